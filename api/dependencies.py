@@ -3,13 +3,23 @@
 
 from fastapi import Depends, Request
 from services.db_factory import create_db_service
-from services.sftp_service import SFTPService
+import logging
+from services.sftp_service import SFTPService, DEFAULT_LIST_CONCURRENCY
+from services.async_sftp_service import create_async_sftp_service, sftp_backend
+from services.sftp_pool import create_sftp_pool
+from services.sftp_transfer import create_transfer_engine
 from services.tmdb_service import TMDBService
+from services.hashing_service import HashingService, create_hashing_service, set_default_hashing_service
+from services.job_manager import JobManager, create_job_manager
+from services.show_resolver import ShowResolver
 from api.services.show_service import ShowService
 from api.services.file_service import FileService
 from api.services.remote_service import RemoteService
 from api.services.admin_service import AdminService
 from services.llm_factory import create_llm_service
+from utils.sync2nas_config import get_config_value
+
+logger = logging.getLogger(__name__)
 
 
 def get_services(config):
@@ -22,22 +32,38 @@ def get_services(config):
         config["SFTP"]["host"], 
         int(config["SFTP"]["port"]), 
         config["SFTP"]["username"], 
-        config["SFTP"]["ssh_key_path"]
+        config["SFTP"]["ssh_key_path"],
+        pool=create_sftp_pool(config),
+        transfer_engine=create_transfer_engine(config),
+        list_concurrency=get_config_value(config, "sftp", "list_concurrency", fallback=DEFAULT_LIST_CONCURRENCY, value_type=int)
     )
+    # Optional asyncio backend for remote endpoints ([sftp] backend = asyncssh)
+    async_sftp = None
+    if sftp_backend(config) == "asyncssh":
+        try:
+            async_sftp = create_async_sftp_service(config)
+        except ImportError as e:
+            logger.error(f"{e}; remote endpoints will use the paramiko backend")
     tmdb = TMDBService(config["TMDB"]["api_key"])
     
     anime_tv_path = config["Routing"]["anime_tv_path"]
     incoming_path = config["Transfers"]["incoming"]
     llm_service = create_llm_service(config)
+    hashing = create_hashing_service(config)
+    set_default_hashing_service(hashing)
     
     return {
         "db": db,
+        "show_resolver": ShowResolver(db),
         "sftp": sftp,
+        "async_sftp": async_sftp,
         "tmdb": tmdb,
         "anime_tv_path": anime_tv_path,
         "incoming_path": incoming_path,
         "config": config,
-        "llm_service": llm_service
+        "llm_service": llm_service,
+        "hashing": hashing,
+        "jobs": create_job_manager(config)
     }
 
 
@@ -50,7 +76,8 @@ def get_show_service(request: Request) -> ShowService:
     return ShowService(
         services["db"],
         services["tmdb"],
-        services["anime_tv_path"]
+        services["anime_tv_path"],
+        resolver=services.get("show_resolver"),
     )
 
 
@@ -64,7 +91,8 @@ def get_file_service(request: Request) -> FileService:
         services["db"],
         services["tmdb"],
         services["anime_tv_path"],
-        services["incoming_path"]
+        services["incoming_path"],
+        resolver=services.get("show_resolver"),
     )
 
 
@@ -77,7 +105,8 @@ def get_remote_service(request: Request) -> RemoteService:
     return RemoteService(
         services["sftp"],
         services["db"],
-        services["config"]
+        services["config"],
+        async_sftp=services.get("async_sftp"),
     )
 
 
@@ -107,4 +136,16 @@ def get_llm_service(request: Request):
 def get_db_service(request: Request):
     """Dependency for direct DB service access in endpoints."""
     services = request.app.state.services
-    return services["db"]
\ No newline at end of file
+    return services["db"]
+
+
+def get_hashing_service(request: Request) -> HashingService:
+    """Dependency for the shared hashing service (defaults apply when none is configured)."""
+    services = request.app.state.services
+    return services.get("hashing") or HashingService()
+
+
+def get_job_manager(request: Request) -> JobManager:
+    """Dependency for the background job manager shared by long-running endpoints."""
+    services = request.app.state.services
+    return services["jobs"]
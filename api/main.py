@@ -2,15 +2,18 @@
 # Sets up the API, middleware, service initialization, and health check endpoint
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 import os
 
 from api.dependencies import get_services
-from api.routes import shows, files, remote, admin
+from api.routes import shows, files, remote, admin, jobs
 from utils.sync2nas_config import load_configuration
 from utils.logging_config import setup_logging
+from utils.metrics import CONTENT_TYPE, render_metrics
+from services.db_implementations.db_interface import DatabaseInterface
 
 
 @asynccontextmanager
@@ -30,6 +33,8 @@ async def lifespan(app: FastAPI):
     
     # --- Shutdown logic ---
     logging.info("Shutting down Sync2NAS API server")
+    await app.state.services["jobs"].shutdown()
+    app.state.services["db"].close()
 
 
 # Create FastAPI app instance with metadata and lifespan handler
@@ -54,6 +59,7 @@ app.include_router(shows.router, prefix="/api/shows", tags=["shows"])
 app.include_router(files.router, prefix="/api/files", tags=["files"])
 app.include_router(remote.router, prefix="/api/remote", tags=["remote"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(jobs.router, prefix=jobs.JOBS_PATH, tags=["jobs"])
 
 
 @app.get("/")
@@ -62,12 +68,23 @@ async def root():
     return {"message": "Sync2NAS API", "version": "1.0.0"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Transfer metrics in the Prometheus text format, for scraping.
+    Covers stage durations and failures (list, download, hash, parse, upsert), bytes, per-file
+    throughput, queue depth and wait, active transfers and SFTP sessions, and retries.
+    """
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check(request: Request):
     """
     Health check endpoint.
     Verifies connectivity to database, SFTP, and TMDB services.
-    Returns a status summary for each service and overall health.
+    Returns a status summary for each service and overall health, plus connection pool
+    utilization (database_pool) for database backends that pool connections.
     """
     services = request.app.state.services
     status = {"api": "ok"}
@@ -79,6 +96,9 @@ async def health_check(request: Request):
         if hasattr(db, "get_all_shows"):
             db.get_all_shows()
         status["database"] = "ok"
+        pool_stats = db.pool_stats() if isinstance(db, DatabaseInterface) else None
+        if pool_stats:
+            status["database_pool"] = pool_stats
     except Exception as e:
         status["database"] = f"error: {e}"
         healthy = False
@@ -86,7 +106,7 @@ async def health_check(request: Request):
     # 2. SFTP server connectivity check
     try:
         sftp = services["sftp"]
-        with sftp as s:
+        with sftp.session() as s:
             s.list_remote_dir("/")
         status["sftp"] = "ok"
     except Exception as e:
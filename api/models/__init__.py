@@ -10,6 +10,7 @@ from .requests import (
 
 from .responses import (
     ShowResponse,
+    ShowMatchResponse,
     EpisodeResponse,
     AddShowResponse,
     UpdateEpisodesResponse,
@@ -21,6 +22,10 @@ from .responses import (
     DownloadResponse,
     ConnectionStatusResponse,
     BootstrapResponse,
+    JobSubmittedResponse,
+    JobProgressResponse,
+    JobResponse,
+    ListJobsResponse,
     ErrorResponse,
     HealthResponse,
     DeleteShowResponse
@@ -49,6 +54,10 @@ __all__ = [
     "DownloadResponse",
     "ConnectionStatusResponse",
     "BootstrapResponse",
+    "JobSubmittedResponse",
+    "JobProgressResponse",
+    "JobResponse",
+    "ListJobsResponse",
     "ErrorResponse",
     "HealthResponse",
     "DeleteShowResponse"
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Literal, Optional
 from models.downloaded_file import FileStatus
 
 
@@ -68,12 +68,14 @@ class DownloadFromRemoteRequest(BaseModel):
 
     Fields:
         dry_run (bool): Simulate without downloading.
+        full_scan (bool): List every remote path even if unchanged since the last run.
     """
     dry_run: bool = Field(False, description="Simulate without downloading")
+    full_scan: bool = Field(False, description="List every remote path even if unchanged since the last run")
 
     model_config = ConfigDict(
         extra="forbid",
-        json_schema_extra={"example": {"dry_run": True}},
+        json_schema_extra={"example": {"dry_run": True, "full_scan": False}},
     )
 
 
@@ -135,6 +137,29 @@ class BootstrapEpisodesRequest(BaseModel):
     )
 
 
+class VerifyLibraryRequest(BaseModel):
+    """
+    Request model for a library integrity verification sweep.
+
+    Fields:
+        source (str): "downloaded", "inventory" or "all".
+        refresh (bool): Re-read every file instead of trusting the hash cache.
+        resume (bool): Continue from the last checkpoint.
+        limit (Optional[int]): Stop after this many files.
+        dry_run (bool): Report results without writing to the DB.
+    """
+    source: Literal["downloaded", "inventory", "all"] = Field("downloaded", description="Which table to verify")
+    refresh: bool = Field(False, description="Re-read every file instead of trusting the hash cache")
+    resume: bool = Field(True, description="Continue from the last checkpoint")
+    limit: Optional[int] = Field(None, ge=1, description="Stop after this many files")
+    dry_run: bool = Field(False, description="Report results without writing to DB")
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={"example": {"source": "downloaded", "refresh": False, "resume": True, "limit": 1000}},
+    )
+
+
 class LLMParseFilenameRequest(BaseModel):
     """
     Request model for parsing a filename using LLM.
@@ -166,4 +191,11 @@ class UpdateDownloadedFileStatusRequest(BaseModel):
     )
     error_message: Optional[str] = Field(None, description="Optional error message")
 
-    model_config = ConfigDict(extra="forbid")
\ No newline at end of file
+    model_config = ConfigDict(extra="forbid")
+
+
+class RehashDownloadedFilesRequest(BaseModel):
+    """Request model to recompute stored hashes for several downloaded files at once."""
+    ids: List[int] = Field(..., min_length=1, description="IDs of downloaded files to rehash")
+
+    model_config = ConfigDict(extra="forbid")
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 
@@ -26,6 +27,18 @@ class ShowResponse(BaseModel):
     }
 
 
+class ShowMatchResponse(ShowResponse):
+    """
+    Response model for a ranked fuzzy show match.
+
+    Fields:
+        score (float): Trigram similarity of the best-matching name (1.0 = identical).
+        matched_name (str): Normalized show name or alias that scored best.
+    """
+    score: float
+    matched_name: str
+
+
 class EpisodeResponse(BaseModel):
     """
     Response model for an episode of a TV show.
@@ -241,6 +254,94 @@ class BootstrapResponse(BaseModel):
     message: str
 
 
+class JobSubmittedResponse(BaseModel):
+    """
+    Response model for a long-running operation accepted as a background job.
+
+    Fields:
+        success (bool): Whether the job was queued.
+        job_id (str): ID to poll at status_url.
+        kind (str): Operation the job runs (download_from_remote, route_files, bootstrap_shows, bootstrap_episodes).
+        status (str): Job status when submitted (queued).
+        status_url (str): URL reporting the job's progress (JSON, or SSE with Accept: text/event-stream).
+        message (str): Human-readable message.
+    """
+    success: bool
+    job_id: str
+    kind: str
+    status: str
+    status_url: str
+    message: str
+
+
+class JobProgressResponse(BaseModel):
+    """
+    Response model for the progress of a background job.
+
+    Fields:
+        stage (Optional[str]): What the job is doing now.
+        files_total (int): Items planned so far (files, shows or folders).
+        files_done (int): Items finished successfully.
+        files_failed (int): Items that failed.
+        bytes_total (int): Bytes planned so far (downloads only).
+        bytes_done (int): Bytes transferred by finished items.
+        elapsed (float): Seconds since the job started.
+        rate (float): Throughput in rate_unit.
+        rate_unit (str): "bytes/s" when the job tracks bytes, otherwise "files/s".
+        eta (Optional[float]): Estimated seconds until the planned work is done.
+    """
+    stage: Optional[str] = None
+    files_total: int
+    files_done: int
+    files_failed: int
+    bytes_total: int
+    bytes_done: int
+    elapsed: float
+    rate: float
+    rate_unit: str
+    eta: Optional[float] = None
+
+
+class JobResponse(BaseModel):
+    """
+    Response model for a background job.
+
+    Fields:
+        id (str): Job ID.
+        kind (str): Operation the job runs.
+        status (str): queued, running, succeeded or failed.
+        params (Dict[str, Any]): Request parameters the job was submitted with.
+        created_at (datetime): When the job was submitted.
+        started_at (Optional[datetime]): When it started running.
+        finished_at (Optional[datetime]): When it finished.
+        progress (JobProgressResponse): Progress counters, rate and ETA.
+        result (Optional[Dict[str, Any]]): The operation's response once it succeeded.
+        error (Optional[str]): Error message if it failed.
+    """
+    id: str
+    kind: str
+    status: str
+    params: Dict[str, Any] = {}
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: JobProgressResponse
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class ListJobsResponse(BaseModel):
+    """
+    Response model for listing background jobs.
+
+    Fields:
+        jobs (List[JobResponse]): Jobs, newest first.
+        count (int): Number of jobs.
+    """
+    jobs: List[JobResponse]
+    count: int
+
+
 class ErrorResponse(BaseModel):
     """
     Response model for API errors.
@@ -1,41 +1,55 @@
-# API routes for admin operations (bootstrap, backup, init-db)
+# API routes for admin operations (bootstrap, backup, init-db, verify-library)
 # Handles HTTP endpoints for administrative tasks in Sync2NAS
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from api.models.requests import BootstrapShowsRequest, BootstrapEpisodesRequest
-from api.models.responses import BootstrapResponse
+from api.models.requests import BootstrapShowsRequest, BootstrapEpisodesRequest, VerifyLibraryRequest
+from api.models.responses import JobSubmittedResponse
 from api.services.admin_service import AdminService
-from api.dependencies import get_admin_service
+from api.dependencies import get_admin_service, get_job_manager
+from api.routes.jobs import submitted
+from services.job_manager import JobManager
 
 router = APIRouter()
 
 
-@router.post("/bootstrap/shows", response_model=BootstrapResponse)
+@router.post("/bootstrap/shows", response_model=JobSubmittedResponse, status_code=202)
 async def bootstrap_tv_shows(request: BootstrapShowsRequest,
-                            admin_service: AdminService = Depends(get_admin_service)):
+                            admin_service: AdminService = Depends(get_admin_service),
+                            jobs: JobManager = Depends(get_job_manager)):
     """
     Bootstrap TV shows from the anime_tv_path directory.
     Adds shows to the database based on folders found in the directory.
+    Runs as a background job; poll /api/jobs/{job_id} for progress and the result.
     """
     try:
-        result = await admin_service.bootstrap_tv_shows(dry_run=request.dry_run)
-        return result
+        job = jobs.submit(
+            "bootstrap_shows",
+            lambda progress: admin_service.bootstrap_tv_shows(dry_run=request.dry_run, progress=progress),
+            params=request.model_dump(),
+        )
+        return submitted(job, "Show bootstrap queued")
     except Exception as e:
         # Return 500 for errors
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/bootstrap/episodes", response_model=BootstrapResponse)
+@router.post("/bootstrap/episodes", response_model=JobSubmittedResponse, status_code=202)
 async def bootstrap_episodes(request: BootstrapEpisodesRequest,
-                            admin_service: AdminService = Depends(get_admin_service)):
+                            admin_service: AdminService = Depends(get_admin_service),
+                            jobs: JobManager = Depends(get_job_manager)):
     """
     Bootstrap episodes for all shows in the database.
     Fetches episode data from TMDB and populates the database.
+    Runs as a background job; poll /api/jobs/{job_id} for progress and the result.
     """
     try:
-        result = await admin_service.bootstrap_episodes(dry_run=request.dry_run)
-        return result
+        job = jobs.submit(
+            "bootstrap_episodes",
+            lambda progress: admin_service.bootstrap_episodes(dry_run=request.dry_run, progress=progress),
+            params=request.model_dump(),
+        )
+        return submitted(job, "Episode bootstrap queued")
     except Exception as e:
         # Return 500 for errors
         raise HTTPException(status_code=500, detail=str(e))
@@ -64,4 +78,36 @@ async def init_database(admin_service: AdminService = Depends(get_admin_service)
         return result
     except Exception as e:
         # Return 500 for errors
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/verify-library", response_model=JobSubmittedResponse, status_code=202)
+async def verify_library(request: VerifyLibraryRequest,
+                         admin_service: AdminService = Depends(get_admin_service),
+                         jobs: JobManager = Depends(get_job_manager)):
+    """
+    Verify library files against their filename CRC32 tags or stored hashes.
+    Mismatched downloaded files are marked with status 'error'; progress is checkpointed.
+    Runs as a background job; poll /api/jobs/{job_id} for progress and the result.
+    Only one sweep runs at a time, since runs share the checkpoint file (409 otherwise).
+    """
+    active = [job for job in jobs.list_jobs() if job.kind == "verify_library" and not job.finished]
+    if active:
+        raise HTTPException(status_code=409, detail=f"Library verification already in progress (job {active[0].id})")
+    try:
+        job = jobs.submit(
+            "verify_library",
+            lambda progress: admin_service.verify_library(
+                source=request.source,
+                refresh=request.refresh,
+                resume=request.resume,
+                limit=request.limit,
+                dry_run=request.dry_run,
+                progress=progress,
+            ),
+            params=request.model_dump(),
+        )
+        return submitted(job, "Library verification queued")
+    except Exception as e:
+        # Return 500 for errors
+        raise HTTPException(status_code=500, detail=str(e))
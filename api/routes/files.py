@@ -3,13 +3,17 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 
-from api.models.requests import RouteFilesRequest, LLMParseFilenameRequest, UpdateDownloadedFileStatusRequest
-from api.models.responses import RouteFilesResponse, ListIncomingResponse, LLMParseFilenameResponse, ListDownloadedFilesResponse, DownloadedFileDTO
+from api.models.requests import RouteFilesRequest, LLMParseFilenameRequest, UpdateDownloadedFileStatusRequest, RehashDownloadedFilesRequest
+from api.models.responses import JobSubmittedResponse, ListIncomingResponse, LLMParseFilenameResponse, ListDownloadedFilesResponse, DownloadedFileDTO
 from api.dependencies import get_db_service
 from api.services.file_service import FileService
 from api.dependencies import get_file_service
 from services.llm_implementations.llm_interface import LLMInterface as LLMService
 from api.dependencies import get_llm_service
+from api.dependencies import get_hashing_service
+from api.dependencies import get_job_manager
+from api.routes.jobs import submitted
+from services.job_manager import JobManager
 from fastapi import Query
 from models.downloaded_file import FileStatus
 import os
@@ -19,21 +23,28 @@ from services.hashing_service import HashingService
 router = APIRouter()
 
 
-@router.post("/route", response_model=RouteFilesResponse)
+@router.post("/route", response_model=JobSubmittedResponse, status_code=202)
 async def route_files(request: Request,
                      body: RouteFilesRequest,
-                     file_service: FileService = Depends(get_file_service)):
+                     file_service: FileService = Depends(get_file_service),
+                     jobs: JobManager = Depends(get_job_manager)):
     """
     Route files from incoming directory to show directories.
     Optionally supports dry-run and auto-add of missing shows.
+    Runs as a background job; poll /api/jobs/{job_id} for progress and the routed files.
     """
     try:
-        result = await file_service.route_files(
-            dry_run=body.dry_run,
-            auto_add=body.auto_add,
-            request=request
+        job = jobs.submit(
+            "route_files",
+            lambda progress: file_service.route_files(
+                dry_run=body.dry_run,
+                auto_add=body.auto_add,
+                request=request,
+                progress=progress
+            ),
+            params=body.model_dump(),
         )
-        return result
+        return submitted(job, "File routing queued")
     except Exception as e:
         # Return 500 error if routing fails
         raise HTTPException(status_code=500, detail=str(e))
@@ -201,19 +212,63 @@ async def parse_filename_llm(
         raise HTTPException(status_code=500, detail=str(e)) 
 
 
+@router.post("/downloaded/rehash")
+def rehash_downloaded_files(body: RehashDownloadedFilesRequest,
+                            refresh: bool = Query(False, description="Re-read files even if the hash cache has them"),
+                            db = Depends(get_db_service),
+                            hasher: HashingService = Depends(get_hashing_service)):
+    """
+    Recompute CRC32 hashes for several downloaded files concurrently.
+    Files that are missing, directories or unreadable are reported per id instead of failing the batch.
+    """
+    results = {}
+    paths = {}
+    for file_id in dict.fromkeys(body.ids):
+        item = db.get_downloaded_file_by_id(file_id)
+        if not item:
+            results[file_id] = {"id": file_id, "success": False, "error": "Downloaded file not found"}
+        elif item.is_dir:
+            results[file_id] = {"id": file_id, "success": False, "error": "Cannot hash a directory"}
+        else:
+            file_path = item.current_path or item.remote_path
+            if not file_path or not os.path.exists(file_path):
+                results[file_id] = {"id": file_id, "success": False, "error": "File not found on disk for hashing"}
+            else:
+                paths[file_id] = file_path
+
+    hashes = hasher.hash_files(paths.values(), ("crc32",), refresh=refresh)
+    now = datetime.datetime.now()
+    for file_id, file_path in paths.items():
+        digest = hashes.get(file_path)
+        if not digest:
+            results[file_id] = {"id": file_id, "success": False, "error": "Unable to compute CRC32"}
+            continue
+        db.set_downloaded_file_hash(file_id, "CRC32", digest["crc32"], now)
+        results[file_id] = {"id": file_id, "success": True, "file_hash_value": digest["crc32"], "file_hash_algo": "CRC32"}
+
+    ordered = [results[file_id] for file_id in dict.fromkeys(body.ids)]
+    return {
+        "success": all(r["success"] for r in ordered),
+        "count": sum(1 for r in ordered if r["success"]),
+        "results": ordered,
+    }
+
+
 @router.post("/downloaded/{file_id}/rehash")
-def rehash_downloaded_file(file_id: int, db = Depends(get_db_service)):
+def rehash_downloaded_file(file_id: int,
+                           refresh: bool = Query(False, description="Re-read the file even if the hash cache has it"),
+                           db = Depends(get_db_service),
+                           hasher: HashingService = Depends(get_hashing_service)):
     item = db.get_downloaded_file_by_id(file_id)
     if not item:
         raise HTTPException(status_code=404, detail="Downloaded file not found")
     if item.is_dir:
         raise HTTPException(status_code=422, detail="Cannot hash a directory")
-    hasher = HashingService()
     file_path = item.current_path or item.remote_path
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found on disk for hashing")
     try:
-        crc = hasher.calculate_crc32(file_path)
+        crc = hasher.hash_file(file_path, ("crc32",), refresh=refresh)["crc32"]
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Hashing failed: {e}")
     if not crc:
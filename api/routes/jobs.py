@@ -0,0 +1,65 @@
+# API routes for background jobs (status polling and progress streams)
+# Long-running operations (downloads, routing, bootstraps) return a job ID; these endpoints report on it
+
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from api.dependencies import get_job_manager
+from api.models.responses import JobResponse, ListJobsResponse
+from services.job_manager import Job, JobManager, JobStatus
+
+router = APIRouter()
+
+# Prefix the jobs router is mounted under (see api/main.py)
+JOBS_PATH = "/api/jobs"
+
+
+def submitted(job: Job, message: str) -> Dict[str, Any]:
+    """Body of the 202 response returned by endpoints that queue a job."""
+    return {
+        "success": True,
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status.value,
+        "status_url": f"{JOBS_PATH}/{job.id}",
+        "message": message,
+    }
+
+
+async def _event_stream(jobs: JobManager, job_id: str) -> AsyncIterator[str]:
+    async for snapshot in jobs.events(job_id):
+        event = "end" if snapshot["status"] in (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value) else "progress"
+        yield f"event: {event}\ndata: {json.dumps(snapshot, default=str)}\n\n"
+
+
+@router.get("", response_model=ListJobsResponse)
+async def list_jobs(status: Optional[JobStatus] = Query(None, description="Filter by status (queued, running, succeeded, failed)"),
+                    jobs: JobManager = Depends(get_job_manager)):
+    """
+    List background jobs, newest first.
+    """
+    found = [job.to_dict() for job in jobs.list_jobs(status)]
+    return {"jobs": found, "count": len(found)}
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, request: Request, jobs: JobManager = Depends(get_job_manager)):
+    """
+    Get a job's status and progress (files done, bytes, rate, ETA) and, once finished, its result.
+    With Accept: text/event-stream, stream the same snapshots as server-sent events until the job
+    finishes: "progress" events while it runs, then one "end" event.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _event_stream(jobs, job_id),
+            media_type="text/event-stream",
+            # Keep proxies from buffering the stream
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return job.to_dict()
@@ -4,23 +4,37 @@
 from fastapi import APIRouter, Depends, HTTPException
 
 from api.models.requests import DownloadFromRemoteRequest, ListRemoteRequest
-from api.models.responses import DownloadResponse, ListRemoteResponse, ConnectionStatusResponse
+from api.models.responses import JobSubmittedResponse, ListRemoteResponse, ConnectionStatusResponse
 from api.services.remote_service import RemoteService
-from api.dependencies import get_remote_service
+from api.dependencies import get_remote_service, get_job_manager
+from api.routes.jobs import submitted
+from services.job_manager import JobManager
+from utils.sync2nas_config import parse_sftp_paths
 
 router = APIRouter()
 
 
-@router.post("/download", response_model=DownloadResponse)
+@router.post("/download", response_model=JobSubmittedResponse, status_code=202)
 async def download_from_remote(request: DownloadFromRemoteRequest,
-                              remote_service: RemoteService = Depends(get_remote_service)):
+                              remote_service: RemoteService = Depends(get_remote_service),
+                              jobs: JobManager = Depends(get_job_manager)):
     """
     Download files from remote SFTP server to the incoming directory.
     Supports dry-run mode for simulation.
+    Runs as a background job: returns its ID at once; poll /api/jobs/{job_id} for progress and
+    the result (files_downloaded).
     """
     try:
-        result = await remote_service.download_from_remote(dry_run=request.dry_run)
-        return result
+        if not parse_sftp_paths(remote_service.config):
+            raise ValueError("No SFTP paths defined in config [SFTP] section")
+        job = jobs.submit(
+            "download_from_remote",
+            lambda progress: remote_service.download_from_remote(
+                dry_run=request.dry_run, full_scan=request.full_scan, progress=progress
+            ),
+            params=request.model_dump(),
+        )
+        return submitted(job, "Download queued" if not request.dry_run else "Dry run queued")
     except ValueError as e:
         # Return 400 for validation errors
         raise HTTPException(status_code=400, detail=str(e))
@@ -7,6 +7,7 @@ to the ShowService.
 
 Endpoints:
     - GET /: Retrieve all shows
+    - GET /search: Rank shows by fuzzy name/alias similarity
     - GET /{show_id}: Retrieve specific show
     - POST /: Add new show
     - POST /{show_id}/episodes/refresh: Update episodes for show
@@ -14,12 +15,12 @@ Endpoints:
 """
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
 
 from api.models.requests import AddShowRequest, UpdateEpisodesRequest
 from api.models.responses import (
-    ShowResponse, AddShowResponse, UpdateEpisodesResponse, DeleteShowResponse
+    ShowResponse, ShowMatchResponse, AddShowResponse, UpdateEpisodesResponse, DeleteShowResponse
 )
 from api.services.show_service import ShowService
 from api.dependencies import get_show_service
@@ -50,6 +51,31 @@ async def get_shows(show_service: ShowService = Depends(get_show_service)):
         raise HTTPException(status_code=500, detail=f"Failed to retrieve shows: {str(e)}")
 
 
+@router.get("/search", response_model=List[ShowMatchResponse])
+async def search_shows(q: str = Query(..., min_length=1, description="Show name to look for"),
+                       limit: int = Query(10, ge=1, le=100),
+                       min_score: float = Query(0.0, ge=0.0, le=1.0),
+                       show_service: ShowService = Depends(get_show_service)):
+    """
+    Rank TV shows by similarity of their names and aliases to a query.
+    Args:
+        q: Show name to look for; typos and word order are tolerated
+        limit: Maximum number of matches
+        min_score: Minimum similarity score
+    Returns:
+        List[ShowMatchResponse]: Matching shows with scores, best first
+    Raises:
+        HTTPException: If the search fails
+    """
+    logger.info(f"GET /api/shows/search endpoint accessed with q={q}")
+    
+    try:
+        return await show_service.search_shows(q, limit=limit, min_score=min_score)
+    except Exception as e:
+        logger.exception(f"Failed to search shows: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to search shows: {str(e)}")
+
+
 @router.get("/{show_id}", response_model=ShowResponse)
 async def get_show(show_id: int, show_service: ShowService = Depends(get_show_service)):
     """
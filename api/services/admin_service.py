@@ -1,15 +1,38 @@
+import asyncio
 import logging
 import os
 import time
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 from services.db_implementations.db_interface import DatabaseInterface
+from services.job_manager import JobProgress
 from services.tmdb_service import TMDBService
 from models.show import Show
 from models.episode import Episode
+from services.hashing_service import get_default_hashing_service
+from services.library_verifier import SOURCES, VerificationReport, create_library_verifier
 
 logger = logging.getLogger(__name__)
 
 
+def _report_verification_progress(progress: JobProgress) -> Callable[[VerificationReport], None]:
+    """Return a LibraryVerifier progress_callback that mirrors the report's counters into ``progress``."""
+    seen = {"planned": False, "done": 0, "failed": 0, "bytes": 0}
+
+    def callback(report: VerificationReport) -> None:
+        if not seen["planned"]:
+            seen["planned"] = True
+            progress.plan(report.total_files, report.total_bytes)
+        failed = report.mismatched + report.missing + report.errors
+        done = report.checked - failed
+        if failed > seen["failed"]:
+            progress.advance(files=failed - seen["failed"], failed=True)
+        if done > seen["done"] or report.bytes_checked > seen["bytes"]:
+            progress.advance(files=done - seen["done"], nbytes=report.bytes_checked - seen["bytes"])
+        seen.update(done=done, failed=failed, bytes=report.bytes_checked)
+
+    return callback
+
+
 class AdminService:
     """
     Service class for administrative operations in Sync2NAS.
@@ -29,112 +52,133 @@ class AdminService:
         self.anime_tv_path = anime_tv_path
         self.config = config
 
-    async def bootstrap_tv_shows(self, dry_run: bool = False) -> Dict[str, Any]:
-        """Bootstrap TV shows from anime_tv_path directory"""
+    async def bootstrap_tv_shows(self, dry_run: bool = False,
+                                 progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+        """Bootstrap TV shows from anime_tv_path directory, reporting each folder to ``progress`` if given"""
         try:
-            added, skipped, failed = [], [], []
-            start_time = time.time()
+            # TMDB lookups and database writes block; keep them off the event loop
+            return await asyncio.to_thread(self._bootstrap_tv_shows, dry_run, progress or JobProgress())
+        except Exception as e:
+            logger.error(f"Failed to bootstrap TV shows: {e}")
+            raise
 
-            for folder_name in sorted(os.listdir(self.anime_tv_path)):
-                sys_name = folder_name.strip()
-                sys_path = os.path.join(self.anime_tv_path, sys_name)
-                
-                if not os.path.isdir(sys_path):
+    def _bootstrap_tv_shows(self, dry_run: bool, progress: JobProgress) -> Dict[str, Any]:
+        added, skipped, failed = [], [], []
+        start_time = time.time()
+
+        folders = sorted(os.listdir(self.anime_tv_path))
+        progress.plan(len(folders))
+        for folder_name in folders:
+            sys_name = folder_name.strip()
+            sys_path = os.path.join(self.anime_tv_path, sys_name)
+            progress.set_stage(f"Bootstrapping show {sys_name}")
+
+            if not os.path.isdir(sys_path):
+                progress.advance()
+                continue
+
+            failures = len(failed)
+            try:
+                if self.db.show_exists(sys_name):
+                    logger.info(f"Skipping: {sys_name}")
+                    skipped.append(sys_name)
                     continue
 
-                try:
-                    if self.db.show_exists(sys_name):
-                        logger.info(f"Skipping: {sys_name}")
-                        skipped.append(sys_name)
-                        continue
-
-                    results = self.tmdb.search_show(sys_name)
-                    if not results or not results.get("results"):
-                        logger.warning(f"No TMDB results for: {sys_name}")
-                        failed.append(sys_name)
-                        continue
-
-                    details = self.tmdb.get_show_details(results["results"][0]["id"])
-                    if not details or "info" not in details:
-                        failed.append(sys_name)
-                        continue
-
-                    show = Show.from_tmdb(details, sys_name=sys_name, sys_path=sys_path)
-                    if dry_run:
-                        logger.info(f"[DRY RUN] Would add show: {sys_name}")
-                    else:
-                        self.db.add_show(show)
-                        logger.info(f"Added: {show.tmdb_name}")
-                    added.append(sys_name)
-
-                except Exception as e:
-                    logger.exception(f"Unexpected error: {e}")
+                results = self.tmdb.search_show(sys_name)
+                if not results or not results.get("results"):
+                    logger.warning(f"No TMDB results for: {sys_name}")
                     failed.append(sys_name)
+                    continue
 
-            duration = time.time() - start_time
+                details = self.tmdb.get_show_details(results["results"][0]["id"])
+                if not details or "info" not in details:
+                    failed.append(sys_name)
+                    continue
 
-            return {
-                "success": True,
-                "added": len(added),
-                "skipped": len(skipped),
-                "failed": len(failed),
-                "duration": duration,
-                "message": f"Bootstrap completed: {len(added)} added, {len(skipped)} skipped, {len(failed)} failed"
-            }
+                show = Show.from_tmdb(details, sys_name=sys_name, sys_path=sys_path)
+                if dry_run:
+                    logger.info(f"[DRY RUN] Would add show: {sys_name}")
+                else:
+                    self.db.add_show(show)
+                    logger.info(f"Added: {show.tmdb_name}")
+                added.append(sys_name)
+
+            except Exception as e:
+                logger.exception(f"Unexpected error: {e}")
+                failed.append(sys_name)
+            finally:
+                progress.advance(failed=len(failed) > failures)
+
+        duration = time.time() - start_time
+
+        return {
+            "success": True,
+            "added": len(added),
+            "skipped": len(skipped),
+            "failed": len(failed),
+            "duration": duration,
+            "message": f"Bootstrap completed: {len(added)} added, {len(skipped)} skipped, {len(failed)} failed"
+        }
+
+    async def bootstrap_episodes(self, dry_run: bool = False,
+                                 progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+        """Bootstrap episodes for all shows, reporting each show to ``progress`` if given"""
+        try:
+            return await asyncio.to_thread(self._bootstrap_episodes, dry_run, progress or JobProgress())
         except Exception as e:
-            logger.error(f"Failed to bootstrap TV shows: {e}")
+            logger.error(f"Failed to bootstrap episodes: {e}")
             raise
 
-    async def bootstrap_episodes(self, dry_run: bool = False) -> Dict[str, Any]:
-        """Bootstrap episodes for all shows"""
-        try:
-            shows = self.db.get_all_shows()
-            added, skipped, failed = 0, 0, 0
-            start_time = time.time()
-
-            for show_record in shows:
-                try:
-                    show = Show.from_db_record(show_record)
-                    
-                    # Check if episodes already exist
-                    existing_episodes = self.db.get_episodes_by_tmdb_id(show.tmdb_id)
-                    if existing_episodes:
-                        logger.info(f"Skipping {show.sys_name} - already has episodes")
-                        skipped += 1
-                        continue
-
-                    # Fetch episodes from TMDB
-                    episodes = self.tmdb.get_show_episodes(show.tmdb_id)
-                    if not episodes:
-                        logger.warning(f"No episodes found for {show.sys_name}")
-                        failed += 1
-                        continue
-
-                    if not dry_run:
-                        for episode_data in episodes:
-                            episode = Episode.parse_from_tmdb(episode_data, show.id)
-                            self.db.add_episode(episode)
-                    
-                    added += 1
-                    logger.info(f"{'[DRY RUN] Would add' if dry_run else 'Added'} episodes for {show.sys_name}")
-
-                except Exception as e:
-                    logger.exception(f"Failed to bootstrap episodes for {show_record['sys_name']}")
-                    failed += 1
+    def _bootstrap_episodes(self, dry_run: bool, progress: JobProgress) -> Dict[str, Any]:
+        shows = self.db.get_all_shows()
+        added, skipped, failed = 0, 0, 0
+        start_time = time.time()
+
+        progress.plan(len(shows))
+        for show_record in shows:
+            progress.set_stage(f"Bootstrapping episodes for {show_record['sys_name']}")
+            failures = failed
+            try:
+                show = Show.from_db_record(show_record)
+                
+                # Check if episodes already exist
+                existing_episodes = self.db.get_episodes_by_tmdb_id(show.tmdb_id)
+                if existing_episodes:
+                    logger.info(f"Skipping {show.sys_name} - already has episodes")
+                    skipped += 1
+                    continue
 
-            duration = time.time() - start_time
+                # Fetch episodes from TMDB
+                episodes = self.tmdb.get_show_episodes(show.tmdb_id)
+                if not episodes:
+                    logger.warning(f"No episodes found for {show.sys_name}")
+                    failed += 1
+                    continue
 
-            return {
-                "success": True,
-                "added": added,
-                "skipped": skipped,
-                "failed": failed,
-                "duration": duration,
-                "message": f"Episode bootstrap completed: {added} added, {skipped} skipped, {failed} failed"
-            }
-        except Exception as e:
-            logger.error(f"Failed to bootstrap episodes: {e}")
-            raise
+                if not dry_run:
+                    for episode_data in episodes:
+                        episode = Episode.parse_from_tmdb(episode_data, show.id)
+                        self.db.add_episode(episode)
+                
+                added += 1
+                logger.info(f"{'[DRY RUN] Would add' if dry_run else 'Added'} episodes for {show.sys_name}")
+
+            except Exception as e:
+                logger.exception(f"Failed to bootstrap episodes for {show_record['sys_name']}")
+                failed += 1
+            finally:
+                progress.advance(failed=failed > failures)
+
+        duration = time.time() - start_time
+
+        return {
+            "success": True,
+            "added": added,
+            "skipped": skipped,
+            "failed": failed,
+            "duration": duration,
+            "message": f"Episode bootstrap completed: {added} added, {skipped} skipped, {failed} failed"
+        }
 
     async def backup_database(self) -> Dict[str, Any]:
         """Create database backup"""
@@ -161,4 +205,29 @@ class AdminService:
             }
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
-            raise 
\ No newline at end of file
+            raise
+
+    async def verify_library(self, source: str = "downloaded", refresh: bool = False, resume: bool = True,
+                             limit: Optional[int] = None, dry_run: bool = False,
+                             progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+        """Verify library files against their filename CRC32 tags or stored hashes, reporting each file to ``progress`` if given"""
+        try:
+            verifier = create_library_verifier(
+                self.config, self.db, get_default_hashing_service(), dry_run=dry_run, refresh=refresh
+            )
+            sources = list(SOURCES) if source == "all" else [source]
+            kwargs = {"sources": sources, "resume": resume, "limit": limit}
+            if progress is not None:
+                kwargs["progress_callback"] = _report_verification_progress(progress)
+            # Hashing is blocking I/O; keep it off the event loop
+            report = await asyncio.to_thread(verifier.verify, **kwargs)
+            result = report.to_dict()
+            result["success"] = True
+            result["message"] = (
+                f"Library verification {'complete' if report.completed else 'paused'}: "
+                f"{report.verified} verified, {report.mismatched} mismatched, {report.missing} missing"
+            )
+            return result
+        except Exception as e:
+            logger.error(f"Failed to verify library: {e}")
+            raise
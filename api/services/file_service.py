@@ -1,12 +1,16 @@
+import asyncio
 import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from services.db_implementations.db_interface import DatabaseInterface
 from services.tmdb_service import TMDBService
+from services.job_manager import JobProgress
 from utils.file_routing import file_routing
 from utils.filename_parser import parse_filename
 from utils.file_filters import EXCLUDED_FILENAMES
 from utils.show_adder import add_show_interactively
+from services.show_resolver import ShowResolver
+from services.fuzzy_show_index import fuzzy_match_threshold
 from services.llm_implementations.ollama_implementation import OllamaLLMService
 from services.llm_implementations.openai_implementation import OpenAILLMService
 from services.llm_implementations.llm_interface import LLMInterface as LLMService
@@ -16,17 +20,23 @@ logger = logging.getLogger(__name__)
 
 class FileService:
     def __init__(self, db: DatabaseInterface, tmdb: TMDBService, 
-                 anime_tv_path: str, incoming_path: str):
+                 anime_tv_path: str, incoming_path: str,
+                 resolver: Optional[ShowResolver] = None):
         self.db = db
+        # Shared across requests via app.state.services; falls back to per-call DB lookups
+        self.resolver = resolver
         self.tmdb = tmdb
         self.anime_tv_path = anime_tv_path
         self.incoming_path = incoming_path
 
     async def route_files(self, dry_run: bool = False, 
-                         auto_add: bool = False, request=None) -> Dict[str, Any]:
-        """Route files from incoming directory to show directories"""
+                         auto_add: bool = False, request=None,
+                         progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+        """Route files from incoming directory to show directories, reporting to ``progress`` if given"""
         try:
+            progress = progress or JobProgress()
             if auto_add:
+                progress.set_stage("Adding missing shows")
                 await self._auto_add_missing_shows(dry_run)
 
             llm_service = None
@@ -48,15 +58,23 @@ class FileService:
                     if section and config.has_option(section, "llm_confidence_threshold"):
                         llm_confidence_threshold = config.getfloat(section, "llm_confidence_threshold")
 
-            routed = file_routing(
+            progress.set_stage("Routing files")
+            # Parsing, lookups and moves block; keep them off the event loop
+            routed = await asyncio.to_thread(
+                file_routing,
                 self.incoming_path, 
                 self.anime_tv_path, 
                 self.db, 
                 self.tmdb, 
                 dry_run=dry_run,
                 llm_service=llm_service,
-                llm_confidence_threshold=llm_confidence_threshold
+                llm_confidence_threshold=llm_confidence_threshold,
+                resolver=self.resolver,
+                fuzzy_threshold=fuzzy_match_threshold(config),
             )
+            # file_routing reports what it moved only once it is done
+            progress.plan(len(routed or []))
+            progress.advance(len(routed or []))
 
             return {
                 "success": True,
@@ -132,7 +150,7 @@ class FileService:
                         continue
                     seen.add(show_name)
 
-                    if self.db.show_exists(show_name):
+                    if (self.resolver or self.db).show_exists(show_name):
                         continue
 
                     logger.info(f"Auto-adding show: {show_name}")
@@ -146,6 +164,7 @@ class FileService:
                             anime_tv_path=self.anime_tv_path,
                             dry_run=dry_run,
                             override_dir=False,
+                            resolver=self.resolver,
                         )
                         
                         if not dry_run:
@@ -1,9 +1,15 @@
+import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from services.sftp_service import SFTPService
+from services.async_sftp_service import AsyncSFTPService
 from services.db_implementations.db_interface import DatabaseInterface
+from services.job_manager import JobProgress
+from services.transfer_scheduler import create_transfer_scheduler
+from services.transfer_pipeline import create_pipeline_settings
 from utils.sync2nas_config import parse_sftp_paths
 from utils.sftp_orchestrator import download_from_remote as downloader
+from utils.sftp_orchestrator import download_from_remote_async as async_downloader
 
 logger = logging.getLogger(__name__)
 
@@ -13,19 +19,37 @@ class RemoteService:
     Service class for managing remote SFTP operations in Sync2NAS.
 
     Handles downloading files from remote SFTP servers, listing remote files, and checking SFTP connection status.
+    With the asyncssh backend, remote I/O is awaited on the event loop; otherwise the blocking
+    paramiko calls run in a worker thread so other requests are not stalled.
     
     Attributes:
         sftp (SFTPService): SFTP service instance for remote operations.
         db (DatabaseInterface): Database interface for file tracking.
         config (Dict[str, Any]): Configuration dictionary for SFTP and transfer settings.
+        async_sftp (Optional[AsyncSFTPService]): asyncio SFTP service, used instead of ``sftp`` when set.
     """
-    def __init__(self, sftp: SFTPService, db: DatabaseInterface, config: Dict[str, Any]):
+    def __init__(self, sftp: SFTPService, db: DatabaseInterface, config: Dict[str, Any],
+                 async_sftp: Optional[AsyncSFTPService] = None):
         self.sftp = sftp
         self.db = db
         self.config = config
+        self.async_sftp = async_sftp
 
-    async def download_from_remote(self, dry_run: bool = False) -> Dict[str, Any]:
-        """Download files from remote SFTP server"""
+    # These run in worker threads, possibly several at once (API requests and background jobs),
+    # so each call opens its own session instead of connecting the shared SFTPService.
+    def _download_blocking(self, options: Dict[str, Any]) -> int:
+        with self.sftp.session() as s:
+            return downloader(sftp=s, db=self.db, **options)
+
+    def _list_blocking(self, remote_path: str, recursive: bool) -> List[Dict[str, Any]]:
+        with self.sftp.session() as sftp:
+            if recursive:
+                return sftp.list_remote_files_recursive(remote_path)
+            return sftp.list_remote_dir(remote_path)
+
+    async def download_from_remote(self, dry_run: bool = False, full_scan: bool = False,
+                                   progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+        """Download files from remote SFTP server, reporting files and bytes to ``progress`` if given"""
         try:
             remote_paths = parse_sftp_paths(self.config)
             if not remote_paths:
@@ -33,18 +57,24 @@ class RemoteService:
 
             incoming_path = self.config["transfers"]["incoming"]
 
-            with self.sftp as s:
-                downloader(
-                    sftp=s,
-                    db=self.db,
-                    remote_paths=remote_paths,
-                    incoming_path=incoming_path,
-                    dry_run=dry_run
-                )
+            options = dict(
+                remote_paths=remote_paths,
+                incoming_path=incoming_path,
+                dry_run=dry_run,
+                incremental=not full_scan,
+                scheduler=create_transfer_scheduler(self.config),
+                pipeline=create_pipeline_settings(self.config),
+                progress=progress,
+            )
+            if self.async_sftp is not None:
+                async with self.async_sftp as s:
+                    files_downloaded = await async_downloader(sftp=s, db=self.db, **options)
+            else:
+                files_downloaded = await asyncio.to_thread(self._download_blocking, options)
 
             return {
                 "success": True,
-                "files_downloaded": 0,  # TODO: Get actual count from downloader
+                "files_downloaded": files_downloaded or 0,
                 "message": "Download completed successfully" if not dry_run else "Dry run completed"
             }
         except Exception as e:
@@ -58,41 +88,44 @@ class RemoteService:
         try:
             remote_path = path if path else self.config["sftp"]["paths"]
 
-            with self.sftp as sftp:
-                if recursive:
-                    files = sftp.list_remote_files_recursive(remote_path)
-                else:
-                    files = sftp.list_remote_dir(remote_path)
+            if self.async_sftp is not None:
+                async with self.async_sftp as sftp:
+                    if recursive:
+                        files = await sftp.list_remote_files_recursive(remote_path)
+                    else:
+                        files = await sftp.list_remote_dir(remote_path)
+            else:
+                files = await asyncio.to_thread(self._list_blocking, remote_path, recursive)
 
-                if populate_sftp_temp and not dry_run:
-                    # Convert timestamps to strings for database storage
-                    files_for_db = []
-                    for f in files:
-                        file_copy = f.copy()
-                        # Handle modified_time
-                        if hasattr(file_copy['modified_time'], 'isoformat'):
-                            file_copy['modified_time'] = file_copy['modified_time'].isoformat()
-                        # Handle fetched_at
-                        if hasattr(file_copy['fetched_at'], 'isoformat'):
-                            file_copy['fetched_at'] = file_copy['fetched_at'].isoformat()
-                        files_for_db.append(file_copy)
-                    
-                    self.db.insert_sftp_temp_files(files_for_db)
+            if populate_sftp_temp and not dry_run:
+                # Convert timestamps to strings for database storage
+                files_for_db = []
+                for f in files:
+                    file_copy = f.copy()
+                    # Handle modified_time
+                    if hasattr(file_copy['modified_time'], 'isoformat'):
+                        file_copy['modified_time'] = file_copy['modified_time'].isoformat()
+                    # Handle fetched_at
+                    if hasattr(file_copy['fetched_at'], 'isoformat'):
+                        file_copy['fetched_at'] = file_copy['fetched_at'].isoformat()
+                    files_for_db.append(file_copy)
+                
+                self.db.insert_sftp_temp_files(files_for_db)
 
-                return {
-                    "success": True,
-                    "files": [
-                        {
-                            "name": f["name"],
-                            "size": f.get("size"),
-                            "modified_time": f.get("modified_time"),
-                            "fetched_at": f.get("fetched_at")
-                        }
-                        for f in files
-                    ],
-                    "count": len(files),
-                    "path": remote_path
-                }
+            return {
+                "success": True,
+                "files": [
+                    {
+                        "name": f["name"],
+                        "size": f.get("size"),
+                        "modified_time": f.get("modified_time"),
+                        "fetched_at": f.get("fetched_at")
+                    }
+                    for f in files
+                ],
+                "count": len(files),
+                "path": remote_path
+            }
         except Exception as e:
             logger.error(f"Failed to list remote files: {e}")
             raise
@@ -100,15 +133,18 @@ class RemoteService:
     async def get_connection_status(self) -> Dict[str, Any]:
         """Check SFTP connection status"""
         try:
-            with self.sftp as sftp:
-                # Try a simple operation to test connection
-                sftp.list_remote_dir("/")
-                return {
-                    "success": True,
-                    "status": "connected",
-                    "host": self.config["sftp"]["host"],
-                    "port": self.config["sftp"]["port"]
-                }
+            # Try a simple operation to test connection
+            if self.async_sftp is not None:
+                async with self.async_sftp as sftp:
+                    await sftp.list_remote_dir("/")
+            else:
+                await asyncio.to_thread(self._list_blocking, "/", False)
+            return {
+                "success": True,
+                "status": "connected",
+                "host": self.config["sftp"]["host"],
+                "port": self.config["sftp"]["port"]
+            }
         except Exception as e:
             return {
                 "success": False,
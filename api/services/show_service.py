@@ -20,6 +20,8 @@ from utils.show_adder import add_show_interactively
 from models.show import Show
 from models.episode import Episode
 from utils.episode_updater import refresh_episodes_for_show
+from services.fuzzy_show_index import DEFAULT_FUZZY_LIMIT
+from services.show_resolver import ShowResolver
 
 logger = logging.getLogger(__name__)
 
@@ -36,9 +38,11 @@ class ShowService:
         db: Database interface for show and episode operations
         tmdb: TMDB service for external API calls
         anime_tv_path: Base path for TV show directories
+        resolver: Cached show lookups shared across requests
     """
     
-    def __init__(self, db: DatabaseInterface, tmdb: TMDBService, anime_tv_path: str):
+    def __init__(self, db: DatabaseInterface, tmdb: TMDBService, anime_tv_path: str,
+                 resolver: Optional[ShowResolver] = None):
         """
         Initialize the ShowService with required dependencies.
         
@@ -46,10 +50,12 @@ class ShowService:
             db: Database interface for show and episode operations
             tmdb: TMDB service for external API calls
             anime_tv_path: Base path for TV show directories
+            resolver: Cached show lookups; a private one is created if not given
         """
         self.db = db
         self.tmdb = tmdb
         self.anime_tv_path = anime_tv_path
+        self.resolver = resolver or ShowResolver(db)
         logger.debug(f"ShowService initialized with anime_tv_path: {anime_tv_path}")
 
     async def add_show(self, show_name: Optional[str] = None, 
@@ -166,6 +172,35 @@ class ShowService:
             logger.exception(f"Failed to retrieve shows: {e}")
             raise
 
+    async def search_shows(self, query: str, limit: int = DEFAULT_FUZZY_LIMIT,
+                           min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Rank shows by similarity of their names and aliases to ``query``.
+        
+        Args:
+            query: Show name to look for (typos and word order are tolerated)
+            limit: Maximum number of matches
+            min_score: Minimum similarity score (0.0-1.0)
+            
+        Returns:
+            list: Show dictionaries as in get_shows, plus score and matched_name, best first
+        """
+        logger.info(f"Fuzzy searching shows for: {query}")
+        matches = self.resolver.search(query, limit=limit, min_score=min_score)
+        return [
+            {
+                "id": m.show["id"],
+                "tmdb_id": m.show["tmdb_id"],
+                "tmdb_name": m.show["tmdb_name"],
+                "sys_name": m.show["sys_name"],
+                "sys_path": m.show["sys_path"],
+                "aliases": m.show.get("tmdb_aliases"),
+                "score": m.score,
+                "matched_name": m.matched_name,
+            }
+            for m in matches
+        ]
+
     async def get_show(self, show_id: int) -> Optional[Dict[str, Any]]:
         """
         Retrieve a specific show by its database ID.
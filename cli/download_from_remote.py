@@ -1,7 +1,13 @@
+import asyncio
 import click
 from utils.sync2nas_config import parse_sftp_paths
 from utils.sftp_orchestrator import download_from_remote as downloader
-from services.hashing_service import HashingService
+from utils.sftp_orchestrator import download_from_remote_async as async_downloader
+from utils.sftp_orchestrator import plan_download_from_remote
+from services.async_sftp_service import create_async_sftp_service, sftp_backend
+from services.hashing_service import create_hashing_service
+from services.transfer_scheduler import create_transfer_scheduler
+from services.transfer_pipeline import create_pipeline_settings
 from utils.cli_helpers import validate_context_for_command, get_service_from_context
 
 """
@@ -9,12 +15,14 @@ CLI command to download new files or directories from the remote SFTP server and
 """
 
 @click.command("download-from-remote")
-@click.option("--max-workers", "-m", default=4, show_default=True, type=int, help="Number of concurrent downloads")
+@click.option("--max-workers", "-m", default=None, type=int, help="Number of concurrent downloads (default: [sftp] max_concurrent_transfers or 4)")
 @click.option("--parse/--no-parse", default=True, show_default=True, help="Enable filename parsing to populate show/season/episode")
 @click.option("--llm/--no-llm", default=True, show_default=True, help="Use configured LLM for parsing; disable to force regex fallback")
 @click.option("--llm-threshold", type=float, default=0.7, show_default=True, help="Minimum LLM confidence to accept parse result")
+@click.option("--incremental/--full-scan", default=True, show_default=True, help="Skip remote paths unchanged since the last fully processed run")
+@click.option("--plan", "plan_only", is_flag=True, default=False, help="Print the transfer plan (files, bytes per show, free space, ETA) and exit without downloading")
 @click.pass_context
-def download_from_remote(ctx, max_workers, parse, llm, llm_threshold):
+def download_from_remote(ctx, max_workers, parse, llm, llm_threshold, incremental, plan_only):
     """
     Download new files or directories from the remote SFTP server and record them.
     """
@@ -36,6 +44,20 @@ def download_from_remote(ctx, max_workers, parse, llm, llm_threshold):
         
     click.secho(f"[SFTP] Starting remote scan from: {remote_paths}", fg="cyan")
     click.secho(f"[DOWNLOAD] Incoming destination: {incoming_path}", fg="cyan")
+    scheduler = create_transfer_scheduler(config, max_concurrent_transfers=max_workers)
+    click.secho(f"[DOWNLOAD] {scheduler}", fg="cyan")
+
+    if plan_only:
+        with sftp as s:
+            plan = plan_download_from_remote(
+                s, db, remote_paths, incoming_path,
+                incremental=incremental, workers=scheduler.max_concurrent_transfers,
+            )
+        print_transfer_plan(plan)
+        return
+
+    pipeline = create_pipeline_settings(config)
+    click.secho(f"[DOWNLOAD] Post-processing: {pipeline}", fg="cyan")
     click.secho(
         f"[PARSING] Enabled={parse} | LLM={llm} | LLM threshold={llm_threshold}",
         fg="cyan",
@@ -44,40 +66,91 @@ def download_from_remote(ctx, max_workers, parse, llm, llm_threshold):
     # Optional hashing service wiring
     hashing_service = None
     try:
-        # Initialize hashing service with configurable chunk size
-        chunk_size = None
-        try:
-            if config.has_section("Hashing"):
-                if config.has_option("Hashing", "chunk_size_bytes"):
-                    chunk_size = config.getint("Hashing", "chunk_size_bytes")
-                elif config.has_option("Hashing", "chunk_size_mib"):
-                    chunk_size = config.getint("Hashing", "chunk_size_mib") * 1024 * 1024
-        except Exception:
-            chunk_size = None
-        hashing_service = HashingService(chunk_size=chunk_size or 1_048_576)
+        # Reuse the shared hashing service (and its hash cache) when the CLI created one
+        hashing_service = ctx.obj.get("hashing") or create_hashing_service(config)
     except Exception:
         # Non-fatal: continue without optional integrations
         hashing_service = None
 
-    with sftp as s:
+    options = dict(
+        db=db,
+        remote_paths=remote_paths,
+        incoming_path=incoming_path,
+        dry_run=dry_run,
+        max_workers=scheduler.max_concurrent_transfers,
+        hashing_service=hashing_service,
+        parse_filenames=parse,
+        use_llm=llm,
+        llm_confidence_threshold=llm_threshold,
+        incremental=incremental,
+        scheduler=scheduler,
+        pipeline=pipeline,
+    )
+
+    # [sftp] backend = asyncssh runs every transfer as a coroutine on one connection
+    async_sftp = None
+    if sftp_backend(config) == "asyncssh":
         try:
-            llm_available = getattr(s, "llm_service", None) is not None
-            click.secho(f"[LLM] Service available: {llm_available}", fg="cyan")
-        except Exception:
-            click.secho(f"[LLM] Service available: False", fg="cyan")
-        downloader(
-            sftp=s,
-            db=db,
-            remote_paths=remote_paths,
-            incoming_path=incoming_path,
-            dry_run=dry_run,
-            max_workers=max_workers,
-            hashing_service=hashing_service,
-            parse_filenames=parse,
-            use_llm=llm,
-            llm_confidence_threshold=llm_threshold,
-        )
+            async_sftp = create_async_sftp_service(config, llm_service=getattr(sftp, "llm_service", None))
+            click.secho("[SFTP] Backend: asyncssh", fg="cyan")
+        except ImportError as e:
+            click.secho(f"[WARNING] {e}; using the paramiko backend", fg="yellow")
+
+    if async_sftp is not None:
+        async def run_async():
+            async with async_sftp as s:
+                click.secho(f"[LLM] Service available: {s.llm_service is not None}", fg="cyan")
+                await async_downloader(sftp=s, **options)
+
+        asyncio.run(run_async())
+    else:
+        with sftp as s:
+            try:
+                llm_available = getattr(s, "llm_service", None) is not None
+                click.secho(f"[LLM] Service available: {llm_available}", fg="cyan")
+            except Exception:
+                click.secho(f"[LLM] Service available: False", fg="cyan")
+            downloader(sftp=s, **options)
 
     # ToDo: If dry-run is true without -vv then no file information is printed.  Should always print the files that would be downloaded.
     if dry_run:
         click.secho("[DRY-RUN] Complete. No files were downloaded or recorded.", fg="green")
+        click.secho("[DRY-RUN] Use --plan for file counts, sizes per show, free space and an ETA.", fg="cyan")
+
+
+def print_transfer_plan(plan):
+    """Print a TransferPlan: totals, per-show breakdown, free space and the time estimate."""
+    mib = 1048576
+    for path in plan.skipped_paths:
+        click.secho(f"[PLAN] Unchanged since last scan (use --full-scan to include): {path}", fg="cyan")
+    click.secho(
+        f"[PLAN] {plan.files} file(s) in {plan.directories} new dir(s), {plan.total_bytes / mib:.1f} MiB",
+        fg="cyan",
+    )
+    for show in plan.shows_by_size():
+        click.echo(f"  {show.name:<50} {show.files:>6} file(s) {show.bytes / mib:>12.1f} MiB")
+
+    if plan.free_bytes is None:
+        click.secho(f"[PLAN] Free space on {plan.incoming_path}: unknown", fg="yellow")
+    else:
+        click.secho(
+            f"[PLAN] Free space on {plan.incoming_path}: {plan.free_bytes / mib:.1f} MiB",
+            fg="green" if plan.fits else "red",
+        )
+        if not plan.fits:
+            click.secho(f"[PLAN] Short by {(plan.total_bytes - plan.free_bytes) / mib:.1f} MiB", fg="red")
+
+    for sample in plan.throughput:
+        click.echo(
+            f"  {sample.workers:>3} worker(s): {sample.bytes_per_second / mib:.1f} MiB/s over {sample.runs} run(s)"
+        )
+    sample, eta = plan.estimate, plan.estimated_seconds
+    if eta is None:
+        click.secho("[PLAN] Estimated duration: unknown (no transfer history yet)", fg="yellow")
+    else:
+        basis = f"{sample.workers} worker(s)" if sample.workers == plan.workers else "all recorded runs"
+        click.secho(
+            f"[PLAN] Estimated duration at {plan.workers} worker(s): {eta / 60:.1f} min "
+            f"({sample.bytes_per_second / mib:.1f} MiB/s from {basis})",
+            fg="cyan",
+        )
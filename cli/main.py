@@ -6,6 +6,7 @@ Main entry point for the Sync2NAS CLI.
 """
 import os
 import sys
+import time
 import importlib
 import click
 import logging
@@ -13,20 +14,51 @@ import rich_click as rclick
 from utils.sync2nas_config import load_configuration
 from utils.logging_config import setup_logging
 from services.db_factory import create_db_service
-from services.sftp_service import SFTPService
+from services.sftp_service import SFTPService, DEFAULT_LIST_CONCURRENCY
+from services.sftp_pool import create_sftp_pool
+from services.sftp_transfer import create_transfer_engine
 from services.tmdb_service import TMDBService
+from services.hashing_service import create_hashing_service, set_default_hashing_service
 from services.llm_factory import create_llm_service, LLMServiceCreationError
+from utils.tracing import RunProfiler, get_tracer
 
 logger = logging.getLogger(__name__)
 
+def _start_profiling(ctx: click.Context, profile_output: str = None) -> None:
+    """Enable stage tracing (and cProfile) now; report when the command's context closes."""
+    tracer = get_tracer()
+    tracer.reset()
+    tracer.enabled = True
+    profiler = RunProfiler() if profile_output else None
+    if profiler is not None:
+        profiler.start()
+    started = time.perf_counter()
+
+    def report() -> None:
+        wall_seconds = time.perf_counter() - started
+        tracer.enabled = False
+        if profiler is not None:
+            profiler.stop()
+        click.secho("[PROFILE] Stage timings", fg="cyan")
+        click.echo(tracer.format_summary(wall_seconds))
+        if profiler is not None:
+            profiler.dump(profile_output)
+            click.secho(f"[PROFILE] cProfile stats written to {profile_output} (inspect with: python -m pstats {profile_output})", fg="cyan")
+
+    ctx.call_on_close(report)
+
+
 @rclick.group()
 @click.option('--logfile', '-l', type=click.Path(writable=True), help="Log to file")
 @click.option('--verbose', '-v', count=True, help="Set verbosity level (-v = INFO, -vv = DEBUG)")
 @click.option('--config', '-c', type=click.Path(exists=True), default='./config/sync2nas_config.ini', help="Path to config file")
 @click.option('--dry-run', is_flag=True, help="Run in dry-run mode (read-only database, no file system changes)")
 @click.option('--skip-validation', is_flag=True, help="Skip configuration validation and health checks (for troubleshooting)")
+@click.option('--profile', is_flag=True, help="Time pipeline stages (list, diff, download, hash, parse, upsert) and print a summary when the command finishes")
+@click.option('--profile-output', type=click.Path(dir_okay=False, writable=True), help="Also write a cProfile dump (pstats format) of the run to this file; implies --profile")
 @click.pass_context
-def sync2nas_cli(ctx: click.Context, verbose: int, logfile: str, config: str, dry_run: bool, skip_validation: bool) -> None:
+def sync2nas_cli(ctx: click.Context, verbose: int, logfile: str, config: str, dry_run: bool, skip_validation: bool,
+                 profile: bool, profile_output: str) -> None:
     """
     Main CLI group. Sets up the context object with configuration, database, SFTP, TMDB, and LLM services.
     All subcommands share this context.
@@ -41,10 +73,15 @@ def sync2nas_cli(ctx: click.Context, verbose: int, logfile: str, config: str, dr
         config (str): Path to configuration file.
         dry_run (bool): Run in dry-run mode (read-only operations).
         skip_validation (bool): Skip configuration validation (for troubleshooting).
+        profile (bool): Print per-stage timings when the command finishes.
+        profile_output (str): Path for a cProfile dump of the run (implies profile).
 
     Returns:
         None
     """
+    if profile or profile_output:
+        _start_profiling(ctx, profile_output)
+
     # If the context object is already set, return it without reinitializing it
     if ctx.obj and all(k in ctx.obj for k in ("config", "db", "tmdb", "sftp", "anime_tv_path", "incoming_path", "llm_service", "dry_run")):
         return
@@ -135,7 +172,10 @@ def sync2nas_cli(ctx: click.Context, verbose: int, logfile: str, config: str, dr
                 sftp_port, 
                 sftp_username, 
                 sftp_ssh_key_path, 
-                llm_service=llm_service
+                llm_service=llm_service,
+                pool=create_sftp_pool(cfg),
+                transfer_engine=create_transfer_engine(cfg),
+                list_concurrency=get_config_value(cfg, 'sftp', 'list_concurrency', fallback=DEFAULT_LIST_CONCURRENCY, value_type=int)
             )
             logger.info("✓ SFTP service initialized successfully")
         except Exception as e:
@@ -165,6 +205,16 @@ def sync2nas_cli(ctx: click.Context, verbose: int, logfile: str, config: str, dr
                 logger.warning("   - Required: api_key (get from https://www.themoviedb.org/settings/api)")
                 logger.warning("   - Run 'python sync2nas.py config-monitor validate --service tmdb' for detailed diagnosis")
         
+        # Hashing Service (persistent hash cache is optional; failures fall back to plain hashing)
+        hashing_service = None
+        try:
+            hashing_service = create_hashing_service(cfg, read_only=dry_run)
+            set_default_hashing_service(hashing_service)
+            if hashing_service.cache is not None:
+                logger.debug(f"✓ Hash cache enabled: {hashing_service.cache.db_file}")
+        except Exception as e:
+            logger.warning(f"⚠️  Hashing service initialization failed: {e}")
+
         # Configuration paths
         try:
             from utils.sync2nas_config import get_config_value
@@ -189,6 +239,7 @@ def sync2nas_cli(ctx: click.Context, verbose: int, logfile: str, config: str, dr
             "tmdb": tmdb_service,
             "anime_tv_path": anime_tv_path,
             "incoming_path": incoming_path,
+            "hashing": hashing_service,
             "dry_run": dry_run,
             "skip_validation": skip_validation
         }
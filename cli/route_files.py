@@ -10,7 +10,9 @@ from utils.file_routing import file_routing
 from utils.filename_parser import parse_filename
 from utils.cli_helpers import pass_sync2nas_context
 from cli.add_show import add_show
-from utils.file_filters import EXCLUDED_FILENAMES
+from utils.file_filters import EXCLUDED_FILENAMES, is_partial_download
+from services.show_resolver import ShowResolver
+from services.fuzzy_show_index import fuzzy_match_threshold
 
 logger = logging.getLogger(__name__)
 
@@ -54,9 +56,12 @@ def route_files(ctx: click.Context, incoming: str, use_llm: bool, llm_confidence
     # Initialize LLM service if requested
     llm_service = ctx.obj["llm_service"] if use_llm else None
 
+    # One cached name/alias lookup for the whole run; add-show and alias updates invalidate it
+    resolver = ShowResolver(db)
+
     # Optionally auto-add missing shows before routing
     if auto_add:
-        _auto_add_missing_shows(ctx=ctx, incoming_path=incoming_path, use_llm=use_llm, llm_confidence=llm_confidence)
+        _auto_add_missing_shows(ctx=ctx, incoming_path=incoming_path, use_llm=use_llm, llm_confidence=llm_confidence, resolver=resolver)
 
     try:
         # Route files using the file_routing utility
@@ -68,7 +73,9 @@ def route_files(ctx: click.Context, incoming: str, use_llm: bool, llm_confidence
             tmdb=tmdb,
             dry_run=dry_run,
             llm_service=llm_service,
-            llm_confidence_threshold=llm_confidence
+            llm_confidence_threshold=llm_confidence,
+            resolver=resolver,
+            fuzzy_threshold=fuzzy_match_threshold(ctx.obj.get("config")),
         )
         logger.info("file_routing completed successfully")
 
@@ -91,7 +98,7 @@ def route_files(ctx: click.Context, incoming: str, use_llm: bool, llm_confidence
         return 1
 
 
-def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files: set[str] = None, use_llm: bool = False, llm_confidence: float = None) -> None:
+def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files: set[str] = None, use_llm: bool = False, llm_confidence: float = None, resolver: ShowResolver = None) -> None:
     """
     Helper function to scan incoming files and auto-add missing shows to the database.
 
@@ -101,6 +108,7 @@ def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files
         ignore_files (set[str], optional): Set of filenames to skip.
         use_llm (bool, optional): If True, use the LLM to parse the filename.
         llm_confidence (float, optional): Minimum confidence threshold for the LLM to parse the filename.
+        resolver (ShowResolver, optional): Cached show lookups; if None the database is queried directly.
 
     Returns:
         None
@@ -113,6 +121,7 @@ def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files
         return
     
     db = ctx.obj["db"]
+    shows = resolver or db
     llm_service = ctx.obj["llm_service"] if use_llm else None
     dry_run = ctx.obj["dry_run"]
 
@@ -129,8 +138,8 @@ def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files
     # Walk through incoming directories and identify candidate shows
     for root, _, filenames in os.walk(incoming_path):
         for fname in filenames:
-            # Skip ignored files
-            if fname in ignore_files:
+            # Skip ignored files and in-progress downloads
+            if fname in ignore_files or is_partial_download(fname):
                 continue
 
             full_path = os.path.join(root, fname)
@@ -164,7 +173,7 @@ def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files
             seen.add(show_name)
 
             # Check if show already exists in DB (either by exact name or as an alias)
-            existing_show = db.get_show_by_name_or_alias(show_name)
+            existing_show = shows.get_show_by_name_or_alias(show_name)
             if existing_show:
                 logger.info(f"Show already exists in DB: {existing_show.get('tmdb_name', show_name)} (matched by: {show_name})")
                 # Still update aliases to include the parsed filename for future routing
@@ -216,7 +225,7 @@ def _auto_add_missing_shows(ctx: click.Context, incoming_path: str, ignore_files
                         logger.info(f"Extracted existing show name from output: {existing_show_name}")
                         
                         # Now look up the show by its actual database name
-                        existing_show = db.get_show_by_name_or_alias(existing_show_name)
+                        existing_show = shows.get_show_by_name_or_alias(existing_show_name)
                         if existing_show:
                             try:
                                 current_aliases = existing_show.get("tmdb_aliases", "")
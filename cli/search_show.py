@@ -11,6 +11,8 @@ from rich.console import Console
 from rich.table import Table
 from services.db_implementations.db_interface import DatabaseInterface
 from services.tmdb_service import TMDBService
+from services.fuzzy_show_index import DEFAULT_FUZZY_LIMIT
+from services.show_resolver import ShowResolver
 from cli.main import validate_context_for_command, get_service_from_context
 
 logger = logging.getLogger(__name__)
@@ -54,14 +56,17 @@ def _search_shows_partial(show_name: str, db: DatabaseInterface) -> list:
 @click.option("--verbose", "-v", is_flag=True, help="Show detailed show information")
 @click.option("--partial", "-p", is_flag=True, help="Enable partial matching (default behavior)")
 @click.option("--exact", "-e", is_flag=True, help="Use exact matching only")
+@click.option("--fuzzy", "-f", is_flag=True, help="Rank shows by name/alias similarity (tolerates typos and word order)")
+@click.option("--limit", "-l", type=int, default=DEFAULT_FUZZY_LIMIT, show_default=True, help="Maximum fuzzy matches to list")
 @click.pass_context
-def search_show(ctx: click.Context, show_name: str, tmdb_id: int, verbose: bool, partial: bool, exact: bool) -> None:
+def search_show(ctx: click.Context, show_name: str, tmdb_id: int, verbose: bool, partial: bool, exact: bool,
+                fuzzy: bool, limit: int) -> None:
     """
     Search for shows in the database by name or TMDB ID.
 
     If no arguments are provided, lists all shows in the database.
     By default, partial matching is enabled (e.g., "Piece" will find "One Piece").
-    Use --exact for exact matching only.
+    Use --exact for exact matching only, or --fuzzy for a ranked, similarity-scored list.
 
     Args:
         ctx (click.Context): Click context containing shared config and services.
@@ -71,6 +76,8 @@ def search_show(ctx: click.Context, show_name: str, tmdb_id: int, verbose: bool,
         verbose (bool): Show detailed show information.
         partial (bool): Enable partial matching (default behavior).
         exact (bool): Use exact matching only.
+        fuzzy (bool): List shows ranked by trigram similarity of their names and aliases.
+        limit (int): Maximum fuzzy matches to list.
 
     Returns:
         None. Prints results to the console and exits on error.
@@ -84,7 +91,7 @@ def search_show(ctx: click.Context, show_name: str, tmdb_id: int, verbose: bool,
     console = Console()
 
     dry_run = ctx.obj.get("dry_run", False)
-    logger.info(f"Starting show search: show_name={show_name}, tmdb_id={tmdb_id}, dry_run={dry_run}, partial={partial}, exact={exact}")
+    logger.info(f"Starting show search: show_name={show_name}, tmdb_id={tmdb_id}, dry_run={dry_run}, partial={partial}, exact={exact}, fuzzy={fuzzy}")
 
     try:
         if dry_run:
@@ -107,7 +114,18 @@ def search_show(ctx: click.Context, show_name: str, tmdb_id: int, verbose: bool,
                 click.secho(f"❌ No show found with TMDB ID {tmdb_id}", fg="red", bold=True)
                 ctx.exit(1)
 
-        # Case 2: Search by show name
+        # Case 2: Ranked fuzzy search by show name
+        elif show_name and fuzzy:
+            logger.info(f"Fuzzy searching by show name: {show_name}")
+            matches = ShowResolver(db).search(show_name, limit=limit)
+            if matches:
+                click.secho(f"✅ Found {len(matches)} fuzzy match(es) for '{show_name}':", fg="green", bold=True)
+                _display_fuzzy_matches_table(matches, console)
+            else:
+                click.secho(f"❌ No shows found resembling '{show_name}'", fg="red", bold=True)
+                ctx.exit(1)
+
+        # Case 3: Search by show name
         elif show_name:
             logger.info(f"Searching by show name: {show_name}")
             
@@ -145,7 +163,7 @@ def search_show(ctx: click.Context, show_name: str, tmdb_id: int, verbose: bool,
                     if click.confirm("Search TMDB?"):
                         _search_tmdb_for_similar_shows(show_name, tmdb, console, dry_run)
 
-        # Case 3: No arguments - list all shows
+        # Case 4: No arguments - list all shows
         else:
             logger.info("No search criteria provided, listing all shows")
             shows = db.get_all_shows()
@@ -275,6 +293,39 @@ def _display_shows_table(shows: list, console: Console) -> None:
     console.print(table)
 
 
+def _display_fuzzy_matches_table(matches: list, console: Console) -> None:
+    """
+    Display ranked fuzzy matches with their scores.
+
+    Args:
+        matches (list): FuzzyMatch results, best first.
+        console (Console): Rich console for formatted output.
+
+    Returns:
+        None
+    """
+    table = Table(title="Fuzzy Matches", show_lines=True)
+    table.add_column("Score", style="bold magenta", justify="right")
+    table.add_column("ID", style="bold cyan", justify="right")
+    table.add_column("TMDB ID", style="bold blue", justify="right")
+    table.add_column("Name", style="bold green")
+    table.add_column("Matched Name", style="yellow")
+    table.add_column("Path", style="blue", overflow="fold")
+
+    for match in matches:
+        show = match.show
+        table.add_row(
+            f"{match.score:.2f}",
+            str(show.get('id', 'N/A')),
+            str(show.get('tmdb_id', 'N/A')),
+            show.get('tmdb_name', 'N/A'),
+            match.matched_name,
+            show.get('sys_path', 'N/A'),
+        )
+
+    console.print(table)
+
+
 def _search_tmdb_for_similar_shows(show_name: str, tmdb: TMDBService, console: Console, dry_run: bool = False):
     """
     Search TMDB for shows similar to the provided name.
@@ -0,0 +1,71 @@
+"""
+CLI command to verify the integrity of library files against their filename-provided or stored CRC32s.
+"""
+import time
+import click
+import logging
+from services.hashing_service import create_hashing_service
+from services.library_verifier import SOURCES, create_library_verifier
+from utils.cli_helpers import validate_context_for_command
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+
+@click.command("verify-library", help="Verify library files against their filename CRC32 tags or stored hashes.")
+@click.option("--source", "-s", type=click.Choice(list(SOURCES) + ["all"]), default="downloaded", show_default=True,
+              help="Which table to verify: downloaded_files, anime_tv_inventory, or both")
+@click.option("--workers", "-w", type=int, default=None, help="Concurrent file reads (default: [verify] workers or 2)")
+@click.option("--max-read-mib", type=float, default=None,
+              help="Cap total read bandwidth in MiB/s (default: [verify] max_read_mib_per_second; 0 = unlimited)")
+@click.option("--refresh", is_flag=True, default=False, help="Re-read every file instead of trusting the hash cache")
+@click.option("--resume/--restart", default=True, show_default=True, help="Continue from the last checkpoint or start over")
+@click.option("--limit", type=int, default=None, help="Stop after this many files (run again to continue)")
+@click.pass_context
+def verify_library(ctx, source, workers, max_read_mib, refresh, resume, limit):
+    """
+    Verify library files against their filename CRC32 tags or stored hashes.
+
+    Mismatched downloaded files are marked with status 'error'. Progress is checkpointed so an
+    interrupted run continues where it stopped.
+    """
+    if not validate_context_for_command(ctx, required_services=["db", "config"]):
+        return
+
+    dry_run = ctx.obj["dry_run"]
+    config = ctx.obj["config"]
+    hashing_service = ctx.obj.get("hashing") or create_hashing_service(config, read_only=dry_run)
+    verifier = create_library_verifier(
+        config,
+        ctx.obj["db"],
+        hashing_service,
+        dry_run=dry_run,
+        refresh=refresh,
+        max_workers=workers,
+        max_read_mib_per_second=max_read_mib,
+    )
+    sources = list(SOURCES) if source == "all" else [source]
+
+    last_print = [time.monotonic()]
+
+    def progress(report):
+        now = time.monotonic()
+        if now - last_print[0] >= PROGRESS_INTERVAL_SECONDS:
+            last_print[0] = now
+            click.secho(f"[VERIFY] {report}", fg="cyan")
+
+    if dry_run:
+        click.secho("[DRY RUN] Results will be reported but not written to the database.", fg="yellow")
+    try:
+        report = verifier.verify(sources=sources, resume=resume, limit=limit, progress_callback=progress)
+    except KeyboardInterrupt:
+        click.secho("[VERIFY] Interrupted; progress saved. Run again to resume.", fg="yellow")
+        ctx.exit(1)
+
+    for m in report.mismatches:
+        click.secho(f"[MISMATCH] {m.path}: expected {m.expected} ({m.reference}), computed {m.actual}", fg="red")
+    status = "complete" if report.completed else "paused (run again to resume)"
+    click.secho(f"[VERIFY] {status}: {report}", fg="red" if report.mismatched else "green")
+    if report.mismatched:
+        ctx.exit(2)
@@ -3,12 +3,12 @@ DownloadedFile model for Sync2NAS, representing downloaded file metadata and dat
 """
 import os
 import datetime
-import hashlib
 import logging
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, field_validator, PrivateAttr
 from enum import Enum
+from services.hashing_service import get_default_hashing_service
 
 logger = logging.getLogger(__name__)
 
@@ -319,38 +319,44 @@ class DownloadedFile(BaseModel):
             logger.warning(f"Unknown hash type: {hash_type}")
             return None
 
+    def calculate_hashes(self, hash_types: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Calculate several hashes of the file content in a single read pass.
+        Cached values are reused; only the missing hash types are computed and cached.
+        Hashes of unchanged files are served from the persistent hash cache when one is configured.
+
+        Args:
+            hash_types (List[str]): Hash types to calculate ("crc32", "sha256", "sha1", "md5").
+
+        Returns:
+            Dict[str, Optional[str]]: Hash per type; None values if the file doesn't exist or can't be read.
+        """
+        hash_types = [h.lower() for h in hash_types]
+        file_path = self.current_path or self.remote_path
+        try:
+            if not file_path or not os.path.exists(file_path):
+                # Clear cache for these hash types if file doesn't exist
+                for hash_type in hash_types:
+                    self._hash_cache.pop(hash_type, None)
+                return {hash_type: None for hash_type in hash_types}
+
+            missing = [h for h in hash_types if h not in self._hash_cache]
+            if missing:
+                self._hash_cache.update(get_default_hashing_service().hash_file(file_path, missing))
+            return {hash_type: self._hash_cache[hash_type] for hash_type in hash_types}
+        except Exception as e:
+            logger.warning(f"Failed to calculate {', '.join(h.upper() for h in hash_types)} hash for {file_path}: {e}")
+            return {hash_type: None for hash_type in hash_types}
+
     def calculate_crc32(self) -> Optional[str]:
         """
         Calculate CRC32 hash of the file content.
         Returns cached value if available, otherwise computes and caches the hash.
         
         Returns:
-            Optional[str]: CRC32 hash or None if file doesn't exist.
+            Optional[str]: CRC32 hash (8-character uppercase hex) or None if file doesn't exist.
         """
-        try:
-            file_path = self.current_path or self.remote_path
-            if not os.path.exists(file_path):
-                # Clear cache for this hash type if file doesn't exist
-                if "crc32" in self._hash_cache:
-                    del self._hash_cache["crc32"]
-                return None
-            
-            # Return cached value if available
-            if "crc32" in self._hash_cache:
-                return self._hash_cache["crc32"]
-            
-            import zlib
-            crc = 0
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(1048576), b""):
-                    crc = zlib.crc32(chunk, crc)
-            
-            # Cache the computed hash
-            self._hash_cache["crc32"] = f"{crc & 0xFFFFFFFF:08X}"  # Return as 8-character uppercase hex string
-            return self._hash_cache["crc32"]
-        except Exception as e:
-            logger.warning(f"Failed to calculate CRC32 hash for {file_path}: {e}")
-            return None
+        return self.calculate_hashes(["crc32"])["crc32"]
 
     def calculate_sha256(self) -> Optional[str]:
         """
@@ -360,29 +366,7 @@ class DownloadedFile(BaseModel):
         Returns:
             Optional[str]: SHA256 hash or None if file doesn't exist.
         """
-        try:
-            file_path = self.current_path or self.remote_path
-            if not os.path.exists(file_path):
-                # Clear cache for this hash type if file doesn't exist
-                if "sha256" in self._hash_cache:
-                    del self._hash_cache["sha256"]
-                return None
-            
-            # Return cached value if available
-            if "sha256" in self._hash_cache:
-                return self._hash_cache["sha256"]
-            
-            hash_sha256 = hashlib.sha256()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(1048576), b""):
-                    hash_sha256.update(chunk)
-            
-            # Cache the computed hash
-            self._hash_cache["sha256"] = hash_sha256.hexdigest()
-            return self._hash_cache["sha256"]
-        except Exception as e:
-            logger.warning(f"Failed to calculate SHA256 hash for {file_path}: {e}")
-            return None
+        return self.calculate_hashes(["sha256"])["sha256"]
 
     def calculate_sha1(self) -> Optional[str]:
         """
@@ -392,29 +376,7 @@ class DownloadedFile(BaseModel):
         Returns:
             Optional[str]: SHA1 hash or None if file doesn't exist.
         """
-        try:
-            file_path = self.current_path or self.remote_path
-            if not os.path.exists(file_path):
-                # Clear cache for this hash type if file doesn't exist
-                if "sha1" in self._hash_cache:
-                    del self._hash_cache["sha1"]
-                return None
-            
-            # Return cached value if available
-            if "sha1" in self._hash_cache:
-                return self._hash_cache["sha1"]
-            
-            hash_sha1 = hashlib.sha1()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(1048576), b""):
-                    hash_sha1.update(chunk)
-            
-            # Cache the computed hash
-            self._hash_cache["sha1"] = hash_sha1.hexdigest()
-            return self._hash_cache["sha1"]
-        except Exception as e:
-            logger.warning(f"Failed to calculate SHA1 hash for {file_path}: {e}")
-            return None
+        return self.calculate_hashes(["sha1"])["sha1"]
 
     def calculate_md5(self) -> Optional[str]:
         """
@@ -424,29 +386,31 @@ class DownloadedFile(BaseModel):
         Returns:
             Optional[str]: MD5 hash or None if file doesn't exist.
         """
-        try:
-            file_path = self.current_path or self.remote_path
-            if not os.path.exists(file_path):
-                # Clear cache for this hash type if file doesn't exist
-                if "md5" in self._hash_cache:
-                    del self._hash_cache["md5"]
-                return None
-            
-            # Return cached value if available
-            if "md5" in self._hash_cache:
-                return self._hash_cache["md5"]
-            
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(1048576), b""):
-                    hash_md5.update(chunk)
-            
-            # Cache the computed hash
-            self._hash_cache["md5"] = hash_md5.hexdigest()
-            return self._hash_cache["md5"]
-        except Exception as e:
-            logger.warning(f"Failed to calculate MD5 hash for {file_path}: {e}")
-            return None
+        return self.calculate_hashes(["md5"])["md5"]
+
+    def apply_transfer_hashes(self, hashes: Dict[str, str]) -> bool:
+        """
+        Record digests that were computed while the file was being downloaded.
+
+        Every digest seeds the hash cache, so later calculate_* calls don't re-read the file;
+        the CRC32, when present, becomes the stored file hash.
+
+        Args:
+            hashes (Dict[str, str]): Digests keyed by algorithm name (e.g. {"crc32": "1A2B3C4D"}).
+
+        Returns:
+            bool: True if a CRC32 was applied to file_hash.
+        """
+        for algo, value in (hashes or {}).items():
+            if value:
+                self._hash_cache[algo.lower()] = value
+        crc = (hashes or {}).get("crc32")
+        if not crc:
+            return False
+        self.file_hash = crc
+        self.file_hash_algo = "CRC32"
+        self.hash_calculated_at = datetime.datetime.now()
+        return True
 
     def update_hash(self, hash_type: str = "crc32") -> bool:
         """
@@ -0,0 +1,436 @@
+"""
+asyncio SFTP backend for Sync2NAS, built on asyncssh.
+
+SFTPService drives blocking paramiko calls from worker threads. AsyncSFTPService offers the same
+listing and download operations as coroutines over a single asyncssh connection, whose SFTP
+client multiplexes any number of outstanding requests, so many transfers can run concurrently on
+one event loop without threads. Entries are filtered, truncated for long local paths and retried
+exactly as in SFTPService, and downloads go through SFTPTransferEngine.download_async, so partial
+files, journals and inline CRC32 are shared by both backends.
+
+Select it with ``[sftp] backend = asyncssh``. asyncssh is an optional dependency; everything else
+works without it.
+"""
+import asyncio
+import functools
+import logging
+import os
+import stat
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+try:
+    import asyncssh
+except ImportError:  # Optional backend; the paramiko SFTPService is always available
+    asyncssh = None
+
+from services.sftp_service import (
+    DEFAULT_LIST_CONCURRENCY,
+    build_listing_entry,
+    index_remote_tree,
+    plan_windows_truncation,
+    truncate_filename,
+)
+from services.sftp_transfer import SFTPTransferEngine, TransferResult
+from utils.file_filters import is_valid_directory, is_valid_media_file
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("paramiko", "asyncssh")
+DEFAULT_BACKEND = "paramiko"
+# Seconds between retries of a failed operation (as in retry_sftp_operation)
+RETRY_DELAY = 5
+# SFTP v4+ file type for directories (asyncssh.FILEXFER_TYPE_DIRECTORY)
+_DIRECTORY_TYPE = 2
+
+
+def _connection_errors() -> tuple:
+    if asyncssh is None:
+        return (OSError, EOFError)
+    return (OSError, EOFError, asyncssh.DisconnectError, asyncssh.SFTPConnectionLost)
+
+
+def async_retry_sftp_operation(func):
+    """Coroutine version of retry_sftp_operation: retry on connection errors, reconnecting in between."""
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        max_retries = 3
+        attempts = 0
+        operation_name = getattr(func, "__name__", str(func))
+        logger.debug(f"Starting SFTP operation: {operation_name} with up to {max_retries} retries.")
+
+        while True:
+            generation = self._generation
+            try:
+                return await func(self, *args, **kwargs)
+            except _connection_errors() as e:
+                attempts += 1
+                logger.warning(f"SFTP operation '{operation_name}' failed: {e}. Retry {attempts}/{max_retries}.")
+                if attempts >= max_retries:
+                    logger.error(f"SFTP operation '{operation_name}' failed after {max_retries} retries.")
+                    raise
+                get_metrics().retries.inc(operation=operation_name)
+                await asyncio.sleep(RETRY_DELAY)
+                await self.reconnect(generation)
+    return wrapper
+
+
+class AsyncSFTPService:
+    """
+    asyncio SFTP service with the listing and download semantics of SFTPService.
+
+    One instance can be shared by concurrent coroutines: ``async with service`` opens the
+    connection for the first user and closes it when the last one leaves.
+
+    Methods:
+        connect(): Open the SSH connection and SFTP client.
+        disconnect(): Close them.
+        reconnect(generation): Reopen the connection unless another coroutine already did.
+        list_remote_dir(remote_path): List and filter one remote directory.
+        stat_remote_dir(remote_path, children): Return a directory's mtime (and optionally child count).
+        iter_remote_files_recursive(remote_path, max_in_flight): Async generator over media files, breadth-first.
+        list_remote_files_recursive(remote_path): Recursively list media files.
+        plan_dir_download(remote_path, local_path, filename_map): Files a directory download would fetch.
+        download_dir(remote_path, local_path, filename_map, max_workers): Download a directory tree.
+        download_file(remote_path, local_path, max_path_length): Download a single file.
+    """
+
+    def __init__(self, host, port, username, ssh_key_path, llm_service=None, transfer_engine=None,
+                 list_concurrency=DEFAULT_LIST_CONCURRENCY):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.ssh_key_path = ssh_key_path
+        self.llm_service = llm_service
+        self.transfer_engine = transfer_engine or SFTPTransferEngine()
+        # Directories listed concurrently by iter_remote_files_recursive
+        self.list_concurrency = max(1, int(list_concurrency or 1))
+        self.client = None
+        self._conn = None
+        self._lock = asyncio.Lock()
+        self._users = 0
+        # Bumped on every connect so concurrent failures trigger a single reconnect
+        self._generation = 0
+
+    def __str__(self) -> str:
+        return f"AsyncSFTPService({self.username}@{self.host}:{self.port})"
+
+    async def __aenter__(self):
+        async with self._lock:
+            if self.client is None:
+                await self.connect()
+            self._users += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        async with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0:
+                await self.disconnect()
+
+    async def connect(self):
+        """Open the SSH connection and start an SFTP client on it."""
+        if asyncssh is None:
+            raise RuntimeError("The asyncssh SFTP backend requires the 'asyncssh' package (pip install asyncssh)")
+        try:
+            # Like SFTPService, the server's host key is not verified
+            self._conn = await asyncssh.connect(
+                self.host,
+                port=int(self.port),
+                username=self.username,
+                client_keys=[self.ssh_key_path],
+                known_hosts=None,
+            )
+            self.client = await self._conn.start_sftp_client()
+            self._generation += 1
+            logger.debug("Async SFTP connection established successfully.")
+            return self
+        except Exception as e:
+            logger.exception(f"Failed to establish async SFTP connection to {self.host}:{self.port} with error: {e}")
+            await self.disconnect()
+            raise RuntimeError(f"Failed to connect to SFTP server: {e}")
+
+    async def disconnect(self):
+        """Close the SFTP client and SSH connection."""
+        try:
+            if self.client:
+                self.client.exit()
+                self.client = None
+            if self._conn:
+                self._conn.close()
+                await self._conn.wait_closed()
+                self._conn = None
+            logger.debug("Async SFTP connection closed successfully.")
+        except Exception as e:
+            logger.exception(f"Error closing async SFTP connection: {e}")
+
+    async def reconnect(self, generation=None):
+        """Reconnect to the SFTP server, unless it was reconnected since ``generation`` was observed."""
+        async with self._lock:
+            if generation is not None and generation != self._generation and self.client is not None:
+                return self
+            logger.debug("Attempting to reconnect to SFTP server...")
+            try:
+                await self.disconnect()
+                return await self.connect()
+            except Exception as e:
+                logger.exception(f"Failed to reconnect to SFTP server: {e}")
+                raise RuntimeError(f"Failed to reconnect to SFTP server: {e}")
+
+    async def _readdir(self, remote_path):
+        """Return (name, attrs) pairs for a remote directory, without '.' and '..'."""
+        return [
+            (entry.filename, entry.attrs)
+            for entry in await self.client.readdir(remote_path)
+            if entry.filename not in (".", "..")
+        ]
+
+    @staticmethod
+    def _is_dir(attrs) -> bool:
+        return attrs.type == _DIRECTORY_TYPE or stat.S_ISDIR(attrs.permissions or 0)
+
+    @async_retry_sftp_operation
+    async def list_remote_dir(self, remote_path):
+        """List contents of a remote directory, filtering by exclusion rules."""
+        cutoff_time = datetime.now() - timedelta(minutes=1)
+        fetched_at = datetime.now()
+
+        entries = []
+        remote_path = remote_path.replace('\\', '/')
+        for name, attrs in await self._readdir(remote_path):
+            entry = build_listing_entry(
+                remote_path, name, attrs.size or 0, attrs.mtime or 0, self._is_dir(attrs), cutoff_time, fetched_at
+            )
+            if entry is not None:
+                entries.append(entry)
+
+        logger.debug(f"Listed {len(entries)} entries in {remote_path}")
+        return entries
+
+    @async_retry_sftp_operation
+    async def stat_remote_dir(self, remote_path, children=False):
+        """Return ``mtime`` and, with ``children``, ``child_count`` and ``settled`` (see SFTPService.stat_remote_dir)."""
+        remote_path = remote_path.replace('\\', '/')
+        state = {"mtime": datetime.fromtimestamp((await self.client.stat(remote_path)).mtime or 0)}
+        if children:
+            cutoff_time = datetime.now() - timedelta(minutes=1)
+            entries = await self._readdir(remote_path)
+            state["child_count"] = len(entries)
+            state["settled"] = all(datetime.fromtimestamp(attrs.mtime or 0) <= cutoff_time for _, attrs in entries)
+        return state
+
+    @async_retry_sftp_operation
+    async def _scan_remote_dir(self, remote_path, cutoff_time, fetched_at, include_dirs=False):
+        """List one remote directory, returning (media file entries, subdirectory entries); see SFTPService._scan_remote_dir."""
+        files, subdirs = [], []
+        for name, attrs in await self._readdir(remote_path):
+            path = remote_path.rstrip('/') + '/' + name.replace('\\', '/')
+            modified_time = datetime.fromtimestamp(attrs.mtime or 0)
+
+            # Skip files and directories modified in the last minute
+            if cutoff_time is not None and modified_time > cutoff_time:
+                continue
+
+            if self._is_dir(attrs):
+                if include_dirs and not is_valid_directory(name):
+                    logger.debug(f"Skipping directory due to filter: {name}")
+                    continue
+                subdirs.append({
+                    "name": name,
+                    "remote_path": path,
+                    "size": attrs.size or 0,
+                    "modified_time": modified_time,
+                    "is_dir": True,
+                    "fetched_at": fetched_at
+                })
+                continue
+
+            # Skip invalid media files
+            if not is_valid_media_file(name):
+                continue
+
+            files.append({
+                "name": name,
+                "remote_path": path,
+                "size": attrs.size or 0,
+                "modified_time": modified_time,
+                "is_dir": False,
+                "fetched_at": fetched_at
+            })
+        logger.debug(f"Listed {len(files)} files and {len(subdirs)} subdirectories in {remote_path}")
+        return files, subdirs
+
+    async def iter_remote_files_recursive(self, remote_path, max_in_flight=None, include_dirs=False,
+                                          min_age=timedelta(minutes=1)):
+        """
+        Walk a remote tree breadth-first, yielding media file entries as directories are listed.
+
+        Up to ``max_in_flight`` directories (default: list_concurrency) are listed concurrently on
+        the shared connection. Closing the generator early cancels listings still in flight.
+        ``include_dirs`` and ``min_age`` work as in SFTPService.iter_remote_files_recursive.
+
+        Yields:
+            dict: File entries in the same shape as SFTPService.list_remote_files_recursive().
+        """
+        cutoff_time = datetime.now() - min_age if min_age is not None else None
+        fetched_at = datetime.now()
+        remote_path = remote_path.replace('\\', '/')
+        max_in_flight = max(1, max_in_flight or self.list_concurrency)
+
+        pending = deque([remote_path])
+        running = set()
+        total = 0
+        try:
+            while pending or running:
+                while pending and len(running) < max_in_flight:
+                    running.add(asyncio.ensure_future(
+                        self._scan_remote_dir(pending.popleft(), cutoff_time, fetched_at, include_dirs)
+                    ))
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    files, subdirs = task.result()
+                    pending.extend(subdir["remote_path"] for subdir in subdirs)
+                    total += len(files)
+                    for entry in (subdirs + files if include_dirs else files):
+                        yield entry
+        finally:
+            for task in running:
+                task.cancel()
+        logger.debug(f"Walked {remote_path}: {total} files with up to {max_in_flight} concurrent listings")
+
+    async def list_remote_files_recursive(self, remote_path):
+        """Return a list of recursively listed media files from the remote path."""
+        remote_path = remote_path.replace('\\', '/')
+        entries = [entry async for entry in self.iter_remote_files_recursive(remote_path)]
+        logger.debug(f"Listed {len(entries)} entries in {remote_path}")
+        return entries
+
+    async def _truncate_for_windows_path(self, local_base, dir_name, remote_path, max_path_length=250, filenames=None):
+        """Return (truncated_dir_name, filename_map) for a remote directory (see plan_windows_truncation)."""
+        if filenames is None:
+            entries = await self.list_remote_files_recursive(remote_path)
+            filenames = [entry['name'] for entry in entries if not entry.get('is_dir', False)]
+        return plan_windows_truncation(local_base, dir_name, filenames, self.llm_service, max_path_length)
+
+    @async_retry_sftp_operation
+    async def plan_dir_download(self, remote_path, local_path, filename_map=None):
+        """
+        List a remote directory tree and return the files download_dir would fetch, without downloading.
+
+        Same filters, truncation and entry shape as SFTPService.plan_dir_download (including the
+        single walk of the tree); local directories are created.
+        """
+        remote_path = remote_path.replace('\\', '/')
+        entries = [entry async for entry in self.iter_remote_files_recursive(remote_path, include_dirs=True, min_age=None)]
+        children, subtree_filenames = index_remote_tree(entries, remote_path)
+        root = remote_path.rstrip('/')
+        if filename_map is None:
+            # Compute truncation and filename mapping for the top-level directory
+            parent_path = os.path.dirname(local_path)
+            dir_name = os.path.basename(root)
+            truncated_dir_name, filename_map = await self._truncate_for_windows_path(
+                parent_path, dir_name, remote_path, filenames=subtree_filenames.get(root, [])
+            )
+            local_path = os.path.join(parent_path, truncated_dir_name)
+
+        planned = []
+        pending = deque([(root, local_path, filename_map)])
+        while pending:
+            current_remote, current_local, current_map = pending.popleft()
+            os.makedirs(current_local, exist_ok=True)
+            for entry in children.get(current_remote, []):
+                if entry["is_dir"]:
+                    # Each subdirectory gets its own truncation and filename mapping
+                    subdir_trunc_name, subdir_filename_map = await self._truncate_for_windows_path(
+                        current_local, entry["name"], entry["remote_path"],
+                        filenames=subtree_filenames.get(entry["remote_path"], []),
+                    )
+                    pending.append((entry["remote_path"], os.path.join(current_local, subdir_trunc_name), subdir_filename_map))
+                else:
+                    local_filename = current_map.get(entry["name"], entry["name"]) if current_map else entry["name"]
+                    planned.append({**entry, "local_path": os.path.join(current_local, local_filename)})
+        return planned
+
+    async def download_dir(self, remote_path, local_path, filename_map=None, max_workers=4):
+        """Download all files under a directory tree, at most ``max_workers`` at a time."""
+        planned = await self.plan_dir_download(remote_path, local_path, filename_map=filename_map)
+        slots = asyncio.Semaphore(max(1, max_workers))
+
+        async def fetch(info):
+            async with slots:
+                return await self.download_file(info["remote_path"], info["local_path"])
+
+        results = []
+        outcomes = await asyncio.gather(*(fetch(info) for info in planned), return_exceptions=True)
+        for info, res in zip(planned, outcomes):
+            if isinstance(res, Exception):
+                logger.error(f"Failed to download entry in {remote_path}: {res}")
+                continue
+            results.append({**info, "hashes": dict(res.hashes) if isinstance(res, TransferResult) else {}})
+        return results
+
+    @async_retry_sftp_operation
+    async def download_file(self, remote_path, local_path, max_path_length=250):
+        """
+        Download a single file with SFTPTransferEngine.download_async.
+
+        Returns:
+            TransferResult | None: Transfer statistics, or None if the file was skipped.
+        """
+        remote_path = remote_path.replace('\\', '/')
+        if len(os.path.abspath(local_path)) > max_path_length:
+            logger.warning(f"Local path too long, attempting to truncate filename: {local_path}")
+            dir_path = os.path.dirname(local_path)
+            base_name = truncate_filename(
+                os.path.basename(local_path), self.llm_service, max_path_length,
+                os.path.dirname(dir_path), os.path.basename(dir_path),
+            )
+            logger.info(f"Truncated filename to: {base_name}")
+            local_path = os.path.join(dir_path, base_name)
+            if len(os.path.abspath(local_path)) > max_path_length:
+                logger.error(f"Skipping file due to path length > 260 after truncation: {local_path}")
+                return
+        logger.debug(f"Downloading file from {remote_path} to {local_path}")
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        result = await self.transfer_engine.download_async(self.client, remote_path, local_path)
+        logger.debug(f"Downloaded file from {remote_path} to {local_path} ({result})")
+        return result
+
+
+def sftp_backend(config: Any) -> str:
+    """Return the configured ``[sftp] backend`` ("paramiko" or "asyncssh")."""
+    from utils.sync2nas_config import get_config_value
+
+    backend = (get_config_value(config, "sftp", "backend", fallback=DEFAULT_BACKEND) or DEFAULT_BACKEND).strip().lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown [sftp] backend '{backend}'; using {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return backend
+
+
+def create_async_sftp_service(config: Any, llm_service=None) -> AsyncSFTPService:
+    """
+    Create an AsyncSFTPService from the [sftp] configuration section.
+
+    Uses the same connection keys as SFTPService plus ``list_concurrency`` and the transfer engine
+    settings (see create_transfer_engine).
+
+    Raises:
+        ImportError: If asyncssh is not installed.
+    """
+    from services.sftp_transfer import create_transfer_engine
+    from utils.sync2nas_config import get_config_value
+
+    if asyncssh is None:
+        raise ImportError("[sftp] backend = asyncssh requires the 'asyncssh' package (pip install asyncssh)")
+    return AsyncSFTPService(
+        get_config_value(config, "sftp", "host"),
+        get_config_value(config, "sftp", "port", fallback=22, value_type=int),
+        get_config_value(config, "sftp", "username"),
+        get_config_value(config, "sftp", "ssh_key_path"),
+        llm_service=llm_service,
+        transfer_engine=create_transfer_engine(config),
+        list_concurrency=get_config_value(config, "sftp", "list_concurrency", fallback=DEFAULT_LIST_CONCURRENCY, value_type=int),
+    )
@@ -3,8 +3,8 @@ This module provides a factory for creating database service instances based on
 """
 from typing import Dict, Any
 from services.db_implementations.db_interface import DatabaseInterface
-from services.db_implementations.sqlite_implementation import SQLiteDBService
-from services.db_implementations.postgres_implementation import PostgresDBService
+from services.db_implementations.sqlite_implementation import SQLiteDBService, create_sqlite_settings
+from services.db_implementations.postgres_implementation import PostgresDBService, create_postgres_pool_settings
 from services.db_implementations.milvus_implementation import MilvusDBService
 
 def create_db_service(config: Dict[str, Any], read_only: bool = False) -> DatabaseInterface:
@@ -30,7 +30,7 @@ def create_db_service(config: Dict[str, Any], read_only: bool = False) -> Databa
     
     if db_type == "sqlite":
         sqlite_section = config.get("sqlite") or config.get("SQLite")
-        return SQLiteDBService(sqlite_section["db_file"], read_only=read_only)
+        return SQLiteDBService(sqlite_section["db_file"], read_only=read_only, settings=create_sqlite_settings(config))
     
     elif db_type == "postgres":
         postgres_section = config.get("postgresql") or config.get("PostgreSQL")
@@ -38,7 +38,8 @@ def create_db_service(config: Dict[str, Any], read_only: bool = False) -> Databa
             f"postgresql://{postgres_section['user']}:{postgres_section['password']}"
             f"@{postgres_section['host']}:{postgres_section['port']}"
             f"/{postgres_section['database']}",
-            read_only=read_only
+            read_only=read_only,
+            **create_postgres_pool_settings(config),
         )
     
     elif db_type == "milvus":
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple, Union
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
 import datetime
 import logging
 from models.episode import Episode
@@ -29,11 +29,24 @@ class DatabaseInterface(ABC):
         get_episodes_by_tmdb_id(tmdb_id): Get all episodes for a show by its TMDB ID.
         get_inventory_files(): Get all inventory files.
         get_downloaded_files(): Get all downloaded files.
+        iter_downloaded_files(...): Stream downloaded files in id order.
+        iter_inventory_files(...): Stream inventory files in id order.
+        get_remote_dir_snapshot(path): Get the last settled listing snapshot of a remote directory.
+        upsert_remote_dir_snapshot(path, mtime, child_count): Record a remote directory snapshot.
+        clear_remote_dir_snapshots(): Forget all remote directory snapshots.
+        add_transfer_run(files, bytes_transferred, elapsed_seconds, workers): Record a finished download run.
+        get_transfer_runs(limit): Most recent download runs, newest first.
         add_downloaded_files(files): Add multiple downloaded files to the database.
         get_sftp_diffs(): Get differences between SFTP and downloaded files.
+        get_known_remote_paths(remote_paths): Subset of remote paths already recorded in downloaded_files.
         backup_database(): Backup the database.
         get_show_by_id(show_id): Get a show by its database ID.
+        shows_version(): Counter bumped whenever show names or aliases change.
+        close(): Release connections held by the service.
+        pool_stats(): Connection pool utilization, for backends that pool connections.
         is_read_only(): Check if database is in read-only mode.
+        upsert_downloaded_file(file): Insert or update a DownloadedFile by remote path.
+        upsert_downloaded_files(files): Insert or update many DownloadedFiles in one batch.
     """
     
     @abstractmethod
@@ -111,6 +124,11 @@ class DatabaseInterface(ABC):
         """Get differences between SFTP and downloaded files."""
         pass
 
+    @abstractmethod
+    def get_known_remote_paths(self, remote_paths: List[str]) -> Set[str]:
+        """Return the subset of ``remote_paths`` that already have a downloaded_files row."""
+        pass
+
     @abstractmethod
     def backup_database(self) -> str:
         """
@@ -129,6 +147,28 @@ class DatabaseInterface(ABC):
         """Update the aliases for a show by its database ID."""
         pass
 
+    # Bumped by add_show, update_show_aliases and delete_show_and_episodes
+    _shows_version = 0
+
+    def shows_version(self) -> int:
+        """
+        Number of show name/alias changes made through this service instance.
+
+        In-process caches such as ShowResolver compare it with the value they loaded at to
+        decide when to reload. Changes made by other processes are not counted.
+        """
+        return self._shows_version
+
+    def _bump_shows_version(self) -> None:
+        self._shows_version += 1
+
+    def close(self) -> None:
+        """Release any connections the service keeps open. No-op for services that hold none."""
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool utilization (see PostgresDBService.pool_stats); empty without a pool."""
+        return {}
+
     @abstractmethod
     def is_read_only(self) -> bool:
         """Check if database is in read-only mode."""
@@ -139,6 +179,15 @@ class DatabaseInterface(ABC):
         """Insert/update a DownloadedFile keyed by remote_path (bridged from original_path)."""
         pass
 
+    def upsert_downloaded_files(self, files: List[DownloadedFile]) -> List[DownloadedFile]:
+        """
+        Insert/update many DownloadedFiles keyed by remote_path.
+
+        Backends override this to write the whole batch in one statement and transaction; this
+        default upserts the files one at a time.
+        """
+        return [self.upsert_downloaded_file(f) for f in files]
+
     @abstractmethod
     def set_downloaded_file_hash(self, file_id: int, algo: str, value: str, calculated_at: Optional[datetime.datetime] = None) -> None:
         pass
@@ -186,4 +235,50 @@ class DatabaseInterface(ABC):
     @abstractmethod
     def update_downloaded_file_status(self, file_id: int, new_status: FileStatus, error_message: Optional[str] = None) -> None:
         """Update only the status (and optionally error_message) of a downloaded file by id."""
+        pass
+
+    @abstractmethod
+    def iter_downloaded_files(self,
+        *,
+        statuses: Optional[List[FileStatus]] = None,
+        include_dirs: bool = False,
+        after_id: int = 0,
+        batch_size: int = 500,
+    ) -> Iterator[DownloadedFile]:
+        """
+        Stream downloaded files ordered by id, fetching ``batch_size`` rows per query.
+
+        Keyset pagination on id keeps memory flat for large libraries and lets a caller resume
+        from the last id it finished (``after_id``).
+        """
+        pass
+
+    @abstractmethod
+    def iter_inventory_files(self, *, after_id: int = 0, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream anime_tv_inventory rows (including id) ordered by id, ``batch_size`` rows per query."""
+        pass
+
+    @abstractmethod
+    def get_remote_dir_snapshot(self, path: str) -> Optional[Dict[str, Any]]:
+        """Return the stored snapshot (path, mtime, child_count, scanned_at) of a remote directory, or None."""
+        pass
+
+    @abstractmethod
+    def upsert_remote_dir_snapshot(self, path: str, mtime: datetime.datetime, child_count: int) -> None:
+        """Record the mtime and child count of a fully processed remote directory."""
+        pass
+
+    @abstractmethod
+    def clear_remote_dir_snapshots(self) -> None:
+        """Forget all remote directory snapshots so the next run lists every remote path."""
+        pass
+
+    @abstractmethod
+    def add_transfer_run(self, files: int, bytes_transferred: int, elapsed_seconds: float, workers: int) -> None:
+        """Record the files, bytes and wall-clock time of a finished download run and its transfer concurrency."""
+        pass
+
+    @abstractmethod
+    def get_transfer_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the most recent transfer runs (finished_at, files, bytes_transferred, elapsed_seconds, workers), newest first."""
         pass
\ No newline at end of file
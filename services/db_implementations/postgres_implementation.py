@@ -3,24 +3,59 @@ import json
 import psycopg2
 import datetime
 import logging
-from typing import List, Dict, Any, Optional, Tuple, Union
+import threading
+import time
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
 from contextlib import contextmanager
 from models.episode import Episode
 from models.show import Show
 from services.db_implementations.db_interface import DatabaseInterface
+from services.db_implementations.show_names import EXACT_KINDS, lookup_keys, show_name_keys
 from models.downloaded_file import DownloadedFile, FileStatus
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_POOL_MIN_CONNECTIONS = 1
+DEFAULT_POOL_MAX_CONNECTIONS = 10
+DEFAULT_POOL_TIMEOUT_SECONDS = 30.0
+DEFAULT_HEALTH_CHECK_SECONDS = 60.0
+
+def create_postgres_pool_settings(config: Any) -> Dict[str, Any]:
+    """
+    Read connection pool keyword arguments for PostgresDBService from the [postgresql] section.
+
+    Recognised keys: ``pool_min_connections``, ``pool_max_connections``, ``pool_timeout_seconds``
+    and ``health_check_seconds``. The maximum is raised to at least 1 and to the minimum.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    def value(key: str, default: Any, value_type: type) -> Any:
+        return max(0, get_config_value(config, "postgresql", key, fallback=default, value_type=value_type))
+
+    min_connections = value("pool_min_connections", DEFAULT_POOL_MIN_CONNECTIONS, int)
+    return {
+        "min_connections": min_connections,
+        "max_connections": max(1, min_connections, value("pool_max_connections", DEFAULT_POOL_MAX_CONNECTIONS, int)),
+        "pool_timeout": value("pool_timeout_seconds", DEFAULT_POOL_TIMEOUT_SECONDS, float),
+        "health_check_seconds": value("health_check_seconds", DEFAULT_HEALTH_CHECK_SECONDS, float),
+    }
+
+
 class PostgresDBService(DatabaseInterface):
     """
     PostgreSQL implementation of the DatabaseInterface for Sync2NAS.
 
     Provides methods for managing TV shows, episodes, and file metadata using PostgreSQL as the backend.
 
+    Connections come from a ThreadedConnectionPool created on first use; pool_stats() and
+    health_check() report on it.
+
     Attributes:
         connection_string (str): PostgreSQL connection string.
+        min_connections (int) / max_connections (int): Pool size bounds.
 
     Methods:
         initialize(): Initialize the database schema.
@@ -40,10 +75,14 @@ class PostgresDBService(DatabaseInterface):
         add_downloaded_files(files): Add multiple downloaded files (legacy insert; maps to new schema where used).
         add_downloaded_file(file): Add a single downloaded file (legacy insert; maps to new schema where used).
         get_sftp_diffs(): Get differences between SFTP temp listing and downloaded files (by remote_path).
+        get_known_remote_paths(remote_paths): Probe which remote paths are already in downloaded_files.
         clear_downloaded_files(): Drop and recreate downloaded_files table.
         clear_sftp_temp_files(): Drop and recreate sftp_temp_files table.
+        get_remote_dir_snapshot(path) / upsert_remote_dir_snapshot(...) / clear_remote_dir_snapshots(): Remote listing snapshots.
+        add_transfer_run(...) / get_transfer_runs(limit): Download run history used for throughput estimates.
         copy_sftp_temp_to_downloaded(): Copy temp entries into downloaded_files (legacy helper).
         upsert_downloaded_file(file): Insert or update DownloadedFile by remote_path.
+        upsert_downloaded_files(files): Insert or update many DownloadedFiles in one statement and transaction.
         set_downloaded_file_hash(...): Update hash fields for a downloaded file.
         update_downloaded_file_location(...): Update current/previous path and status.
         update_downloaded_file_location_by_current_path(...): Update by current path.
@@ -52,31 +91,193 @@ class PostgresDBService(DatabaseInterface):
         get_downloaded_file_by_remote_path(path): Fetch by remote_path.
         search_downloaded_files(...): Filtered, paginated listing.
         backup_database(): Backup the database.
+        health_check(): Ping the database through the pool.
+        pool_stats(): Connection pool utilization.
+        close(): Close all pooled connections.
     """
     
-    def __init__(self, connection_string: str, read_only: bool = False) -> None:
+    def __init__(
+        self,
+        connection_string: str,
+        read_only: bool = False,
+        min_connections: int = DEFAULT_POOL_MIN_CONNECTIONS,
+        max_connections: int = DEFAULT_POOL_MAX_CONNECTIONS,
+        pool_timeout: float = DEFAULT_POOL_TIMEOUT_SECONDS,
+        health_check_seconds: float = DEFAULT_HEALTH_CHECK_SECONDS,
+    ) -> None:
         """Initialize the repository with a connection string.
         
         Args:
             connection_string: PostgreSQL connection string
             read_only: If True, database will be in read-only mode (TODO: implement read-only user)
+            min_connections: Connections the pool opens up front and keeps
+            max_connections: Upper bound on concurrent connections
+            pool_timeout: Seconds to wait for a free connection before raising PoolError
+            health_check_seconds: Ping connections idle for longer than this before reuse (0 = always)
         """
         self.connection_string = connection_string
         self.read_only = read_only
+        self.min_connections = max(0, min_connections)
+        self.max_connections = max(1, self.min_connections, max_connections)
+        self.pool_timeout = pool_timeout
+        self.health_check_seconds = health_check_seconds
+        self._show_names_ready = False
+        # The pool is created on first use so constructing the service never touches the network
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # ThreadedConnectionPool raises instead of waiting when exhausted; the semaphore makes callers wait
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._local = threading.local()
+        self._last_used: Dict[int, float] = {}
+        self._stats = {"checkouts": 0, "waits": 0, "timeouts": 0, "discarded": 0, "in_use": 0, "peak_in_use": 0}
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.min_connections, self.max_connections, self.connection_string)
+                logger.info(f"PostgreSQL pool created (min={self.min_connections}, max={self.max_connections})")
+            return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """Ping a pooled connection that has been idle longer than health_check_seconds."""
+        if conn.closed:
+            return False
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle <= self.health_check_seconds:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding unhealthy PostgreSQL connection: {e}")
+            return False
+
+    def _checkout(self):
+        """Take a healthy connection from the pool, waiting up to pool_timeout for a free slot."""
+        if not self._slots.acquire(blocking=False):
+            with self._pool_lock:
+                self._stats["waits"] += 1
+            if not self._slots.acquire(timeout=self.pool_timeout):
+                with self._pool_lock:
+                    self._stats["timeouts"] += 1
+                raise PoolError(f"No PostgreSQL connection available within {self.pool_timeout}s (max={self.max_connections})")
+        try:
+            pool = self._get_pool()
+            for _ in range(self.max_connections + 1):
+                conn = pool.getconn()
+                if self._is_healthy(conn):
+                    break
+                self._discard(pool, conn)
+            else:
+                raise PoolError("Could not obtain a healthy PostgreSQL connection")
+        except Exception:
+            self._slots.release()
+            raise
+        with self._pool_lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+        return conn
+
+    def _discard(self, pool: Optional[ThreadedConnectionPool], conn) -> None:
+        with self._pool_lock:
+            self._stats["discarded"] += 1
+            self._last_used.pop(id(conn), None)
+        self._put(pool, conn, close=True)
+
+    @staticmethod
+    def _put(pool: Optional[ThreadedConnectionPool], conn, close: bool = False) -> None:
+        try:
+            if pool is None:
+                raise PoolError("pool closed")
+            pool.putconn(conn, close=close)
+        except PoolError:
+            # The pool was closed (and possibly recreated) while the connection was checked out
+            if not conn.closed:
+                conn.close()
+
+    def _release(self, conn, broken: bool = False) -> None:
+        pool = self._pool
+        try:
+            if broken or conn.closed:
+                self._discard(pool, conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._put(pool, conn)
+        finally:
+            with self._pool_lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
 
     @contextmanager
     def _connection(self):
-        """Context manager to get a connection to the database."""
-        conn = psycopg2.connect(self.connection_string)
+        """
+        Context manager yielding a pooled connection.
+
+        The outermost block commits on success (rolls back on error) and returns the connection
+        to the pool; nested blocks in the same thread reuse it and share its transaction.
+        Connections that fail with a connection-level error are closed instead of reused.
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+        conn = self._checkout()
+        self._local.conn = conn
+        broken = False
         try:
             yield conn
             conn.commit()
         except psycopg2.Error as e:
             logger.exception(f"Error in database operation: {e}")
-            conn.rollback()
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) or bool(conn.closed)
+            if not broken:
+                conn.rollback()
+            raise
+        except BaseException:
+            if not conn.closed:
+                conn.rollback()
             raise
         finally:
-            conn.close()
+            self._local.conn = None
+            self._release(conn, broken=broken)
+
+    def health_check(self) -> bool:
+        """Run ``SELECT 1`` on a pooled connection; False if the database cannot be reached."""
+        try:
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    return cursor.fetchone() == (1,)
+        except (psycopg2.Error, PoolError) as e:
+            logger.warning(f"PostgreSQL health check failed: {e}")
+            return False
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool utilization: configured bounds, connections in use and idle, peak use,
+        checkouts, callers that had to wait (or timed out) and connections discarded as unhealthy.
+        """
+        with self._pool_lock:
+            stats = dict(self._stats)
+            idle = len(self._pool._pool) if self._pool is not None else 0
+        stats.update(
+            min_connections=self.min_connections,
+            max_connections=self.max_connections,
+            idle=idle,
+            utilization=round(stats["in_use"] / self.max_connections, 3),
+        )
+        return stats
+
+    def close(self) -> None:
+        """Close every pooled connection; the pool is recreated on next use."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            self._last_used.clear()
+        if pool is not None:
+            pool.closeall()
 
     def _create_table_tv_shows(self, cursor) -> None:
         cursor.execute('''CREATE TABLE IF NOT EXISTS tv_shows (
@@ -169,6 +370,80 @@ class PostgresDBService(DatabaseInterface):
             is_dir BOOLEAN NOT NULL
         )''')
 
+    def _create_table_remote_dir_snapshots(self, cursor) -> None:
+        cursor.execute('''CREATE TABLE IF NOT EXISTS remote_dir_snapshots (
+            path TEXT PRIMARY KEY,
+            mtime TIMESTAMP NOT NULL,
+            child_count INTEGER NOT NULL,
+            scanned_at TIMESTAMP NOT NULL
+        )''')
+
+    def _create_table_transfer_runs(self, cursor) -> None:
+        cursor.execute('''CREATE TABLE IF NOT EXISTS transfer_runs (
+            id SERIAL PRIMARY KEY,
+            finished_at TIMESTAMP NOT NULL,
+            files INTEGER NOT NULL,
+            bytes_transferred BIGINT NOT NULL,
+            elapsed_seconds DOUBLE PRECISION NOT NULL,
+            workers INTEGER NOT NULL
+        )''')
+
+    def _create_table_show_names(self, cursor) -> None:
+        cursor.execute('''CREATE TABLE IF NOT EXISTS show_names (
+            show_id INTEGER NOT NULL REFERENCES tv_shows(id),
+            normalized_name TEXT NOT NULL,
+            kind TEXT NOT NULL
+        )''')
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_show_names_name ON show_names(normalized_name, kind, show_id)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_show_names_show_id ON show_names(show_id)")
+
+    def _ensure_show_names(self, cursor) -> None:
+        """Create show_names on first use and index any show that has no rows yet (e.g. added before the table existed)."""
+        if self._show_names_ready:
+            return
+        self._create_table_show_names(cursor)
+        cursor.execute(
+            "SELECT id, sys_name, tmdb_name, tmdb_aliases FROM tv_shows "
+            "WHERE id NOT IN (SELECT show_id FROM show_names)"
+        )
+        rows = cursor.fetchall()
+        for show_id, sys_name, tmdb_name, tmdb_aliases in rows:
+            self._insert_show_names(cursor, show_id, show_name_keys(sys_name, tmdb_name, tmdb_aliases))
+        if rows:
+            logger.info(f"Indexed names of {len(rows)} show(s) in show_names")
+        self._show_names_ready = True
+
+    @staticmethod
+    def _insert_show_names(cursor, show_id: int, keys: List[Tuple[str, str]]) -> None:
+        if keys:
+            execute_values(
+                cursor,
+                "INSERT INTO show_names (show_id, normalized_name, kind) VALUES %s ON CONFLICT DO NOTHING",
+                [(show_id, name, kind) for name, kind in keys],
+            )
+
+    def _find_show_by_name(self, cursor, name: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return the first show (by id) that name matches, with the match type, using the show_names index."""
+        exact, parts = lookup_keys(name)
+        self._ensure_show_names(cursor)
+        part_clause = " OR n.normalized_name = ANY(%s)" if parts else ""
+        params: List[Any] = [exact, list(EXACT_KINDS), exact, list(EXACT_KINDS)] + ([parts] if parts else [])
+        cursor.execute(f"""
+            SELECT t.*, (n.normalized_name = %s AND n.kind = ANY(%s)) AS standard_match
+            FROM show_names n JOIN tv_shows t ON t.id = n.show_id
+            WHERE (n.normalized_name = %s AND n.kind = ANY(%s)){part_clause}
+            ORDER BY t.id, standard_match DESC
+            LIMIT 1
+        """, params)
+        columns = [desc[0] for desc in cursor.description]
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        show = dict(zip(columns, row))
+        return show, "Standard Match" if show.pop("standard_match") else "Set Match"
+
     def initialize(self) -> None:
         """Initialize the database schema."""
         with self._connection() as conn:
@@ -178,13 +453,20 @@ class PostgresDBService(DatabaseInterface):
             self._create_table_downloaded_files(cursor)
             self._create_table_sftp_temp_files(cursor)
             self._create_table_inventory(cursor)
+            self._create_table_remote_dir_snapshots(cursor)
+            self._create_table_transfer_runs(cursor)
+            self._create_table_show_names(cursor)
             conn.commit()
             logger.info("Database initialized successfully")
 
     def add_show(self, show: Any) -> None:
         """Add a show to the database."""
+        values = show.to_db_tuple()
+        # Column order of to_db_tuple: sys_name, sys_path, tmdb_name, tmdb_aliases, ...
+        sys_name, tmdb_name, tmdb_aliases = values[0], values[2], values[3]
         with self._connection() as conn:
             cursor = conn.cursor()
+            self._ensure_show_names(cursor)
             cursor.execute('''
                 INSERT INTO tv_shows (
                     sys_name, sys_path, tmdb_name, tmdb_aliases, tmdb_id,
@@ -193,8 +475,12 @@ class PostgresDBService(DatabaseInterface):
                     tmdb_episode_groups, tmdb_episodes_fetched_at, tmdb_status,
                     tmdb_external_ids, fetched_at
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', show.to_db_tuple())
+                RETURNING id
+            ''', values)
+            show_id = cursor.fetchone()[0]
+            self._insert_show_names(cursor, show_id, show_name_keys(sys_name, tmdb_name, tmdb_aliases))
             conn.commit()
+            self._bump_shows_version()
             logger.info(f"Inserted show: {show.tmdb_name}")
 
     def add_episode(self, episode: Any) -> None:
@@ -243,27 +529,10 @@ class PostgresDBService(DatabaseInterface):
     def show_exists(self, name: str) -> bool:
         """Check if a show exists based on name or aliases."""
         with self._connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT sys_name, tmdb_name, tmdb_aliases FROM tv_shows')
-            for row in cursor.fetchall():
-                sys_name, tmdb_name, tmdb_aliases = row
-                aliases = [a.strip().lower() for a in (tmdb_aliases or "").split(",") if a.strip()]
-                match_candidates = [sys_name.lower(), tmdb_name.lower()] + aliases
-
-                # Check variations
-                name_set = {x.strip() for x in set(name.lower().split(','))}
-                sys_name_set = {x.strip() for x in set(sys_name.lower().split(','))}
-                alias_set = {x.strip() for x in set(aliases)}
-                tmdb_name_set = {x.strip() for x in set(tmdb_name.lower().split(','))}
-                set_match_candidates = sys_name_set | alias_set | tmdb_name_set
-                
-                if name.lower() in match_candidates:
-                    logger.info(f"Show {name} already exists in the database. (Standard Match)")
-                    return True
-                
-                if name_set.intersection(set_match_candidates) and len(name_set) > 1:
-                    logger.info(f"Show {name} already exists in the database. (Set Match)")
-                    return True
+            found = self._find_show_by_name(conn.cursor(), name)
+        if found:
+            logger.info(f"Show {name} already exists in the database. ({found[1]})")
+            return True
         return False
 
     def get_show_by_sys_name(self, sys_name: str) -> Optional[Dict[str, Any]]:
@@ -280,27 +549,10 @@ class PostgresDBService(DatabaseInterface):
     def get_show_by_name_or_alias(self, name: str) -> Optional[Dict[str, Any]]:
         """Get a show by name or alias."""
         with self._connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM tv_shows")
-            columns = [desc[0] for desc in cursor.description]
-            for row in cursor.fetchall():
-                row_dict = dict(zip(columns, row))
-                aliases = [a.strip().lower() for a in (row_dict["tmdb_aliases"] or "").split(",") if a.strip()]
-                match_candidates = [row_dict["sys_name"].lower(), row_dict["tmdb_name"].lower()] + aliases
-
-                name_set = {x.strip() for x in set(name.lower().split(','))}
-                sys_name_set = {x.strip() for x in set(row_dict["sys_name"].lower().split(','))}
-                alias_set = {x.strip() for x in set(aliases)}
-                tmdb_name_set = {x.strip() for x in set(row_dict["tmdb_name"].lower().split(','))}
-                set_match_candidates = sys_name_set | alias_set | tmdb_name_set
-
-                if name.lower() in match_candidates:
-                    logger.info(f"Show {name} found in database. (Standard Match)")
-                    return row_dict
-                
-                if name_set.intersection(set_match_candidates) and len(name_set) > 1:
-                    logger.info(f"Show {name} found in database. (Set Match)")
-                    return row_dict
+            found = self._find_show_by_name(conn.cursor(), name)
+        if found:
+            logger.info(f"Show {name} found in database. ({found[1]})")
+            return found[0]
         return None
 
     def get_show_by_tmdb_id(self, tmdb_id: int) -> Optional[Dict[str, Any]]:
@@ -454,6 +706,18 @@ class PostgresDBService(DatabaseInterface):
             logger.debug(f"SFTP diff found {len(diffs)} new or changed files.")
             return diffs
 
+    def get_known_remote_paths(self, remote_paths: List[str]) -> Set[str]:
+        """Return the subset of remote_paths already recorded in downloaded_files (one indexed probe)."""
+        if not remote_paths:
+            return set()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT remote_path FROM downloaded_files WHERE remote_path = ANY(%s)",
+                (list(remote_paths),),
+            )
+            return {r[0] for r in cursor.fetchall()}
+
     def add_inventory_files(self, files: List[Dict[str, Any]]) -> None:
         """Insert a list of inventory files into the anime_tv_inventory table."""
         with self._connection() as conn:
@@ -559,15 +823,20 @@ class PostgresDBService(DatabaseInterface):
         with self._connection() as conn:
             cursor = conn.cursor()
 
-            # Delete episodes first due to foreign key constraint
+            # Delete episodes and indexed names first due to foreign key constraints
             cursor.execute("DELETE FROM episodes WHERE tmdb_id = %s", (tmdb_id,))
             deleted_episodes = cursor.rowcount
+            self._ensure_show_names(cursor)
+            cursor.execute(
+                "DELETE FROM show_names WHERE show_id IN (SELECT id FROM tv_shows WHERE tmdb_id = %s)", (tmdb_id,)
+            )
 
             # Delete show from tv_shows
             cursor.execute("DELETE FROM tv_shows WHERE tmdb_id = %s", (tmdb_id,))
             deleted_shows = cursor.rowcount
 
             conn.commit()
+            self._bump_shows_version()
             logger.info(f"Deleted {deleted_episodes} episodes and {deleted_shows} show(s) for tmdb_id={tmdb_id}")
 
     def copy_sftp_temp_to_downloaded(self) -> None:
@@ -653,11 +922,71 @@ class PostgresDBService(DatabaseInterface):
 
     # --------------------- DownloadedFile methods ---------------------
 
-    def upsert_downloaded_file(self, file: DownloadedFile) -> DownloadedFile:
-        remote_path = file.remote_path
-        row = (
+    def _df_row_to_model(self, row: Dict[str, Any]) -> DownloadedFile:
+        return DownloadedFile(
+            id=row.get("id"),
+            name=row.get("name"),
+            remote_path=row.get("remote_path"),
+            current_path=row.get("current_path"),
+            previous_path=row.get("previous_path"),
+            size=row.get("size"),
+            modified_time=row.get("modified_time"),
+            fetched_at=row.get("fetched_at"),
+            is_dir=row.get("is_dir"),
+            status=FileStatus(row.get("status")),
+            file_provided_hash_value=row.get("file_provided_hash_value"),
+            file_hash=row.get("file_hash_value"),
+            file_hash_algo=row.get("file_hash_algo"),
+            hash_calculated_at=row.get("hash_calculated_at"),
+            show_name=row.get("show_name"),
+            season=row.get("season"),
+            episode=row.get("episode"),
+            confidence=row.get("confidence"),
+            reasoning=row.get("reasoning"),
+            tmdb_id=row.get("tmdb_id"),
+            routing_attempts=row.get("routing_attempts", 0),
+            last_routing_attempt=row.get("last_routing_attempt"),
+            error_message=row.get("error_message"),
+        )
+
+    _UPSERT_DOWNLOADED_FILES_SQL = """
+        INSERT INTO downloaded_files (
+            name, remote_path, current_path, previous_path, size, modified_time, fetched_at, is_dir,
+            status, file_type, file_provided_hash_value, file_hash_value, file_hash_algo, hash_calculated_at, show_name, season,
+            episode, confidence, reasoning, tmdb_id, routing_attempts, last_routing_attempt, error_message, metadata
+        ) VALUES %s
+        ON CONFLICT (remote_path) DO UPDATE SET
+            name=EXCLUDED.name,
+            current_path=EXCLUDED.current_path,
+            previous_path=EXCLUDED.previous_path,
+            size=EXCLUDED.size,
+            modified_time=EXCLUDED.modified_time,
+            fetched_at=EXCLUDED.fetched_at,
+            is_dir=EXCLUDED.is_dir,
+            status=EXCLUDED.status,
+            file_type=EXCLUDED.file_type,
+            file_provided_hash_value=COALESCE(EXCLUDED.file_provided_hash_value, downloaded_files.file_provided_hash_value),
+            file_hash_value=COALESCE(EXCLUDED.file_hash_value, downloaded_files.file_hash_value),
+            file_hash_algo=COALESCE(EXCLUDED.file_hash_algo, downloaded_files.file_hash_algo),
+            show_name=EXCLUDED.show_name,
+            season=EXCLUDED.season,
+            episode=EXCLUDED.episode,
+            confidence=EXCLUDED.confidence,
+            reasoning=EXCLUDED.reasoning,
+            tmdb_id=EXCLUDED.tmdb_id,
+            routing_attempts=EXCLUDED.routing_attempts,
+            last_routing_attempt=EXCLUDED.last_routing_attempt,
+            error_message=EXCLUDED.error_message,
+            metadata=EXCLUDED.metadata
+        RETURNING id, remote_path
+        """
+
+    @staticmethod
+    def _downloaded_file_row(file: DownloadedFile) -> tuple:
+        """Values for one row of _UPSERT_DOWNLOADED_FILES_SQL."""
+        return (
             file.name,
-            remote_path,
+            file.remote_path,
             file.current_path,
             getattr(file, "previous_path", None),
             file.size,
@@ -681,49 +1010,30 @@ class PostgresDBService(DatabaseInterface):
             file.error_message,
             json.dumps(file.metadata) if file.metadata is not None else None,
         )
+
+    def upsert_downloaded_file(self, file: DownloadedFile) -> DownloadedFile:
+        return self.upsert_downloaded_files([file])[0]
+
+    def upsert_downloaded_files(self, files: List[DownloadedFile]) -> List[DownloadedFile]:
+        """Upsert many DownloadedFiles with one execute_values statement in a single transaction."""
+        if not files:
+            return []
+        # ON CONFLICT DO UPDATE can't touch the same row twice in one statement; the last entry wins
+        latest = {f.remote_path: f for f in files}
         with self._connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO downloaded_files (
-                    name, remote_path, current_path, previous_path, size, modified_time, fetched_at, is_dir,
-                    status, file_type, file_provided_hash_value, file_hash_value, file_hash_algo, hash_calculated_at, show_name, season,
-                    episode, confidence, reasoning, tmdb_id, routing_attempts, last_routing_attempt, error_message, metadata
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                )
-                ON CONFLICT (remote_path) DO UPDATE SET
-                    name=EXCLUDED.name,
-                    current_path=EXCLUDED.current_path,
-                    previous_path=EXCLUDED.previous_path,
-                    size=EXCLUDED.size,
-                    modified_time=EXCLUDED.modified_time,
-                    fetched_at=EXCLUDED.fetched_at,
-                    is_dir=EXCLUDED.is_dir,
-                    status=EXCLUDED.status,
-                    file_type=EXCLUDED.file_type,
-                    file_provided_hash_value=COALESCE(EXCLUDED.file_provided_hash_value, downloaded_files.file_provided_hash_value),
-                    file_hash_value=COALESCE(EXCLUDED.file_hash_value, downloaded_files.file_hash_value),
-                    file_hash_algo=COALESCE(EXCLUDED.file_hash_algo, downloaded_files.file_hash_algo),
-                    show_name=EXCLUDED.show_name,
-                    season=EXCLUDED.season,
-                    episode=EXCLUDED.episode,
-                    confidence=EXCLUDED.confidence,
-                    reasoning=EXCLUDED.reasoning,
-                    tmdb_id=EXCLUDED.tmdb_id,
-                    routing_attempts=EXCLUDED.routing_attempts,
-                    last_routing_attempt=EXCLUDED.last_routing_attempt,
-                    error_message=EXCLUDED.error_message,
-                    metadata=EXCLUDED.metadata
-                RETURNING id
-                """,
-                row,
+            returned = execute_values(
+                cursor,
+                self._UPSERT_DOWNLOADED_FILES_SQL,
+                [self._downloaded_file_row(f) for f in latest.values()],
+                fetch=True,
             )
-            res = cursor.fetchone()
-            if res:
-                file.id = res[0]
             conn.commit()
-            return file
+        ids = {remote_path: file_id for file_id, remote_path in returned}
+        for f in files:
+            f.id = ids.get(f.remote_path)
+        logger.debug(f"Upserted {len(latest)} downloaded files in one transaction.")
+        return files
 
     def set_downloaded_file_hash(self, file_id: int, algo: str, value: str, calculated_at: Optional[datetime.datetime] = None) -> None:
         if calculated_at is None:
@@ -807,6 +1117,122 @@ class PostgresDBService(DatabaseInterface):
                 )
             conn.commit()
 
+    def iter_downloaded_files(
+        self,
+        *,
+        statuses: Optional[List[FileStatus]] = None,
+        include_dirs: bool = False,
+        after_id: int = 0,
+        batch_size: int = 500,
+    ) -> Iterator[DownloadedFile]:
+        where = ["id > %s"]
+        params: list = []
+        if statuses:
+            where.append("status = ANY(%s)")
+            params.append([s.value for s in statuses])
+        if not include_dirs:
+            where.append("is_dir = FALSE")
+        query = f"SELECT * FROM downloaded_files WHERE {' AND '.join(where)} ORDER BY id LIMIT %s"
+        last_id = after_id
+        while True:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, tuple([last_id] + params + [batch_size]))
+                columns = [desc[0] for desc in cursor.description]
+                rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+            if not rows:
+                return
+            for row in rows:
+                yield self._df_row_to_model(row)
+            last_id = rows[-1]["id"]
+
+    def iter_inventory_files(self, *, after_id: int = 0, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        last_id = after_id
+        while True:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, name, size, modified_time, path, is_dir FROM anime_tv_inventory "
+                    "WHERE id > %s ORDER BY id LIMIT %s",
+                    (last_id, batch_size),
+                )
+                columns = [desc[0] for desc in cursor.description]
+                rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1]["id"]
+
+    # --------------------- Remote directory snapshots ---------------------
+    def get_remote_dir_snapshot(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            self._create_table_remote_dir_snapshots(cursor)
+            cursor.execute(
+                "SELECT path, mtime, child_count, scanned_at FROM remote_dir_snapshots WHERE path = %s",
+                (path,),
+            )
+            row = cursor.fetchone()
+            if not row:
+                return None
+            columns = [desc[0] for desc in cursor.description]
+            return dict(zip(columns, row))
+
+    def upsert_remote_dir_snapshot(self, path: str, mtime: datetime.datetime, child_count: int) -> None:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            self._create_table_remote_dir_snapshots(cursor)
+            cursor.execute(
+                """
+                INSERT INTO remote_dir_snapshots (path, mtime, child_count, scanned_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (path) DO UPDATE SET
+                    mtime = EXCLUDED.mtime,
+                    child_count = EXCLUDED.child_count,
+                    scanned_at = EXCLUDED.scanned_at
+                """,
+                (path, mtime, child_count, datetime.datetime.now()),
+            )
+            conn.commit()
+            logger.debug(f"Recorded remote dir snapshot: {path} (mtime={mtime}, children={child_count})")
+
+    def clear_remote_dir_snapshots(self) -> None:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DROP TABLE IF EXISTS remote_dir_snapshots")
+            self._create_table_remote_dir_snapshots(cursor)
+            conn.commit()
+            logger.info("remote_dir_snapshots table reset.")
+
+    # --------------------- Transfer run history ---------------------
+    def add_transfer_run(self, files: int, bytes_transferred: int, elapsed_seconds: float, workers: int) -> None:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            self._create_table_transfer_runs(cursor)
+            cursor.execute(
+                """
+                INSERT INTO transfer_runs (finished_at, files, bytes_transferred, elapsed_seconds, workers)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (datetime.datetime.now(), files, bytes_transferred, elapsed_seconds, workers),
+            )
+            conn.commit()
+            logger.debug(f"Recorded transfer run: {files} file(s), {bytes_transferred} bytes in {elapsed_seconds:.2f}s on {workers} worker(s)")
+
+    def get_transfer_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            self._create_table_transfer_runs(cursor)
+            cursor.execute(
+                """
+                SELECT finished_at, files, bytes_transferred, elapsed_seconds, workers
+                FROM transfer_runs ORDER BY id DESC LIMIT %s
+                """,
+                (limit,),
+            )
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, r)) for r in cursor.fetchall()]
+
     def update_show_aliases(self, show_id: int, new_aliases: str) -> None:
         """Update the aliases for a show by its database ID.
         
@@ -816,11 +1242,16 @@ class PostgresDBService(DatabaseInterface):
         """
         with self._connection() as conn:
             cursor = conn.cursor()
+            self._ensure_show_names(cursor)
             cursor.execute(
                 "UPDATE tv_shows SET tmdb_aliases = %s WHERE id = %s",
                 (new_aliases, show_id),
             )
+            if cursor.rowcount:
+                cursor.execute("DELETE FROM show_names WHERE show_id = %s AND kind = 'alias'", (show_id,))
+                self._insert_show_names(cursor, show_id, show_name_keys(None, None, new_aliases))
             conn.commit()
+            self._bump_shows_version()
             logger.info(f"Updated aliases for show ID {show_id} to: {new_aliases}")
 
     def get_downloaded_files_by_status(self, status: FileStatus) -> List[DownloadedFile]:
@@ -832,30 +1263,7 @@ class PostgresDBService(DatabaseInterface):
             items = []
             for r in rows:
                 row = dict(zip(columns, r))
-                items.append(DownloadedFile(
-                    id=row.get("id"),
-                    name=row.get("name"),
-                    remote_path=row.get("remote_path"),
-                    current_path=row.get("current_path"),
-                    previous_path=row.get("previous_path"),
-                    size=row.get("size"),
-                    modified_time=row.get("modified_time"),
-                    fetched_at=row.get("fetched_at"),
-                    is_dir=row.get("is_dir"),
-                    status=FileStatus(row.get("status")),
-                    file_hash=row.get("file_hash_value"),
-                    file_hash_algo=row.get("file_hash_algo"),
-                    hash_calculated_at=row.get("hash_calculated_at"),
-                    show_name=row.get("show_name"),
-                    season=row.get("season"),
-                    episode=row.get("episode"),
-                    confidence=row.get("confidence"),
-                    reasoning=row.get("reasoning"),
-                    tmdb_id=row.get("tmdb_id"),
-                    routing_attempts=row.get("routing_attempts", 0),
-                    last_routing_attempt=row.get("last_routing_attempt"),
-                    error_message=row.get("error_message"),
-                ))
+                items.append(self._df_row_to_model(row))
             return items
 
     def get_downloaded_file_by_remote_path(self, remote_path: str) -> Optional[DownloadedFile]:
@@ -867,30 +1275,7 @@ class PostgresDBService(DatabaseInterface):
             if not r:
                 return None
             row = dict(zip(columns, r))
-            return DownloadedFile(
-                id=row.get("id"),
-                name=row.get("name"),
-                remote_path=row.get("remote_path"),
-                current_path=row.get("current_path"),
-                previous_path=row.get("previous_path"),
-                size=row.get("size"),
-                modified_time=row.get("modified_time"),
-                fetched_at=row.get("fetched_at"),
-                is_dir=row.get("is_dir"),
-                status=FileStatus(row.get("status")),
-                file_hash=row.get("file_hash_value"),
-                file_hash_algo=row.get("file_hash_algo"),
-                hash_calculated_at=row.get("hash_calculated_at"),
-                show_name=row.get("show_name"),
-                season=row.get("season"),
-                episode=row.get("episode"),
-                confidence=row.get("confidence"),
-                reasoning=row.get("reasoning"),
-                tmdb_id=row.get("tmdb_id"),
-                routing_attempts=row.get("routing_attempts", 0),
-                last_routing_attempt=row.get("last_routing_attempt"),
-                error_message=row.get("error_message"),
-            )
+            return self._df_row_to_model(row)
 
     def search_downloaded_files(self,
         *,
@@ -945,30 +1330,7 @@ class PostgresDBService(DatabaseInterface):
             items = []
             for r in rows:
                 row = dict(zip(columns, r))
-                items.append(DownloadedFile(
-                    id=row.get("id"),
-                    name=row.get("name"),
-                    remote_path=row.get("remote_path"),
-                    current_path=row.get("current_path"),
-                    previous_path=row.get("previous_path"),
-                    size=row.get("size"),
-                    modified_time=row.get("modified_time"),
-                    fetched_at=row.get("fetched_at"),
-                    is_dir=row.get("is_dir"),
-                    status=FileStatus(row.get("status")),
-                    file_hash=row.get("file_hash_value"),
-                    file_hash_algo=row.get("file_hash_algo"),
-                    hash_calculated_at=row.get("hash_calculated_at"),
-                    show_name=row.get("show_name"),
-                    season=row.get("season"),
-                    episode=row.get("episode"),
-                    confidence=row.get("confidence"),
-                    reasoning=row.get("reasoning"),
-                    tmdb_id=row.get("tmdb_id"),
-                    routing_attempts=row.get("routing_attempts", 0),
-                    last_routing_attempt=row.get("last_routing_attempt"),
-                    error_message=row.get("error_message"),
-                ))
+                items.append(self._df_row_to_model(row))
             return items, int(total)
 
     def get_downloaded_file_by_id(self, file_id: int) -> Optional[DownloadedFile]:
@@ -980,27 +1342,4 @@ class PostgresDBService(DatabaseInterface):
             if not r:
                 return None
             row = dict(zip(columns, r))
-            return DownloadedFile(
-                id=row.get("id"),
-                name=row.get("name"),
-                remote_path=row.get("remote_path"),
-                current_path=row.get("current_path"),
-                previous_path=row.get("previous_path"),
-                size=row.get("size"),
-                modified_time=row.get("modified_time"),
-                fetched_at=row.get("fetched_at"),
-                is_dir=row.get("is_dir"),
-                status=FileStatus(row.get("status")),
-                file_hash=row.get("file_hash_value"),
-                file_hash_algo=row.get("file_hash_algo"),
-                hash_calculated_at=row.get("hash_calculated_at"),
-                show_name=row.get("show_name"),
-                season=row.get("season"),
-                episode=row.get("episode"),
-                confidence=row.get("confidence"),
-                reasoning=row.get("reasoning"),
-                tmdb_id=row.get("tmdb_id"),
-                routing_attempts=row.get("routing_attempts", 0),
-                last_routing_attempt=row.get("last_routing_attempt"),
-                error_message=row.get("error_message"),
-            )
\ No newline at end of file
+            return self._df_row_to_model(row)
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Normalized show-name keys for the ``show_names`` lookup table.
+
+Every show gets one row per name it can be found by: its sys_name, its tmdb_name and each alias
+in ``tmdb_aliases``, lower-cased and stripped. A sys_name or tmdb_name containing commas also
+gets a ``*_part`` row per comma-separated part. These rows let the database answer both
+lookups that get_show_by_name_or_alias and show_exists support with one indexed query:
+
+- Standard match: the whole name equals a sys_name, tmdb_name or alias.
+- Set match: the name is a comma-separated list of two or more parts, and one of the parts
+  equals any key of the show.
+"""
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Kinds a whole-name (standard) match may hit; set matches may hit any kind
+EXACT_KINDS = ("sys_name", "tmdb_name", "alias")
+
+
+def normalize_show_name(name: Optional[str]) -> str:
+    return (name or "").strip().lower()
+
+
+def show_name_keys(sys_name: Optional[str], tmdb_name: Optional[str], tmdb_aliases: Optional[str]) -> List[Tuple[str, str]]:
+    """Return the distinct (normalized_name, kind) rows for a show; empty names are left out."""
+    keys: List[Tuple[str, str]] = []
+    seen: Set[Tuple[str, str]] = set()
+
+    def add(name: Optional[str], kind: str) -> None:
+        key = (normalize_show_name(name), kind)
+        if key[0] and key not in seen:
+            seen.add(key)
+            keys.append(key)
+
+    for kind, value in (("sys_name", sys_name), ("tmdb_name", tmdb_name)):
+        add(value, kind)
+        if value and "," in value:
+            for part in value.split(","):
+                add(part, f"{kind}_part")
+    for alias in (tmdb_aliases or "").split(","):
+        add(alias, "alias")
+    return keys
+
+
+def lookup_keys(name: Optional[str]) -> Tuple[str, List[str]]:
+    """Return the standard-match key of ``name`` and its set-match parts (empty unless it has two or more)."""
+    parts = sorted({normalize_show_name(p) for p in (name or "").split(",")})
+    return normalize_show_name(name), parts if len(parts) > 1 else []
+
+
+def match_kind(name: Optional[str], keys: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """Return "Standard Match", "Set Match" or None for ``name`` against a show's keys."""
+    exact, parts = lookup_keys(name)
+    keys = list(keys)
+    if any(key == exact and kind in EXACT_KINDS for key, kind in keys):
+        return "Standard Match"
+    if parts and {key for key, _ in keys}.intersection(parts):
+        return "Set Match"
+    return None
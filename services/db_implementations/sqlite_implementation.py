@@ -4,24 +4,113 @@ import json
 import sqlite3
 import datetime
 import logging
-import shutil
-from typing import List, Dict, Any, Optional, Tuple, Union
+import threading
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple, Union
 from contextlib import contextmanager
 from models.episode import Episode
 from services.db_implementations.db_interface import DatabaseInterface
+from services.db_implementations.show_names import EXACT_KINDS, lookup_keys, match_kind, show_name_keys
 from models.show import Show
 from models.downloaded_file import DownloadedFile, FileStatus
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_JOURNAL_MODE = "wal"
+DEFAULT_SYNCHRONOUS = "normal"
+DEFAULT_CACHE_SIZE_KIB = 65536
+DEFAULT_MMAP_SIZE_MB = 256
+DEFAULT_CACHED_STATEMENTS = 256
+
+_JOURNAL_MODES = {"delete", "truncate", "persist", "memory", "wal", "off"}
+_SYNCHRONOUS_MODES = {"off", "normal", "full", "extra"}
+
+
+@dataclass
+class SQLiteSettings:
+    """
+    Pragmas applied to every connection SQLiteDBService opens.
+
+    Attributes:
+        journal_mode (str): Journal mode set on writer connections; WAL lets readers run alongside a writer.
+        synchronous (str): fsync policy; NORMAL is durable across application crashes in WAL mode.
+        cache_size_kib (int): Page cache per connection in KiB (0 = SQLite default).
+        mmap_size_mb (int): Memory-mapped I/O window in MiB (0 = disabled).
+        cached_statements (int): Prepared statements kept per connection.
+    """
+    journal_mode: str = DEFAULT_JOURNAL_MODE
+    synchronous: str = DEFAULT_SYNCHRONOUS
+    cache_size_kib: int = DEFAULT_CACHE_SIZE_KIB
+    mmap_size_mb: int = DEFAULT_MMAP_SIZE_MB
+    cached_statements: int = DEFAULT_CACHED_STATEMENTS
+
+
+def create_sqlite_settings(config: Any) -> SQLiteSettings:
+    """
+    Create SQLiteSettings from the [sqlite] configuration section.
+
+    Recognised keys: ``journal_mode``, ``synchronous``, ``cache_size_kib``, ``mmap_size_mb`` and
+    ``cached_statements``. Unknown modes fall back to the defaults; negative sizes are raised to 0.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    def mode(key: str, default: str, allowed: Set[str]) -> str:
+        value = str(get_config_value(config, "sqlite", key, fallback=default)).strip().lower()
+        if value not in allowed:
+            logger.warning(f"Ignoring unsupported [sqlite] {key} = {value}; using {default}")
+            return default
+        return value
+
+    def size(key: str, default: int) -> int:
+        return max(0, get_config_value(config, "sqlite", key, fallback=default, value_type=int))
+
+    return SQLiteSettings(
+        journal_mode=mode("journal_mode", DEFAULT_JOURNAL_MODE, _JOURNAL_MODES),
+        synchronous=mode("synchronous", DEFAULT_SYNCHRONOUS, _SYNCHRONOUS_MODES),
+        cache_size_kib=size("cache_size_kib", DEFAULT_CACHE_SIZE_KIB),
+        mmap_size_mb=size("mmap_size_mb", DEFAULT_MMAP_SIZE_MB),
+        cached_statements=size("cached_statements", DEFAULT_CACHED_STATEMENTS),
+    )
+
+
+def _close_connections(connections: List[sqlite3.Connection]) -> None:
+    while connections:
+        try:
+            connections.pop().close()
+        except sqlite3.Error as e:
+            logger.debug(f"Error closing SQLite connection: {e}")
+
+
+class _ThreadConnections:
+    """
+    One thread's connections and _connection() nesting depth.
+
+    Held only by the service's threading.local, so it is dropped when the thread exits and the
+    finalizer closes its connections; close() closes them early.
+    """
+
+    def __init__(self) -> None:
+        self.writer: Optional[sqlite3.Connection] = None
+        self.reader: Optional[sqlite3.Connection] = None
+        self.depth = 0
+        self.opened: List[sqlite3.Connection] = []
+        weakref.finalize(self, _close_connections, self.opened)
+
+
 class SQLiteDBService(DatabaseInterface):
     """
     SQLite implementation of the DatabaseInterface for Sync2NAS.
 
     Provides methods for managing TV shows, episodes, and file metadata using SQLite as the backend.
 
+    Each thread keeps a long-lived writer connection and, for pure reads, a separate read-only
+    connection (see _connection and _read_connection); pragmas come from SQLiteSettings.
+
     Attributes:
         db_file (str): Path to the SQLite database file.
+        settings (SQLiteSettings): Journal mode, cache and statement-cache pragmas.
 
     Methods:
         initialize(): Initialize the database schema.
@@ -41,10 +130,13 @@ class SQLiteDBService(DatabaseInterface):
         add_downloaded_files(files): Add multiple downloaded files (legacy insert; maps to new schema).
         add_downloaded_file(file): Add a single downloaded file (legacy insert; maps to new schema).
         get_sftp_diffs(): Get differences between SFTP temp listing and downloaded files (by remote_path).
+        get_known_remote_paths(remote_paths): Probe which remote paths are already in downloaded_files.
         clear_downloaded_files(): Drop and recreate downloaded_files table.
         clear_sftp_temp_files(): Drop and recreate sftp_temp_files table.
         copy_sftp_temp_to_downloaded(): Copy temp entries into downloaded_files with defaults.
+        add_transfer_run(...) / get_transfer_runs(limit): Download run history used for throughput estimates.
         upsert_downloaded_file(file): Insert or update DownloadedFile by remote_path.
+        upsert_downloaded_files(files): Insert or update many DownloadedFiles in one transaction.
         set_downloaded_file_hash(...): Update hash fields for a downloaded file.
         update_downloaded_file_location(...): Update current/previous path and status.
         update_downloaded_file_location_by_current_path(...): Update by current path.
@@ -53,48 +145,151 @@ class SQLiteDBService(DatabaseInterface):
         get_downloaded_file_by_remote_path(path): Fetch by remote_path.
         search_downloaded_files(...): Filtered, paginated listing.
         backup_database(): Backup the database.
+        close(): Close the connections opened by this service.
     """
     
-    def __init__(self, db_file: str, read_only: bool = False) -> None:
+    def __init__(self, db_file: str, read_only: bool = False, settings: Optional["SQLiteSettings"] = None) -> None:
         """Initialize the repository with a database file path.
         
         Args:
             db_file: Path to the SQLite database file
             read_only: If True, database will be opened in read-only mode
+            settings: Connection pragmas; defaults to SQLiteSettings()
         """
         self.db_file = db_file
         self.read_only = read_only
+        self.settings = settings or SQLiteSettings()
+        self._show_names_ready = False
+        # One writer and one reader connection per thread, closed when the thread exits
+        self._local = threading.local()
+        self._states: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
         self._register_sqlite_datetime_adapters()
 
+    def _open_connection(self, reader: bool) -> sqlite3.Connection:
+        """Open a connection and apply the per-connection pragmas from ``self.settings``."""
+        s = self.settings
+        kwargs = dict(detect_types=sqlite3.PARSE_DECLTYPES, timeout=10.0,
+                      cached_statements=s.cached_statements, check_same_thread=False)
+        if reader and self._is_memory_db():
+            raise sqlite3.OperationalError("in-memory databases have no separate reader connection")
+        if (reader or self.read_only) and not self._is_memory_db():
+            uri = Path(os.path.abspath(self.db_file)).as_uri() + "?mode=ro"
+            try:
+                conn = sqlite3.connect(uri, uri=True, **kwargs)
+            except sqlite3.OperationalError:
+                if reader:
+                    raise
+                # Fallback to regular connection for read-only
+                conn = sqlite3.connect(self.db_file, **kwargs)
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn = sqlite3.connect(self.db_file, **kwargs)
+            if s.journal_mode:
+                mode = conn.execute(f"PRAGMA journal_mode = {s.journal_mode}").fetchone()
+                if mode and str(mode[0]).lower() != s.journal_mode.lower() and not self._is_memory_db():
+                    logger.warning(f"SQLite journal_mode={s.journal_mode} not available for {self.db_file}; using {mode[0]}")
+        if s.synchronous:
+            conn.execute(f"PRAGMA synchronous = {s.synchronous}")
+        if s.cache_size_kib:
+            conn.execute(f"PRAGMA cache_size = -{int(s.cache_size_kib)}")
+        if s.mmap_size_mb:
+            conn.execute(f"PRAGMA mmap_size = {int(s.mmap_size_mb) * 1024 * 1024}")
+        return conn
+
+    def _is_memory_db(self) -> bool:
+        return self.db_file in ("", ":memory:") or str(self.db_file).startswith("file::memory:")
+
+    def _thread_state(self) -> "_ThreadConnections":
+        """Return this thread's connection state, creating it on first use."""
+        state = getattr(self._local, "state", None)
+        if state is None:
+            state = _ThreadConnections()
+            with self._connections_lock:
+                self._local.state = state
+                self._states.add(state)
+        return state
+
+    def _thread_connection(self, reader: bool) -> sqlite3.Connection:
+        """Return this thread's writer (or reader) connection, opening it on first use."""
+        state = self._thread_state()
+        name = "reader" if reader else "writer"
+        conn = getattr(state, name)
+        if conn is None:
+            conn = self._open_connection(reader)
+            setattr(state, name, conn)
+            state.opened.append(conn)
+        return conn
+
     @contextmanager
     def _connection(self):
-        """Context manager to get a connection to the database."""
+        """
+        Context manager yielding this thread's long-lived connection.
+
+        The outermost block commits on success (rolls back on error); nested blocks share its
+        transaction. row_factory is reset on entry and restored on exit.
+        """
         try:
-            if self.read_only:
-                # For read-only mode, try URI mode first, fallback to regular mode
-                try:
-                    uri = f"file:{self.db_file}?mode=ro"
-                    conn = sqlite3.connect(uri, detect_types=sqlite3.PARSE_DECLTYPES, timeout=10.0)
-                except sqlite3.OperationalError:
-                    # Fallback to regular connection for read-only
-                    conn = sqlite3.connect(self.db_file, detect_types=sqlite3.PARSE_DECLTYPES, timeout=10.0)
-            else:
-                conn = sqlite3.connect(self.db_file, detect_types=sqlite3.PARSE_DECLTYPES, timeout=10.0)
-            
-            try:
-                yield conn
-                if not self.read_only:
-                    conn.commit()
-            except sqlite3.Error as e:
-                logger.exception(f"Error in database operation: {e}")
-                if not self.read_only:
-                    conn.rollback()
-                raise  # Re-raise the error
-            finally:
-                conn.close()
+            conn = self._thread_connection(reader=False)
         except Exception as e:
             logger.exception(f"Failed to connect to database {self.db_file}: {e}")
             raise
+        state = self._thread_state()
+        depth = state.depth
+        saved_factory = conn.row_factory
+        conn.row_factory = None
+        state.depth = depth + 1
+        try:
+            yield conn
+            if depth == 0 and not self.read_only:
+                conn.commit()
+        except BaseException as e:
+            if depth == 0:
+                if isinstance(e, sqlite3.Error):
+                    logger.exception(f"Error in database operation: {e}")
+                # Any failure must end the transaction, or the next call on this thread would commit it
+                if not self.read_only:
+                    conn.rollback()
+            raise
+        finally:
+            state.depth = depth
+            conn.row_factory = saved_factory
+
+    @contextmanager
+    def _read_connection(self):
+        """
+        Context manager yielding this thread's read-only connection.
+
+        In WAL mode readers never wait on the writer, so API reads proceed while another thread or
+        process persists downloads. Inside an open _connection() block (or for in-memory
+        databases) the writer connection is used so the caller sees its own uncommitted changes.
+        """
+        if self._thread_state().depth or self.read_only:
+            with self._connection() as conn:
+                yield conn
+            return
+        try:
+            # The writer is opened first so the WAL and shared-memory files exist for the reader
+            self._thread_connection(reader=False)
+            conn = self._thread_connection(reader=True)
+        except sqlite3.Error:
+            with self._connection() as conn:
+                yield conn
+            return
+        saved_factory = conn.row_factory
+        conn.row_factory = None
+        try:
+            yield conn
+        finally:
+            conn.row_factory = saved_factory
+
+    def close(self) -> None:
+        """Close every connection this service opened, in all threads."""
+        with self._connections_lock:
+            states, self._states = list(self._states), weakref.WeakSet()
+            self._local = threading.local()
+        for state in states:
+            _close_connections(state.opened)
 
     def __str__(self):
         """Return a string representation of the repository."""
@@ -234,6 +429,91 @@ class SQLiteDBService(DatabaseInterface):
                             fetched_at DATETIME NOT NULL,
                             is_dir BOOLEAN NOT NULL)''')
 
+    def _create_table_remote_dir_snapshots(self, conn: sqlite3.Connection) -> None:
+        conn.execute('''CREATE TABLE IF NOT EXISTS remote_dir_snapshots (
+                            path TEXT PRIMARY KEY,
+                            mtime DATETIME NOT NULL,
+                            child_count INTEGER NOT NULL,
+                            scanned_at DATETIME NOT NULL)''')
+
+    def _create_table_transfer_runs(self, conn: sqlite3.Connection) -> None:
+        conn.execute('''CREATE TABLE IF NOT EXISTS transfer_runs (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            finished_at DATETIME NOT NULL,
+                            files INTEGER NOT NULL,
+                            bytes_transferred INTEGER NOT NULL,
+                            elapsed_seconds REAL NOT NULL,
+                            workers INTEGER NOT NULL)''')
+
+    def _create_table_show_names(self, conn: sqlite3.Connection) -> None:
+        conn.execute('''CREATE TABLE IF NOT EXISTS show_names (
+                            show_id INTEGER NOT NULL,
+                            normalized_name TEXT NOT NULL,
+                            kind TEXT NOT NULL,
+                            CONSTRAINT FK_show_names_tv_shows FOREIGN KEY (show_id) REFERENCES tv_shows(id))''')
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_show_names_name ON show_names(normalized_name, kind, show_id)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_show_names_show_id ON show_names(show_id)")
+
+    def _ensure_show_names(self, conn: sqlite3.Connection) -> None:
+        """Create show_names on first use and index any show that has no rows yet (e.g. added before the table existed)."""
+        if self._show_names_ready or self.read_only:
+            return
+        self._create_table_show_names(conn)
+        rows = conn.execute(
+            "SELECT id, sys_name, tmdb_name, tmdb_aliases FROM tv_shows "
+            "WHERE id NOT IN (SELECT show_id FROM show_names)"
+        ).fetchall()
+        for show_id, sys_name, tmdb_name, tmdb_aliases in rows:
+            self._insert_show_names(conn, show_id, show_name_keys(sys_name, tmdb_name, tmdb_aliases))
+        if rows:
+            logger.info(f"Indexed names of {len(rows)} show(s) in show_names")
+        self._show_names_ready = True
+
+    @staticmethod
+    def _insert_show_names(conn: sqlite3.Connection, show_id: int, keys: List[Tuple[str, str]]) -> None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO show_names (show_id, normalized_name, kind) VALUES (?, ?, ?)",
+            [(show_id, name, kind) for name, kind in keys],
+        )
+
+    def _find_show_by_name(self, conn: sqlite3.Connection, name: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return the first show (by id) that name matches, with the match type, using the show_names index."""
+        exact, parts = lookup_keys(name)
+        self._ensure_show_names(conn)
+        kinds = ", ".join("?" * len(EXACT_KINDS))
+        part_clause = f" OR n.normalized_name IN ({', '.join('?' * len(parts))})" if parts else ""
+        query = f"""
+            SELECT t.*, CASE WHEN n.normalized_name = ? AND n.kind IN ({kinds}) THEN 1 ELSE 0 END AS standard_match
+            FROM show_names n JOIN tv_shows t ON t.id = n.show_id
+            WHERE (n.normalized_name = ? AND n.kind IN ({kinds})){part_clause}
+            ORDER BY t.id, standard_match DESC
+            LIMIT 1
+        """
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute(query, (exact, *EXACT_KINDS, exact, *EXACT_KINDS, *parts)).fetchone()
+        except sqlite3.OperationalError:
+            # Read-only access to a database that predates show_names: match in Python instead
+            for row in conn.execute("SELECT * FROM tv_shows ORDER BY id").fetchall():
+                match = match_kind(name, show_name_keys(row["sys_name"], row["tmdb_name"], row["tmdb_aliases"]))
+                if match:
+                    return dict(row), match
+            return None
+        if row is None:
+            return None
+        show = dict(row)
+        return show, "Standard Match" if show.pop("standard_match") else "Set Match"
+
+    def _lookup_show_by_name(self, name: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """_find_show_by_name on the reader connection, once show_names has been built by the writer."""
+        if not self._show_names_ready and not self.read_only:
+            with self._connection() as conn:
+                self._ensure_show_names(conn)
+        with self._read_connection() as conn:
+            return self._find_show_by_name(conn, name)
+
     def _initialize_database(self):
         """Initialize the database schema by creating necessary tables if they don't exist."""
         _ = self._check_database_path()
@@ -243,6 +523,9 @@ class SQLiteDBService(DatabaseInterface):
             self._create_table_downloaded_files(conn)
             self._create_table_sftp_temp_files(conn)
             self._create_table_inventory(conn)
+            self._create_table_remote_dir_snapshots(conn)
+            self._create_table_transfer_runs(conn)
+            self._create_table_show_names(conn)
             conn.commit()
             logger.info("Database initialized successfully")
  
@@ -255,8 +538,12 @@ class SQLiteDBService(DatabaseInterface):
   
     def add_show(self, show) -> None:
         """Add a show to the database."""
+        values = show.to_db_tuple()
+        # Column order of to_db_tuple: sys_name, sys_path, tmdb_name, tmdb_aliases, ...
+        sys_name, tmdb_name, tmdb_aliases = values[0], values[2], values[3]
         with self._connection() as conn:
-            conn.execute('''
+            self._ensure_show_names(conn)
+            cursor = conn.execute('''
                 INSERT INTO tv_shows (
                     sys_name, sys_path, tmdb_name, tmdb_aliases, tmdb_id,
                     tmdb_first_aired, tmdb_last_aired, tmdb_year,
@@ -264,8 +551,12 @@ class SQLiteDBService(DatabaseInterface):
                     tmdb_episode_groups, tmdb_episodes_fetched_at, tmdb_status, 
                     tmdb_external_ids, fetched_at
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', show.to_db_tuple())
+            ''', values)
+            self._insert_show_names(
+                conn, cursor.lastrowid, show_name_keys(sys_name, tmdb_name, tmdb_aliases)
+            )
             conn.commit()
+            self._bump_shows_version()
             logger.info(f"Inserted show: {show.tmdb_name}")
     
     def add_episode(self, episode) -> None:
@@ -322,34 +613,15 @@ class SQLiteDBService(DatabaseInterface):
 
     def show_exists(self, name: str) -> bool:
         """Check if a show exists based on sys_name, tmdb_name, or aliases."""
-        with self._connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT sys_name, tmdb_name, tmdb_aliases FROM tv_shows')
-            for row in cursor.fetchall():
-                sys_name, tmdb_name, tmdb_aliases = row
-                aliases = [a.strip().lower() for a in (tmdb_aliases or "").split(",") if a.strip()]
-                match_candidates = [sys_name.lower(), tmdb_name.lower()] + aliases
-
-                # Check variations
-                name_set = {x.strip() for x in set(name.lower().split(','))}
-                sys_name_set = {x.strip() for x in set(sys_name.lower().split(','))}
-                alias_set = {x.strip() for x in set(aliases)}
-                tmdb_name_set = {x.strip() for x in set(tmdb_name.lower().split(','))}
-                set_match_candidates = sys_name_set | alias_set | tmdb_name_set
-                
-                if name.lower() in match_candidates:
-                    logger.info(f"Show {name} already exists in the database. (Standard Match)")
-                    return True
-                
-                if name_set.intersection(set_match_candidates) and len(name_set) > 1:
-                    logger.info(f"Show {name} already exists in the database. (Set Match)")
-                    return True                
-                
+        found = self._lookup_show_by_name(name)
+        if found:
+            logger.info(f"Show {name} already exists in the database. ({found[1]})")
+            return True
         return False
 
     def get_show_by_sys_name(self, sys_name: str) -> Optional[Dict[str, Any]]:
         """Retrieve a show record by sys_name."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 "SELECT * FROM tv_shows WHERE LOWER(sys_name) = LOWER(?)", (sys_name,)
@@ -359,33 +631,15 @@ class SQLiteDBService(DatabaseInterface):
 
     def get_show_by_name_or_alias(self, name: str) -> Optional[Dict[str, Any]]:
         """Get a show by its name or alias."""
-        with self._connection() as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM tv_shows")
-            for row in cursor.fetchall():
-                aliases = [a.strip().lower() for a in (row["tmdb_aliases"] or "").split(",") if a.strip()]
-                match_candidates = [row["sys_name"].lower(), row["tmdb_name"].lower()] + aliases
-
-                # Check variations
-                name_set = {x.strip() for x in set(name.lower().split(','))}
-                sys_name_set = {x.strip() for x in set(row["sys_name"].lower().split(','))}
-                alias_set = {x.strip() for x in set(aliases)}
-                tmdb_name_set = {x.strip() for x in set(row["tmdb_name"].lower().split(','))}
-                set_match_candidates = sys_name_set | alias_set | tmdb_name_set                
-
-                if name.lower() in match_candidates:
-                    logger.info(f"Show {name} found in database. (Standard Match)")
-                    return dict(row)
-                
-                if name_set.intersection(set_match_candidates) and len(name_set) > 1:
-                    logger.info(f"Show {name} found in database. (Set Match)")
-                    return dict(row)
-
+        found = self._lookup_show_by_name(name)
+        if found:
+            logger.info(f"Show {name} found in database. ({found[1]})")
+            return found[0]
         return None
 
     def get_show_by_tmdb_id(self, tmdb_id: int) -> Optional[Dict[str, Any]]:
         """Retrieve a show record by TMDB ID."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM tv_shows WHERE tmdb_id = ?", (tmdb_id,))
             row = cursor.fetchone()
@@ -406,7 +660,7 @@ class SQLiteDBService(DatabaseInterface):
         Returns:
             dict: Show record if found, None otherwise
         """
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.execute('''
                 SELECT id, sys_name, sys_path, tmdb_name, tmdb_aliases, tmdb_id,
                        tmdb_first_aired, tmdb_last_aired, tmdb_year, tmdb_overview,
@@ -441,7 +695,7 @@ class SQLiteDBService(DatabaseInterface):
 
     def get_all_shows(self) -> List[Dict[str, Any]]:
         """Return all shows from the tv_shows table."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM tv_shows")
             shows = [dict(row) for row in cursor.fetchall()]
@@ -450,7 +704,7 @@ class SQLiteDBService(DatabaseInterface):
     
     def episodes_exist(self, tmdb_id: int) -> bool:
         """Check whether episodes already exist for the given TMDB show ID."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             cursor = conn.execute("SELECT COUNT(*) FROM episodes WHERE tmdb_id = ?", (tmdb_id,))
             count = cursor.fetchone()[0]
             logger.debug(f"Found {count} episodes for tmdb_id={tmdb_id}")
@@ -458,7 +712,7 @@ class SQLiteDBService(DatabaseInterface):
     
     def get_episodes_by_tmdb_id(self, tmdb_id: int) -> List[Dict[str, Any]]:
         """Return all episodes for the given TMDB ID."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM episodes WHERE tmdb_id = ?", (tmdb_id,))
             episodes = [dict(row) for row in cursor.fetchall()]
@@ -467,7 +721,7 @@ class SQLiteDBService(DatabaseInterface):
 
     def get_inventory_files(self) -> List[Dict[str, Any]]:
         """Return a list of all files in the anime_tv_inventory table."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             query = """
                 SELECT name, size, modified_time, path, is_dir
@@ -480,7 +734,7 @@ class SQLiteDBService(DatabaseInterface):
     
     def get_downloaded_files(self) -> List[Dict[str, Any]]:
         """Return a list of all files in the downloaded_files table."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             query = """
                 SELECT name, size, modified_time, remote_path, is_dir
@@ -518,7 +772,7 @@ class SQLiteDBService(DatabaseInterface):
             
     def get_sftp_diffs(self) -> List[Dict[str, Any]]:
         """Return a list of files present in sftp_temp_files but not in downloaded_files."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             query = """
                 SELECT name, size, modified_time, path AS remote_path, is_dir
@@ -607,7 +861,7 @@ class SQLiteDBService(DatabaseInterface):
 
     def get_episodes_by_show_name(self, show_name: str) -> List[Dict[str, Any]]:
         """Return all episodes for the given show name by first resolving the TMDB ID."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT tmdb_id FROM tv_shows WHERE sys_name = ?", (show_name,))
             row = cursor.fetchone()
@@ -618,7 +872,7 @@ class SQLiteDBService(DatabaseInterface):
 
     def get_episode_by_absolute_number(self, tmdb_id: int, abs_episode: int) -> Optional[Dict[str, Any]]:
         """Retrieve episode info using tmdb_id and absolute episode number."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("""
                 SELECT * FROM episodes
@@ -632,20 +886,25 @@ class SQLiteDBService(DatabaseInterface):
         with self._connection() as conn:
             cursor = conn.cursor()
 
-            # Delete episodes first due to foreign key constraint
+            # Delete episodes and indexed names first due to foreign key constraints
             cursor.execute("DELETE FROM episodes WHERE tmdb_id = ?", (tmdb_id,))
             deleted_episodes = cursor.rowcount
+            self._ensure_show_names(conn)
+            cursor.execute(
+                "DELETE FROM show_names WHERE show_id IN (SELECT id FROM tv_shows WHERE tmdb_id = ?)", (tmdb_id,)
+            )
 
             # Delete show from tv_shows
             cursor.execute("DELETE FROM tv_shows WHERE tmdb_id = ?", (tmdb_id,))
             deleted_shows = cursor.rowcount
 
             conn.commit()
+            self._bump_shows_version()
             logger.info(f"Deleted {deleted_episodes} episodes and {deleted_shows} show(s) for tmdb_id={tmdb_id}")
 
     def get_sftp_diffs(self) -> List[Dict[str, Any]]:
         """Get differences between SFTP temp listing and new downloaded_files by remote_path."""
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             query = """
                 SELECT s.name, s.size, s.modified_time, s.path, s.is_dir
@@ -658,6 +917,18 @@ class SQLiteDBService(DatabaseInterface):
             logger.debug(f"Found {len(diffs)} differences between SFTP and downloaded files.")
             return diffs
 
+    def get_known_remote_paths(self, remote_paths: List[str]) -> Set[str]:
+        """Return the subset of remote_paths already recorded in downloaded_files (one indexed probe)."""
+        if not remote_paths:
+            return set()
+        placeholders = ", ".join("?" for _ in remote_paths)
+        with self._read_connection() as conn:
+            rows = conn.execute(
+                f"SELECT remote_path FROM downloaded_files WHERE remote_path IN ({placeholders})",
+                list(remote_paths),
+            ).fetchall()
+        return {r[0] for r in rows}
+
     def copy_sftp_temp_to_downloaded(self) -> None:
         """Copy all records from sftp_temp_files to downloaded_files."""
         with self._connection() as conn:
@@ -677,7 +948,7 @@ class SQLiteDBService(DatabaseInterface):
 
     def backup_database(self) -> str:
         """
-        Creates a backup of the SQLite database file.
+        Creates a consistent backup of the SQLite database.
         The backup is stored in a 'backups/sqlite' directory relative to the db file path,
         with a timestamp in the filename.
         """
@@ -693,7 +964,13 @@ class SQLiteDBService(DatabaseInterface):
         backup_filename = f"{os.path.splitext(db_filename)[0]}_{timestamp}.db"
         backup_path = os.path.join(backup_dir, backup_filename)
 
-        shutil.copy2(self.db_file, backup_path)
+        # The online backup API includes changes still in the WAL file, which a file copy would miss
+        backup = sqlite3.connect(backup_path)
+        try:
+            with self._read_connection() as conn:
+                conn.backup(backup)
+        finally:
+            backup.close()
         logger.info(f"SQLite database backed up to {backup_path}")
         return backup_path
 
@@ -749,6 +1026,7 @@ class SQLiteDBService(DatabaseInterface):
             fetched_at=row["fetched_at"],
             is_dir=bool(row["is_dir"]),
             status=FileStatus(row["status"]),
+            file_provided_hash_value=row["file_provided_hash_value"],
             file_hash=row["file_hash_value"],
             file_hash_algo=row["file_hash_algo"],
             hash_calculated_at=row["hash_calculated_at"],
@@ -763,12 +1041,47 @@ class SQLiteDBService(DatabaseInterface):
             error_message=row["error_message"],
         )
 
-    def upsert_downloaded_file(self, file: DownloadedFile) -> DownloadedFile:
-        remote_path = file.remote_path
-        row = (
+    _UPSERT_DOWNLOADED_FILE_SQL = """
+        INSERT INTO downloaded_files (
+            name, path, remote_path, current_path, previous_path, size, modified_time, fetched_at, is_dir,
+            status, file_type, file_provided_hash_value, file_hash_value, file_hash_algo, hash_calculated_at, show_name, season,
+            episode, confidence, reasoning, tmdb_id, routing_attempts, last_routing_attempt, error_message, metadata
+        ) VALUES (
+            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+        )
+        ON CONFLICT(remote_path) DO UPDATE SET
+            name=excluded.name,
+            path=excluded.path,
+            current_path=excluded.current_path,
+            previous_path=excluded.previous_path,
+            size=excluded.size,
+            modified_time=excluded.modified_time,
+            fetched_at=excluded.fetched_at,
+            is_dir=excluded.is_dir,
+            status=excluded.status,
+            file_type=excluded.file_type,
+            file_provided_hash_value=COALESCE(excluded.file_provided_hash_value, downloaded_files.file_provided_hash_value),
+            file_hash_value=COALESCE(excluded.file_hash_value, downloaded_files.file_hash_value),
+            file_hash_algo=COALESCE(excluded.file_hash_algo, downloaded_files.file_hash_algo),
+            show_name=excluded.show_name,
+            season=excluded.season,
+            episode=excluded.episode,
+            confidence=excluded.confidence,
+            reasoning=excluded.reasoning,
+            tmdb_id=excluded.tmdb_id,
+            routing_attempts=excluded.routing_attempts,
+            last_routing_attempt=excluded.last_routing_attempt,
+            error_message=excluded.error_message,
+            metadata=excluded.metadata
+        """
+
+    @staticmethod
+    def _downloaded_file_row(file: DownloadedFile) -> tuple:
+        """Parameters for _UPSERT_DOWNLOADED_FILE_SQL."""
+        return (
             file.name,
             file.remote_path,  # path
-            remote_path,
+            file.remote_path,
             file.current_path,
             getattr(file, "previous_path", None),
             file.size,
@@ -792,43 +1105,11 @@ class SQLiteDBService(DatabaseInterface):
             file.error_message,
             json.dumps(file.metadata) if file.metadata is not None else None,
         )
+
+    def upsert_downloaded_file(self, file: DownloadedFile) -> DownloadedFile:
+        remote_path = file.remote_path
         with self._connection() as conn:
-            cur = conn.execute(
-                """
-                INSERT INTO downloaded_files (
-                    name, path, remote_path, current_path, previous_path, size, modified_time, fetched_at, is_dir,
-                    status, file_type, file_provided_hash_value, file_hash_value, file_hash_algo, hash_calculated_at, show_name, season,
-                    episode, confidence, reasoning, tmdb_id, routing_attempts, last_routing_attempt, error_message, metadata
-                ) VALUES (
-                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                )
-                ON CONFLICT(remote_path) DO UPDATE SET
-                    name=excluded.name,
-                    path=excluded.path,
-                    current_path=excluded.current_path,
-                    previous_path=excluded.previous_path,
-                    size=excluded.size,
-                    modified_time=excluded.modified_time,
-                    fetched_at=excluded.fetched_at,
-                    is_dir=excluded.is_dir,
-                    status=excluded.status,
-                    file_type=excluded.file_type,
-                    file_provided_hash_value=COALESCE(excluded.file_provided_hash_value, downloaded_files.file_provided_hash_value),
-                    file_hash_value=COALESCE(excluded.file_hash_value, downloaded_files.file_hash_value),
-                    file_hash_algo=COALESCE(excluded.file_hash_algo, downloaded_files.file_hash_algo),
-                    show_name=excluded.show_name,
-                    season=excluded.season,
-                    episode=excluded.episode,
-                    confidence=excluded.confidence,
-                    reasoning=excluded.reasoning,
-                    tmdb_id=excluded.tmdb_id,
-                    routing_attempts=excluded.routing_attempts,
-                    last_routing_attempt=excluded.last_routing_attempt,
-                    error_message=excluded.error_message,
-                    metadata=excluded.metadata
-                """,
-                row,
-            )
+            cur = conn.execute(self._UPSERT_DOWNLOADED_FILE_SQL, self._downloaded_file_row(file))
             file_id = cur.lastrowid
             if not file_id:
                 cur2 = conn.execute(
@@ -841,6 +1122,27 @@ class SQLiteDBService(DatabaseInterface):
             file.id = file_id
             return file
 
+    def upsert_downloaded_files(self, files: List[DownloadedFile]) -> List[DownloadedFile]:
+        """Upsert many DownloadedFiles with one executemany in a single transaction, then fill in their ids."""
+        if not files:
+            return []
+        with self._connection() as conn:
+            conn.executemany(self._UPSERT_DOWNLOADED_FILE_SQL, [self._downloaded_file_row(f) for f in files])
+            paths = list({f.remote_path for f in files})
+            ids: Dict[str, int] = {}
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                ids.update(conn.execute(
+                    f"SELECT remote_path, id FROM downloaded_files WHERE remote_path IN ({placeholders})",
+                    chunk,
+                ).fetchall())
+        for f in files:
+            f.id = ids.get(f.remote_path)
+        logger.debug(f"Upserted {len(files)} downloaded files in one transaction.")
+        return files
+
     def set_downloaded_file_hash(self, file_id: int, algo: str, value: str, calculated_at: Optional[datetime.datetime] = None) -> None:
         if calculated_at is None:
             calculated_at = datetime.datetime.now()
@@ -913,6 +1215,118 @@ class SQLiteDBService(DatabaseInterface):
                     (new_status.value, error_message, file_id),
                 )
 
+    def iter_downloaded_files(
+        self,
+        *,
+        statuses: Optional[List[FileStatus]] = None,
+        include_dirs: bool = False,
+        after_id: int = 0,
+        batch_size: int = 500,
+    ) -> Iterator[DownloadedFile]:
+        where = ["id > ?"]
+        params: list = []
+        if statuses:
+            where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(s.value for s in statuses)
+        if not include_dirs:
+            where.append("is_dir = 0")
+        query = f"SELECT * FROM downloaded_files WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        last_id = after_id
+        while True:
+            # Each batch is a separate query so no read transaction stays open between batches
+            with self._read_connection() as conn:
+                conn.row_factory = sqlite3.Row
+                rows = conn.execute(query, [last_id] + params + [batch_size]).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield self._df_row_to_model(r)
+            last_id = rows[-1]["id"]
+
+    def iter_inventory_files(self, *, after_id: int = 0, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        last_id = after_id
+        while True:
+            with self._read_connection() as conn:
+                conn.row_factory = sqlite3.Row
+                rows = conn.execute(
+                    "SELECT id, name, size, modified_time, path, is_dir FROM anime_tv_inventory "
+                    "WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield dict(r)
+            last_id = rows[-1]["id"]
+
+    # --------------------- Remote directory snapshots ---------------------
+    def get_remote_dir_snapshot(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._read_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            try:
+                row = conn.execute(
+                    "SELECT path, mtime, child_count, scanned_at FROM remote_dir_snapshots WHERE path = ?",
+                    (path,),
+                ).fetchone()
+            except sqlite3.OperationalError:
+                # Databases created before snapshots existed have no table yet
+                return None
+            return dict(row) if row else None
+
+    def upsert_remote_dir_snapshot(self, path: str, mtime: datetime.datetime, child_count: int) -> None:
+        with self._connection() as conn:
+            self._create_table_remote_dir_snapshots(conn)
+            conn.execute(
+                """
+                INSERT INTO remote_dir_snapshots (path, mtime, child_count, scanned_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    mtime = excluded.mtime,
+                    child_count = excluded.child_count,
+                    scanned_at = excluded.scanned_at
+                """,
+                (path, mtime, child_count, datetime.datetime.now()),
+            )
+            conn.commit()
+            logger.debug(f"Recorded remote dir snapshot: {path} (mtime={mtime}, children={child_count})")
+
+    def clear_remote_dir_snapshots(self) -> None:
+        with self._connection() as conn:
+            conn.execute("DROP TABLE IF EXISTS remote_dir_snapshots")
+            self._create_table_remote_dir_snapshots(conn)
+            conn.commit()
+            logger.info("remote_dir_snapshots table reset.")
+
+    # --------------------- Transfer run history ---------------------
+    def add_transfer_run(self, files: int, bytes_transferred: int, elapsed_seconds: float, workers: int) -> None:
+        with self._connection() as conn:
+            self._create_table_transfer_runs(conn)
+            conn.execute(
+                """
+                INSERT INTO transfer_runs (finished_at, files, bytes_transferred, elapsed_seconds, workers)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (datetime.datetime.now(), files, bytes_transferred, elapsed_seconds, workers),
+            )
+            conn.commit()
+            logger.debug(f"Recorded transfer run: {files} file(s), {bytes_transferred} bytes in {elapsed_seconds:.2f}s on {workers} worker(s)")
+
+    def get_transfer_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._read_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            try:
+                rows = conn.execute(
+                    """
+                    SELECT finished_at, files, bytes_transferred, elapsed_seconds, workers
+                    FROM transfer_runs ORDER BY id DESC LIMIT ?
+                    """,
+                    (limit,),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                # Databases created before run history existed have no table yet
+                return []
+            return [dict(r) for r in rows]
+
     def update_show_aliases(self, show_id: int, new_aliases: str) -> None:
         """Update the aliases for a show by its database ID.
         
@@ -921,14 +1335,19 @@ class SQLiteDBService(DatabaseInterface):
             new_aliases: New aliases string to set
         """
         with self._connection() as conn:
-            conn.execute(
+            self._ensure_show_names(conn)
+            cursor = conn.execute(
                 "UPDATE tv_shows SET tmdb_aliases = ? WHERE id = ?",
                 (new_aliases, show_id),
             )
+            if cursor.rowcount:
+                conn.execute("DELETE FROM show_names WHERE show_id = ? AND kind = 'alias'", (show_id,))
+                self._insert_show_names(conn, show_id, show_name_keys(None, None, new_aliases))
             logger.info(f"Updated aliases for show ID {show_id} to: {new_aliases}")
+        self._bump_shows_version()
 
     def get_downloaded_files_by_status(self, status: FileStatus) -> List[DownloadedFile]:
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cur = conn.execute(
                 "SELECT * FROM downloaded_files WHERE status = ?",
@@ -937,7 +1356,7 @@ class SQLiteDBService(DatabaseInterface):
             return [self._df_row_to_model(r) for r in cur.fetchall()]
 
     def get_downloaded_file_by_remote_path(self, remote_path: str) -> Optional[DownloadedFile]:
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cur = conn.execute(
                 "SELECT * FROM downloaded_files WHERE remote_path = ?",
@@ -947,7 +1366,7 @@ class SQLiteDBService(DatabaseInterface):
             return self._df_row_to_model(row) if row else None
 
     def get_downloaded_file_by_id(self, file_id: int) -> Optional[DownloadedFile]:
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             cur = conn.execute(
                 "SELECT * FROM downloaded_files WHERE id = ?",
@@ -993,7 +1412,7 @@ class SQLiteDBService(DatabaseInterface):
         limit = max(1, min(page_size, 200))
         offset = max(0, (max(1, page) - 1) * limit)
 
-        with self._connection() as conn:
+        with self._read_connection() as conn:
             conn.row_factory = sqlite3.Row
             count_cur = conn.execute(
                 f"SELECT COUNT(*) as c FROM downloaded_files {where_sql}", params
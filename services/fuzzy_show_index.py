@@ -0,0 +1,119 @@
+"""
+Fuzzy show-name matching over a precomputed trigram index.
+
+FuzzyShowIndex is built once from the show rows (sys_name, tmdb_name and aliases) and maps each
+character trigram to the names containing it. A query only scores names that share at least one
+trigram with it, so ranking candidates costs time proportional to the postings it touches
+rather than the number of shows.
+
+A name's score is the Dice coefficient of the query's and the name's trigram sets (1.0 for
+identical names after normalization), and a show's score is that of its best-matching name.
+"""
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from services.db_implementations.show_names import show_name_keys
+
+DEFAULT_FUZZY_LIMIT = 10
+# Routing accepts a fuzzy match only at or above this score; see fuzzy_match_threshold()
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def fuzzy_key(name: str) -> str:
+    """Lower-case ``name`` and collapse punctuation and underscores to single spaces."""
+    return _NON_WORD.sub(" ", (name or "").lower()).strip()
+
+
+def trigrams(name: str) -> Set[str]:
+    """Trigrams of each word in ``fuzzy_key(name)``, padded so short words and word starts count."""
+    grams: Set[str] = set()
+    for token in fuzzy_key(name).split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass
+class FuzzyMatch:
+    """A ranked fuzzy-match candidate."""
+    show: Dict[str, Any]
+    score: float
+    matched_name: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"show": self.show, "score": round(self.score, 4), "matched_name": self.matched_name}
+
+
+class FuzzyShowIndex:
+    """
+    Trigram inverted index over show names and aliases.
+
+    Attributes:
+        shows (Dict[Any, Dict[str, Any]]): Show rows keyed by database id.
+    """
+
+    def __init__(self, shows: Iterable[Dict[str, Any]]) -> None:
+        self.shows: Dict[Any, Dict[str, Any]] = {}
+        # Indexed names: (show id, display name, trigram count)
+        self._names: List[Tuple[Any, str, int]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for row in shows:
+            show_id = row.get("id")
+            self.shows[show_id] = row
+            seen: Set[str] = set()
+            for name, _ in show_name_keys(row.get("sys_name"), row.get("tmdb_name"), row.get("tmdb_aliases")):
+                key = fuzzy_key(name)
+                grams = trigrams(key)
+                if not grams or key in seen:
+                    continue
+                seen.add(key)
+                index = len(self._names)
+                self._names.append((show_id, name, len(grams)))
+                for gram in grams:
+                    self._postings[gram].append(index)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def search(self, name: str, limit: int = DEFAULT_FUZZY_LIMIT, min_score: float = 0.0) -> List[FuzzyMatch]:
+        """Return up to ``limit`` shows scoring at least ``min_score``, best first (ties by show id)."""
+        query = trigrams(name)
+        if not query or limit <= 0:
+            return []
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in query))
+
+        # Names sharing c trigrams score at most 2c / (len(query) + c), so walking them by
+        # descending c can stop once that bound drops below min_score or the limit-th best score.
+        best: Dict[Any, Tuple[float, str]] = {}
+        cutoff = min_score
+        last_count = None
+        for index, count in shared.most_common():
+            if count != last_count:
+                last_count = count
+                if len(best) >= limit:
+                    cutoff = max(cutoff, sorted((s for s, _ in best.values()), reverse=True)[limit - 1])
+                if 2.0 * count / (len(query) + count) < cutoff:
+                    break
+            show_id, matched_name, size = self._names[index]
+            score = 2.0 * count / (len(query) + size)
+            if score >= min_score and score > best.get(show_id, (-1.0, ""))[0]:
+                best[show_id] = (score, matched_name)
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0] or 0))[:limit]
+        return [FuzzyMatch(dict(self.shows[show_id]), score, matched) for show_id, (score, matched) in ranked]
+
+
+def fuzzy_match_threshold(config: Any) -> float:
+    """
+    Read ``[routing] fuzzy_match_threshold``: the minimum score at which routing falls back to
+    a fuzzy match for a show name with no exact match. 0 disables the fallback.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    value = get_config_value(config, "routing", "fuzzy_match_threshold", fallback=DEFAULT_FUZZY_THRESHOLD, value_type=float)
+    return min(max(value, 0.0), 1.0)
@@ -0,0 +1,204 @@
+"""
+Persistent file hash cache for Sync2NAS.
+
+Stores digests in a sidecar SQLite file keyed by the file's identity on disk (device, inode) and
+validated against its size and nanosecond mtime. A cache hit costs one ``stat()`` instead of a full
+read, and entries follow a file when it is renamed or routed within the same filesystem.
+"""
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILENAME = "hash_cache.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    algo TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    path TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (dev, inode, algo)
+);
+CREATE INDEX IF NOT EXISTS idx_file_hashes_path ON file_hashes(path);
+"""
+
+
+def stat_key(st: os.stat_result) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Return the (dev, inode, size, mtime_ns) identity of a stat result.
+
+    Returns None when the filesystem does not report inode numbers, in which case the file can't be
+    identified reliably and is never cached.
+    """
+    if not st.st_ino:
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HashCache:
+    """
+    Thread-safe sidecar SQLite store of file digests.
+
+    Entries are invalidated automatically whenever the size or mtime of the file at (dev, inode)
+    no longer matches, so a stale digest is never returned for modified content.
+
+    Attributes:
+        db_file (str): Path to the cache database.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that required hashing the file.
+
+    Methods:
+        get(path, algos, st): Cached digests for a file, invalidating stale entries.
+        put(path, st, hashes): Record digests for a file.
+        invalidate(path): Drop every entry for a file.
+        clear(): Drop all entries.
+        close(): Close the database connection.
+    """
+
+    def __init__(self, db_file: str) -> None:
+        self.db_file = db_file
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(db_file))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, timeout=10.0, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def __str__(self) -> str:
+        return f"HashCache(db_file={self.db_file})"
+
+    def get(self, path: str, algos: Iterable[str], st: Optional[os.stat_result] = None) -> Dict[str, str]:
+        """
+        Look up cached digests for a file.
+
+        Args:
+            path (str): File path.
+            algos (Iterable[str]): Algorithms wanted.
+            st (Optional[os.stat_result]): Current stat of the file; taken here when omitted.
+
+        Returns:
+            Dict[str, str]: The cached subset of the requested digests (possibly empty).
+        """
+        algos = [a.lower() for a in algos]
+        key = stat_key(st if st is not None else os.stat(path))
+        if key is None:
+            return {}
+        dev, inode, size, mtime_ns = key
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT algo, digest, size, mtime_ns FROM file_hashes WHERE dev = ? AND inode = ?",
+                (dev, inode),
+            ).fetchall()
+            if any(r[2] != size or r[3] != mtime_ns for r in rows):
+                logger.debug(f"Hash cache entry for {path} is stale; invalidating")
+                self._conn.execute("DELETE FROM file_hashes WHERE dev = ? AND inode = ?", (dev, inode))
+                self._conn.commit()
+                rows = []
+            cached = {r[0]: r[1] for r in rows if r[0] in algos}
+            if len(cached) == len(set(algos)):
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached
+
+    def put(self, path: str, st: os.stat_result, hashes: Dict[str, str]) -> None:
+        """
+        Record digests for a file as of the given stat.
+
+        Args:
+            path (str): File path (kept for invalidation by path and for inspection).
+            st (os.stat_result): Stat taken before the file was read.
+            hashes (Dict[str, str]): Digests keyed by algorithm name.
+        """
+        key = stat_key(st)
+        if key is None or not hashes:
+            return
+        dev, inode, size, mtime_ns = key
+        now = datetime.datetime.now().isoformat()
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            # A different file previously seen at this path is gone or replaced
+            self._conn.execute(
+                "DELETE FROM file_hashes WHERE path = ? AND NOT (dev = ? AND inode = ?)",
+                (abs_path, dev, inode),
+            )
+            self._conn.execute(
+                "DELETE FROM file_hashes WHERE dev = ? AND inode = ? AND (size != ? OR mtime_ns != ?)",
+                (dev, inode, size, mtime_ns),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes (dev, inode, size, mtime_ns, algo, digest, path, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(dev, inode, size, mtime_ns, algo.lower(), digest, abs_path, now)
+                 for algo, digest in hashes.items() if digest],
+            )
+            self._conn.commit()
+
+    def invalidate(self, path: str) -> None:
+        """Drop every cached digest recorded for a path."""
+        with self._lock:
+            self._conn.execute("DELETE FROM file_hashes WHERE path = ?", (os.path.abspath(path),))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Drop all cached digests."""
+        with self._lock:
+            self._conn.execute("DELETE FROM file_hashes")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of stored files."""
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(DISTINCT dev || ':' || inode) FROM file_hashes").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "files": files}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_hash_cache(config: Any, read_only: bool = False) -> Optional[HashCache]:
+    """
+    Create a HashCache from the [hashing] configuration section.
+
+    Recognised keys: ``cache_enabled`` (default true) and ``cache_file``. Without an explicit
+    ``cache_file`` the cache lives next to the SQLite database (``[sqlite] db_file``); if neither is
+    configured, no cache is created.
+
+    Args:
+        config: Loaded configuration (ConfigParser or normalized dict).
+        read_only (bool): Dry-run mode; no cache is created so nothing is written to disk.
+
+    Returns:
+        Optional[HashCache]: Cache instance, or None when disabled or unavailable.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    if read_only or not get_config_value(config, "hashing", "cache_enabled", fallback=True, value_type=bool):
+        return None
+    cache_file = get_config_value(config, "hashing", "cache_file")
+    if not cache_file:
+        db_file = get_config_value(config, "sqlite", "db_file")
+        if not db_file:
+            return None
+        cache_file = os.path.join(os.path.dirname(db_file), DEFAULT_CACHE_FILENAME)
+    try:
+        return HashCache(cache_file)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Hash cache unavailable at {cache_file}: {e}")
+        return None
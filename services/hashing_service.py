@@ -1,14 +1,112 @@
 """
 HashingService: streaming file hashing with configurable chunk size.
 
-Defaults to a 1 MiB chunk size for large file efficiency.
+Defaults to a 1 MiB chunk size for large file efficiency. Every requested digest is fed from a
+single read pass, and batches of files can be hashed concurrently with per-disk limits.
 """
 
 from __future__ import annotations
 
-import binascii
 import hashlib
-from typing import Optional
+import logging
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from services.hash_cache import HashCache, create_hash_cache, stat_key
+
+logger = logging.getLogger(__name__)
+
+# Algorithms that can be computed incrementally; CRC32 uses zlib, the rest hashlib
+SUPPORTED_ALGORITHMS = ("crc32", "md5", "sha1", "sha256")
+
+# Concurrent hashing jobs allowed per storage device in hash_files()
+DEFAULT_WORKERS_PER_DEVICE = 2
+
+_default_service: Optional["HashingService"] = None
+
+
+def format_crc32(value: int) -> str:
+    """Format a CRC32 value the way HashingService reports it (8 uppercase hex characters)."""
+    return f"{value & 0xFFFFFFFF:08X}"
+
+
+def _gf2_matrix_times(mat, vec: int) -> int:
+    result = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            result ^= mat[i]
+        vec >>= 1
+        i += 1
+    return result
+
+
+def _gf2_matrix_square(mat):
+    return [_gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """
+    Combine the CRC32 of two adjacent byte ranges without re-reading either of them.
+
+    Port of zlib's ``crc32_combine``: given crc1 = CRC32(A) and crc2 = CRC32(B), return CRC32(A + B)
+    where ``len2`` is the length of B in bytes.
+    """
+    if len2 <= 0:
+        return crc1
+
+    # Operator for one zero bit, then square up to one zero byte
+    odd = [0xEDB88320] + [1 << (n - 1) for n in range(1, 32)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+
+    # Apply len2 zero bytes to crc1
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return (crc1 ^ crc2) & 0xFFFFFFFF
+
+
+class MultiHasher:
+    """
+    Feed one byte stream into several digests at once.
+
+    Used to hash data as it streams through a transfer, so the file never has to be re-read.
+    Output formats match HashingService: CRC32 as 8 uppercase hex characters, others lowercase hex.
+    """
+
+    def __init__(self, algos: Iterable[str] = ("crc32",), crc32: int = 0) -> None:
+        self.algos = tuple(dict.fromkeys(a.lower() for a in algos))
+        unknown = [a for a in self.algos if a not in SUPPORTED_ALGORITHMS]
+        if unknown:
+            raise ValueError(f"Unsupported hash algorithm(s): {', '.join(unknown)}")
+        self.crc32 = crc32
+        self._digests = {a: hashlib.new(a) for a in self.algos if a != "crc32"}
+
+    def update(self, data: bytes) -> None:
+        if "crc32" in self.algos:
+            self.crc32 = zlib.crc32(data, self.crc32)
+        for digest in self._digests.values():
+            digest.update(data)
+
+    def hexdigests(self) -> Dict[str, str]:
+        results = {a: d.hexdigest() for a, d in self._digests.items()}
+        if "crc32" in self.algos:
+            results["crc32"] = format_crc32(self.crc32)
+        return results
 
 
 class HashingService:
@@ -16,40 +114,203 @@ class HashingService:
     Provides streaming hashing operations for large files.
 
     - CRC32 output is an 8-character uppercase hex string
-    - MD5 and SHA1 outputs are lowercase hex strings
+    - MD5, SHA1 and SHA256 outputs are lowercase hex strings
+
+    hash_file() computes any combination of digests in one pass, reading into a reused buffer so
+    large files don't allocate a new bytes object per chunk. zlib and hashlib release the GIL on
+    large buffers, so hash_files() runs files concurrently on threads, limited per storage device
+    so a single spinning disk isn't thrashed by competing sequential reads.
+
+    With a HashCache attached, digests of files whose (device, inode, size, mtime) are unchanged
+    are served from the cache, so repeated sweeps cost a stat() per file instead of a full read.
     """
 
-    def __init__(self, chunk_size: int = 1_048_576) -> None:
+    def __init__(
+        self,
+        chunk_size: int = 1_048_576,
+        workers_per_device: int = DEFAULT_WORKERS_PER_DEVICE,
+        max_workers: Optional[int] = None,
+        cache: Optional[HashCache] = None,
+    ) -> None:
         self.chunk_size = chunk_size
+        self.workers_per_device = max(1, workers_per_device)
+        self.max_workers = max_workers
+        self.cache = cache
 
-    def calculate_crc32(self, file_path: str) -> str:
-        crc = 0
-        with open(file_path, "rb") as f:
+    def hash_file(
+        self,
+        file_path: str,
+        algos: Sequence[str] = ("crc32",),
+        refresh: bool = False,
+        throttle: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, str]:
+        """
+        Compute several digests of a file while reading it only once.
+
+        Args:
+            file_path (str): File to hash.
+            algos (Sequence[str]): Algorithms from SUPPORTED_ALGORITHMS.
+            refresh (bool): Ignore cached digests and re-read the file (the cache is still updated).
+            throttle (Optional[Callable[[int], None]]): Called with each chunk's size before it is
+                hashed, e.g. TokenBucket.consume to cap read bandwidth.
+
+        Returns:
+            Dict[str, str]: Digests keyed by algorithm name.
+
+        Raises:
+            ValueError: If an algorithm is not supported.
+            OSError: If the file cannot be read.
+        """
+        algos = MultiHasher(algos).algos
+        cached: Dict[str, str] = {}
+        st = None
+        if self.cache is not None:
+            st = os.stat(file_path)
+            if not refresh:
+                cached = self.cache.get(file_path, algos, st)
+        missing = [a for a in algos if a not in cached]
+        if not missing:
+            return {a: cached[a] for a in algos}
+
+        hasher = MultiHasher(missing)
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        with open(file_path, "rb", buffering=0) as f:
             while True:
-                data = f.read(self.chunk_size)
-                if not data:
+                n = f.readinto(buffer)
+                if not n:
                     break
-                crc = binascii.crc32(data, crc)
-        return f"{crc & 0xFFFFFFFF:08X}"
+                if throttle is not None:
+                    throttle(n)
+                hasher.update(view[:n])
+        computed = hasher.hexdigests()
+
+        # Only cache the result if the file didn't change while it was being read
+        if st is not None and stat_key(os.stat(file_path)) == stat_key(st):
+            self.cache.put(file_path, st, computed)
+        cached.update(computed)
+        return {a: cached[a] for a in algos}
+
+    def record(self, file_path: str, hashes: Optional[Dict[str, str]]) -> None:
+        """
+        Store digests computed elsewhere (e.g. during a download) in the persistent cache.
+
+        Never raises; a failure only means the file will be read on its next verification.
+        """
+        if self.cache is None or not hashes:
+            return
+        try:
+            self.cache.put(file_path, os.stat(file_path), hashes)
+        except Exception as e:
+            logger.debug(f"Could not record hashes for {file_path} in hash cache: {e}")
+
+    def hash_files(
+        self,
+        file_paths: Iterable[str],
+        algos: Sequence[str] = ("crc32",),
+        refresh: bool = False,
+    ) -> Dict[str, Optional[Dict[str, str]]]:
+        """
+        Hash many files concurrently, each in a single pass.
+
+        Files on the same device share a limit of ``workers_per_device`` concurrent reads; the
+        total thread count defaults to that limit times the number of devices involved.
+
+        Args:
+            file_paths (Iterable[str]): Files to hash.
+            algos (Sequence[str]): Algorithms from SUPPORTED_ALGORITHMS.
+            refresh (bool): Ignore cached digests and re-read every file.
+
+        Returns:
+            Dict[str, Optional[Dict[str, str]]]: Digests per path; None for files that could not be read.
+        """
+        MultiHasher(algos)  # validate algorithms up front rather than once per file
+        paths: List[str] = list(dict.fromkeys(file_paths))
+        if not paths:
+            return {}
+
+        devices: Dict[str, Any] = {}
+        for path in paths:
+            try:
+                devices[path] = os.stat(path).st_dev
+            except OSError:
+                devices[path] = None
+        limits = {dev: threading.Semaphore(self.workers_per_device) for dev in set(devices.values())}
+        max_workers = self.max_workers or min(len(paths), self.workers_per_device * len(limits))
+
+        def task(path: str) -> Optional[Dict[str, str]]:
+            with limits[devices[path]]:
+                try:
+                    return self.hash_file(path, algos, refresh=refresh)
+                except OSError as e:
+                    logger.warning(f"Failed to hash {path}: {e}")
+                    return None
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            return dict(zip(paths, executor.map(task, paths)))
+
+    def calculate_crc32(self, file_path: str) -> str:
+        return self.hash_file(file_path, ("crc32",))["crc32"]
 
     def calculate_md5(self, file_path: str) -> str:
-        md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            while True:
-                data = f.read(self.chunk_size)
-                if not data:
-                    break
-                md5.update(data)
-        return md5.hexdigest()
+        return self.hash_file(file_path, ("md5",))["md5"]
 
     def calculate_sha1(self, file_path: str) -> str:
-        sha1 = hashlib.sha1()
-        with open(file_path, "rb") as f:
-            while True:
-                data = f.read(self.chunk_size)
-                if not data:
-                    break
-                sha1.update(data)
-        return sha1.hexdigest()
+        return self.hash_file(file_path, ("sha1",))["sha1"]
+
+    def calculate_sha256(self, file_path: str) -> str:
+        return self.hash_file(file_path, ("sha256",))["sha256"]
 
 
+def create_hashing_service(config: Any, read_only: bool = False) -> HashingService:
+    """
+    Create a HashingService from the [hashing] configuration section.
+
+    Recognised keys: ``chunk_size_bytes`` (or ``chunk_size_mib``), ``workers_per_device`` and
+    ``max_workers``, plus the persistent cache keys read by create_hash_cache().
+
+    Args:
+        config: Loaded configuration (ConfigParser or normalized dict).
+        read_only (bool): Dry-run mode; the persistent hash cache is not used.
+
+    Returns:
+        HashingService: Configured service (defaults apply when the section is absent).
+    """
+    from utils.sync2nas_config import get_config_value
+
+    chunk_size = get_config_value(config, "hashing", "chunk_size_bytes", fallback=None, value_type=int)
+    if not chunk_size:
+        chunk_mib = get_config_value(config, "hashing", "chunk_size_mib", fallback=None, value_type=int)
+        chunk_size = chunk_mib * 1024 * 1024 if chunk_mib else 1_048_576
+    return HashingService(
+        chunk_size=chunk_size,
+        workers_per_device=get_config_value(
+            config, "hashing", "workers_per_device", fallback=DEFAULT_WORKERS_PER_DEVICE, value_type=int
+        ),
+        max_workers=get_config_value(config, "hashing", "max_workers", fallback=None, value_type=int),
+        cache=create_hash_cache(config, read_only=read_only),
+    )
+
+
+def get_default_hashing_service() -> HashingService:
+    """
+    Get the process-wide HashingService used for on-demand hashing (e.g. by DownloadedFile).
+
+    Returns:
+        HashingService: The configured default, or a cache-less service if none was set.
+    """
+    global _default_service
+    if _default_service is None:
+        _default_service = HashingService()
+    return _default_service
+
+
+def set_default_hashing_service(service: Optional[HashingService]) -> None:
+    """
+    Install the process-wide HashingService, typically the one built by create_hashing_service().
+
+    Args:
+        service (Optional[HashingService]): Service to use; None resets to the cache-less default.
+    """
+    global _default_service
+    _default_service = service
@@ -0,0 +1,287 @@
+"""
+Background jobs for long-running Sync2NAS operations.
+
+Downloads, file routing and bootstraps can take far longer than an HTTP request may stay open
+behind a proxy. JobManager runs them as background tasks on the event loop instead: submit()
+returns a Job immediately, at most ``max_concurrent_jobs`` run at once (the rest wait in
+submission order), and callers follow a job through its JobProgress by polling get() or by
+subscribing to events(). Blocking work inside a job belongs in a worker thread
+(``asyncio.to_thread``), like the API services already do.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_JOBS = 2
+# Finished jobs kept for status queries; older ones are forgotten first
+DEFAULT_JOB_HISTORY = 100
+
+
+class JobStatus(str, Enum):
+    """Lifecycle state of a background job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobProgress:
+    """
+    Thread-safe progress counters for one job.
+
+    The work being tracked calls plan() as it discovers items and advance() as each one finishes,
+    from any thread; readers take consistent snapshot()s. Rate and ETA are derived from bytes when
+    the work has sizes, otherwise from item counts.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+        self._stopped: Optional[float] = None
+        self.files_total = 0
+        self.files_done = 0
+        self.files_failed = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.stage: Optional[str] = None
+        # Bumped on every change so watchers can tell when to report again
+        self.version = 0
+
+    def start(self) -> None:
+        with self._lock:
+            self._started = self._clock()
+            self.version += 1
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = self._clock()
+            self.version += 1
+
+    def set_stage(self, stage: str) -> None:
+        """Describe what the job is doing now (e.g. the remote path being listed)."""
+        with self._lock:
+            self.stage = stage
+            self.version += 1
+
+    def plan(self, files: int = 0, nbytes: int = 0) -> None:
+        """Add ``files`` items totalling ``nbytes`` bytes to the work still to do."""
+        with self._lock:
+            self.files_total += files
+            self.bytes_total += nbytes
+            self.version += 1
+
+    def advance(self, files: int = 1, nbytes: int = 0, failed: bool = False) -> None:
+        """Mark ``files`` items finished (``failed`` if they did not succeed), moving ``nbytes`` bytes."""
+        with self._lock:
+            if failed:
+                self.files_failed += files
+            else:
+                self.files_done += files
+            self.bytes_done += nbytes
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters with elapsed time, rate (bytes/s or items/s) and ETA in seconds."""
+        with self._lock:
+            if self._started is None:
+                elapsed = 0.0
+            else:
+                elapsed = max(0.0, (self._stopped or self._clock()) - self._started)
+            finished = self.files_done + self.files_failed
+            if self.bytes_total:
+                done, total = self.bytes_done, self.bytes_total
+            else:
+                done, total = finished, self.files_total
+            rate = done / elapsed if elapsed > 0 else 0.0
+            eta = None
+            if self._stopped is None and rate > 0 and total > done:
+                eta = (total - done) / rate
+            return {
+                "stage": self.stage,
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "files_failed": self.files_failed,
+                "bytes_total": self.bytes_total,
+                "bytes_done": self.bytes_done,
+                "elapsed": elapsed,
+                "rate": rate,
+                "rate_unit": "bytes/s" if self.bytes_total else "files/s",
+                "eta": eta,
+            }
+
+
+@dataclass
+class Job:
+    """A submitted operation, its state and, once finished, its result or error."""
+    id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    progress: JobProgress = field(default_factory=JobProgress)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": self.progress.snapshot(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs submitted operations as background tasks, a bounded number at a time.
+
+    Methods:
+        submit(kind, run, params): Start ``run(progress)`` in the background and return its Job.
+        get(job_id): Return a job, or None if it is unknown or was forgotten.
+        list_jobs(status): Return jobs, newest first.
+        events(job_id, interval): Async iterator of job snapshots, yielded as the job changes.
+        shutdown(): Cancel jobs that are still queued or running.
+    """
+
+    def __init__(self, max_concurrent_jobs: int = DEFAULT_MAX_CONCURRENT_JOBS,
+                 max_finished_jobs: int = DEFAULT_JOB_HISTORY) -> None:
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self.max_finished_jobs = max(1, int(max_finished_jobs))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Created on first submit so it belongs to the serving event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def __str__(self) -> str:
+        running = sum(1 for job in self._jobs.values() if job.status == JobStatus.RUNNING)
+        return f"JobManager(running={running}, max_concurrent_jobs={self.max_concurrent_jobs})"
+
+    def submit(self, kind: str, run: Callable[[JobProgress], Awaitable[Dict[str, Any]]],
+               params: Optional[Dict[str, Any]] = None) -> Job:
+        """
+        Queue ``run`` as a background job; must be called from the event loop.
+
+        Args:
+            kind (str): Operation name, e.g. "download_from_remote".
+            run: Coroutine function taking the job's JobProgress and returning a result dict.
+            params (Optional[Dict[str, Any]]): Request parameters, reported with the job.
+
+        Returns:
+            Job: The queued job.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent_jobs)
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=dict(params or {}))
+        self._jobs[job.id] = job
+        self._prune()
+        self._tasks[job.id] = asyncio.get_running_loop().create_task(self._run(job, run))
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    async def _run(self, job: Job, run: Callable[[JobProgress], Awaitable[Dict[str, Any]]]) -> None:
+        try:
+            async with self._slots:
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.now()
+                job.progress.start()
+                logger.info(f"Started {job.kind} job {job.id}")
+                try:
+                    job.result = await run(job.progress)
+                    job.status = JobStatus.SUCCEEDED
+                    logger.info(f"Finished {job.kind} job {job.id}")
+                except asyncio.CancelledError:
+                    job.error = "Cancelled"
+                    job.status = JobStatus.FAILED
+                    raise
+                except Exception as e:
+                    logger.exception(f"{job.kind} job {job.id} failed: {e}")
+                    job.error = str(e)
+                    job.status = JobStatus.FAILED
+        finally:
+            if not job.finished:
+                job.error = job.error or "Cancelled"
+                job.status = JobStatus.FAILED
+            job.finished_at = datetime.now()
+            job.progress.stop()
+            self._tasks.pop(job.id, None)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[JobStatus] = None) -> List[Job]:
+        return [job for job in reversed(self._jobs.values()) if status is None or job.status == status]
+
+    async def events(self, job_id: str, interval: float = 0.5) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield snapshots of a job: one immediately, then one whenever it changes, until it finishes.
+
+        Progress is updated from worker threads, so changes are picked up every ``interval`` seconds.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        seen = None
+        while True:
+            state = (job.status, job.progress.version)
+            if state != seen:
+                seen = state
+                yield job.to_dict()
+            if job.finished:
+                return
+            await asyncio.sleep(interval)
+
+    async def shutdown(self) -> None:
+        """Cancel queued and running jobs and wait for them to stop."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info(f"Cancelled {len(tasks)} unfinished job(s)")
+
+
+def create_job_manager(config: Any) -> JobManager:
+    """
+    Create a JobManager from the [api] configuration section.
+
+    Keys:
+        max_concurrent_jobs: Jobs run at the same time (default 2); later submissions wait.
+        job_history: Finished jobs kept for status queries (default 100).
+    """
+    from utils.sync2nas_config import get_config_value
+
+    return JobManager(
+        max_concurrent_jobs=get_config_value(
+            config, "api", "max_concurrent_jobs", fallback=DEFAULT_MAX_CONCURRENT_JOBS, value_type=int
+        ) or DEFAULT_MAX_CONCURRENT_JOBS,
+        max_finished_jobs=get_config_value(
+            config, "api", "job_history", fallback=DEFAULT_JOB_HISTORY, value_type=int
+        ) or DEFAULT_JOB_HISTORY,
+    )
@@ -0,0 +1,396 @@
+"""
+Library integrity verification for Sync2NAS.
+
+Streams files recorded in ``downloaded_files`` and/or ``anime_tv_inventory``, hashes them in
+parallel with bounded read concurrency and bandwidth, and compares each CRC32 against a reference:
+the CRC32 the release carried in its filename (e.g. ``[ABCD1234]``) or, failing that, the hash
+previously stored for the file. Progress is checkpointed so an interrupted sweep resumes where
+it stopped.
+"""
+import datetime
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from models.downloaded_file import DownloadedFile, FileStatus
+from services.db_implementations.db_interface import DatabaseInterface
+from services.hashing_service import HashingService
+from utils.filename_parser import extract_crc32
+from utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ("downloaded", "inventory")
+DEFAULT_CHECKPOINT_FILENAME = "verify_library.checkpoint.json"
+DEFAULT_WORKERS = 2
+CHECKPOINT_INTERVAL_SECONDS = 30.0
+
+# Files in these states are not expected to be on disk
+_SKIPPED_STATUSES = {FileStatus.DELETED}
+
+
+@dataclass
+class VerificationMismatch:
+    """A file whose computed CRC32 differs from its reference CRC32."""
+    source: str
+    id: int
+    path: str
+    expected: str
+    actual: str
+    reference: str
+
+
+@dataclass
+class VerificationReport:
+    """Counters, throughput and ETA for a verification run."""
+    sources: List[str]
+    total_files: int = 0
+    total_bytes: int = 0
+    checked: int = 0
+    verified: int = 0
+    mismatched: int = 0
+    missing: int = 0
+    unverifiable: int = 0
+    skipped: int = 0
+    errors: int = 0
+    bytes_checked: int = 0
+    elapsed_seconds: float = 0.0
+    completed: bool = False
+    resumed: bool = False
+    mismatches: List[VerificationMismatch] = field(default_factory=list)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_checked / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimated seconds remaining, from bytes still to check at the current throughput."""
+        rate = self.bytes_per_second
+        if rate <= 0:
+            return None
+        return max(0.0, (self.total_bytes - self.bytes_checked) / rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["bytes_per_second"] = self.bytes_per_second
+        data["eta_seconds"] = self.eta_seconds
+        return data
+
+    def __str__(self) -> str:
+        eta = self.eta_seconds
+        return (
+            f"{self.checked}/{self.total_files} files, {self.bytes_checked / 1048576:.1f}/"
+            f"{self.total_bytes / 1048576:.1f} MiB at {self.bytes_per_second / 1048576:.1f} MiB/s "
+            f"(ok={self.verified}, mismatched={self.mismatched}, missing={self.missing}, "
+            f"unverifiable={self.unverifiable}, errors={self.errors}"
+            + (f", ETA {eta:.0f}s)" if eta is not None and not self.completed else ")")
+        )
+
+
+class VerificationCheckpoint:
+    """
+    JSON checkpoint recording, per source, the highest id below which every file was checked.
+
+    Written atomically (temp file + rename) so a crash never leaves a truncated checkpoint.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def load(self) -> Dict[str, int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {k: int(v) for k, v in data.get("last_ids", {}).items() if k in SOURCES}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable verification checkpoint {self.path}: {e}")
+            return {}
+
+    def save(self, last_ids: Dict[str, int]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_ids": last_ids, "updated_at": datetime.datetime.now().isoformat()}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LibraryVerifier:
+    """
+    Verify library files against their reference CRC32s.
+
+    Files are hashed on ``max_workers`` threads through the shared HashingService (so unchanged
+    files are answered by the persistent hash cache unless ``refresh`` is set). Reads are capped
+    at ``max_bytes_per_second`` across all workers. Mismatches in ``downloaded_files`` are marked
+    with status ``error``; computed hashes are stored for files that didn't have one.
+
+    Attributes:
+        db (DatabaseInterface): Database to read files from and write results to.
+        hashing_service (HashingService): Service used to hash files.
+        max_workers (int): Concurrent file reads.
+        max_bytes_per_second (Optional[float]): Read bandwidth cap (None = unlimited).
+        checkpoint (Optional[VerificationCheckpoint]): Where progress is saved for resuming.
+        dry_run (bool): Report only; no database writes.
+        refresh (bool): Ignore the hash cache and re-read every file.
+
+    Methods:
+        verify(sources, resume, limit, progress_callback): Run a verification sweep.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseInterface,
+        hashing_service: HashingService,
+        max_workers: int = DEFAULT_WORKERS,
+        max_bytes_per_second: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        dry_run: bool = False,
+        refresh: bool = False,
+    ) -> None:
+        self.db = db
+        self.hashing_service = hashing_service
+        self.max_workers = max(1, max_workers)
+        self.max_bytes_per_second = max_bytes_per_second
+        self.checkpoint = VerificationCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.dry_run = dry_run
+        self.refresh = refresh
+        self._bucket = TokenBucket(max_bytes_per_second)
+
+    # --------------------- item helpers ---------------------
+    def _iter_source(self, source: str, after_id: int) -> Iterator[Tuple[int, Any]]:
+        if source == "downloaded":
+            statuses = [s for s in FileStatus if s not in _SKIPPED_STATUSES]
+            for item in self.db.iter_downloaded_files(statuses=statuses, after_id=after_id):
+                yield item.id, item
+        else:
+            for row in self.db.iter_inventory_files(after_id=after_id):
+                if not row.get("is_dir"):
+                    yield row["id"], row
+
+    @staticmethod
+    def _describe(source: str, item: Any) -> Tuple[Optional[str], int, Optional[str], Optional[str]]:
+        """Return (path, size, expected CRC32, reference kind) for a source item."""
+        if source == "inventory":
+            name = item.get("name") or os.path.basename(item.get("path") or "")
+            expected = extract_crc32(name)
+            return item.get("path"), int(item.get("size") or 0), expected, "filename" if expected else None
+
+        df: DownloadedFile = item
+        if df.file_provided_hash_value:
+            return df.current_path, df.size, df.file_provided_hash_value.upper(), "filename"
+        expected = extract_crc32(df.name)
+        if expected:
+            return df.current_path, df.size, expected, "filename"
+        if df.file_hash and (df.file_hash_algo or "").upper() == "CRC32":
+            return df.current_path, df.size, df.file_hash.upper(), "stored"
+        return df.current_path, df.size, None, None
+
+    def _check(self, path: Optional[str]) -> Tuple[str, Optional[str], int]:
+        """Hash one file in a worker thread; returns (outcome, crc32, size on disk)."""
+        if not path or not os.path.isfile(path):
+            return "missing", None, 0
+        try:
+            size = os.path.getsize(path)
+            crc = self.hashing_service.hash_file(
+                path, ("crc32",), refresh=self.refresh, throttle=self._bucket.consume
+            )["crc32"]
+            return "hashed", crc, size
+        except OSError as e:
+            logger.warning(f"Failed to hash {path}: {e}")
+            return "error", None, 0
+
+    def _record(self, report: VerificationReport, source: str, item: Any, result: Tuple[str, Optional[str], int]) -> None:
+        """Fold one result into the report and write it back to the database (main thread only)."""
+        outcome, actual, size = result
+        path, _, expected, reference = self._describe(source, item)
+        file_id = item.id if source == "downloaded" else item["id"]
+        report.checked += 1
+        report.bytes_checked += size
+
+        if outcome == "missing":
+            report.missing += 1
+            logger.warning(f"Missing from disk: {path}")
+            return
+        if outcome == "error":
+            report.errors += 1
+            return
+
+        if expected is None:
+            report.unverifiable += 1
+        elif actual == expected:
+            report.verified += 1
+        else:
+            report.mismatched += 1
+            report.mismatches.append(VerificationMismatch(source, file_id, path, expected, actual, reference))
+            logger.error(f"CRC32 mismatch for {path}: expected {expected} ({reference}), computed {actual}")
+
+        if self.dry_run or source != "downloaded":
+            return
+        if expected is not None and actual != expected:
+            self.db.update_downloaded_file_status(
+                file_id, FileStatus.ERROR,
+                f"CRC32 mismatch: expected {expected} ({reference}), computed {actual}",
+            )
+        # Keep the stored reference when it's what failed; otherwise record the computed hash
+        if reference != "stored" and item.file_hash != actual:
+            self.db.set_downloaded_file_hash(file_id, "CRC32", actual, datetime.datetime.now())
+
+    def _plan(self, report: VerificationReport, start_ids: Dict[str, int]) -> None:
+        """Count files and bytes still to check so progress can report an ETA (DB reads only)."""
+        for source in report.sources:
+            for _, item in self._iter_source(source, start_ids.get(source, 0)):
+                path, size, expected, _ = self._describe(source, item)
+                if source == "inventory" and expected is None:
+                    continue
+                report.total_files += 1
+                report.total_bytes += size
+
+    # --------------------- public API ---------------------
+    def verify(
+        self,
+        sources: Optional[List[str]] = None,
+        resume: bool = True,
+        limit: Optional[int] = None,
+        progress_callback: Optional[Callable[[VerificationReport], None]] = None,
+    ) -> VerificationReport:
+        """
+        Run a verification sweep.
+
+        Args:
+            sources (Optional[List[str]]): "downloaded" and/or "inventory" (default: "downloaded").
+            resume (bool): Continue from the saved checkpoint instead of starting over.
+            limit (Optional[int]): Stop after this many files (the checkpoint lets the next run continue).
+            progress_callback (Optional[Callable]): Called with the report after each file.
+
+        Returns:
+            VerificationReport: Results; ``completed`` is False if the sweep stopped early.
+        """
+        sources = list(dict.fromkeys(sources or ["downloaded"]))
+        unknown = [s for s in sources if s not in SOURCES]
+        if unknown:
+            raise ValueError(f"Unknown verification source(s): {', '.join(unknown)}")
+
+        last_ids = self.checkpoint.load() if (self.checkpoint and resume) else {}
+        report = VerificationReport(sources=sources, resumed=bool(last_ids))
+        if last_ids:
+            logger.info(f"Resuming verification from checkpoint: {last_ids}")
+        self._plan(report, last_ids)
+        if limit is not None:
+            report.total_files = min(report.total_files, limit)
+
+        start = time.monotonic()
+        last_saved = start
+        remaining = limit
+        stopped_early = False
+        finished = False
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="verify") as executor:
+                for source in sources:
+                    # Ids are submitted in increasing order; the checkpoint only advances past ids
+                    # whose results (and every earlier one) have been recorded
+                    outstanding: Dict[int, Any] = {}
+                    in_flight: Dict[Future, Tuple[int, Any]] = {}
+                    last_submitted = last_ids.get(source, 0)
+
+                    def drain(block_until: int) -> None:
+                        while len(in_flight) > block_until:
+                            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                            for future in done:
+                                file_id, item = in_flight.pop(future)
+                                self._record(report, source, item, future.result())
+                                outstanding.pop(file_id, None)
+                                report.elapsed_seconds = time.monotonic() - start
+                                if progress_callback:
+                                    progress_callback(report)
+                        last_ids[source] = next(iter(outstanding)) - 1 if outstanding else last_submitted
+
+                    for file_id, item in self._iter_source(source, last_ids.get(source, 0)):
+                        if remaining is not None and remaining <= 0:
+                            stopped_early = True
+                            break
+                        path, _, expected, _ = self._describe(source, item)
+                        last_submitted = file_id
+                        if source == "inventory" and expected is None:
+                            # Nothing to compare against; don't spend I/O hashing it
+                            report.skipped += 1
+                            continue
+                        outstanding[file_id] = item
+                        in_flight[executor.submit(self._check, path)] = (file_id, item)
+                        if remaining is not None:
+                            remaining -= 1
+                        drain(self.max_workers * 2 - 1)
+                        if self.checkpoint and time.monotonic() - last_saved >= CHECKPOINT_INTERVAL_SECONDS:
+                            self.checkpoint.save(last_ids)
+                            last_saved = time.monotonic()
+                    drain(0)
+                    if stopped_early:
+                        break
+            finished = True
+        finally:
+            report.elapsed_seconds = time.monotonic() - start
+            report.completed = finished and not stopped_early
+            if self.checkpoint:
+                if report.completed:
+                    self.checkpoint.remove()
+                else:
+                    self.checkpoint.save(last_ids)
+        logger.info(f"Library verification {'complete' if report.completed else 'paused'}: {report}")
+        return report
+
+
+def default_checkpoint_path(config: Any) -> str:
+    """Checkpoint location: [verify] checkpoint_file, else next to the SQLite database, else the working directory."""
+    from utils.sync2nas_config import get_config_value
+
+    path = get_config_value(config, "verify", "checkpoint_file")
+    if path:
+        return path
+    db_file = get_config_value(config, "sqlite", "db_file")
+    return os.path.join(os.path.dirname(db_file) if db_file else ".", DEFAULT_CHECKPOINT_FILENAME)
+
+
+def create_library_verifier(
+    config: Any,
+    db: DatabaseInterface,
+    hashing_service: HashingService,
+    dry_run: bool = False,
+    refresh: bool = False,
+    max_workers: Optional[int] = None,
+    max_read_mib_per_second: Optional[float] = None,
+) -> LibraryVerifier:
+    """
+    Create a LibraryVerifier from the [verify] configuration section.
+
+    Recognised keys: ``workers`` (concurrent reads), ``max_read_mib_per_second`` (0 = unlimited)
+    and ``checkpoint_file``. Explicit arguments override the configuration.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    if max_workers is None:
+        max_workers = get_config_value(config, "verify", "workers", fallback=DEFAULT_WORKERS, value_type=int)
+    if max_read_mib_per_second is None:
+        max_read_mib_per_second = get_config_value(
+            config, "verify", "max_read_mib_per_second", fallback=0.0, value_type=float
+        )
+    return LibraryVerifier(
+        db,
+        hashing_service,
+        max_workers=max_workers,
+        max_bytes_per_second=max_read_mib_per_second * 1024 * 1024 if max_read_mib_per_second else None,
+        checkpoint_path=default_checkpoint_path(config),
+        dry_run=dry_run,
+        refresh=refresh,
+    )
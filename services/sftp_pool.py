@@ -0,0 +1,385 @@
+"""
+Bounded SFTP session pool for Sync2NAS.
+
+Multiplexes SFTP channels over a small number of SSH transports so that worker threads
+can reuse authenticated sessions instead of performing a full TCP connect, key load and
+SSH handshake for every file or subdirectory they download.
+"""
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+# Idle channels older than this are probed with a cheap round trip before being reused
+HEALTH_PROBE_AFTER_SECONDS = 30.0
+
+
+class _PooledTransport:
+    """Book-keeping for one SSH transport and the SFTP channels opened on it."""
+
+    def __init__(self, transport: paramiko.Transport) -> None:
+        self.transport = transport
+        self.channels = 0
+        self.last_used = time.monotonic()
+
+    def is_active(self) -> bool:
+        try:
+            return bool(self.transport.is_active())
+        except Exception:
+            return False
+
+
+class SFTPConnectionPool:
+    """
+    Thread-safe pool of SFTP sessions multiplexed over a bounded number of SSH transports.
+
+    Each transport carries up to ``channels_per_transport`` SFTP channels, so the pool never
+    holds more than ``max_transports * channels_per_transport`` sessions against the server.
+    Sessions are health-checked before reuse and closed after ``idle_timeout`` seconds idle.
+
+    Attributes:
+        host (str): SFTP server hostname.
+        port (int): SFTP server port.
+        username (str): SFTP username.
+        ssh_key_path (str): Path to the private key used for authentication.
+        max_transports (int): Maximum number of SSH transports (TCP connections).
+        channels_per_transport (int): Maximum SFTP channels opened on each transport.
+        idle_timeout (float): Seconds an idle session or transport is kept before closing.
+        acquire_timeout (Optional[float]): Seconds to wait for a free session (None waits forever).
+
+    Methods:
+        acquire(timeout): Lease an SFTP client from the pool.
+        release(client, discard): Return a leased client to the pool.
+        session(): Context manager that leases and releases a client.
+        stats(): Return pool utilization counters.
+        close(): Close all sessions and transports.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        ssh_key_path: str,
+        max_transports: int = 2,
+        channels_per_transport: int = 4,
+        idle_timeout: float = 300.0,
+        acquire_timeout: Optional[float] = None,
+    ) -> None:
+        if max_transports < 1:
+            raise ValueError("max_transports must be at least 1")
+        if channels_per_transport < 1:
+            raise ValueError("channels_per_transport must be at least 1")
+        self.host = host
+        self.port = port
+        self.username = username
+        self.ssh_key_path = ssh_key_path
+        self.max_transports = max_transports
+        self.channels_per_transport = channels_per_transport
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._transports: List[_PooledTransport] = []
+        self._idle: List[Tuple[paramiko.SFTPClient, _PooledTransport, float]] = []
+        self._leased: Dict[int, Tuple[paramiko.SFTPClient, _PooledTransport]] = {}
+        self._pending_transports = 0
+        self._key = None
+        self._closed = False
+
+    def __str__(self) -> str:
+        return (
+            f"SFTPConnectionPool(host={self.host}, port={self.port}, "
+            f"max_transports={self.max_transports}, channels_per_transport={self.channels_per_transport})"
+        )
+
+    @property
+    def max_sessions(self) -> int:
+        """Upper bound on concurrently open SFTP sessions."""
+        return self.max_transports * self.channels_per_transport
+
+    # --------------------- connection helpers ---------------------
+    def _load_key(self) -> paramiko.PKey:
+        """Load the private key once and reuse it for every transport."""
+        if self._key is None:
+            self._key = paramiko.RSAKey.from_private_key_file(self.ssh_key_path)
+        return self._key
+
+    def _open_transport(self) -> paramiko.Transport:
+        transport = paramiko.Transport((self.host, self.port))
+        try:
+            transport.connect(username=self.username, pkey=self._load_key())
+        except Exception:
+            transport.close()
+            raise
+        logger.debug(f"Opened pooled SSH transport to {self.host}:{self.port}")
+        return transport
+
+    @staticmethod
+    def _is_alive(client: paramiko.SFTPClient, owner: _PooledTransport) -> bool:
+        """Check transport/channel liveness from local state only (safe to call under the lock)."""
+        if not owner.is_active():
+            return False
+        try:
+            channel = client.get_channel()
+        except (paramiko.SSHException, socket.error, EOFError, OSError):
+            return False
+        return channel is not None and not channel.closed
+
+    @staticmethod
+    def _probe(client: paramiko.SFTPClient) -> bool:
+        """Round-trip to the server; call without holding the lock."""
+        try:
+            client.normalize(".")
+        except (paramiko.SSHException, socket.error, EOFError, OSError) as e:
+            logger.debug(f"Discarding unhealthy pooled SFTP session: {e}")
+            return False
+        return True
+
+    def _close_channel_locked(self, client: paramiko.SFTPClient, owner: _PooledTransport) -> None:
+        try:
+            client.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled SFTP channel: {e}")
+        owner.channels = max(0, owner.channels - 1)
+        if owner.channels == 0 and not owner.is_active():
+            self._drop_transport_locked(owner)
+
+    def _drop_transport_locked(self, owner: _PooledTransport) -> None:
+        try:
+            owner.transport.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled SSH transport: {e}")
+        if owner in self._transports:
+            self._transports.remove(owner)
+
+    def _reap_idle_locked(self) -> None:
+        """Close idle sessions and empty transports that exceeded the idle timeout."""
+        now = time.monotonic()
+        keep = []
+        for client, owner, idle_since in self._idle:
+            if now - idle_since > self.idle_timeout or not owner.is_active():
+                self._close_channel_locked(client, owner)
+            else:
+                keep.append((client, owner, idle_since))
+        self._idle = keep
+        for owner in list(self._transports):
+            if owner.channels == 0 and (now - owner.last_used > self.idle_timeout or not owner.is_active()):
+                logger.debug(f"Closing idle pooled SSH transport to {self.host}:{self.port}")
+                self._drop_transport_locked(owner)
+
+    def _open_sessions_locked(self) -> int:
+        return sum(t.channels for t in self._transports) + self._pending_transports
+
+    # --------------------- public API ---------------------
+    def acquire(self, timeout: Optional[float] = None) -> paramiko.SFTPClient:
+        """
+        Lease an SFTP client, reusing an idle healthy session when possible.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a free session; defaults to acquire_timeout.
+
+        Returns:
+            paramiko.SFTPClient: A client that must be handed back via release().
+
+        Raises:
+            TimeoutError: If no session became available within the timeout.
+            RuntimeError: If the pool has been closed.
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        owner: Optional[_PooledTransport] = None
+        new_transport = False
+
+        while True:
+            # An idle session that needs a server round trip first; its channel still counts as open
+            probe: Optional[Tuple[paramiko.SFTPClient, _PooledTransport]] = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("SFTP connection pool is closed")
+                    self._reap_idle_locked()
+
+                    while self._idle:
+                        client, idle_owner, idle_since = self._idle.pop()
+                        if not self._is_alive(client, idle_owner):
+                            self._close_channel_locked(client, idle_owner)
+                            continue
+                        if time.monotonic() - idle_since > HEALTH_PROBE_AFTER_SECONDS:
+                            probe = (client, idle_owner)
+                            break
+                        idle_owner.last_used = time.monotonic()
+                        self._leased[id(client)] = (client, idle_owner)
+                        return client
+                    if probe is not None:
+                        break
+
+                    if self._open_sessions_locked() < self.max_sessions:
+                        for candidate in self._transports:
+                            if candidate.channels < self.channels_per_transport and candidate.is_active():
+                                owner = candidate
+                                owner.channels += 1
+                                break
+                        if owner is None and len(self._transports) + self._pending_transports < self.max_transports:
+                            self._pending_transports += 1
+                            new_transport = True
+                        if owner is not None or new_transport:
+                            break
+
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"Timed out waiting for a pooled SFTP session to {self.host}:{self.port}")
+                    self._cond.wait(remaining)
+            if probe is None:
+                break
+
+            # Probe outside the lock so a slow server doesn't stall other acquire/release calls
+            client, idle_owner = probe
+            healthy = self._probe(client)
+            with self._cond:
+                if healthy and not self._closed:
+                    idle_owner.last_used = time.monotonic()
+                    self._leased[id(client)] = (client, idle_owner)
+                    return client
+                self._close_channel_locked(client, idle_owner)
+                self._cond.notify()
+
+        # Network I/O happens outside the lock so other threads can keep leasing sessions
+        if new_transport:
+            try:
+                transport = self._open_transport()
+            except Exception:
+                with self._cond:
+                    self._pending_transports -= 1
+                    self._cond.notify()
+                raise
+            owner = _PooledTransport(transport)
+            owner.channels = 1
+            with self._cond:
+                self._pending_transports -= 1
+                self._transports.append(owner)
+
+        try:
+            client = paramiko.SFTPClient.from_transport(owner.transport)
+            if client is None:
+                raise paramiko.SSHException("Server refused to open an SFTP channel")
+        except Exception:
+            with self._cond:
+                owner.channels = max(0, owner.channels - 1)
+                if owner.channels == 0 and not owner.is_active():
+                    self._drop_transport_locked(owner)
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            owner.last_used = time.monotonic()
+            self._leased[id(client)] = (client, owner)
+        logger.debug(f"Opened pooled SFTP session ({self.stats()['open_sessions']}/{self.max_sessions})")
+        return client
+
+    def release(self, client: paramiko.SFTPClient, discard: bool = False) -> None:
+        """
+        Return a leased client to the pool.
+
+        Args:
+            client (paramiko.SFTPClient): Client previously returned by acquire().
+            discard (bool): Close the session instead of keeping it for reuse (e.g. after an error).
+        """
+        with self._cond:
+            leased = self._leased.pop(id(client), None)
+            if leased is None:
+                logger.debug("Released an SFTP client that is not leased from this pool; closing it")
+                try:
+                    client.close()
+                except Exception:
+                    pass
+                return
+            _, owner = leased
+            if discard or self._closed or not owner.is_active():
+                self._close_channel_locked(client, owner)
+            else:
+                owner.last_used = time.monotonic()
+                self._idle.append((client, owner, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        """Lease a client for the duration of a with-block, discarding it on connection errors."""
+        client = self.acquire(timeout)
+        discard = False
+        try:
+            yield client
+        except (paramiko.SSHException, socket.error, EOFError):
+            discard = True
+            raise
+        finally:
+            self.release(client, discard=discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of pool utilization."""
+        with self._cond:
+            return {
+                "transports": len(self._transports),
+                "open_sessions": sum(t.channels for t in self._transports),
+                "leased_sessions": len(self._leased),
+                "idle_sessions": len(self._idle),
+                "max_sessions": self.max_sessions,
+            }
+
+    def close(self) -> None:
+        """Close all idle sessions and transports; leased sessions are closed when released."""
+        with self._cond:
+            self._closed = True
+            for client, owner, _ in self._idle:
+                self._close_channel_locked(client, owner)
+            self._idle = []
+            for owner in list(self._transports):
+                if owner.channels == 0:
+                    self._drop_transport_locked(owner)
+            self._cond.notify_all()
+        logger.debug(f"Closed {self}")
+
+
+def create_sftp_pool(config: Any) -> Optional[SFTPConnectionPool]:
+    """
+    Create an SFTPConnectionPool from the [sftp] configuration section.
+
+    Recognised keys: ``pool_size`` (SSH transports, 0 disables pooling), ``pool_channels_per_transport``,
+    ``pool_idle_timeout`` (seconds) and ``pool_acquire_timeout`` (seconds, optional).
+
+    Args:
+        config: Loaded configuration (ConfigParser or normalized dict).
+
+    Returns:
+        Optional[SFTPConnectionPool]: Pool instance, or None when pooling is disabled or SFTP is not configured.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    host = get_config_value(config, "sftp", "host")
+    username = get_config_value(config, "sftp", "username")
+    ssh_key_path = get_config_value(config, "sftp", "ssh_key_path")
+    if not all([host, username, ssh_key_path]):
+        return None
+
+    pool_size = get_config_value(config, "sftp", "pool_size", fallback=2, value_type=int)
+    if pool_size <= 0:
+        logger.info("SFTP session pooling disabled (pool_size=0)")
+        return None
+
+    acquire_timeout = get_config_value(config, "sftp", "pool_acquire_timeout", fallback=None, value_type=float)
+    return SFTPConnectionPool(
+        host,
+        get_config_value(config, "sftp", "port", fallback=22, value_type=int),
+        username,
+        ssh_key_path,
+        max_transports=pool_size,
+        channels_per_transport=get_config_value(config, "sftp", "pool_channels_per_transport", fallback=4, value_type=int),
+        idle_timeout=get_config_value(config, "sftp", "pool_idle_timeout", fallback=300.0, value_type=float),
+        acquire_timeout=acquire_timeout,
+    )
@@ -4,7 +4,10 @@ import time
 import paramiko
 import logging
 import os
+import queue
 import stat
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 from datetime import timedelta
@@ -12,9 +15,16 @@ from utils.file_filters import is_valid_media_file
 from utils.file_filters import is_valid_directory
 from utils.filename_parser import parse_filename
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from services.sftp_transfer import SFTPTransferEngine, TransferResult
+from utils.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
+# Default number of remote directories listed concurrently during a recursive walk
+DEFAULT_LIST_CONCURRENCY = 8
+_CONNECTION_ERRORS = (paramiko.SSHException, socket.error, EOFError)
+
 def retry_sftp_operation(func):
     """Decorator factory to retry SFTP operations in case of connection errors."""
     @functools.wraps(func)
@@ -34,11 +44,141 @@ def retry_sftp_operation(func):
                 if attempts >= max_retries:
                     logger.error(f"SFTP operation '{operation_name}' failed after {max_retries} retries.")
                     raise
+                get_metrics().retries.inc(operation=operation_name)
                 time.sleep(delay)
                 self.reconnect()
     return wrapper
         
 
+def build_listing_entry(remote_dir, name, size, mtime, is_dir, cutoff_time, fetched_at):
+    """
+    Apply list_remote_dir's rules to one directory entry.
+
+    Returns the listing dict (name, remote_path, size, modified_time, is_dir, fetched_at), or None
+    when the entry was modified after ``cutoff_time`` or is excluded by the directory/media filters.
+    """
+    modified_time = datetime.fromtimestamp(mtime)
+
+    # Skip files modified in the last minute
+    if modified_time > cutoff_time:
+        return None
+
+    # Skip invalid media files and directories with excluded keywords
+    if is_dir:
+        if not is_valid_directory(name):
+            return None
+    else:
+        if not is_valid_media_file(name):
+            return None
+
+    return {
+        "name": name,
+        "remote_path": remote_dir.rstrip('/') + '/' + name.replace('\\', '/'),
+        "size": size,
+        "modified_time": modified_time,
+        "is_dir": is_dir,
+        "fetched_at": fetched_at
+    }
+
+
+def truncate_filename(fname, llm_service, max_path_length, local_base, truncated_dir_name):
+    """
+    Truncate a filename to fit within max_path_length when combined with the local_base and truncated_dir_name.
+    Uses LLM if available, then regex parsing, then fallback truncation.
+    """
+    # Try LLM for filename truncation first if available
+    if llm_service:
+        base_name = llm_service.suggest_short_filename(fname, max_length=max_path_length - len(os.path.abspath(os.path.join(local_base, truncated_dir_name, ''))))
+        logger.debug(f"LLM suggested filename: {base_name} for original: {fname}")
+        if len(os.path.abspath(os.path.join(local_base, truncated_dir_name, base_name))) <= max_path_length:
+            return base_name
+    # Fallback to regex parsing
+    parser_result = parse_filename(fname, llm_service=llm_service)
+    extension = os.path.splitext(fname)[1][1:].lower()
+    if parser_result.get('show_name') and parser_result.get('season') and parser_result.get('episode'):
+        base_name = f"{parser_result['show_name']}.S{parser_result['season']}E{parser_result['episode']}.{extension}"
+        if len(os.path.abspath(os.path.join(local_base, truncated_dir_name, base_name))) > max_path_length:
+            show = parser_result['show_name']
+            show_short = show[:10]
+            base_name = f"{show_short}.S{parser_result['season']}E{parser_result['episode']}.{extension}"
+        return base_name
+    elif parser_result.get('show_name') and parser_result.get('episode'):
+        base_name = f"{parser_result['show_name']}.E{parser_result['episode']}.{extension}"
+        if len(os.path.abspath(os.path.join(local_base, truncated_dir_name, base_name))) > max_path_length:
+            show = parser_result['show_name']
+            show_short = show[:10]
+            base_name = f"{show_short}.E{parser_result['episode']}.{extension}"
+        return base_name
+    # fallback: just truncate filename
+    base_name = fname[:max(1, max_path_length - len(os.path.abspath(os.path.join(local_base, truncated_dir_name, ''))))]
+    return base_name
+
+
+def plan_windows_truncation(local_base, dir_name, filenames, llm_service=None, max_path_length=250,
+                            truncate=truncate_filename):
+    """
+    Decide how to shorten a directory (and, if needed, its files) so every path fits in max_path_length.
+
+    ``filenames`` are the names of all files in the remote tree; ``truncate`` shortens one filename
+    (signature of truncate_filename). Returns (truncated_dir_name, filename_map) where filename_map
+    is {original: truncated} or None if not needed.
+    """
+    truncated_dir_name = dir_name
+    filename_map = None
+
+    # Initial check: is any path too long with the original dir name?
+    max_path = max((len(os.path.abspath(os.path.join(local_base, dir_name, fname))) for fname in filenames), default=0)
+    if max_path <= max_path_length:
+        logger.debug(f"No truncation needed for dir {dir_name} in {local_base}")
+        return truncated_dir_name, None
+
+    # Find the longest filename
+    max_filename_length = max((len(fname) for fname in filenames), default=0)
+    # Calculate max allowed dirname length
+    max_dirname_length = max_path_length - max_filename_length - len(os.path.abspath(os.path.join(local_base, ''))) - 1
+
+    # Try truncating the directory name (always try LLM if available)
+    if llm_service:
+        truncated_dir_name = llm_service.suggest_short_dirname(dir_name, max_length=max_dirname_length)
+    else:
+        truncated_dir_name = dir_name[:max_dirname_length]
+
+    # Check again: is any path too long with the truncated dir name?
+    max_path = max((len(os.path.abspath(os.path.join(local_base, truncated_dir_name, fname))) for fname in filenames), default=0)
+    if max_path <= max_path_length:
+        logger.debug(f"Truncated dir name to {truncated_dir_name} in {local_base}")
+        return truncated_dir_name, None
+
+    # Only now, if still too long, parse and truncate filenames
+    filename_map = {}
+    for fname in filenames:
+        base_name = truncate(fname, llm_service, max_path_length, local_base, truncated_dir_name)
+        filename_map[fname] = base_name
+    logger.debug(f"Truncated filenames for dir {truncated_dir_name} in {local_base}")
+    return truncated_dir_name, filename_map
+
+
+def index_remote_tree(entries, remote_root):
+    """
+    Index one recursive listing (files and directories) of ``remote_root`` for download planning.
+
+    Returns (children, subtree_filenames): the entries directly inside each directory, and the names
+    of every file anywhere below each directory (what plan_windows_truncation needs), both keyed by
+    remote path, with ``remote_root`` keyed without a trailing slash.
+    """
+    root = remote_root.rstrip('/')
+    children, subtree_filenames = {}, {}
+    for entry in entries:
+        path = entry["remote_path"]
+        children.setdefault(path.rsplit('/', 1)[0], []).append(entry)
+        if entry["is_dir"]:
+            continue
+        while path != root:
+            path = path.rsplit('/', 1)[0]
+            subtree_filenames.setdefault(path, []).append(entry["name"])
+    return children, subtree_filenames
+
+
 class SFTPService:
     """
     Service for managing SFTP connections and file operations, including listing, downloading, and filtering remote files.
@@ -47,13 +187,17 @@ class SFTPService:
         connect(): Establish a new SFTP connection.
         disconnect(): Close the SFTP connection.
         reconnect(): Reconnect to the SFTP server.
+        session(): Context manager yielding a worker SFTPService bound to its own channel.
         list_remote_dir(remote_path): List contents of a remote directory.
+        stat_remote_dir(remote_path, children): Return a directory's mtime (and optionally child count).
         list_remote_files(remote_path): List files in a remote directory.
         list_remote_files_recursive(remote_path): Recursively list files in a remote directory.
+        iter_remote_files_recursive(remote_path, max_in_flight): Breadth-first generator over files, listing directories concurrently.
         download_dir(remote_path, local_path, filename_map): Download a directory from remote.
         download_file(remote_path, local_path, max_path_length): Download a file from remote.
     """
-    def __init__(self, host, port, username, ssh_key_path, llm_service=None):
+    def __init__(self, host, port, username, ssh_key_path, llm_service=None, pool=None, transfer_engine=None,
+                 list_concurrency=DEFAULT_LIST_CONCURRENCY):
         self.host = host
         self.port = port
         self.username = username
@@ -61,6 +205,13 @@ class SFTPService:
         self.client = None
         self.transport = None
         self.llm_service = llm_service
+        # Optional SFTPConnectionPool shared by worker sessions (see session())
+        self.pool = pool
+        self._pooled = False
+        # Pipelined transfer engine used by download_file
+        self.transfer_engine = transfer_engine or SFTPTransferEngine()
+        # Directories listed concurrently by iter_remote_files_recursive (extra channels come from the pool)
+        self.list_concurrency = max(1, int(list_concurrency or 1))
         
         if llm_service is None:
             logger.warning("No LLM service provided.")
@@ -77,6 +228,12 @@ class SFTPService:
             raise
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._pooled:
+            # Hand the channel back to the pool; drop it if the block failed on a connection error
+            discard = exc_type is not None and issubclass(exc_type, (paramiko.SSHException, socket.error, EOFError))
+            self.disconnect(discard=discard)
+            return
+
         try:
             if self.client:
                 self.client.close()
@@ -92,7 +249,14 @@ class SFTPService:
             logger.exception(f"Error closing transport: {e}")
 
     def connect(self):
-        """Establish a new SFTP connection."""
+        """Establish a new SFTP connection (or lease a channel from the pool for worker sessions)."""
+        if self._pooled:
+            try:
+                self.client = self.pool.acquire()
+                return self
+            except Exception as e:
+                logger.exception(f"Failed to acquire pooled SFTP session for {self.host}:{self.port}: {e}")
+                raise RuntimeError(f"Failed to connect to SFTP server: {e}")
         try:
             key = paramiko.RSAKey.from_private_key_file(self.ssh_key_path)
             self.transport = paramiko.Transport((self.host, self.port))
@@ -105,8 +269,13 @@ class SFTPService:
             self.__exit__(None, None, None)
             raise RuntimeError(f"Failed to connect to SFTP server: {e}")
 
-    def disconnect(self):
-        """Close existing SFTP connection."""
+    def disconnect(self, discard=False):
+        """Close existing SFTP connection. Pooled worker sessions return their channel to the pool instead."""
+        if self._pooled:
+            if self.client:
+                self.pool.release(self.client, discard=discard)
+                self.client = None
+            return
         try:
             if self.client:
                 self.client.close()
@@ -122,12 +291,49 @@ class SFTPService:
         """Reconnect to the SFTP server."""
         logger.debug("Attempting to reconnect to SFTP server...")
         try:
-            self.disconnect()
+            self.disconnect(discard=True)
             return self.connect()
         except Exception as e:
             logger.exception(f"Failed to reconnect to SFTP server: {e}")
             raise RuntimeError(f"Failed to reconnect to SFTP server: {e}")
         
+    @contextmanager
+    def session(self):
+        """
+        Yield an SFTPService bound to its own SFTP channel, for use by a single worker thread.
+
+        When a connection pool is configured the channel is leased from the pool and handed back
+        afterwards; otherwise a dedicated connection is opened and closed as before.
+        """
+        worker = SFTPService(
+            self.host,
+            self.port,
+            self.username,
+            self.ssh_key_path,
+            llm_service=self.llm_service,
+            pool=self.pool,
+            transfer_engine=self.transfer_engine,
+            list_concurrency=self.list_concurrency,
+        )
+        worker._pooled = self.pool is not None
+        with get_metrics().sessions_active.track(), worker:
+            yield worker
+
+    @contextmanager
+    def _segment_session(self):
+        """
+        Yield an extra SFTP client for a segmented download.
+
+        Pooled sessions are only taken if one is free right now, so segment helpers never wait on
+        channels held by other file workers; without a pool a dedicated connection is opened.
+        """
+        if self.pool is not None:
+            with self.pool.session(timeout=0) as client:
+                yield client
+        else:
+            with self.session() as worker:
+                yield worker.client
+
     @retry_sftp_operation
     def list_remote_dir(self, remote_path):
         """List contents of a remote directory, filtering by exclusion rules."""
@@ -137,34 +343,40 @@ class SFTPService:
         entries = []
         remote_path = remote_path.replace('\\', '/')
         for attr in self.client.listdir_attr(remote_path):
-            name = attr.filename
-            path = remote_path.rstrip('/') + '/' + name.replace('\\', '/')
-            is_dir = stat.S_ISDIR(attr.st_mode)
-            modified_time = datetime.fromtimestamp(attr.st_mtime)
+            entry = build_listing_entry(
+                remote_path, attr.filename, attr.st_size, attr.st_mtime, stat.S_ISDIR(attr.st_mode),
+                cutoff_time, fetched_at,
+            )
+            if entry is not None:
+                entries.append(entry)
 
-            # Skip files modified in the last minute
-            if modified_time > cutoff_time:
-                continue
+        logger.debug(f"Listed {len(entries)} entries in {remote_path}")
+        return entries
 
-            # Skip invalid media files and directories with excluded keywords
-            if is_dir:
-                if not is_valid_directory(name):
-                    continue
-            else:
-                if not is_valid_media_file(name):
-                    continue
+    @retry_sftp_operation
+    def stat_remote_dir(self, remote_path, children=False):
+        """
+        Return the state of a remote directory for incremental listing.
 
-            entries.append({
-                "name": name,
-                "remote_path": path,
-                "size": attr.st_size,
-                "modified_time": modified_time,
-                "is_dir": is_dir,
-                "fetched_at": fetched_at
-            })
+        A directory's mtime changes whenever an entry is added, removed or renamed directly inside
+        it, so an unchanged mtime means its top-level listing is unchanged.
 
-        logger.debug(f"Listed {len(entries)} entries in {remote_path}")
-        return entries
+        Args:
+            remote_path (str): Remote directory.
+            children (bool): Also list the directory to count its entries and check that none was
+                modified within the last minute (a settled directory is safe to snapshot).
+
+        Returns:
+            dict: ``mtime`` (datetime) and, with ``children``, ``child_count`` and ``settled``.
+        """
+        remote_path = remote_path.replace('\\', '/')
+        state = {"mtime": datetime.fromtimestamp(self.client.stat(remote_path).st_mtime)}
+        if children:
+            cutoff_time = datetime.now() - timedelta(minutes=1)
+            attrs = self.client.listdir_attr(remote_path)
+            state["child_count"] = len(attrs)
+            state["settled"] = all(datetime.fromtimestamp(a.st_mtime) <= cutoff_time for a in attrs)
+        return state
 
     @retry_sftp_operation
     def list_remote_files(self, remote_path):
@@ -206,33 +418,44 @@ class SFTPService:
         logger.debug(f"Listed {len(entries)} entries in {remote_path}")
         return entries
 
-    @retry_sftp_operation
-    def _list_remote_files_recursive_helper(self, remote_path, entries):
-        """Helper method for recursive file listing."""
-        cutoff_time = datetime.now() - timedelta(minutes=1)
-        fetched_at = datetime.now()
+    @staticmethod
+    def _scan_remote_dir(client, remote_path, cutoff_time, fetched_at, include_dirs=False):
+        """
+        List one remote directory, returning (media file entries, subdirectory entries).
 
-        remote_path = remote_path.replace('\\', '/')
-        for attr in self.client.listdir_attr(remote_path):
+        With ``include_dirs``, subdirectories rejected by is_valid_directory are left out (and so
+        never walked). A ``cutoff_time`` of None keeps recently modified entries.
+        """
+        files, subdirs = [], []
+        for attr in client.listdir_attr(remote_path):
             name = attr.filename
             path = remote_path.rstrip('/') + '/' + name.replace('\\', '/')
             is_dir = stat.S_ISDIR(attr.st_mode)
             modified_time = datetime.fromtimestamp(attr.st_mtime)
 
-            # Skip files modified in the last minute
-            if modified_time > cutoff_time:
+            # Skip files and directories modified in the last minute
+            if cutoff_time is not None and modified_time > cutoff_time:
                 continue
 
-            # For directories, recurse
             if is_dir:
-                self._list_remote_files_recursive_helper(path, entries)
+                if include_dirs and not is_valid_directory(name):
+                    logger.debug(f"Skipping directory due to filter: {name}")
+                    continue
+                subdirs.append({
+                    "name": name,
+                    "remote_path": path,
+                    "size": attr.st_size,
+                    "modified_time": modified_time,
+                    "is_dir": True,
+                    "fetched_at": fetched_at
+                })
                 continue
 
             # Skip invalid media files
             if not is_valid_media_file(name):
                 continue
 
-            entries.append({
+            files.append({
                 "name": name,
                 "remote_path": path,
                 "size": attr.st_size,
@@ -240,9 +463,127 @@ class SFTPService:
                 "is_dir": False,
                 "fetched_at": fetched_at
             })
-        logger.debug(f"Listed {len(entries)} files in {remote_path}")
+        logger.debug(f"Listed {len(files)} files and {len(subdirs)} subdirectories in {remote_path}")
+        return files, subdirs
 
     @retry_sftp_operation
+    def _scan_own_remote_dir(self, remote_path, cutoff_time, fetched_at, include_dirs=False):
+        """List a directory on this service's own channel, reconnecting on connection errors."""
+        return self._scan_remote_dir(self.client, remote_path, cutoff_time, fetched_at, include_dirs)
+
+    def _walk_helper(self, pending, results, cutoff_time, fetched_at, include_dirs=False):
+        """
+        Walk worker: lease a pooled channel if one is available right now and list directories
+        from ``pending`` until a None sentinel arrives.
+
+        Errors are reported to the coordinator; after a connection error the channel is discarded
+        and the helper stops (the coordinator retries that directory on its own channel).
+        """
+        try:
+            client = self.pool.acquire(timeout=0)
+        except Exception as e:
+            logger.debug(f"No pooled SFTP session free for remote walk helper: {e}")
+            return
+        discard = False
+        try:
+            while True:
+                path = pending.get()
+                if path is None:
+                    return
+                try:
+                    files, subdirs = self._scan_remote_dir(client, path, cutoff_time, fetched_at, include_dirs)
+                except Exception as e:
+                    results.put((path, None, None, e))
+                    if isinstance(e, _CONNECTION_ERRORS):
+                        logger.warning(f"Remote walk helper lost its channel listing {path}: {e}")
+                        discard = True
+                        return
+                else:
+                    results.put((path, files, subdirs, None))
+        finally:
+            self.pool.release(client, discard=discard)
+
+    def iter_remote_files_recursive(self, remote_path, max_in_flight=None, include_dirs=False,
+                                    min_age=timedelta(minutes=1)):
+        """
+        Walk a remote tree breadth-first, yielding media file entries as directories are listed.
+
+        The calling thread lists directories on this service's own channel; when a connection pool
+        is configured, up to ``max_in_flight - 1`` helper threads list further directories
+        concurrently over pooled channels that are free at the start of the walk (never waiting
+        for one, so a walk started from a pooled worker cannot deadlock the pool). Entries are
+        yielded as soon as their directory has been listed, so consumers can start before the
+        walk finishes. Closing the generator early stops the helpers.
+
+        Args:
+            remote_path (str): Root directory to walk.
+            max_in_flight (Optional[int]): Directories listed concurrently (default: list_concurrency).
+            include_dirs (bool): Also yield directory entries (``is_dir`` True); directories rejected
+                by is_valid_directory are then neither yielded nor walked.
+            min_age (Optional[timedelta]): Skip entries modified more recently than this (None keeps them).
+
+        Yields:
+            dict: File entries in the same shape as list_remote_files_recursive().
+        """
+        cutoff_time = datetime.now() - min_age if min_age is not None else None
+        fetched_at = datetime.now()
+        remote_path = remote_path.replace('\\', '/')
+        max_in_flight = max(1, max_in_flight or self.list_concurrency)
+
+        pending = queue.Queue()
+        results = queue.Queue()
+        pending.put(remote_path)
+        outstanding = 1  # Directories queued or being listed whose results haven't been consumed
+
+        helpers = []
+        if self.pool is not None:
+            for i in range(max_in_flight - 1):
+                helper = threading.Thread(
+                    target=self._walk_helper,
+                    args=(pending, results, cutoff_time, fetched_at, include_dirs),
+                    name=f"sftp-walk-{i}",
+                    daemon=True,
+                )
+                helper.start()
+                helpers.append(helper)
+
+        total = 0
+        try:
+            while outstanding:
+                try:
+                    path, files, subdirs, error = results.get_nowait()
+                except queue.Empty:
+                    try:
+                        path = pending.get_nowait()
+                    except queue.Empty:
+                        # Everything left is being listed by helpers
+                        path, files, subdirs, error = results.get()
+                    else:
+                        files, subdirs = self._scan_own_remote_dir(path, cutoff_time, fetched_at, include_dirs)
+                        error = None
+                if isinstance(error, _CONNECTION_ERRORS):
+                    files, subdirs = self._scan_own_remote_dir(path, cutoff_time, fetched_at, include_dirs)
+                elif error is not None:
+                    raise error
+                outstanding -= 1
+                for subdir in subdirs:
+                    pending.put(subdir["remote_path"])
+                outstanding += len(subdirs)
+                total += len(files)
+                if include_dirs:
+                    yield from subdirs
+                yield from files
+        finally:
+            for _ in helpers:
+                pending.put(None)
+            for helper in helpers:
+                helper.join()
+        logger.debug(f"Walked {remote_path}: {total} files using {len(helpers) + 1} lister(s)")
+
+    def _list_remote_files_recursive_helper(self, remote_path, entries):
+        """Helper method for recursive file listing."""
+        entries.extend(self.iter_remote_files_recursive(remote_path))
+
     def list_remote_files_recursive(self, remote_path):
         """Return a list of recursively listed files from the remote path.
         
@@ -260,189 +601,104 @@ class SFTPService:
         Truncate a filename to fit within max_path_length when combined with the local_base and truncated_dir_name.
         Uses LLM if available, then regex parsing, then fallback truncation.
         """
-        # Try LLM for filename truncation first if available
-        if llm_service:
-            base_name = llm_service.suggest_short_filename(fname, max_length=max_path_length - len(os.path.abspath(os.path.join(local_base, truncated_dir_name, ''))))
-            logger.debug(f"LLM suggested filename: {base_name} for original: {fname}")
-            if len(os.path.abspath(os.path.join(local_base, truncated_dir_name, base_name))) <= max_path_length:
-                return base_name
-        # Fallback to regex parsing
-        parser_result = parse_filename(fname, llm_service=llm_service)
-        extension = os.path.splitext(fname)[1][1:].lower()
-        if parser_result.get('show_name') and parser_result.get('season') and parser_result.get('episode'):
-            base_name = f"{parser_result['show_name']}.S{parser_result['season']}E{parser_result['episode']}.{extension}"
-            if len(os.path.abspath(os.path.join(local_base, truncated_dir_name, base_name))) > max_path_length:
-                show = parser_result['show_name']
-                show_short = show[:10]
-                base_name = f"{show_short}.S{parser_result['season']}E{parser_result['episode']}.{extension}"
-            return base_name
-        elif parser_result.get('show_name') and parser_result.get('episode'):
-            base_name = f"{parser_result['show_name']}.E{parser_result['episode']}.{extension}"
-            if len(os.path.abspath(os.path.join(local_base, truncated_dir_name, base_name))) > max_path_length:
-                show = parser_result['show_name']
-                show_short = show[:10]
-                base_name = f"{show_short}.E{parser_result['episode']}.{extension}"
-            return base_name
-        # fallback: just truncate filename
-        base_name = fname[:max(1, max_path_length - len(os.path.abspath(os.path.join(local_base, truncated_dir_name, ''))))]
-        return base_name
+        return truncate_filename(fname, llm_service, max_path_length, local_base, truncated_dir_name)
 
-    def _truncate_for_windows_path(self, local_base, dir_name, remote_path, max_path_length=250):
+    def _truncate_for_windows_path(self, local_base, dir_name, remote_path, max_path_length=250, filenames=None):
         """
         Given a local base path, a directory name, and the remote path, determine if truncation is needed for the directory and/or filenames so that all resulting paths are <= max_path_length (default 250 chars).
+        ``filenames`` (every file name below the directory) skips listing the remote tree again.
         Returns (truncated_dir_name, filename_map) where filename_map is {original: truncated} or None if not needed.
         """
-        entries = []
-        self._list_remote_files_recursive_helper(remote_path, entries)
-        filenames = [entry['name'] for entry in entries if not entry.get('is_dir', False)]
-        truncated_dir_name = dir_name
-        filename_map = None
-
-        # Initial check: is any path too long with the original dir name?
-        max_path = max((len(os.path.abspath(os.path.join(local_base, dir_name, fname))) for fname in filenames), default=0)
-        if max_path <= max_path_length:
-            logger.debug(f"No truncation needed for dir {dir_name} in {local_base}")
-            return truncated_dir_name, None
-
-        # Find the longest filename
-        max_filename_length = max((len(fname) for fname in filenames), default=0)
-        # Calculate max allowed dirname length
-        max_dirname_length = max_path_length - max_filename_length - len(os.path.abspath(os.path.join(local_base, ''))) - 1
-
-        # Try truncating the directory name (always try LLM if available)
-        if self.llm_service:
-            truncated_dir_name = self.llm_service.suggest_short_dirname(dir_name, max_length=max_dirname_length)
-        else:
-            truncated_dir_name = dir_name[:max_dirname_length]
-
-        # Check again: is any path too long with the truncated dir name?
-        max_path = max((len(os.path.abspath(os.path.join(local_base, truncated_dir_name, fname))) for fname in filenames), default=0)
-        if max_path <= max_path_length:
-            logger.debug(f"Truncated dir name to {truncated_dir_name} in {local_base}")
-            return truncated_dir_name, None
-
-        # Only now, if still too long, parse and truncate filenames
-        filename_map = {}
-        for fname in filenames:
-            base_name = self._truncate_filename(fname, self.llm_service, max_path_length, local_base, truncated_dir_name)
-            filename_map[fname] = base_name
-        logger.debug(f"Truncated filenames for dir {truncated_dir_name} in {local_base}")
-        return truncated_dir_name, filename_map
+        if filenames is None:
+            entries = []
+            self._list_remote_files_recursive_helper(remote_path, entries)
+            filenames = [entry['name'] for entry in entries if not entry.get('is_dir', False)]
+        return plan_windows_truncation(
+            local_base, dir_name, filenames, self.llm_service, max_path_length, self._truncate_filename
+        )
 
     @retry_sftp_operation
-    def download_dir(self, remote_path, local_path, filename_map=None, max_workers=4):
+    def plan_dir_download(self, remote_path, local_path, filename_map=None, create_dirs=True):
         """
-        Download all files and subdirectories in a directory in parallel using a thread pool.
-        Each file/subdir download uses a new SFTPService instance.
-        Preserves filename mapping for path truncation.
+        List a remote directory tree and return the files download_dir would fetch, without downloading.
+
+        Applies the same directory/file filters and Windows path truncation as download_dir and
+        creates the local directories unless ``create_dirs`` is False (e.g. when only planning).
+        The tree is walked once (iter_remote_files_recursive, directories included) and every
+        directory's truncation is worked out from that listing. Entries carry name, remote_path,
+        local_path, size, modified_time, is_dir and fetched_at, so callers can schedule them
+        alongside other transfers.
         """
         remote_path = remote_path.replace('\\', '/')
-        dir_name = os.path.basename(remote_path.rstrip('/'))
-        parent_path = os.path.dirname(local_path)
-        # If this is a recursive call, use the provided filename_map and local_path (already truncated)
-        # Otherwise, compute truncation and filename mapping for this directory
-        if filename_map is not None:
-            truncated_dir_name = os.path.basename(local_path)
-            new_filename_map = filename_map
-        else:
+        entries = self.iter_remote_files_recursive(remote_path, include_dirs=True, min_age=None)
+        children, subtree_filenames = index_remote_tree(entries, remote_path)
+        root = remote_path.rstrip('/')
+        if filename_map is None:
             # Compute truncation and filename mapping for the top-level directory
-            truncated_dir_name, new_filename_map = self._truncate_for_windows_path(parent_path, dir_name, remote_path)
+            parent_path = os.path.dirname(local_path)
+            dir_name = os.path.basename(root)
+            truncated_dir_name, filename_map = self._truncate_for_windows_path(
+                parent_path, dir_name, remote_path, filenames=subtree_filenames.get(root, [])
+            )
             local_path = os.path.join(parent_path, truncated_dir_name)
-        os.makedirs(local_path, exist_ok=True)
 
-        # Gather files and subdirectories for parallel download
-        files_info = []
-        subdirs = []
-        fetched_at = datetime.now()
-        for entry in self.client.listdir_attr(remote_path):
-            # Always use forward slashes for remote paths
-            remote_entry = remote_path.rstrip('/') + '/' + entry.filename.replace('\\', '/')
-            if stat.S_ISDIR(entry.st_mode):
-                # Apply directory filtering
-                if not is_valid_directory(entry.filename):
-                    logger.debug(f"Skipping directory due to filter: {entry.filename}")
-                    continue
-                # For each subdirectory, precompute its truncation and filename mapping
-                subdir_local_path = os.path.join(local_path, entry.filename)
-                subdir_trunc_name, subdir_filename_map = self._truncate_for_windows_path(local_path, entry.filename, remote_entry)
-                subdir_local_path = os.path.join(local_path, subdir_trunc_name)
-                # Pass the mapping and truncated name to the parallel task
-                subdirs.append((remote_entry, subdir_local_path, subdir_filename_map))
-            else:
-                # Apply file filtering
-                if not is_valid_media_file(entry.filename):
-                    logger.debug(f"Skipping file due to filter: {entry.filename}")
-                    continue
-                # Use the filename mapping for this directory if present
-                local_filename = new_filename_map[entry.filename] if new_filename_map and entry.filename in new_filename_map else entry.filename
-                files_info.append({
-                    "remote_entry": remote_entry,
-                    "local_file": os.path.join(local_path, local_filename),
-                    "size": entry.st_size,
-                    "modified_time": datetime.fromtimestamp(entry.st_mtime),
-                    "name": entry.filename,
-                    "is_dir": False,
-                    "fetched_at": fetched_at,
-                })
+        planned = []
+        pending = deque([(root, local_path, filename_map)])
+        while pending:
+            current_remote, current_local, current_map = pending.popleft()
+            if create_dirs:
+                os.makedirs(current_local, exist_ok=True)
+            for entry in children.get(current_remote, []):
+                if entry["is_dir"]:
+                    # Each subdirectory gets its own truncation and filename mapping
+                    subdir_trunc_name, subdir_filename_map = self._truncate_for_windows_path(
+                        current_local, entry["name"], entry["remote_path"],
+                        filenames=subtree_filenames.get(entry["remote_path"], []),
+                    )
+                    pending.append((entry["remote_path"], os.path.join(current_local, subdir_trunc_name), subdir_filename_map))
+                else:
+                    # Use the filename mapping for this directory if present
+                    local_filename = current_map.get(entry["name"], entry["name"]) if current_map else entry["name"]
+                    planned.append({**entry, "local_path": os.path.join(current_local, local_filename)})
+        return planned
+
+    def download_dir(self, remote_path, local_path, filename_map=None, max_workers=4):
+        """
+        Download all files under a directory tree in parallel using one thread pool.
+        The tree is listed first (see plan_dir_download); each file then runs on its own session
+        (leased from the pool when configured). Preserves filename mapping for path truncation.
+        """
+        planned = self.plan_dir_download(remote_path, local_path, filename_map=filename_map)
 
-        # Prepare SFTP connection parameters for new instances (each thread gets its own connection)
-        sftp_params = {
-            "host": self.host,
-            "port": self.port,
-            "username": self.username,
-            "ssh_key_path": self.ssh_key_path,
-            "llm_service": self.llm_service,
-        }
+        # Listing is done; a pooled worker hands its channel back so the file downloads can use it
+        if self._pooled:
+            self.disconnect()
 
-        # Task for downloading a single file (runs in a thread)
+        # Task for downloading a single file (runs in a thread on its own session)
         def file_download_task(remote_entry, local_file):
             logger.info(f"Starting download of file: {remote_entry} -> {local_file}")
-            sftp = SFTPService(**sftp_params)
-            with sftp:
-                sftp.download_file(remote_entry, local_file)
+            with self.session() as sftp:
+                result = sftp.download_file(remote_entry, local_file)
             logger.info(f"Completed download of file: {remote_entry} -> {local_file}")
+            return result
 
-        # Task for downloading a subdirectory (runs in a thread, recurses in parallel)
-        def dir_download_task(remote_entry, local_dir, subdir_filename_map):
-            sftp = SFTPService(**sftp_params)
-            with sftp:
-                # Recursively call download_dir with the correct filename mapping for this subdir
-                return sftp.download_dir(
-                    remote_entry,
-                    local_dir,
-                    filename_map=subdir_filename_map,
-                    max_workers=max_workers,
-                )
-
-        # Use a thread pool to download all files and subdirectories in parallel
+        # Every file in the tree shares a single pool, so concurrency stays at max_workers at any depth
         results = []
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_kind = {}
-            # Submit all file download tasks
-            for info in files_info:
-                fut = executor.submit(file_download_task, info["remote_entry"], info["local_file"])
-                future_to_kind[fut] = ("file", info)
-            # Submit all subdirectory download tasks (each will recurse in parallel)
-            for remote_entry, local_dir, subdir_filename_map in subdirs:
-                fut = executor.submit(dir_download_task, remote_entry, local_dir, subdir_filename_map)
-                future_to_kind[fut] = ("dir", None)
+            future_to_info = {
+                executor.submit(file_download_task, info["remote_path"], info["local_path"]): info
+                for info in planned
+            }
             # Wait for all downloads to complete, logging any exceptions
-            for future in as_completed(future_to_kind):
-                kind, info = future_to_kind[future]
+            for future in as_completed(future_to_info):
+                info = future_to_info[future]
                 try:
                     res = future.result()
-                    if kind == "file" and info is not None:
-                        results.append({
-                            "name": info["name"],
-                            "remote_path": info["remote_entry"],
-                            "size": info["size"],
-                            "modified_time": info["modified_time"],
-                            "is_dir": False,
-                            "fetched_at": info["fetched_at"],
-                            "local_path": info["local_file"],
-                        })
-                    elif kind == "dir" and isinstance(res, list):
-                        results.extend(res)
+                    results.append({
+                        **info,
+                        # Digests computed while the file streamed in (see SFTPTransferEngine)
+                        "hashes": dict(res.hashes) if isinstance(res, TransferResult) else {},
+                    })
                 except Exception as e:
                     logger.exception(f"Failed to download entry in {remote_path}: {e}")
 
@@ -450,6 +706,15 @@ class SFTPService:
 
     @retry_sftp_operation
     def download_file(self, remote_path, local_path, max_path_length=250):
+        """
+        Download a single file using the pipelined transfer engine.
+
+        Files above the engine's segment threshold are fetched in parallel byte ranges over extra
+        SFTP channels; an interrupted segmented download resumes from its checkpoint on retry.
+
+        Returns:
+            TransferResult | None: Transfer statistics, or None if the file was skipped.
+        """
         remote_path = remote_path.replace('\\', '/')
         # Final check for path length
         if len(os.path.abspath(local_path)) > max_path_length:
@@ -468,5 +733,8 @@ class SFTPService:
         # Always use forward slashes for remote paths
         logger.debug(f"Downloading file from {remote_path} to {local_path}")
         os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        self.client.get(remote_path, local_path)
-        logger.debug(f"Downloaded file from {remote_path} to {local_path}")
+        result = self.transfer_engine.download(
+            self.client, remote_path, local_path, session_factory=self._segment_session
+        )
+        logger.debug(f"Downloaded file from {remote_path} to {local_path} ({result})")
+        return result
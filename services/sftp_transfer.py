@@ -0,0 +1,719 @@
+"""
+Pipelined SFTP transfer engine for Sync2NAS.
+
+paramiko's ``SFTPClient.get`` issues reads with a small request window, which leaves a
+high-latency link mostly idle. The engine here opens the remote file, pipelines a
+configurable number of outstanding read requests via ``SFTPFile.prefetch`` and streams the
+data through a large write buffer into a preallocated local file, reporting throughput
+for every transfer.
+
+Files above an optional size threshold can be split into byte ranges that are fetched
+concurrently over several SFTP channels.
+
+Every download is written to ``<file>.part`` alongside a small JSON journal recording the
+remote file identity and, per byte range, the bytes completed and their rolling CRC32. A
+retry or a later run resumes from the last verified offset, and the ``.part`` file is only
+renamed into place once the whole file has arrived. Because the journal already tracks the
+CRC32 of every byte range, the whole-file CRC32 falls out of the transfer without re-reading
+the file; other digests (MD5/SHA1) are streamed alongside when the file arrives in one pass.
+
+An optional BandwidthLimiter caps download bandwidth across every transfer sharing the engine.
+While a finite rate is in force, transfers request data one block at a time, after paying for it
+(with prefetch, data keeps arriving at full speed however slowly it is consumed). In an unlimited
+schedule window they prefetch as usual and only meter the bytes they read.
+
+download_async() performs the same journaled, resumable transfer over an asyncssh client for the
+asyncio backend (see services.async_sftp_service).
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Sequence
+
+import paramiko
+
+from services.hashing_service import SUPPORTED_ALGORITHMS, MultiHasher, crc32_combine, format_crc32
+from utils.rate_limiter import BandwidthLimiter, FileThrottle, RateSchedule
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_MAX_REQUESTS = 64
+DEFAULT_WRITE_BUFFER_SIZE = 8 * 1024 * 1024
+DEFAULT_SEGMENT_COUNT = 4
+
+PART_SUFFIX = ".part"
+# The journal lives next to the partial file: <file>.part.json
+JOURNAL_SUFFIX = ".json"
+# Progress is flushed and journaled at least this often
+JOURNAL_INTERVAL = 16 * 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+# Returns a context manager yielding an additional SFTP client, or raises if none is available
+SessionFactory = Callable[[], ContextManager[paramiko.SFTPClient]]
+
+
+@dataclass
+class TransferResult:
+    """
+    Outcome of a single file transfer.
+
+    Attributes:
+        remote_path (str): Remote file that was read.
+        local_path (str): Local file that was written.
+        bytes_transferred (int): Number of bytes fetched and written during this transfer.
+        elapsed_seconds (float): Wall-clock duration of the transfer.
+        bytes_resumed (int): Bytes already present locally from an interrupted earlier attempt.
+        segments (int): Number of byte ranges the file was split into.
+        hashes (Dict[str, str]): Digests computed while streaming, keyed by lowercase algorithm name.
+            CRC32 never needs a second pass; MD5/SHA1 are omitted when the file was segmented or resumed.
+    """
+    remote_path: str
+    local_path: str
+    bytes_transferred: int
+    elapsed_seconds: float
+    bytes_resumed: int = 0
+    segments: int = 1
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Average throughput of the transfer."""
+        if self.elapsed_seconds <= 0:
+            return float(self.bytes_transferred)
+        return self.bytes_transferred / self.elapsed_seconds
+
+    def __str__(self) -> str:
+        mib = self.bytes_transferred / (1024 * 1024)
+        rate = self.bytes_per_second / (1024 * 1024)
+        return f"{mib:.1f} MiB in {self.elapsed_seconds:.2f}s ({rate:.2f} MiB/s)"
+
+
+def preallocate(fileobj, size: int) -> None:
+    """
+    Reserve ``size`` bytes for an open local file to limit fragmentation on large writes.
+
+    Uses ``posix_fallocate`` where available and falls back to extending the file with truncate.
+    """
+    if size <= 0:
+        return
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fileobj.fileno(), 0, size)
+        else:
+            fileobj.truncate(size)
+    except OSError as e:
+        logger.debug(f"Could not preallocate {size} bytes: {e}")
+
+
+def part_path_for(local_path: str) -> str:
+    """Path of the partial file used while ``local_path`` is being downloaded."""
+    return local_path + PART_SUFFIX
+
+
+def journal_path_for(local_path: str) -> str:
+    """Path of the transfer journal kept while ``local_path`` is being downloaded."""
+    return part_path_for(local_path) + JOURNAL_SUFFIX
+
+
+@dataclass
+class Segment:
+    """A byte range [start, end) of a remote file, how much of it is written locally and its CRC32."""
+    index: int
+    start: int
+    end: int
+    done: int = 0
+    crc32: int = 0
+
+    @property
+    def offset(self) -> int:
+        return self.start + self.done
+
+    @property
+    def complete(self) -> bool:
+        return self.offset >= self.end
+
+
+class TransferJournal:
+    """
+    Sidecar JSON file recording the progress of a partial download.
+
+    The journal identifies the remote file by path, size and mtime and is only honoured when
+    all three still match; otherwise the transfer starts over. Each segment carries the number
+    of bytes written and the CRC32 of those bytes, so the partial file can be verified before
+    it is resumed. A sequential download is simply a journal with a single segment.
+
+    Methods:
+        plan(path, remote_path, size, mtime, segment_count): Create a fresh journal.
+        load(path, remote_path, size, mtime): Load a matching journal, or None.
+        verify(part_path, block_size): Re-check written ranges against their CRC32.
+        update(index, done, crc32): Record progress for one segment and persist it.
+        remove(): Delete the journal file.
+    """
+
+    def __init__(self, path: str, remote_path: str, size: int, mtime: int, segments: List[Segment]) -> None:
+        self.path = path
+        self.remote_path = remote_path
+        self.size = size
+        self.mtime = mtime
+        self.segments = segments
+        self._lock = threading.Lock()
+
+    @classmethod
+    def plan(cls, path: str, remote_path: str, size: int, mtime: int, segment_count: int) -> "TransferJournal":
+        if size <= 0:
+            return cls(path, remote_path, size, mtime, [Segment(index=0, start=0, end=0)])
+        segment_count = max(1, min(segment_count, size // DEFAULT_BLOCK_SIZE or 1))
+        step = -(-size // segment_count)
+        segments = [
+            Segment(index=i, start=start, end=min(start + step, size))
+            for i, start in enumerate(range(0, size, step))
+        ]
+        return cls(path, remote_path, size, mtime, segments)
+
+    @classmethod
+    def load(cls, path: str, remote_path: str, size: int, mtime: int) -> Optional["TransferJournal"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable transfer journal {path}: {e}")
+            return None
+        if (data.get("remote_path"), data.get("size"), data.get("mtime")) != (remote_path, size, mtime):
+            logger.info(f"Remote file changed since last attempt, restarting download: {remote_path}")
+            return None
+        try:
+            segments = [Segment(**seg) for seg in data["segments"]]
+        except (KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed transfer journal {path}: {e}")
+            return None
+        return cls(path, remote_path, size, mtime, segments)
+
+    @property
+    def bytes_done(self) -> int:
+        return sum(seg.done for seg in self.segments)
+
+    def crc32(self) -> int:
+        """CRC32 of the journaled data, combining the per-segment values in file order."""
+        crc = 0
+        for seg in self.segments:
+            crc = crc32_combine(crc, seg.crc32, seg.done)
+        return crc
+
+    def verify(self, part_path: str, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+        """
+        Re-read the journaled ranges of the partial file and reset any whose CRC32 no longer matches.
+
+        Returns:
+            int: Number of bytes that verified and can be resumed.
+        """
+        with open(part_path, "rb") as f:
+            for seg in self.segments:
+                if not seg.done:
+                    continue
+                f.seek(seg.start)
+                remaining = seg.done
+                crc = 0
+                while remaining > 0:
+                    data = f.read(min(block_size, remaining))
+                    if not data:
+                        break
+                    crc = zlib.crc32(data, crc)
+                    remaining -= len(data)
+                if remaining or crc != seg.crc32:
+                    logger.warning(
+                        f"Partial data for {self.remote_path} failed verification "
+                        f"(segment {seg.index}); re-fetching {seg.done} bytes"
+                    )
+                    seg.done = 0
+                    seg.crc32 = 0
+        self.save()
+        return self.bytes_done
+
+    def update(self, index: int, done: int, crc32: int) -> None:
+        with self._lock:
+            seg = self.segments[index]
+            seg.done = done
+            seg.crc32 = crc32
+            self._save_locked()
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        data = {
+            "remote_path": self.remote_path,
+            "size": self.size,
+            "mtime": self.mtime,
+            "segments": [asdict(seg) for seg in self.segments],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        for path in (self.path, f"{self.path}.tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class SFTPTransferEngine:
+    """
+    Download files over an SFTP client using pipelined (prefetched) reads.
+
+    Attributes:
+        block_size (int): Bytes read from the remote file and written locally per iteration.
+        max_requests (int): Maximum outstanding SFTP read requests kept in flight per file (or segment).
+        write_buffer_size (int): Size of the local write buffer in bytes.
+        preallocate (bool): Whether to reserve the full file size locally before writing.
+        segment_threshold (int): Files at least this large are downloaded in segments (0 disables).
+        segment_count (int): Number of byte ranges (and channels) used for a segmented download.
+        hash_algorithms (Sequence[str]): Digests reported in TransferResult.hashes (crc32, md5, sha1, sha256).
+        bandwidth (Optional[BandwidthLimiter]): Bandwidth limits shared by all transfers (None = unlimited).
+
+    Methods:
+        download(client, remote_path, local_path, progress_callback, session_factory): Transfer one file.
+        download_async(client, remote_path, local_path, progress_callback): Transfer one file over asyncssh.
+    """
+
+    def __init__(
+        self,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        write_buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+        preallocate: bool = True,
+        segment_threshold: int = 0,
+        segment_count: int = DEFAULT_SEGMENT_COUNT,
+        hash_algorithms: Sequence[str] = ("crc32",),
+        bandwidth: Optional[BandwidthLimiter] = None,
+    ) -> None:
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if max_requests <= 0:
+            raise ValueError("max_requests must be positive")
+        self.block_size = block_size
+        self.max_requests = max_requests
+        self.write_buffer_size = max(write_buffer_size, block_size)
+        self.preallocate = preallocate
+        self.segment_threshold = max(0, segment_threshold)
+        self.segment_count = max(1, segment_count)
+        self.hash_algorithms = tuple(dict.fromkeys(a.lower() for a in hash_algorithms))
+        unknown = [a for a in self.hash_algorithms if a not in SUPPORTED_ALGORITHMS]
+        if unknown:
+            raise ValueError(f"Unsupported hash algorithm(s): {', '.join(unknown)}")
+        self.bandwidth = bandwidth if bandwidth is not None and bandwidth.enabled else None
+
+    def __str__(self) -> str:
+        return (
+            f"SFTPTransferEngine(block_size={self.block_size}, max_requests={self.max_requests}, "
+            f"write_buffer_size={self.write_buffer_size})"
+        )
+
+    def download(
+        self,
+        client: paramiko.SFTPClient,
+        remote_path: str,
+        local_path: str,
+        progress_callback: Optional[ProgressCallback] = None,
+        session_factory: Optional[SessionFactory] = None,
+    ) -> TransferResult:
+        """
+        Download a remote file to ``local_path`` using prefetched reads.
+
+        Data is written to ``<local_path>.part`` and journaled as it arrives; if a matching journal
+        from an interrupted attempt exists, the verified ranges are kept and only the rest is fetched.
+        The partial file is renamed to ``local_path`` once complete.
+
+        When segmented mode is enabled, a ``session_factory`` is supplied and the file is at least
+        ``segment_threshold`` bytes, the file is fetched as concurrent byte ranges. The calling client
+        always works on segments; helper clients are requested from ``session_factory`` and simply
+        skipped if none is available, so a busy pool slows the transfer down instead of blocking it.
+
+        Args:
+            client (paramiko.SFTPClient): Connected SFTP client.
+            remote_path (str): Remote file path.
+            local_path (str): Destination path on the local filesystem.
+            progress_callback (Optional[Callable[[int, int], None]]): Called with (bytes_done, total_bytes).
+            session_factory (Optional[SessionFactory]): Source of extra SFTP clients for segmented mode.
+
+        Returns:
+            TransferResult: Bytes transferred in this call, bytes resumed, elapsed time, throughput and
+                the digests computed from the streamed bytes.
+
+        Raises:
+            IOError: If the transfer ends before the advertised remote size was received.
+        """
+        start = time.monotonic()
+        attrs = client.stat(remote_path)
+        size = attrs.st_size
+        segmented = session_factory is not None and 0 < self.segment_threshold <= size
+        journal = self._open_journal(
+            remote_path, local_path, size, int(attrs.st_mtime or 0), self.segment_count if segmented else 1
+        )
+        part_path = part_path_for(local_path)
+
+        resumed = journal.bytes_done
+        if resumed:
+            logger.info(f"Resuming download of {remote_path} at {resumed}/{size} bytes")
+
+        # CRC32 comes from the journal; other digests need every byte in order, i.e. a single fresh pass
+        streamed_algos = [a for a in self.hash_algorithms if a != "crc32"]
+        hasher = MultiHasher(streamed_algos) if streamed_algos and not segmented and not resumed else None
+
+        pending: "queue.Queue[Segment]" = queue.Queue()
+        for seg in journal.segments:
+            if not seg.complete:
+                pending.put(seg)
+
+        # One throttle per file so a per-file cap covers all of its segments
+        throttle = self.bandwidth.throttle_for_file() if self.bandwidth else None
+        cancel = threading.Event()
+        errors: List[BaseException] = []
+        progress_lock = threading.Lock()
+        progress = {"done": resumed}
+
+        def report(nbytes: int) -> None:
+            if progress_callback:
+                with progress_lock:
+                    progress["done"] += nbytes
+                    progress_callback(progress["done"], size)
+
+        def drain(worker_client: paramiko.SFTPClient) -> None:
+            while not cancel.is_set():
+                try:
+                    seg = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self._fetch_segment(
+                        worker_client, remote_path, part_path, seg, journal, cancel, report, hasher, throttle
+                    )
+                except BaseException as e:
+                    errors.append(e)
+                    cancel.set()
+                    return
+
+        def helper() -> None:
+            if pending.empty() or cancel.is_set():
+                return
+            try:
+                with session_factory() as helper_client:
+                    drain(helper_client)
+            except Exception as e:
+                # Segment errors are collected by drain(); this only covers acquiring/releasing the channel
+                logger.debug(f"No extra SFTP channel for segmented download of {remote_path}: {e}")
+
+        helpers = []
+        if segmented:
+            helpers = [
+                threading.Thread(target=helper, name=f"sftp-segment-{i}", daemon=True)
+                for i in range(min(self.segment_count, pending.qsize()) - 1)
+            ]
+        for t in helpers:
+            t.start()
+        drain(client)
+        for t in helpers:
+            t.join()
+
+        if errors:
+            raise errors[0]
+        incomplete = [seg.index for seg in journal.segments if not seg.complete]
+        if incomplete:
+            raise IOError(f"Segments {incomplete} of {remote_path} did not complete")
+
+        return self._finish(journal, remote_path, local_path, resumed, start, hasher)
+
+    async def download_async(
+        self,
+        client: Any,
+        remote_path: str,
+        local_path: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> TransferResult:
+        """
+        Coroutine counterpart of download() for an asyncssh SFTP client.
+
+        Uses the same ``.part`` file, journal and inline CRC32 as download(), so either backend can
+        resume the other's interrupted transfer. Each block is requested with ``read(n, offset)``,
+        which asyncssh splits into up to ``max_requests`` pipelined requests; the event loop is only
+        held while a received block is written out. Opening (and verifying) the journal, journal
+        flushes and the final rename run in worker threads. Byte ranges left by an interrupted
+        segmented download are fetched one after another.
+
+        Args:
+            client (asyncssh.SFTPClient): Connected asyncssh SFTP client.
+            remote_path (str): Remote file path.
+            local_path (str): Destination path on the local filesystem.
+            progress_callback (Optional[Callable[[int, int], None]]): Called with (bytes_done, total_bytes).
+
+        Returns:
+            TransferResult: Same statistics and digests as download().
+
+        Raises:
+            IOError: If the transfer ends before the advertised remote size was received.
+        """
+        start = time.monotonic()
+        attrs = await client.stat(remote_path)
+        size = attrs.size
+        journal = await asyncio.to_thread(
+            self._open_journal, remote_path, local_path, size, int(attrs.mtime or 0), 1
+        )
+        part_path = part_path_for(local_path)
+
+        resumed = journal.bytes_done
+        if resumed:
+            logger.info(f"Resuming download of {remote_path} at {resumed}/{size} bytes")
+
+        streamed_algos = [a for a in self.hash_algorithms if a != "crc32"]
+        hasher = MultiHasher(streamed_algos) if streamed_algos and not resumed else None
+        throttle = self.bandwidth.async_throttle_for_file() if self.bandwidth else None
+        done = resumed
+
+        async with client.open(remote_path, "rb", max_requests=self.max_requests) as remote:
+            for seg in journal.segments:
+                if seg.complete:
+                    continue
+                offset = seg.offset
+                crc = seg.crc32
+                unflushed = 0
+                with open(part_path, "r+b", buffering=self.write_buffer_size) as local:
+                    local.seek(offset)
+                    try:
+                        while offset < seg.end:
+                            want = min(self.block_size, seg.end - offset)
+                            if throttle is not None:
+                                await throttle(want)
+                            data = await remote.read(want, offset)
+                            if not data:
+                                raise IOError(
+                                    f"Size mismatch for {remote_path}: expected {journal.size} bytes, "
+                                    f"received data ended at byte {offset}"
+                                )
+                            local.write(data)
+                            crc = zlib.crc32(data, crc)
+                            if hasher is not None:
+                                hasher.update(data)
+                            offset += len(data)
+                            unflushed += len(data)
+                            done += len(data)
+                            if progress_callback:
+                                progress_callback(done, size)
+                            if unflushed >= JOURNAL_INTERVAL:
+                                await asyncio.to_thread(
+                                    self._flush_progress, local, journal, seg.index, offset - seg.start, crc
+                                )
+                                unflushed = 0
+                    finally:
+                        # Whatever was written before a failure is still valid; record it so a retry resumes here
+                        await asyncio.to_thread(
+                            self._flush_progress, local, journal, seg.index, offset - seg.start, crc
+                        )
+
+        return await asyncio.to_thread(self._finish, journal, remote_path, local_path, resumed, start, hasher)
+
+    @staticmethod
+    def _flush_progress(local, journal: TransferJournal, index: int, done: int, crc: int) -> None:
+        """Flush written data, then journal it (so the journal never claims bytes not yet on disk)."""
+        local.flush()
+        journal.update(index, done, crc)
+
+    def _finish(
+        self,
+        journal: TransferJournal,
+        remote_path: str,
+        local_path: str,
+        resumed: int,
+        start: float,
+        hasher: Optional[MultiHasher],
+    ) -> TransferResult:
+        """Move a completed ``.part`` file into place, drop its journal and report the transfer."""
+        hashes = hasher.hexdigests() if hasher else {}
+        if "crc32" in self.hash_algorithms:
+            hashes["crc32"] = format_crc32(journal.crc32())
+
+        os.replace(part_path_for(local_path), local_path)
+        journal.remove()
+
+        result = TransferResult(
+            remote_path,
+            local_path,
+            journal.size - resumed,
+            time.monotonic() - start,
+            bytes_resumed=resumed,
+            segments=len(journal.segments),
+            hashes=hashes,
+        )
+        if result.segments > 1:
+            logger.info(f"Transferred {remote_path} in {result.segments} segments: {result}")
+        else:
+            logger.info(f"Transferred {remote_path}: {result}")
+        return result
+
+    def _open_journal(
+        self, remote_path: str, local_path: str, size: int, mtime: int, segment_count: int
+    ) -> TransferJournal:
+        """Load and verify the journal of an interrupted attempt, or start a fresh partial file."""
+        part_path = part_path_for(local_path)
+        journal_path = journal_path_for(local_path)
+
+        if os.path.exists(part_path):
+            journal = TransferJournal.load(journal_path, remote_path, size, mtime)
+            if journal is not None:
+                try:
+                    journal.verify(part_path, self.block_size)
+                    return journal
+                except OSError as e:
+                    logger.warning(f"Could not verify partial download {part_path}: {e}")
+
+        journal = TransferJournal.plan(journal_path, remote_path, size, mtime, segment_count)
+        with open(part_path, "wb") as local:
+            if self.preallocate:
+                preallocate(local, size)
+            local.truncate(size)
+        journal.save()
+        return journal
+
+    def _fetch_segment(
+        self,
+        client: paramiko.SFTPClient,
+        remote_path: str,
+        part_path: str,
+        seg: Segment,
+        journal: TransferJournal,
+        cancel: threading.Event,
+        report: Callable[[int], None],
+        hasher: Optional[MultiHasher] = None,
+        throttle: Optional[FileThrottle] = None,
+    ) -> None:
+        """
+        Fetch the missing part of one segment, journaling progress and CRC32 as data is flushed.
+
+        ``hasher`` is only passed for single-segment transfers starting at byte 0, where it sees every
+        byte in file order. While the ``throttle`` reports a finite rate, each block is paid for and
+        then fetched with its own pipelined ``readv``; otherwise the rest of the segment is prefetched
+        and the bytes read are metered afterwards, so an unlimited schedule window runs at full speed.
+        Once prefetching has started its requests are already in flight, so a limit imposed later in
+        the segment only paces how fast the buffered data is consumed.
+        """
+        offset = seg.offset
+        crc = seg.crc32
+        unflushed = 0
+        prefetching = False
+        with open(part_path, "r+b", buffering=self.write_buffer_size) as local:
+            try:
+                with client.open(remote_path, "rb") as remote:
+                    local.seek(offset)
+                    while offset < seg.end:
+                        if cancel.is_set():
+                            break
+                        want = min(self.block_size, seg.end - offset)
+                        if throttle is not None and not prefetching and throttle.limited:
+                            throttle(want)
+                            data = b"".join(remote.readv([(offset, want)], self.max_requests))
+                        else:
+                            if not prefetching:
+                                remote.seek(offset)
+                                remote.prefetch(seg.end, max_concurrent_requests=self.max_requests)
+                                prefetching = True
+                            data = remote.read(want)
+                            if throttle is not None:
+                                # Keeps the global budget (and its schedule check) up to date
+                                throttle(len(data))
+                        if not data:
+                            raise IOError(
+                                f"Size mismatch for {remote_path}: expected {journal.size} bytes, "
+                                f"received data ended at byte {offset}"
+                            )
+                        local.write(data)
+                        crc = zlib.crc32(data, crc)
+                        if hasher is not None:
+                            hasher.update(data)
+                        offset += len(data)
+                        unflushed += len(data)
+                        report(len(data))
+                        if unflushed >= JOURNAL_INTERVAL:
+                            local.flush()
+                            journal.update(seg.index, offset - seg.start, crc)
+                            unflushed = 0
+            finally:
+                # Whatever was written before a failure is still valid; record it so a retry resumes here
+                local.flush()
+                journal.update(seg.index, offset - seg.start, crc)
+
+
+def create_transfer_engine(config: Any) -> SFTPTransferEngine:
+    """
+    Create an SFTPTransferEngine from the [sftp] configuration section.
+
+    Recognised keys: ``transfer_block_size`` (bytes), ``transfer_max_requests``,
+    ``transfer_write_buffer`` (bytes), ``transfer_preallocate`` (bool), ``segment_threshold``
+    (bytes, 0 disables segmented downloads) and ``segment_count``. Digests computed during the
+    transfer are read from ``[hashing] inline_algorithms`` (comma-separated, default ``crc32``).
+    Bandwidth limits come from create_bandwidth_limiter().
+
+    Args:
+        config: Loaded configuration (ConfigParser or normalized dict).
+
+    Returns:
+        SFTPTransferEngine: Engine configured from the [sftp] section, falling back to defaults.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    return SFTPTransferEngine(
+        block_size=get_config_value(config, "sftp", "transfer_block_size", fallback=DEFAULT_BLOCK_SIZE, value_type=int),
+        max_requests=get_config_value(config, "sftp", "transfer_max_requests", fallback=DEFAULT_MAX_REQUESTS, value_type=int),
+        write_buffer_size=get_config_value(
+            config, "sftp", "transfer_write_buffer", fallback=DEFAULT_WRITE_BUFFER_SIZE, value_type=int
+        ),
+        preallocate=get_config_value(config, "sftp", "transfer_preallocate", fallback=True, value_type=bool),
+        segment_threshold=get_config_value(config, "sftp", "segment_threshold", fallback=0, value_type=int),
+        segment_count=get_config_value(config, "sftp", "segment_count", fallback=DEFAULT_SEGMENT_COUNT, value_type=int),
+        hash_algorithms=[
+            algo.strip()
+            for algo in get_config_value(config, "hashing", "inline_algorithms", fallback="crc32").split(",")
+            if algo.strip()
+        ],
+        bandwidth=create_bandwidth_limiter(config),
+    )
+
+
+def create_bandwidth_limiter(config: Any) -> BandwidthLimiter:
+    """
+    Create a BandwidthLimiter from the [sftp] configuration section.
+
+    Recognised keys: ``max_download_mib_per_second`` (global cap, 0 = unlimited),
+    ``max_file_mib_per_second`` (per-file cap, 0 = unlimited) and ``bandwidth_schedule``
+    (e.g. ``08:00-23:00=50, 23:00-08:00=0``; windows override the global cap). An invalid
+    schedule is logged and ignored, and the global cap still applies.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    global_mib = get_config_value(config, "sftp", "max_download_mib_per_second", fallback=0.0, value_type=float)
+    file_mib = get_config_value(config, "sftp", "max_file_mib_per_second", fallback=0.0, value_type=float)
+    schedule = None
+    spec = get_config_value(config, "sftp", "bandwidth_schedule", fallback="")
+    if spec and spec.strip():
+        try:
+            schedule = RateSchedule.parse(spec)
+        except ValueError as e:
+            logger.error(f"Ignoring [sftp] bandwidth_schedule: {e}")
+    limiter = BandwidthLimiter(
+        max_bytes_per_second=global_mib * 1024 * 1024 if global_mib and global_mib > 0 else None,
+        per_file_bytes_per_second=file_mib * 1024 * 1024 if file_mib and file_mib > 0 else None,
+        schedule=schedule,
+    )
+    if limiter.enabled:
+        logger.info(f"Download bandwidth limits: {limiter}")
+    return limiter
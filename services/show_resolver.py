@@ -0,0 +1,135 @@
+"""
+In-process cache for show name and alias lookups.
+
+ShowResolver loads every show once and answers show_exists / get_show_by_name_or_alias from
+dictionaries keyed by normalized name, with the same standard and set-match rules as the
+database (see services.db_implementations.show_names). Routing, auto-add and add-show call
+these lookups once per file or candidate name, so a run no longer queries the database for
+names it has already seen.
+
+The cache reloads when the database's shows_version() changes, i.e. after add_show,
+update_show_aliases or delete_show_and_episodes on the same service instance. Changes made by
+another process (a CLI command while the API is running) are picked up after ``max_age_seconds``
+or an explicit invalidate().
+
+search() and best_fuzzy_match() rank shows by trigram similarity for names that match nothing
+exactly; the FuzzyShowIndex behind them is built on first use after each reload.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.db_implementations.db_interface import DatabaseInterface
+from services.db_implementations.show_names import EXACT_KINDS, lookup_keys, show_name_keys
+from services.fuzzy_show_index import DEFAULT_FUZZY_LIMIT, FuzzyMatch, FuzzyShowIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE_SECONDS = 300.0
+
+
+class ShowResolver:
+    """
+    Cached show lookups by name or alias.
+
+    Attributes:
+        db (DatabaseInterface): Database the shows are loaded from.
+        max_age_seconds (float): Reload at least this often; 0 disables time-based reloads.
+    """
+
+    def __init__(self, db: DatabaseInterface, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> None:
+        self.db = db
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._shows: Dict[Any, Dict[str, Any]] = {}
+        # normalized name -> id of the first show (by id) with that key
+        self._exact: Dict[str, Any] = {}
+        self._any: Dict[str, Any] = {}
+        self._fuzzy: Optional[FuzzyShowIndex] = None
+
+    def invalidate(self) -> None:
+        """Drop the cache; the next lookup reloads all shows."""
+        with self._lock:
+            self._version = None
+
+    def _stale(self) -> bool:
+        if self._version is None or self._version != self.db.shows_version():
+            return True
+        return self.max_age_seconds > 0 and time.monotonic() - self._loaded_at > self.max_age_seconds
+
+    def _load(self) -> None:
+        version = self.db.shows_version()
+        shows: Dict[Any, Dict[str, Any]] = {}
+        exact: Dict[str, Any] = {}
+        any_key: Dict[str, Any] = {}
+        rows = sorted(self.db.get_all_shows(), key=lambda r: r.get("id") or 0)
+        for row in rows:
+            show_id = row.get("id")
+            shows[show_id] = row
+            for name, kind in show_name_keys(row.get("sys_name"), row.get("tmdb_name"), row.get("tmdb_aliases")):
+                if kind in EXACT_KINDS:
+                    exact.setdefault(name, show_id)
+                any_key.setdefault(name, show_id)
+        self._shows, self._exact, self._any = shows, exact, any_key
+        self._fuzzy = None
+        self._version = version
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Loaded {len(shows)} show(s) and {len(any_key)} name key(s) into the show resolver")
+
+    def resolve(self, name: Optional[str]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return a copy of the first show (by id) that ``name`` matches and the match type, or None."""
+        with self._lock:
+            if self._stale():
+                self._load()
+            exact, parts = lookup_keys(name)
+            standard_id = self._exact.get(exact)
+            candidates = [self._any[p] for p in parts if p in self._any]
+            if standard_id is not None:
+                candidates.append(standard_id)
+            if not candidates:
+                return None
+            show_id = min(candidates, key=lambda i: i or 0)
+            match = "Standard Match" if show_id == standard_id else "Set Match"
+            return dict(self._shows[show_id]), match
+
+    def get_show_by_name_or_alias(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Same contract as DatabaseInterface.get_show_by_name_or_alias, answered from the cache."""
+        found = self.resolve(name)
+        if found:
+            logger.debug(f"Show {name} resolved from cache. ({found[1]})")
+            return found[0]
+        return None
+
+    def show_exists(self, name: Optional[str]) -> bool:
+        """Same contract as DatabaseInterface.show_exists, answered from the cache."""
+        return self.resolve(name) is not None
+
+    def _fuzzy_index(self) -> FuzzyShowIndex:
+        with self._lock:
+            if self._stale():
+                self._load()
+            if self._fuzzy is None:
+                self._fuzzy = FuzzyShowIndex(self._shows.values())
+            return self._fuzzy
+
+    def search(self, name: str, limit: int = DEFAULT_FUZZY_LIMIT, min_score: float = 0.0) -> List[FuzzyMatch]:
+        """Rank shows by similarity of their names and aliases to ``name``, best first."""
+        return self._fuzzy_index().search(name, limit=limit, min_score=min_score)
+
+    def best_fuzzy_match(self, name: str, threshold: float) -> Optional[FuzzyMatch]:
+        """
+        Return the top fuzzy match if it scores at least ``threshold`` and is unambiguous.
+
+        A different show tying the top score means the name cannot tell them apart, so None is
+        returned rather than guessing.
+        """
+        matches = self.search(name, limit=2, min_score=threshold)
+        if not matches:
+            return None
+        if len(matches) > 1 and matches[1].score == matches[0].score:
+            logger.info(f"Fuzzy match for {name} is ambiguous: {matches[0].matched_name} / {matches[1].matched_name}")
+            return None
+        return matches[0]
@@ -0,0 +1,294 @@
+"""
+Staged post-processing for finished downloads.
+
+A download worker only transfers bytes. Each finished file then moves through a chain of stages
+(hash -> parse -> persist in process_sftp_diffs). Every stage has its own worker threads and a
+bounded input queue. A slow stage, such as multi-second LLM filename parsing, only backs up its
+own queue. The transfer pool keeps every slot busy. When a queue fills, submit() blocks the
+caller until the stage catches up, so pending work cannot grow without bound. A
+WriteBehindBuffer lets the last stage write its results in batches, which means one database
+transaction per batch instead of one per file.
+
+Usage:
+    stages = [Stage("hash", hash_file, workers=2), Stage("persist", save, workers=1)]
+    with StagePipeline(stages, queue_size=32) as pipeline:
+        for item in finished:
+            pipeline.submit(item)
+    # Leaving the block waits until every submitted item has passed the last stage
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence
+
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HASH_WORKERS = 1
+DEFAULT_PARSE_WORKERS = 1
+DEFAULT_PERSIST_WORKERS = 1
+DEFAULT_STAGE_QUEUE_SIZE = 32
+DEFAULT_PERSIST_BATCH_SIZE = 50
+DEFAULT_PERSIST_BATCH_SECONDS = 2.0
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a StagePipeline.
+
+    Attributes:
+        name (str): Stage name, used for thread names, logs and the stage_backlog metric.
+        handler (Callable[[Any], Any]): Processes one item; its return value goes to the next stage.
+        workers (int): Threads running the handler.
+        on_drained (Optional[Callable[[], None]]): Called once the stage's workers have exited
+            during close(), before the next stage is stopped (e.g. to flush a batch).
+    """
+    name: str
+    handler: Callable[[Any], Any]
+    workers: int = 1
+    on_drained: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class PipelineSettings:
+    """
+    Worker counts, queue bound and database batching for the post-download stages.
+
+    Attributes:
+        hash_workers (int): Threads computing CRC32s that were not computed during transfer.
+        parse_workers (int): Threads parsing filenames (regex or LLM).
+        persist_workers (int): Threads writing finished files to the database.
+        queue_size (int): Items each stage may have waiting before submit() blocks.
+        batch_size (int): Files written to the database per transaction.
+        batch_seconds (float): Longest a finished file waits for its batch to fill.
+    """
+    hash_workers: int = DEFAULT_HASH_WORKERS
+    parse_workers: int = DEFAULT_PARSE_WORKERS
+    persist_workers: int = DEFAULT_PERSIST_WORKERS
+    queue_size: int = DEFAULT_STAGE_QUEUE_SIZE
+    batch_size: int = DEFAULT_PERSIST_BATCH_SIZE
+    batch_seconds: float = DEFAULT_PERSIST_BATCH_SECONDS
+
+    def __str__(self) -> str:
+        return (
+            f"PipelineSettings(hash_workers={self.hash_workers}, parse_workers={self.parse_workers}, "
+            f"persist_workers={self.persist_workers}, queue_size={self.queue_size}, "
+            f"batch_size={self.batch_size}, batch_seconds={self.batch_seconds:g})"
+        )
+
+
+class StagePipeline:
+    """
+    Run items through a fixed chain of stages on per-stage worker threads.
+
+    If a handler raises, ``on_error(item, exc)`` is called (when given) and the item leaves the
+    pipeline; otherwise the exception is logged. close() feeds a stop marker through each stage
+    in order, so every item submitted before it is fully processed when close() returns.
+
+    Methods:
+        start(): Start the worker threads (done by ``with``).
+        submit(item): Queue an item for the first stage, blocking while that queue is full.
+        close(): Drain every stage and join the workers.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        queue_size: int = DEFAULT_STAGE_QUEUE_SIZE,
+        on_error: Optional[Callable[[Any, BaseException], None]] = None,
+    ) -> None:
+        if not stages:
+            raise ValueError("StagePipeline needs at least one stage")
+        self.stages = list(stages)
+        self.on_error = on_error
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, int(queue_size))) for _ in self.stages]
+        self._threads: List[List[threading.Thread]] = []
+        self._backlog = get_metrics().stage_backlog
+        self._started = False
+
+    def __enter__(self) -> "StagePipeline":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        for index, stage in enumerate(self.stages):
+            threads = [
+                threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+                for n in range(max(1, int(stage.workers)))
+            ]
+            for thread in threads:
+                thread.start()
+            self._threads.append(threads)
+
+    def submit(self, item: Any) -> None:
+        if not self._started:
+            raise RuntimeError("StagePipeline.submit() called before start()")
+        self._put(0, item)
+
+    def close(self) -> None:
+        if not self._started:
+            return
+        # Stop one stage at a time: once a stage's workers have exited, nothing more reaches the next
+        for index, threads in enumerate(self._threads):
+            for _ in threads:
+                self._queues[index].put(_STOP)
+            for thread in threads:
+                thread.join()
+            on_drained = self.stages[index].on_drained
+            if on_drained is not None:
+                on_drained()
+        self._threads = []
+        self._started = False
+
+    def _put(self, index: int, item: Any) -> None:
+        self._backlog.inc(stage=self.stages[index].name)
+        self._queues[index].put(item)
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        source = self._queues[index]
+        last = index == len(self.stages) - 1
+        while True:
+            item = source.get()
+            if item is _STOP:
+                return
+            self._backlog.dec(stage=stage.name)
+            try:
+                result = stage.handler(item)
+            except Exception as e:
+                if self.on_error is None:
+                    logger.exception(f"Pipeline stage '{stage.name}' failed: {e}")
+                    continue
+                try:
+                    self.on_error(item, e)
+                except Exception:
+                    logger.exception(f"Pipeline error handler failed after stage '{stage.name}'")
+                continue
+            if not last:
+                self._put(index + 1, result)
+
+
+class WriteBehindBuffer:
+    """
+    Collect items from any thread and hand them to ``flush`` in batches.
+
+    A batch is written once it holds ``max_items``, or ``max_seconds`` after its first item arrived,
+    whichever comes first; close() writes whatever is left. ``flush`` calls never overlap and see
+    items in arrival order. If ``flush`` raises, the error is logged and the batch is dropped, so
+    ``flush`` should handle its own failures.
+
+    Methods:
+        add(item): Buffer one item, flushing if the batch is full.
+        flush(): Write the current batch now.
+        close(): Write the last batch and stop the timer thread.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], None],
+        max_items: int = DEFAULT_PERSIST_BATCH_SIZE,
+        max_seconds: float = DEFAULT_PERSIST_BATCH_SECONDS,
+    ) -> None:
+        self._flush = flush
+        self.max_items = max(1, int(max_items))
+        self.max_seconds = max(0.0, float(max_seconds))
+        self._items: List[Any] = []
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        # Serializes flush calls, so batches are written in order
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._timer: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "WriteBehindBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+    def add(self, item: Any) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindBuffer.add() called after close()")
+            self._items.append(item)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                if self._timer is None and self.max_seconds > 0:
+                    self._timer = threading.Thread(target=self._flush_when_due, name="write-behind", daemon=True)
+                    self._timer.start()
+                self._cond.notify_all()
+            full = len(self._items) >= self.max_items
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._cond:
+                batch, self._items, self._oldest = self._items, [], None
+            if not batch:
+                return
+            try:
+                self._flush(batch)
+            except Exception as e:
+                logger.exception(f"Write-behind flush of {len(batch)} item(s) failed: {e}")
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        self.flush()
+
+    def _flush_when_due(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and self._oldest is None:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._oldest + self.max_seconds - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
+
+
+def create_pipeline_settings(config: Any) -> PipelineSettings:
+    """
+    Create PipelineSettings from the [transfers] configuration section.
+
+    Recognised keys: ``hash_workers``, ``parse_workers``, ``persist_workers``,
+    ``stage_queue_size`` and ``persist_batch_size`` (values below 1 are raised to 1), and
+    ``persist_batch_seconds`` (0 = only flush full batches and at the end of the run).
+    """
+    from utils.sync2nas_config import get_config_value
+
+    def workers(key: str, default: int) -> int:
+        return max(1, get_config_value(config, "transfers", key, fallback=default, value_type=int))
+
+    return PipelineSettings(
+        hash_workers=workers("hash_workers", DEFAULT_HASH_WORKERS),
+        parse_workers=workers("parse_workers", DEFAULT_PARSE_WORKERS),
+        persist_workers=workers("persist_workers", DEFAULT_PERSIST_WORKERS),
+        queue_size=workers("stage_queue_size", DEFAULT_STAGE_QUEUE_SIZE),
+        batch_size=workers("persist_batch_size", DEFAULT_PERSIST_BATCH_SIZE),
+        batch_seconds=max(0.0, get_config_value(
+            config, "transfers", "persist_batch_seconds", fallback=DEFAULT_PERSIST_BATCH_SECONDS, value_type=float
+        )),
+    )
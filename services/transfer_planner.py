@@ -0,0 +1,159 @@
+"""
+Transfer planning for download-from-remote.
+
+A TransferPlan summarises what a download run would fetch before any byte moves: file count,
+total bytes, a per-show breakdown, free space on the incoming volume and an estimated duration.
+The estimate uses the throughput of earlier runs, which process_sftp_diffs records in
+``transfer_runs``. Runs at the planned concurrency are preferred, and the throughput seen at
+every other concurrency is reported too, so the plan also helps pick ``--max-workers``.
+"""
+import logging
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_RUNS = 20
+UNKNOWN_SHOW = "(unknown)"
+
+
+@dataclass
+class PlannedShow:
+    """Files and bytes a plan would fetch for one show."""
+    name: str
+    files: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class ThroughputSample:
+    """Combined throughput of recorded runs at one transfer concurrency."""
+    workers: int
+    runs: int
+    bytes_transferred: int
+    elapsed_seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes_transferred / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+@dataclass
+class TransferPlan:
+    """
+    Files, bytes, free space and estimated duration of a download run.
+
+    Attributes:
+        incoming_path (str): Local directory the files would be written to.
+        workers (int): Concurrent transfers the run would use.
+        files (int): Files that would be downloaded.
+        total_bytes (int): Their combined size.
+        directories (int): New remote directories among them.
+        skipped_paths (List[str]): Remote paths skipped as unchanged (incremental mode).
+        shows (Dict[str, PlannedShow]): Per-show breakdown, keyed by parsed show name.
+        free_bytes (Optional[int]): Free space on the incoming volume, if it could be read.
+        throughput (List[ThroughputSample]): Recorded throughput per concurrency, most runs first.
+    """
+    incoming_path: str
+    workers: int
+    files: int = 0
+    total_bytes: int = 0
+    directories: int = 0
+    skipped_paths: List[str] = field(default_factory=list)
+    shows: Dict[str, PlannedShow] = field(default_factory=dict)
+    free_bytes: Optional[int] = None
+    throughput: List[ThroughputSample] = field(default_factory=list)
+
+    def add_file(self, show_name: Optional[str], size: int) -> None:
+        name = show_name or UNKNOWN_SHOW
+        show = self.shows.setdefault(name, PlannedShow(name))
+        show.files += 1
+        show.bytes += size
+        self.files += 1
+        self.total_bytes += size
+
+    @property
+    def fits(self) -> Optional[bool]:
+        """Whether the incoming volume has room for every planned byte (None if free space is unknown)."""
+        if self.free_bytes is None:
+            return None
+        return self.total_bytes <= self.free_bytes
+
+    @property
+    def estimate(self) -> Optional[ThroughputSample]:
+        """The throughput sample used for the estimate: runs at ``workers`` if any, else all runs."""
+        for sample in self.throughput:
+            if sample.workers == self.workers:
+                return sample
+        if not self.throughput:
+            return None
+        return ThroughputSample(
+            workers=0,
+            runs=sum(s.runs for s in self.throughput),
+            bytes_transferred=sum(s.bytes_transferred for s in self.throughput),
+            elapsed_seconds=sum(s.elapsed_seconds for s in self.throughput),
+        )
+
+    @property
+    def estimated_seconds(self) -> Optional[float]:
+        """Estimated transfer time at the recorded throughput (None without history)."""
+        sample = self.estimate
+        if sample is None or sample.bytes_per_second <= 0:
+            return None
+        return self.total_bytes / sample.bytes_per_second
+
+    def shows_by_size(self) -> List[PlannedShow]:
+        return sorted(self.shows.values(), key=lambda s: (-s.bytes, s.name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["shows"] = [asdict(s) for s in self.shows_by_size()]
+        data["throughput"] = [dict(asdict(s), bytes_per_second=s.bytes_per_second) for s in self.throughput]
+        data["fits"] = self.fits
+        data["estimated_seconds"] = self.estimated_seconds
+        return data
+
+    def __str__(self) -> str:
+        eta = self.estimated_seconds
+        return (
+            f"{self.files} file(s), {self.total_bytes / 1048576:.1f} MiB across {len(self.shows)} show(s)"
+            + (f", ETA {eta:.0f}s" if eta is not None else ", ETA unknown (no transfer history)")
+        )
+
+
+def summarize_throughput(runs: List[Dict[str, Any]]) -> List[ThroughputSample]:
+    """
+    Combine recorded transfer runs into one sample per concurrency, most runs first.
+
+    Bytes and seconds are summed rather than averaging per-run rates, so a run of a few small
+    files (dominated by connection latency) does not skew the result.
+    """
+    samples: Dict[int, ThroughputSample] = {}
+    for run in runs:
+        bytes_transferred = int(run.get("bytes_transferred") or 0)
+        elapsed = float(run.get("elapsed_seconds") or 0.0)
+        if bytes_transferred <= 0 or elapsed <= 0:
+            continue
+        workers = int(run.get("workers") or 0)
+        sample = samples.setdefault(workers, ThroughputSample(workers, 0, 0, 0.0))
+        sample.runs += 1
+        sample.bytes_transferred += bytes_transferred
+        sample.elapsed_seconds += elapsed
+    return sorted(samples.values(), key=lambda s: (-s.runs, s.workers))
+
+
+def free_space(path: str) -> Optional[int]:
+    """Free bytes on the volume holding ``path`` (or its nearest existing parent), or None."""
+    current = os.path.abspath(path)
+    while not os.path.exists(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+    try:
+        return shutil.disk_usage(current).free
+    except OSError as e:
+        logger.warning(f"Could not read free space for {path}: {e}")
+        return None
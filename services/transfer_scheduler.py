@@ -0,0 +1,245 @@
+"""
+Global download scheduling for Sync2NAS.
+
+process_sftp_diffs flattens every new remote entry into one list of TransferJobs. That covers
+loose files and the files inside new directories. The jobs run on a single worker pool. The
+TransferScheduler decides which jobs start first (smallest or largest) and caps two things: the
+number of concurrent transfers and the total bytes in flight. So a run opens the same number of
+SFTP sessions however deep the remote tree is. The asyncio backend uses run_async(), which applies
+the same limits to coroutines instead of worker threads.
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+ORDERS = ("smallest_first", "largest_first")
+DEFAULT_ORDER = "smallest_first"
+DEFAULT_MAX_CONCURRENT_TRANSFERS = 4
+
+
+@dataclass
+class TransferJob:
+    """
+    One file to download.
+
+    Attributes:
+        remote_path (str): Remote file path.
+        local_path (str): Destination path.
+        size (int): Remote size in bytes (used for ordering and the in-flight byte budget).
+        entry (Dict[str, Any]): Listing entry the file was scheduled from.
+        parent (Optional[str]): Remote path of the diff directory that contained the file, if any.
+    """
+    remote_path: str
+    local_path: str
+    size: int = 0
+    entry: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional[str] = None
+
+
+class ByteBudget:
+    """
+    Weighted semaphore over bytes, granted in FIFO order.
+
+    acquire() blocks until the requested bytes fit under ``capacity``. Requests are served in
+    arrival order, so smaller jobs can't overtake a large one indefinitely. A request larger
+    than the whole budget is clamped to it and therefore runs alone. A capacity of None or 0
+    disables the limit.
+
+    Attributes:
+        capacity (Optional[int]): Maximum bytes in flight (None = unlimited).
+    """
+
+    def __init__(self, capacity: Optional[int]) -> None:
+        self.capacity = int(capacity) if capacity and capacity > 0 else None
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._next_ticket = 0
+        self._serving = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, amount: int) -> int:
+        """Block until ``amount`` bytes fit; returns the amount reserved (pass it to release())."""
+        if self.capacity is None:
+            return 0
+        amount = min(max(0, int(amount or 0)), self.capacity)
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving or self._in_flight + amount > self.capacity:
+                self._cond.wait()
+            self._serving += 1
+            self._in_flight += amount
+            self._cond.notify_all()
+        return amount
+
+    def release(self, amount: int) -> None:
+        if self.capacity is None:
+            return
+        with self._cond:
+            self._in_flight -= amount
+            self._cond.notify_all()
+
+
+class AsyncByteBudget:
+    """
+    asyncio counterpart of ByteBudget: the same FIFO byte admission, for coroutines on one event loop.
+
+    Attributes:
+        capacity (Optional[int]): Maximum bytes in flight (None = unlimited).
+    """
+
+    def __init__(self, capacity: Optional[int]) -> None:
+        self.capacity = int(capacity) if capacity and capacity > 0 else None
+        self._cond = asyncio.Condition()
+        self._in_flight = 0
+        self._next_ticket = 0
+        self._serving = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self, amount: int) -> int:
+        """Wait until ``amount`` bytes fit; returns the amount reserved (pass it to release())."""
+        if self.capacity is None:
+            return 0
+        amount = min(max(0, int(amount or 0)), self.capacity)
+        async with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            await self._cond.wait_for(
+                lambda: ticket == self._serving and self._in_flight + amount <= self.capacity
+            )
+            self._serving += 1
+            self._in_flight += amount
+            self._cond.notify_all()
+        return amount
+
+    async def release(self, amount: int) -> None:
+        if self.capacity is None:
+            return
+        async with self._cond:
+            self._in_flight -= amount
+            self._cond.notify_all()
+
+
+class TransferScheduler:
+    """
+    Order and admit downloads across a whole run.
+
+    Callers submit jobs to one executor with ``workers_for()`` threads, in the order given by
+    ``prioritize()``. Each worker calls ``run()``, which waits until the job's bytes fit in the
+    in-flight budget before transferring. Coroutines started in ``prioritize()`` order await
+    ``run_async()`` instead, which also enforces ``max_concurrent_transfers``.
+
+    Attributes:
+        max_concurrent_transfers (int): Maximum downloads running at once.
+        max_inflight_bytes (Optional[int]): Maximum bytes of running downloads (None = unlimited).
+        order (str): "smallest_first" or "largest_first".
+
+    Methods:
+        workers_for(sftp_service): Worker threads to use with a given SFTP service.
+        prioritize(jobs): Return jobs in start order.
+        run(job, transfer): Run one job under the byte budget.
+        run_async(job, transfer): Await one job under the concurrency cap and byte budget.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_transfers: int = DEFAULT_MAX_CONCURRENT_TRANSFERS,
+        max_inflight_bytes: Optional[int] = None,
+        order: str = DEFAULT_ORDER,
+    ) -> None:
+        if order not in ORDERS:
+            raise ValueError(f"Unknown transfer order '{order}'; expected one of: {', '.join(ORDERS)}")
+        self.max_concurrent_transfers = max(1, int(max_concurrent_transfers))
+        self.max_inflight_bytes = int(max_inflight_bytes) if max_inflight_bytes and max_inflight_bytes > 0 else None
+        self.order = order
+        self._budget = ByteBudget(self.max_inflight_bytes)
+        # (event loop, concurrency semaphore, AsyncByteBudget) for run_async(), created on first use
+        self._async_gate = None
+
+    def __str__(self) -> str:
+        limit = f"{self.max_inflight_bytes / 1048576:.0f} MiB" if self.max_inflight_bytes else "unlimited"
+        return (
+            f"TransferScheduler(max_concurrent_transfers={self.max_concurrent_transfers}, "
+            f"max_inflight={limit}, order={self.order})"
+        )
+
+    @property
+    def bytes_in_flight(self) -> int:
+        budget = self._async_gate[2] if self._async_gate else None
+        return self._budget.in_flight + (budget.in_flight if budget else 0)
+
+    def workers_for(self, sftp_service: Any) -> int:
+        """Concurrency cap, further limited to the SFTP pool's session count when one is configured."""
+        max_sessions = getattr(getattr(sftp_service, "pool", None), "max_sessions", None)
+        if isinstance(max_sessions, int) and max_sessions > 0:
+            return min(self.max_concurrent_transfers, max_sessions)
+        return self.max_concurrent_transfers
+
+    def prioritize(self, jobs: Iterable[TransferJob]) -> List[TransferJob]:
+        """Return jobs in start order; equal sizes keep their listing order."""
+        return sorted(jobs, key=lambda job: job.size or 0, reverse=self.order == "largest_first")
+
+    def run(self, job: TransferJob, transfer: Callable[[TransferJob], Any]) -> Any:
+        """Run ``transfer(job)`` on the calling worker once the job's bytes fit in the budget."""
+        reserved = self._budget.acquire(job.size)
+        metrics = get_metrics()
+        try:
+            with metrics.transfers_active.track(), metrics.inflight_bytes.track(reserved):
+                return transfer(job)
+        finally:
+            self._budget.release(reserved)
+
+    async def run_async(self, job: TransferJob, transfer: Callable[[TransferJob], Awaitable[Any]]) -> Any:
+        """Await ``transfer(job)`` once a transfer slot is free and the job's bytes fit in the budget."""
+        loop = asyncio.get_running_loop()
+        if self._async_gate is None or self._async_gate[0] is not loop:
+            self._async_gate = (
+                loop, asyncio.Semaphore(self.max_concurrent_transfers), AsyncByteBudget(self.max_inflight_bytes)
+            )
+        _, slots, budget = self._async_gate
+        async with slots:
+            reserved = await budget.acquire(job.size)
+            metrics = get_metrics()
+            try:
+                with metrics.transfers_active.track(), metrics.inflight_bytes.track(reserved):
+                    return await transfer(job)
+            finally:
+                await budget.release(reserved)
+
+
+def create_transfer_scheduler(config: Any, max_concurrent_transfers: Optional[int] = None) -> TransferScheduler:
+    """
+    Create a TransferScheduler from the [sftp] configuration section.
+
+    Recognised keys: ``max_concurrent_transfers``, ``max_inflight_mib`` (0 = unlimited) and
+    ``transfer_order`` (``smallest_first`` or ``largest_first``). An explicit
+    ``max_concurrent_transfers`` (e.g. the CLI's --max-workers) overrides the configuration.
+    """
+    from utils.sync2nas_config import get_config_value
+
+    if max_concurrent_transfers is None:
+        max_concurrent_transfers = get_config_value(
+            config, "sftp", "max_concurrent_transfers", fallback=DEFAULT_MAX_CONCURRENT_TRANSFERS, value_type=int
+        )
+    max_inflight_mib = get_config_value(config, "sftp", "max_inflight_mib", fallback=0.0, value_type=float)
+    order = (get_config_value(config, "sftp", "transfer_order", fallback=DEFAULT_ORDER) or DEFAULT_ORDER).strip().lower()
+    if order not in ORDERS:
+        logger.warning(f"Unknown [sftp] transfer_order '{order}'; using {DEFAULT_ORDER}")
+        order = DEFAULT_ORDER
+    return TransferScheduler(
+        max_concurrent_transfers=max_concurrent_transfers,
+        max_inflight_bytes=int(max_inflight_mib * 1024 * 1024) if max_inflight_mib else None,
+        order=order,
+    )
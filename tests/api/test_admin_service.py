@@ -139,4 +139,17 @@ def test_init_database_success(db_service, mock_tmdb_service, temp_anime_tv_path
     admin_service = AdminService(db_service, mock_tmdb_service, temp_anime_tv_path, {})
     result = asyncio_run(admin_service.init_database())
     assert result["success"] is True
-    assert "initialized" in result["message"].lower() 
\ No newline at end of file
+    assert "initialized" in result["message"].lower() 
+def test_verify_library_returns_report(db_service, mock_tmdb_service, temp_anime_tv_path, tmp_path, mocker):
+    """Test that verify_library runs the verifier off the event loop and returns its report."""
+    from services.library_verifier import VerificationReport
+    verifier = MagicMock()
+    verifier.verify.return_value = VerificationReport(sources=["downloaded", "inventory"], checked=3, verified=3, completed=True)
+    factory = mocker.patch("api.services.admin_service.create_library_verifier", return_value=verifier)
+    admin_service = AdminService(db_service, mock_tmdb_service, temp_anime_tv_path, {})
+    result = asyncio_run(admin_service.verify_library(source="all", limit=10, dry_run=True))
+    assert result["success"] is True
+    assert result["verified"] == 3
+    assert result["completed"] is True
+    assert factory.call_args.kwargs["dry_run"] is True
+    verifier.verify.assert_called_once_with(sources=["downloaded", "inventory"], resume=True, limit=10)
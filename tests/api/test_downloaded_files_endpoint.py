@@ -161,3 +161,26 @@ def test_patch_with_error_message(client_sqlite):
     assert data["error_message"] == "checksum mismatch"
 
 
+def test_rehash_batch_reports_per_file_results(client_sqlite, tmp_path):
+    import zlib
+    items = client_sqlite.get("/api/files/downloaded").json()["files"]
+    a_id = next(it["id"] for it in items if it["name"] == "a.mkv")
+    dir_id = next(it["id"] for it in items if it["name"] == "some_folder")
+
+    # Point a.mkv at a real file so it can be hashed
+    local = tmp_path / "a.mkv"
+    local.write_bytes(b"episode data")
+    from models.downloaded_file import FileStatus
+    db = client_sqlite.app.state.services["db"]
+    db.update_downloaded_file_location(a_id, str(local), FileStatus.DOWNLOADED)
+
+    r = client_sqlite.post("/api/files/downloaded/rehash", json={"ids": [a_id, dir_id, 999999]})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["count"] == 1
+    assert data["success"] is False
+    by_id = {res["id"]: res for res in data["results"]}
+    assert by_id[a_id]["file_hash_value"] == f"{zlib.crc32(b'episode data'):08X}"
+    assert by_id[dir_id]["error"] == "Cannot hash a directory"
+    assert by_id[999999]["error"] == "Downloaded file not found"
+    assert db.get_downloaded_file_by_id(a_id).file_hash == by_id[a_id]["file_hash_value"]
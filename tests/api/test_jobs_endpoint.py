@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.routes import admin, jobs, remote
+from services.job_manager import JobManager
+
+
+@pytest.fixture
+def client(db_service, config, mocker):
+    # A bare app without the lifespan; TestClient's context keeps one event loop for background jobs
+    app = FastAPI()
+    app.include_router(remote.router, prefix="/api/remote")
+    app.include_router(admin.router, prefix="/api/admin")
+    app.include_router(jobs.router, prefix=jobs.JOBS_PATH)
+    sftp = MagicMock()
+    sftp.__enter__.return_value = sftp
+    sftp.session.return_value.__enter__.return_value = sftp
+    app.state.services = {"sftp": sftp, "db": db_service, "config": config, "jobs": JobManager(),
+                          "tmdb": MagicMock(), "anime_tv_path": "/library"}
+    mocker.patch("api.routes.remote.parse_sftp_paths", return_value=["/remote/path"])
+    mocker.patch("api.services.remote_service.parse_sftp_paths", return_value=["/remote/path"])
+    with TestClient(app) as client:
+        yield client
+
+
+def wait_for(client, url):
+    for _ in range(200):
+        body = client.get(url).json()
+        if body["status"] in ("succeeded", "failed"):
+            return body
+        time.sleep(0.01)
+    raise AssertionError(f"Job did not finish: {body}")
+
+
+def test_download_is_queued_and_reports_count(client, mocker):
+    def fake_downloader(sftp, db, progress, **kwargs):
+        progress.plan(2, 300)
+        progress.advance(nbytes=100)
+        progress.advance(nbytes=200)
+        return 2
+
+    mocker.patch("api.services.remote_service.downloader", side_effect=fake_downloader)
+
+    response = client.post("/api/remote/download", json={"dry_run": False})
+
+    assert response.status_code == 202
+    submitted = response.json()
+    assert submitted["kind"] == "download_from_remote"
+    assert submitted["status_url"] == f"/api/jobs/{submitted['job_id']}"
+
+    job = wait_for(client, submitted["status_url"])
+    assert job["status"] == "succeeded"
+    assert job["result"]["files_downloaded"] == 2
+    assert job["progress"]["bytes_done"] == 300
+    assert client.get("/api/jobs").json()["count"] == 1
+
+
+def test_job_progress_streams_as_server_sent_events(client, mocker):
+    mocker.patch("api.services.remote_service.downloader", side_effect=RuntimeError("connection refused"))
+    job_id = client.post("/api/remote/download", json={"dry_run": True}).json()["job_id"]
+
+    response = client.get(f"/api/jobs/{job_id}", headers={"Accept": "text/event-stream"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert events[-1][0] == "event: end"
+    final = json.loads(events[-1][1][len("data: "):])
+    assert final["status"] == "failed"
+    assert final["error"] == "connection refused"
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/jobs/missing").status_code == 404
+
+
+def test_verify_library_runs_as_one_job_at_a_time(client, mocker):
+    from services.library_verifier import VerificationReport
+
+    release = threading.Event()
+
+    def fake_verify(sources, resume, limit, progress_callback):
+        report = VerificationReport(sources=sources, total_files=2, total_bytes=30)
+        for i, size in enumerate((10, 20), start=1):
+            report.checked, report.verified, report.bytes_checked = i, i - 1, report.bytes_checked + size
+            report.mismatched = 1 if i == 2 else 0
+            progress_callback(report)
+        release.wait(5)
+        report.completed = True
+        return report
+
+    verifier = MagicMock()
+    verifier.verify.side_effect = fake_verify
+    mocker.patch("api.services.admin_service.create_library_verifier", return_value=verifier)
+
+    first = client.post("/api/admin/verify-library", json={})
+    assert first.status_code == 202
+    assert first.json()["kind"] == "verify_library"
+    # Sweeps share the checkpoint file, so an overlapping request is refused
+    assert client.post("/api/admin/verify-library", json={}).status_code == 409
+    release.set()
+
+    job = wait_for(client, first.json()["status_url"])
+    assert job["status"] == "succeeded"
+    assert job["result"]["mismatched"] == 1
+    assert (job["progress"]["files_done"], job["progress"]["files_failed"], job["progress"]["bytes_done"]) == (1, 1, 30)
+    assert client.post("/api/admin/verify-library", json={}).status_code == 202
@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+from utils.metrics import TransferMetrics, set_metrics
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    from api.main import app
+    metrics = TransferMetrics()
+    metrics.bytes_downloaded.inc(1024)
+    metrics.stage_duration.observe(0.2, stage="download")
+    set_metrics(metrics)
+    try:
+        response = TestClient(app).get("/metrics")
+    finally:
+        set_metrics(None)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "sync2nas_transfer_bytes_total 1024" in response.text
+    assert 'sync2nas_stage_duration_seconds_count{stage="download"} 1' in response.text
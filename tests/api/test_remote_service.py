@@ -100,4 +100,46 @@ def test_get_connection_status_disconnected(mock_sftp_service, db_service, confi
     result = asyncio_run(remote_service.get_connection_status())
     assert result["success"] is False
     assert result["status"] == "disconnected"
-    assert "failconn" in result["error"] 
\ No newline at end of file
+    assert "failconn" in result["error"] 
+
+def test_async_backend_is_awaited_instead_of_paramiko(mock_sftp_service, db_service, config, mocker):
+    """With an AsyncSFTPService configured, remote operations await it and leave the paramiko service alone."""
+    from unittest.mock import AsyncMock
+    mocker.patch("api.services.remote_service.parse_sftp_paths", return_value=["/remote/path"])
+    async_downloader = mocker.patch("api.services.remote_service.async_downloader", new_callable=AsyncMock)
+    blocking_downloader = mocker.patch("api.services.remote_service.downloader")
+    async_sftp = MagicMock()
+    async_sftp.__aenter__ = AsyncMock(return_value=async_sftp)
+    async_sftp.__aexit__ = AsyncMock(return_value=None)
+    async_sftp.list_remote_dir = AsyncMock(return_value=[
+        {"name": "a.mkv", "size": 1, "modified_time": None, "fetched_at": None}
+    ])
+    remote_service = RemoteService(mock_sftp_service, db_service, config, async_sftp=async_sftp)
+
+    asyncio.run(remote_service.download_from_remote(dry_run=True))
+    listing = asyncio.run(remote_service.list_remote_files(path="/remote/path"))
+
+    async_downloader.assert_awaited_once()
+    assert async_downloader.await_args.kwargs["sftp"] is async_sftp
+    blocking_downloader.assert_not_called()
+    assert listing["count"] == 1
+    mock_sftp_service.list_remote_dir.assert_not_called()
+
+
+def test_concurrent_calls_use_their_own_sftp_sessions(mock_sftp_service, db_service, config, mocker):
+    """Test that overlapping list and download calls each open a session instead of sharing the app-wide connection."""
+    mocker.patch("api.services.remote_service.parse_sftp_paths", return_value=["/remote/path"])
+    mocker.patch("api.services.remote_service.downloader", return_value=None)
+    remote_service = RemoteService(mock_sftp_service, db_service, config)
+
+    async def run_all():
+        return await asyncio.gather(
+            remote_service.list_remote_files(),
+            remote_service.list_remote_files(recursive=True),
+            remote_service.download_from_remote(dry_run=False),
+        )
+
+    results = asyncio_run(run_all())
+    assert all(r["success"] for r in results)
+    assert mock_sftp_service.session.call_count == 3
+    mock_sftp_service.__enter__.assert_not_called()
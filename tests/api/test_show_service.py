@@ -213,4 +213,20 @@ def test_delete_show_unexpected_error():
     db.get_show_by_id.side_effect = Exception("fail")
     service = ShowService(db, tmdb, "/shows")
     with pytest.raises(Exception):
-        asyncio_run(service.delete_show(1)) 
\ No newline at end of file
+        asyncio_run(service.delete_show(1)) 
+
+# --- search_shows ---
+def test_search_shows_returns_scored_matches():
+    """Test that search_shows ranks shows by fuzzy similarity and includes scores."""
+    db = MagicMock()
+    db.get_all_shows.return_value = [
+        {"id": 1, "tmdb_id": 10, "tmdb_name": "Frieren", "sys_name": "Sousou no Frieren", "sys_path": "/shows/Frieren", "tmdb_aliases": "Frieren: Beyond Journey's End"},
+        {"id": 2, "tmdb_id": 20, "tmdb_name": "Dungeon Meshi", "sys_name": "Dungeon Meshi", "sys_path": "/shows/Dungeon Meshi", "tmdb_aliases": ""},
+    ]
+    service = ShowService(db, MagicMock(), "/shows")
+    result = asyncio_run(service.search_shows("sousou no frieren", limit=1))
+    assert len(result) == 1
+    assert result[0]["id"] == 1
+    assert result[0]["score"] == 1.0
+    assert result[0]["aliases"] == "Frieren: Beyond Journey's End"
+
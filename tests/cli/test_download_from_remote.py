@@ -98,6 +98,62 @@ def test_download_from_remote_dry_run(tmp_path, mock_tmdb_service, mock_sftp_ser
     assert "Starting remote scan from" in result.output
     assert "Incoming destination" in result.output
 
+def test_download_from_remote_profile(tmp_path, mock_tmdb_service, cli_runner, cli, db_service, mock_llm_service_patch):
+    """--profile prints per-stage timings; --profile-output also writes a pstats dump."""
+    import pstats
+    from utils.tracing import get_tracer
+
+    config_path = create_temp_config(tmp_path)
+    config = load_configuration(config_path)
+    os.makedirs(parse_sftp_paths(config)[0], exist_ok=True)
+
+    mock_sftp_service = MagicMock()
+    mock_sftp_service.__enter__.return_value = mock_sftp_service
+    mock_sftp_service.list_remote_dir.return_value = []
+    obj = TestConfigurationHelper.create_cli_context_from_config(
+        config, tmp_path, dry_run=True, db=db_service, tmdb=mock_tmdb_service, sftp=mock_sftp_service
+    )
+    dump = tmp_path / "run.pstats"
+
+    result = cli_runner.invoke(
+        cli, ["-c", config_path, "--profile-output", str(dump), "download-from-remote", "--full-scan"], obj=obj
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "[PROFILE] Stage timings" in result.output
+    assert any(line.split()[:1] == ["list"] for line in result.output.splitlines())
+    assert pstats.Stats(str(dump)).total_calls > 0
+    assert get_tracer().enabled is False
+
+def test_download_from_remote_plan(tmp_path, mock_tmdb_service, cli_runner, cli, db_service, mock_llm_service_patch):
+    """--plan prints files, sizes per show, free space and an ETA from recorded runs, and downloads nothing."""
+    config_path = create_temp_config(tmp_path)
+    config = load_configuration(config_path)
+    remote_path = parse_sftp_paths(config)[0]
+
+    mock_sftp_service = MagicMock()
+    mock_sftp_service.__enter__.return_value = mock_sftp_service
+    mock_sftp_service.list_remote_dir.return_value = [
+        {"name": "Show.Name.S01E01.mkv", "path": f"{remote_path}/Show.Name.S01E01.mkv", "size": 3 * 1048576,
+         "modified_time": datetime.datetime(2020, 1, 1, 12, 0, 0), "is_dir": False},
+    ]
+    db_service.add_transfer_run(1, 1048576, 1.0, 4)
+    obj = TestConfigurationHelper.create_cli_context_from_config(
+        config, tmp_path, dry_run=False, db=db_service, tmdb=mock_tmdb_service, sftp=mock_sftp_service
+    )
+
+    result = cli_runner.invoke(
+        cli, ["-c", config_path, "download-from-remote", "--plan", "--full-scan", "--max-workers", "4"], obj=obj
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "[PLAN] 1 file(s) in 0 new dir(s), 3.0 MiB" in result.output
+    assert "Show Name" in result.output
+    assert "Free space on" in result.output
+    assert "Estimated duration at 4 worker(s): 0.1 min" in result.output
+    mock_sftp_service.download_file.assert_not_called()
+    assert db_service.get_downloaded_files() == []
+
 def test_download_from_remote_insert(tmp_path, mock_tmdb_service, mock_sftp_service, cli_runner, cli, db_service, mocker, mock_llm_service_patch):
     config_path = create_temp_config(tmp_path)
     config = load_configuration(config_path)
@@ -49,6 +49,23 @@ def test_search_show_partial_match(runner, mock_ctx, mock_llm_service_patch):
     assert "Found 1 partial match for 'Test'" in result.output or "Found 1 partial matches for 'Test'" in result.output
     assert "Test Show" in result.output
 
+def test_search_show_fuzzy_lists_ranked_matches(runner, mock_ctx, mock_llm_service_patch):
+    """Test that --fuzzy lists similar shows with scores without requiring an exact match."""
+    ctx, db_service = mock_ctx
+    db_service.get_all_shows.return_value = [
+        {'id': 1, 'tmdb_id': 123, 'tmdb_name': 'Test Show', 'sys_name': 'Test_Show', 'sys_path': '/shows/Test_Show', 'tmdb_aliases': ''},
+        {'id': 2, 'tmdb_id': 456, 'tmdb_name': 'Other', 'sys_name': 'Other', 'sys_path': '/shows/Other', 'tmdb_aliases': ''},
+    ]
+    result = runner.invoke(search_show, ['Tset Show', '--fuzzy'], obj=ctx.obj)
+    assert result.exit_code == 0
+    assert "Found 1 fuzzy match(es) for 'Tset Show'" in result.output
+    assert "Test Show" in result.output
+    db_service.get_show_by_name_or_alias.assert_not_called()
+
+    result = runner.invoke(search_show, ['zzzz', '--fuzzy'], obj=ctx.obj)
+    assert result.exit_code == 1
+    assert "No shows found resembling 'zzzz'" in result.output
+
 def test_search_show_no_match_offers_tmdb(runner, mock_ctx, mock_llm_service_patch):
     """Test that search_show offers TMDB search if no matches are found and user declines."""
     ctx, db_service = mock_ctx
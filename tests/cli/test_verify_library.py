@@ -0,0 +1,59 @@
+import pytest
+from click.testing import CliRunner
+from unittest.mock import MagicMock, patch
+from cli.verify_library import verify_library
+from services.library_verifier import VerificationMismatch, VerificationReport
+
+
+@pytest.fixture
+def runner():
+    """Fixture providing a Click CliRunner instance."""
+    return CliRunner()
+
+
+@pytest.fixture
+def obj():
+    return {"db": MagicMock(), "config": {"sqlite": {"db_file": "/tmp/test.db"}}, "dry_run": False, "hashing": MagicMock()}
+
+
+def run(runner, obj, report, args=()):
+    verifier = MagicMock()
+    verifier.verify.return_value = report
+    with patch("cli.verify_library.create_library_verifier", return_value=verifier) as factory:
+        result = runner.invoke(verify_library, list(args), obj=obj)
+    return result, factory, verifier
+
+
+def test_verify_library_success(runner, obj):
+    """A clean sweep exits 0 and reports completion."""
+    report = VerificationReport(sources=["downloaded"], checked=2, verified=2, completed=True)
+    result, factory, verifier = run(runner, obj, report)
+    assert result.exit_code == 0
+    assert "complete" in result.output
+    assert verifier.verify.call_args.kwargs["sources"] == ["downloaded"]
+    assert factory.call_args.args[2] is obj["hashing"]
+
+
+def test_verify_library_mismatch_exit_code(runner, obj):
+    """Mismatches are listed and the command exits with status 2."""
+    report = VerificationReport(sources=["downloaded"], checked=1, mismatched=1, completed=True)
+    report.mismatches.append(VerificationMismatch("downloaded", 7, "/lib/ep.mkv", "DEADBEEF", "12345678", "filename"))
+    result, _, _ = run(runner, obj, report)
+    assert result.exit_code == 2
+    assert "[MISMATCH] /lib/ep.mkv" in result.output
+
+
+def test_verify_library_options_passed_through(runner, obj):
+    """--source all, --restart, --limit and bandwidth/worker options reach the verifier."""
+    report = VerificationReport(sources=["downloaded", "inventory"], completed=False)
+    result, factory, verifier = run(
+        runner, obj, report, ["--source", "all", "--restart", "--limit", "5", "--workers", "4", "--max-read-mib", "50", "--refresh"]
+    )
+    assert result.exit_code == 0
+    assert "paused" in result.output
+    assert verifier.verify.call_args.kwargs["sources"] == ["downloaded", "inventory"]
+    assert verifier.verify.call_args.kwargs["resume"] is False
+    assert verifier.verify.call_args.kwargs["limit"] == 5
+    assert factory.call_args.kwargs["max_workers"] == 4
+    assert factory.call_args.kwargs["max_read_mib_per_second"] == 50
+    assert factory.call_args.kwargs["refresh"] is True
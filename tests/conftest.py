@@ -171,6 +171,7 @@ def mock_sftp_service(mocker):
     mock.username = "testuser"
     mock.ssh_key_path = "/tmp/test_key"
     mock.llm_service = None
+    mock.session.return_value.__enter__.return_value = mock
     
     mock.list_remote_dir.return_value = [
         {
@@ -13,6 +13,7 @@ from pathlib import Path
 
 from utils.sftp_orchestrator import process_sftp_diffs
 from models.downloaded_file import DownloadedFile
+from services.db_implementations.db_interface import DatabaseInterface
 
 
 class TestCRC32FieldMigrationIntegration:
@@ -23,6 +24,8 @@ class TestCRC32FieldMigrationIntegration:
         """Set up mock services for integration testing."""
         mock_sftp = mocker.Mock()
         mock_db = mocker.Mock()
+        # Batched upserts go through upsert_downloaded_file, as in DatabaseInterface's default
+        mock_db.upsert_downloaded_files.side_effect = lambda files: DatabaseInterface.upsert_downloaded_files(mock_db, files)
         mock_llm = mocker.Mock()
         
         # Mock ThreadPoolExecutor for file processing
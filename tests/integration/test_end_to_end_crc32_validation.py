@@ -22,6 +22,7 @@ from utils.sftp_orchestrator import process_sftp_diffs, download_from_remote
 from models.downloaded_file import DownloadedFile
 from services.hashing_service import HashingService
 from utils.filename_parser import parse_filename
+from services.db_implementations.db_interface import DatabaseInterface
 
 
 class TestEndToEndCRC32Validation:
@@ -51,6 +52,7 @@ class TestEndToEndCRC32Validation:
         mock_db.insert_sftp_temp_files.return_value = None
         mock_db.add_downloaded_file.return_value = None
         mock_db.upsert_downloaded_file.return_value = None
+        mock_db.upsert_downloaded_files.side_effect = lambda files: DatabaseInterface.upsert_downloaded_files(mock_db, files)
         
         # Mock LLM service
         mock_llm = mocker.Mock()
@@ -171,10 +173,9 @@ class TestEndToEndCRC32Validation:
             for future in mock_futures:
                 future.result.return_value = None
             
-            # Set up LLM responses
-            mock_services['llm'].parse_filename.side_effect = [
-                file_data["llm_response"] for file_data in test_files
-            ]
+            # Set up LLM responses (downloads are scheduled by size, so match on filename)
+            llm_responses = {file_data["name"]: file_data["llm_response"] for file_data in test_files}
+            mock_services['llm'].parse_filename.side_effect = lambda name: llm_responses[name]
             
             # Extract file diffs for processing
             diffs = [{k: v for k, v in file_data.items() 
@@ -197,14 +198,14 @@ class TestEndToEndCRC32Validation:
             )
         
         # Verify all files were processed through the complete workflow
-        assert mock_services['db'].add_downloaded_file.call_count == len(test_files)
+        assert sum(len(c.args[0]) for c in mock_services['db'].upsert_downloaded_files.call_args_list) == len(test_files)
         assert mock_services['db'].upsert_downloaded_file.call_count == len(test_files)
         
         # Verify each file was processed correctly
-        upsert_calls = mock_services['db'].upsert_downloaded_file.call_args_list
+        stored_by_name = {c[0][0].name: c[0][0] for c in mock_services['db'].upsert_downloaded_file.call_args_list}
         
         for i, file_data in enumerate(test_files):
-            stored_file = upsert_calls[i][0][0]
+            stored_file = stored_by_name[file_data["name"]]
             expected_crc32 = file_data["expected_crc32"]
             
             # Verify CRC32 extraction and normalization
@@ -484,14 +485,8 @@ class TestEndToEndCRC32Validation:
         # Mock SFTP service methods
         mock_services['sftp'].list_remote_dir.return_value = remote_files
         
-        # Mock database diff results
-        mock_services['db'].get_sftp_diffs.return_value = [
-            {
-                **remote_files[0],
-                "fetched_at": datetime.datetime(2024, 1, 1, 12, 0, 0),
-                "remote_path": remote_files[0]["path"]
-            }
-        ]
+        # Nothing has been downloaded yet, so the listing entry is new
+        mock_services['db'].get_known_remote_paths.return_value = set()
         
         # Create test file
         file_path = Path(temp_directory) / remote_files[0]["name"]
@@ -530,9 +525,9 @@ class TestEndToEndCRC32Validation:
         
         # Verify the complete workflow executed correctly
         mock_services['sftp'].list_remote_dir.assert_called_once_with("/remote/complete")
-        mock_services['db'].clear_sftp_temp_files.assert_called_once()
-        mock_services['db'].insert_sftp_temp_files.assert_called_once_with(remote_files)
-        mock_services['db'].get_sftp_diffs.assert_called_once()
+        mock_services['db'].get_known_remote_paths.assert_called_once_with([remote_files[0]["path"]])
+        mock_services['db'].clear_sftp_temp_files.assert_not_called()
+        mock_services['db'].insert_sftp_temp_files.assert_not_called()
         
         # Verify file was processed with CRC32 extraction
         assert mock_services['db'].upsert_downloaded_file.call_count == 1
@@ -647,7 +642,7 @@ class TestEndToEndCRC32Validation:
             )
         
         # Verify all files were attempted to be processed
-        assert mock_services['db'].add_downloaded_file.call_count == len(test_files)
+        assert sum(len(c.args[0]) for c in mock_services['db'].upsert_downloaded_files.call_args_list) == len(test_files)
         assert mock_services['db'].upsert_downloaded_file.call_count == len(test_files)
         
         # Verify successful files were processed correctly
@@ -22,6 +22,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from utils.sftp_orchestrator import process_sftp_diffs, download_from_remote
 from models.downloaded_file import DownloadedFile
 from services.hashing_service import HashingService
+from services.db_implementations.db_interface import DatabaseInterface
 
 
 def create_mock_services():
@@ -41,6 +42,7 @@ def create_mock_services():
     mock_db.insert_sftp_temp_files.return_value = None
     mock_db.add_downloaded_file.return_value = None
     mock_db.upsert_downloaded_file.return_value = None
+    mock_db.upsert_downloaded_files.side_effect = lambda files: DatabaseInterface.upsert_downloaded_files(mock_db, files)
     
     # Mock LLM service
     mock_llm = Mock()
@@ -260,13 +262,7 @@ def validate_complete_workflow():
         
         # Set up mock services
         mock_services['sftp'].list_remote_dir.return_value = remote_files
-        mock_services['db'].get_sftp_diffs.return_value = [
-            {
-                **remote_files[0],
-                "fetched_at": datetime.datetime(2024, 1, 1, 12, 0, 0),
-                "remote_path": remote_files[0]["path"]
-            }
-        ]
+        mock_services['db'].get_known_remote_paths.return_value = set()
         
         # Create test file
         file_path = Path(temp_dir) / remote_files[0]["name"]
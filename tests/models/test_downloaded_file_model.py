@@ -709,6 +709,44 @@ class TestDownloadedFileFileOperations:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
 
+    def test_apply_transfer_hashes(self):
+        """Test that digests computed during download seed the hash fields and cache."""
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b"test content")
+            tmp_path = tmp.name
+
+        try:
+            file = DownloadedFile(
+                name="test.mkv",
+                original_path="/remote/test.mkv",
+                current_path=tmp_path,
+                size=12,
+                modified_time=datetime.datetime.now()
+            )
+
+            assert file.apply_transfer_hashes({"crc32": "1A2B3C4D", "md5": "abc123"}) is True
+            assert file.file_hash == "1A2B3C4D"
+            assert file.file_hash_algo == "CRC32"
+            assert file.hash_calculated_at is not None
+            # Cached digests are returned without re-reading the file
+            assert file.calculate_md5() == "abc123"
+            assert file.calculate_crc32() == "1A2B3C4D"
+        finally:
+            os.unlink(tmp_path)
+
+    def test_apply_transfer_hashes_without_crc32(self):
+        """Test that hashes without a CRC32 leave the file hash unset."""
+        file = DownloadedFile(
+            name="test.mkv",
+            original_path="/remote/test.mkv",
+            size=1000,
+            modified_time=datetime.datetime.now()
+        )
+
+        assert file.apply_transfer_hashes({"md5": "abc123"}) is False
+        assert file.apply_transfer_hashes(None) is False
+        assert file.file_hash is None
+
 
 class TestDownloadedFileEdgeCases:
     """Test edge cases and error handling."""
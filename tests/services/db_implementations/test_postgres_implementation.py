@@ -46,4 +46,167 @@ def test_pg_initialize_and_upsert_and_search(monkeypatch):
         db.mark_downloaded_file_error(got.id, "error message")
         got2 = db.get_downloaded_file_by_id(got.id)
         assert got2 is not None
-        assert got2.status in (FileStatus.ROUTED, FileStatus.ERROR)
\ No newline at end of file
+        assert got2.status in (FileStatus.ROUTED, FileStatus.ERROR)
+
+# --------------------- Connection pool (no server needed) ---------------------
+
+import threading
+
+import psycopg2
+from psycopg2.pool import PoolError
+
+from services.db_implementations import postgres_implementation
+from services.db_implementations.postgres_implementation import create_postgres_pool_settings
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool:
+    instances = []
+
+    def __init__(self, minconn, maxconn, dsn):
+        self.minconn, self.maxconn = minconn, maxconn
+        self._pool, self.created, self.closed_conns = [], [], []
+        FakePool.instances.append(self)
+
+    def getconn(self):
+        if self._pool:
+            return self._pool.pop()
+        conn = FakeConnection()
+        self.created.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.close()
+            self.closed_conns.append(conn)
+        else:
+            self._pool.append(conn)
+
+    def closeall(self):
+        for conn in self._pool:
+            conn.close()
+
+
+@pytest.fixture
+def pooled_db(monkeypatch):
+    FakePool.instances = []
+    monkeypatch.setattr(postgres_implementation, "ThreadedConnectionPool", FakePool)
+
+    def make(**kwargs):
+        return PostgresDBService("postgresql://u:p@localhost:5432/db", **kwargs)
+    return make
+
+
+def test_pool_is_created_lazily_and_reuses_connections(pooled_db):
+    db = pooled_db(min_connections=2, max_connections=4)
+    assert FakePool.instances == []
+
+    with db._connection() as first:
+        with db._connection() as nested:
+            assert nested is first
+    assert db.health_check()
+    with db._connection() as again:
+        assert again is first
+
+    pool = FakePool.instances[0]
+    assert (pool.minconn, pool.maxconn) == (2, 4)
+    assert len(pool.created) == 1
+    stats = db.pool_stats()
+    assert stats["checkouts"] == 3 and stats["in_use"] == 0 and stats["idle"] == 1
+    assert stats["peak_in_use"] == 1 and stats["utilization"] == 0.0
+
+
+def test_callers_wait_for_a_free_connection_and_time_out(pooled_db):
+    db = pooled_db(max_connections=1, pool_timeout=0.05)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        with db._connection():
+            holding.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait(5)
+    try:
+        assert db.pool_stats()["utilization"] == 1.0
+        with pytest.raises(PoolError):
+            with db._connection():
+                pass
+        assert not db.health_check()
+    finally:
+        release.set()
+        holder.join()
+    stats = db.pool_stats()
+    assert stats["waits"] == 2 and stats["timeouts"] == 2 and stats["in_use"] == 0
+
+
+def test_unhealthy_and_broken_connections_are_discarded(pooled_db):
+    db = pooled_db(health_check_seconds=0)
+    with db._connection() as conn:
+        pass
+    # The idle connection fails its ping, so a fresh one is handed out
+    conn.broken = True
+    with db._connection() as fresh:
+        assert fresh is not conn
+    # A connection-level error during use closes the connection instead of returning it
+    with pytest.raises(psycopg2.OperationalError):
+        with db._connection() as c:
+            c.broken = True
+            c.cursor().execute("SELECT 1")
+    assert c is fresh
+    pool = FakePool.instances[0]
+    assert pool.closed_conns == [conn, fresh]
+    assert db.pool_stats()["discarded"] == 2
+
+
+def test_close_discards_the_pool(pooled_db):
+    db = pooled_db()
+    with db._connection() as conn:
+        pass
+    db.close()
+    assert conn.closed
+    with db._connection() as new_conn:
+        assert new_conn is not conn
+    assert len(FakePool.instances) == 2
+
+
+def test_create_postgres_pool_settings_reads_postgresql_section():
+    assert create_postgres_pool_settings({"postgresql": {
+        "pool_min_connections": "3", "pool_max_connections": "2", "pool_timeout_seconds": "5",
+    }}) == {"min_connections": 3, "max_connections": 3, "pool_timeout": 5.0, "health_check_seconds": 60.0}
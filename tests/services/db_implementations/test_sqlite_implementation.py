@@ -1,7 +1,13 @@
 import pytest
 import tempfile
 import os
-from services.db_implementations.sqlite_implementation import SQLiteDBService
+import datetime
+import gc
+import sqlite3
+import threading
+import time
+from models.downloaded_file import DownloadedFile
+from services.db_implementations.sqlite_implementation import SQLiteDBService, SQLiteSettings, create_sqlite_settings
 
 class DummyShow:
     def __init__(self, sys_name, sys_path, tmdb_name):
@@ -86,4 +92,176 @@ def test_backup_database_creates_file(temp_db_file):
     db.initialize()
     backup_path = db.backup_database()
     assert os.path.exists(backup_path)
-    assert backup_path != temp_db_file 
\ No newline at end of file
+    assert backup_path != temp_db_file 
+def test_upsert_downloaded_files_writes_a_batch_and_sets_ids(temp_db_file):
+    """Test that a batch upsert inserts new files, updates existing ones and fills in ids."""
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    now = datetime.datetime.now()
+
+    def make(name, size):
+        return DownloadedFile(name=name, remote_path=f"/remote/{name}", current_path=f"/in/{name}", size=size, modified_time=now)
+
+    existing = db.upsert_downloaded_file(make("a.mkv", 1))
+    saved = db.upsert_downloaded_files([make("a.mkv", 2), make("b.mkv", 3)])
+
+    assert saved[0].id == existing.id
+    assert saved[1].id is not None and saved[1].id != existing.id
+    assert db.get_downloaded_file_by_id(existing.id).size == 2
+    assert db.upsert_downloaded_files([]) == []
+
+def _show_names(db):
+    with db._connection() as conn:
+        return sorted(conn.execute("SELECT show_id, normalized_name, kind FROM show_names").fetchall())
+
+def test_show_names_follow_adds_alias_updates_and_deletes(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    db.add_show(DummyShow('Spy x Family', '/shows/Spy x Family', 'SPY x FAMILY'))
+    show = db.get_show_by_name_or_alias(' spy X family ')
+    assert show is not None and 'standard_match' not in show
+
+    db.update_show_aliases(show['id'], 'Spy Family, SxF')
+    assert _show_names(db) == [
+        (show['id'], 'spy family', 'alias'), (show['id'], 'spy x family', 'sys_name'),
+        (show['id'], 'spy x family', 'tmdb_name'), (show['id'], 'sxf', 'alias'),
+    ]
+    assert db.get_show_by_name_or_alias('SxF')['id'] == show['id']
+    # Set match: any part of a comma-separated name may hit a key
+    assert db.show_exists('Unknown, sxf')
+    assert not db.show_exists('Unknown')
+
+    db.delete_show_and_episodes(1)
+    assert _show_names(db) == []
+    assert db.get_show_by_name_or_alias('SxF') is None
+
+def test_show_names_backfills_shows_added_before_the_table(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    db.add_show(DummyShow('Old Show', '/shows/Old Show', 'Old Show'))
+    with db._connection() as conn:
+        conn.execute("DROP TABLE show_names")
+
+    # A fresh service (e.g. after upgrading) indexes existing shows on first lookup
+    assert SQLiteDBService(temp_db_file).show_exists('old show')
+    assert [row[1:] for row in _show_names(db)] == [('old show', 'sys_name'), ('old show', 'tmdb_name')]
+
+def test_show_lookup_falls_back_to_scan_when_read_only_and_unindexed(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    db.add_show(DummyShow('Old Show', '/shows/Old Show', 'Old Show'))
+    with db._connection() as conn:
+        conn.execute("DROP TABLE show_names")
+
+    assert SQLiteDBService(temp_db_file, read_only=True).get_show_by_name_or_alias('Old Show')['sys_name'] == 'Old Show'
+
+def test_connections_are_reused_per_thread_with_wal_pragmas(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    with db._connection() as first:
+        pass
+    with db._connection() as second:
+        assert second is first
+        assert second.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert second.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert second.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    with db._read_connection() as reader:
+        assert reader is not first
+        assert reader.execute("PRAGMA query_only").fetchone()[0] == 1
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.get_all_shows() == [] and db._thread_state().writer))
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+    db.close()
+
+def test_nested_blocks_share_one_transaction_and_restore_row_factory(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    with pytest.raises(sqlite3.IntegrityError):
+        with db._connection() as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("INSERT INTO transfer_runs (finished_at, files, bytes_transferred, elapsed_seconds, workers) "
+                         "VALUES (CURRENT_TIMESTAMP, 1, 1, 1.0, 1)")
+            # Reads inside the block see its uncommitted rows, and the caller's row_factory survives
+            assert db.get_transfer_runs()[0]['files'] == 1
+            assert conn.row_factory is sqlite3.Row
+            conn.execute("INSERT INTO tv_shows (id) VALUES (NULL)")
+    assert db.get_transfer_runs() == []
+
+def test_any_exception_rolls_back_the_thread_writer(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    with pytest.raises(ValueError):
+        with db._connection() as conn:
+            conn.execute("INSERT INTO transfer_runs (finished_at, files, bytes_transferred, elapsed_seconds, workers) "
+                         "VALUES (CURRENT_TIMESTAMP, 1, 1, 1.0, 1)")
+            raise ValueError("failed to build a model")
+    assert not conn.in_transaction
+    # Another writer is not locked out, and the next call does not commit the abandoned insert
+    SQLiteDBService(temp_db_file).add_transfer_run(1, 1, 1.0, 1)
+    assert len(db.get_transfer_runs()) == 1
+
+def test_connections_are_closed_when_their_thread_exits(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    opened = []
+
+    def work():
+        db.get_all_shows()
+        opened.extend(db._thread_state().opened)
+
+    for _ in range(5):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    gc.collect()
+
+    assert len(opened) == 10
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert len(db._states) == 1  # only the main thread, which ran initialize()
+
+def test_readers_are_not_blocked_by_an_open_write_transaction(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    db.add_show(DummyShow('Committed', '/shows/c', 'Committed'))
+    writing, done = threading.Event(), threading.Event()
+
+    def write():
+        with db._connection() as conn:
+            conn.execute("INSERT INTO transfer_runs (finished_at, files, bytes_transferred, elapsed_seconds, workers) "
+                         "VALUES (CURRENT_TIMESTAMP, 1, 1, 1.0, 1)")
+            writing.set()
+            done.wait(5)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    writing.wait(5)
+    try:
+        start = time.monotonic()
+        assert [s['sys_name'] for s in SQLiteDBService(temp_db_file).get_all_shows()] == ['Committed']
+        assert db.get_transfer_runs() == []
+        assert time.monotonic() - start < 2
+    finally:
+        done.set()
+        writer.join()
+    assert len(db.get_transfer_runs()) == 1
+
+def test_backup_includes_changes_still_in_the_wal(temp_db_file):
+    db = SQLiteDBService(temp_db_file)
+    db.initialize()
+    db.add_show(DummyShow('In Wal', '/shows/w', 'In Wal'))
+    backup_path = db.backup_database()
+    try:
+        assert [s['sys_name'] for s in SQLiteDBService(backup_path).get_all_shows()] == ['In Wal']
+    finally:
+        os.remove(backup_path)
+
+def test_create_sqlite_settings_reads_sqlite_section():
+    settings = create_sqlite_settings({"sqlite": {
+        "db_file": "x.db", "journal_mode": "DELETE", "synchronous": "sometimes", "mmap_size_mb": "-1",
+    }})
+    assert settings == SQLiteSettings(journal_mode="delete", synchronous="normal", mmap_size_mb=0)
@@ -0,0 +1,228 @@
+import asyncio
+import stat
+import threading
+import time
+import zlib
+import pytest
+from types import SimpleNamespace
+import services.async_sftp_service as async_sftp_module
+from services.async_sftp_service import AsyncSFTPService, create_async_sftp_service, sftp_backend
+import services.sftp_transfer as sftp_transfer
+from services.sftp_transfer import SFTPTransferEngine
+from utils.metrics import TransferMetrics
+
+OLD = int(time.time()) - 3600
+
+
+def attrs(size=0, mtime=OLD, is_dir=False):
+    return SimpleNamespace(
+        size=size,
+        mtime=mtime,
+        permissions=(stat.S_IFDIR if is_dir else stat.S_IFREG) | 0o755,
+        type=2 if is_dir else 1,
+    )
+
+
+class FakeRemoteFile:
+    def __init__(self, data):
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self, size, offset):
+        await asyncio.sleep(0)
+        return self.data[offset:offset + size]
+
+
+class FakeAsyncSFTPClient:
+    """Minimal stand-in for asyncssh.SFTPClient: a tree of directories and file contents."""
+
+    def __init__(self, tree, files=None):
+        self.tree = tree
+        self.files = files or {}
+        self.listing = 0
+        self.peak_listing = 0
+        self.fail_next = 0
+
+    async def readdir(self, path):
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionResetError("connection lost")
+        self.listing += 1
+        self.peak_listing = max(self.peak_listing, self.listing)
+        await asyncio.sleep(0.01)
+        self.listing -= 1
+        children = [SimpleNamespace(filename=n, attrs=a) for n, a in self.tree[path]]
+        return [SimpleNamespace(filename=".", attrs=attrs(is_dir=True)),
+                SimpleNamespace(filename="..", attrs=attrs(is_dir=True))] + children
+
+    async def stat(self, path):
+        if path in self.files:
+            return attrs(size=len(self.files[path]))
+        return attrs(is_dir=True)
+
+    def open(self, path, mode="rb", **kwargs):
+        return FakeRemoteFile(self.files[path])
+
+
+def make_service(client, **kwargs):
+    service = AsyncSFTPService("host", 22, "user", "/key", **kwargs)
+    service.client = client
+    return service
+
+
+# ─────────────────────────────────────────────────────────
+# Listing
+# ─────────────────────────────────────────────────────────
+
+def test_list_remote_dir_applies_sftp_service_filters():
+    client = FakeAsyncSFTPClient({"/remote": [
+        ("Show - 01.mkv", attrs(100)),
+        ("Show - 02.mkv", attrs(100, mtime=int(time.time()))),  # still being written
+        ("cover.jpg", attrs(10)),
+        ("Season 1", attrs(is_dir=True)),
+        ("screens", attrs(is_dir=True)),
+    ]})
+
+    entries = asyncio.run(make_service(client).list_remote_dir("/remote"))
+
+    assert [(e["name"], e["is_dir"]) for e in entries] == [("Show - 01.mkv", False), ("Season 1", True)]
+    assert entries[0]["remote_path"] == "/remote/Show - 01.mkv"
+
+
+def test_recursive_listing_lists_directories_concurrently():
+    tree = {"/remote": [(f"d{i}", attrs(is_dir=True)) for i in range(4)]}
+    for i in range(4):
+        tree[f"/remote/d{i}"] = [(f"Show - 0{i}.mkv", attrs(10))]
+    client = FakeAsyncSFTPClient(tree)
+
+    entries = asyncio.run(make_service(client, list_concurrency=4).list_remote_files_recursive("/remote"))
+
+    assert sorted(e["remote_path"] for e in entries) == [f"/remote/d{i}/Show - 0{i}.mkv" for i in range(4)]
+    assert client.peak_listing == 4
+
+
+def test_connection_errors_are_retried_after_reconnect(monkeypatch):
+    monkeypatch.setattr(async_sftp_module, "RETRY_DELAY", 0)
+    metrics = TransferMetrics()
+    monkeypatch.setattr("utils.metrics._default_metrics", metrics)
+    client = FakeAsyncSFTPClient({"/remote": [("Show - 01.mkv", attrs(100))]})
+    client.fail_next = 1
+    service = make_service(client)
+    reconnects = []
+
+    async def fake_reconnect(generation=None):
+        reconnects.append(generation)
+
+    service.reconnect = fake_reconnect
+
+    entries = asyncio.run(service.list_remote_dir("/remote"))
+
+    assert len(entries) == 1
+    assert reconnects == [0]
+    assert metrics.retries.value(operation="list_remote_dir") == 1
+
+
+# ─────────────────────────────────────────────────────────
+# Downloads
+# ─────────────────────────────────────────────────────────
+
+def test_plan_dir_download_skips_filtered_entries(tmp_path):
+    client = FakeAsyncSFTPClient({
+        "/remote/Show": [("Show - 01.mkv", attrs(5)), ("cover.jpg", attrs(1)), ("screens", attrs(is_dir=True))],
+        "/remote/Show/screens": [("shot.mkv", attrs(1))],
+    })
+
+    planned = asyncio.run(make_service(client).plan_dir_download("/remote/Show", str(tmp_path / "Show")))
+
+    assert [(p["remote_path"], p["local_path"]) for p in planned] == [
+        ("/remote/Show/Show - 01.mkv", str(tmp_path / "Show" / "Show - 01.mkv"))
+    ]
+    assert (tmp_path / "Show").is_dir()
+
+
+def test_download_dir_fetches_files_with_inline_crc32(tmp_path):
+    data = b"episode data" * 1000
+    client = FakeAsyncSFTPClient(
+        {"/remote/Show": [("Show - 01.mkv", attrs(len(data)))]},
+        files={"/remote/Show/Show - 01.mkv": data},
+    )
+    service = make_service(client, transfer_engine=SFTPTransferEngine(block_size=4096))
+
+    results = asyncio.run(service.download_dir("/remote/Show", str(tmp_path / "Show")))
+
+    target = tmp_path / "Show" / "Show - 01.mkv"
+    assert target.read_bytes() == data
+    assert not (tmp_path / "Show" / "Show - 01.mkv.part").exists()
+    assert results[0]["hashes"]["crc32"] == f"{zlib.crc32(data) & 0xFFFFFFFF:08X}"
+
+
+def test_download_file_resumes_partial_download(tmp_path):
+    data = bytes(range(256)) * 64
+    client = FakeAsyncSFTPClient({}, files={"/remote/a.mkv": data})
+    engine = SFTPTransferEngine(block_size=1024)
+    local = str(tmp_path / "a.mkv")
+
+    class FlakyFile(FakeRemoteFile):
+        async def read(self, size, offset):
+            if offset >= 4096:
+                raise ConnectionResetError("dropped")
+            return await super().read(size, offset)
+
+    flaky = FakeAsyncSFTPClient({}, files={"/remote/a.mkv": data})
+    flaky.open = lambda path, mode="rb", **kwargs: FlakyFile(data)
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(engine.download_async(flaky, "/remote/a.mkv", local))
+    assert (tmp_path / "a.mkv.part").exists()
+
+    result = asyncio.run(engine.download_async(client, "/remote/a.mkv", local))
+
+    assert result.bytes_resumed == 4096
+    assert (tmp_path / "a.mkv").read_bytes() == data
+    assert result.hashes["crc32"] == f"{zlib.crc32(data) & 0xFFFFFFFF:08X}"
+    assert not (tmp_path / "a.mkv.part").exists()
+
+
+def test_download_async_keeps_journal_io_off_the_event_loop(tmp_path, monkeypatch):
+    data = bytes(range(256)) * 64
+    client = FakeAsyncSFTPClient({}, files={"/remote/a.mkv": data})
+    engine = SFTPTransferEngine(block_size=1024)
+    monkeypatch.setattr(sftp_transfer, "JOURNAL_INTERVAL", 4096)
+    loop_thread = threading.get_ident()
+    threads = {}
+
+    def recording(name, func):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.get_ident())
+            return func(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(engine, "_open_journal", recording("open", engine._open_journal))
+    monkeypatch.setattr(engine, "_flush_progress", recording("flush", engine._flush_progress))
+    monkeypatch.setattr(engine, "_finish", recording("finish", engine._finish))
+
+    asyncio.run(engine.download_async(client, "/remote/a.mkv", str(tmp_path / "a.mkv")))
+
+    assert (tmp_path / "a.mkv").read_bytes() == data
+    assert set(threads) == {"open", "flush", "finish"}
+    assert all(loop_thread not in idents for idents in threads.values())
+
+
+# ─────────────────────────────────────────────────────────
+# Configuration
+# ─────────────────────────────────────────────────────────
+
+def test_sftp_backend_defaults_to_paramiko():
+    assert sftp_backend({"sftp": {}}) == "paramiko"
+    assert sftp_backend({"sftp": {"backend": "AsyncSSH"}}) == "asyncssh"
+    assert sftp_backend({"sftp": {"backend": "ftp"}}) == "paramiko"
+
+
+def test_create_async_sftp_service_requires_asyncssh(monkeypatch):
+    monkeypatch.setattr(async_sftp_module, "asyncssh", None)
+    with pytest.raises(ImportError):
+        create_async_sftp_service({"sftp": {"host": "h", "port": "22", "username": "u", "ssh_key_path": "/k"}})
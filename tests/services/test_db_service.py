@@ -196,6 +196,26 @@ def test_get_sftp_diffs_returns_expected(db_service):
     assert diffs[0]["name"] == "newfile.txt"
 
 
+def test_remote_dir_snapshot_round_trip(db_service):
+    mtime = datetime.datetime(2024, 5, 1, 12, 30, 15, 250000)
+    assert db_service.get_remote_dir_snapshot("/remote/snapshot") is None
+    db_service.upsert_remote_dir_snapshot("/remote/snapshot", mtime, 3)
+    db_service.upsert_remote_dir_snapshot("/remote/snapshot", mtime, 4)
+    snapshot = db_service.get_remote_dir_snapshot("/remote/snapshot")
+    assert snapshot["mtime"] == mtime
+    assert snapshot["child_count"] == 4
+    db_service.clear_remote_dir_snapshots()
+    assert db_service.get_remote_dir_snapshot("/remote/snapshot") is None
+
+def test_transfer_runs_are_returned_newest_first(db_service):
+    assert db_service.get_transfer_runs() == []
+    db_service.add_transfer_run(2, 2048, 1.5, 4)
+    db_service.add_transfer_run(1, 512, 0.5, 2)
+    runs = db_service.get_transfer_runs()
+    assert [(r["files"], r["bytes_transferred"], r["workers"]) for r in runs] == [(1, 512, 2), (2, 2048, 4)]
+    assert runs[1]["elapsed_seconds"] == pytest.approx(1.5)
+    assert len(db_service.get_transfer_runs(limit=1)) == 1
+
 # ────────────────────────────────────────────────
 # DATABASE BEHAVIOR / EDGE CASE TESTS
 # ────────────────────────────────────────────────
@@ -0,0 +1,50 @@
+import pytest
+from services.fuzzy_show_index import FuzzyShowIndex, fuzzy_key, fuzzy_match_threshold, trigrams
+
+
+SHOWS = [
+    {"id": 1, "sys_name": "Shingeki no Kyojin", "tmdb_name": "Attack on Titan", "tmdb_aliases": "AoT"},
+    {"id": 2, "sys_name": "Spy x Family", "tmdb_name": "SPY x FAMILY", "tmdb_aliases": ""},
+    {"id": 3, "sys_name": "Kimetsu no Yaiba", "tmdb_name": "Demon Slayer", "tmdb_aliases": "Demon Slayer: Kimetsu no Yaiba"},
+]
+
+
+def test_fuzzy_key_and_trigrams_ignore_case_and_punctuation():
+    assert fuzzy_key("Demon_Slayer: Kimetsu-no Yaiba!") == "demon slayer kimetsu no yaiba"
+    assert trigrams("Spy-Family") == trigrams("spy family") == {"  s", " sp", "spy", "py ", "  f", " fa", "fam", "ami", "mil", "ily", "ly "}
+    assert trigrams("") == set()
+
+
+def test_search_ranks_typos_and_reordered_words():
+    index = FuzzyShowIndex(SHOWS)
+
+    matches = index.search("Shingeki no Kyoujin")
+    assert matches[0].show["id"] == 1
+    assert matches[0].matched_name == "shingeki no kyojin"
+    assert 0.7 < matches[0].score < 1.0
+
+    assert index.search("family spy")[0].show["id"] == 2
+    assert index.search("SPY x FAMILY")[0].score == pytest.approx(1.0)
+
+
+def test_search_returns_best_name_per_show_within_limit_and_min_score():
+    index = FuzzyShowIndex(SHOWS)
+
+    matches = index.search("demon slayer kimetsu", limit=5)
+    assert [m.show["id"] for m in matches].count(3) == 1
+    assert matches[0].show["id"] == 3
+    assert all(m.score >= 0.5 for m in index.search("no", min_score=0.5))
+    assert index.search("kimetsu", limit=0) == []
+    assert index.search("zzzz") == []
+
+
+def test_search_returns_copies():
+    index = FuzzyShowIndex(SHOWS)
+    index.search("spy family")[0].show["sys_name"] = "changed"
+    assert index.search("spy family")[0].show["sys_name"] == "Spy x Family"
+
+
+def test_fuzzy_match_threshold_reads_routing_config():
+    assert fuzzy_match_threshold(None) == 0.8
+    assert fuzzy_match_threshold({"routing": {"fuzzy_match_threshold": "0.9"}}) == 0.9
+    assert fuzzy_match_threshold({"routing": {"fuzzy_match_threshold": "2"}}) == 1.0
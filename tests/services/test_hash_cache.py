@@ -0,0 +1,139 @@
+import os
+import zlib
+import pytest
+from services.hash_cache import HashCache, create_hash_cache
+from services.hashing_service import HashingService
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = HashCache(str(tmp_path / "cache" / "hash_cache.db"))
+    yield c
+    c.close()
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / "episode.mkv"
+    path.write_bytes(b"episode data" * 1000)
+    return path
+
+
+def touch(path, data=None, mtime_ns=None):
+    """Rewrite a file (optionally with new content) and bump its mtime."""
+    if data is not None:
+        path.write_bytes(data)
+    st = os.stat(path)
+    new_mtime = mtime_ns or st.st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(st.st_atime_ns, new_mtime))
+
+# ─────────────────────────────────────────────────────────
+# HashCache Tests
+# ─────────────────────────────────────────────────────────
+
+def test_put_then_get_returns_cached_digests(cache, media_file):
+    st = os.stat(media_file)
+    cache.put(str(media_file), st, {"crc32": "1A2B3C4D", "md5": "abc"})
+
+    assert cache.get(str(media_file), ["crc32", "md5"]) == {"crc32": "1A2B3C4D", "md5": "abc"}
+    assert cache.get(str(media_file), ["sha1"]) == {}
+    assert cache.stats()["files"] == 1
+
+def test_changed_mtime_invalidates_entry(cache, media_file):
+    cache.put(str(media_file), os.stat(media_file), {"crc32": "1A2B3C4D"})
+    touch(media_file)
+
+    assert cache.get(str(media_file), ["crc32"]) == {}
+    assert cache.stats()["files"] == 0
+
+def test_entry_follows_renamed_file(cache, media_file, tmp_path):
+    cache.put(str(media_file), os.stat(media_file), {"crc32": "1A2B3C4D"})
+    routed = tmp_path / "routed.mkv"
+    os.rename(media_file, routed)
+
+    assert cache.get(str(routed), ["crc32"]) == {"crc32": "1A2B3C4D"}
+
+def test_invalidate_and_clear(cache, media_file):
+    cache.put(str(media_file), os.stat(media_file), {"crc32": "1A2B3C4D"})
+    cache.invalidate(str(media_file))
+    assert cache.get(str(media_file), ["crc32"]) == {}
+
+    cache.put(str(media_file), os.stat(media_file), {"crc32": "1A2B3C4D"})
+    cache.clear()
+    assert cache.stats()["files"] == 0
+
+def test_create_hash_cache_defaults_next_to_sqlite_db(tmp_path):
+    config = {"sqlite": {"db_file": str(tmp_path / "db" / "sync2nas.db")}}
+    cache = create_hash_cache(config)
+    assert cache.db_file == str(tmp_path / "db" / "hash_cache.db")
+    cache.close()
+
+def test_create_hash_cache_disabled(tmp_path):
+    config = {"sqlite": {"db_file": str(tmp_path / "sync2nas.db")}, "hashing": {"cache_enabled": "false"}}
+    assert create_hash_cache(config) is None
+    assert create_hash_cache({"sqlite": {"db_file": str(tmp_path / "sync2nas.db")}}, read_only=True) is None
+    assert create_hash_cache({}) is None
+
+# ─────────────────────────────────────────────────────────
+# HashingService Integration Tests
+# ─────────────────────────────────────────────────────────
+
+def test_hashing_service_serves_unchanged_files_from_cache(cache, media_file, mocker):
+    service = HashingService(cache=cache)
+    expected = f"{zlib.crc32(media_file.read_bytes()):08X}"
+
+    assert service.hash_file(str(media_file)) == {"crc32": expected}
+    read_spy = mocker.patch("builtins.open", side_effect=AssertionError("file should not be read"))
+    assert service.hash_file(str(media_file)) == {"crc32": expected}
+    read_spy.assert_not_called()
+    assert cache.hits == 1
+
+def test_hashing_service_rehashes_modified_file(cache, media_file):
+    service = HashingService(cache=cache)
+    service.hash_file(str(media_file))
+
+    touch(media_file, b"different content")
+
+    assert service.hash_file(str(media_file)) == {"crc32": f"{zlib.crc32(b'different content'):08X}"}
+
+def test_hashing_service_computes_only_missing_algorithms(cache, media_file):
+    service = HashingService(cache=cache)
+    service.record(str(media_file), {"crc32": "CACHED00"})
+
+    result = service.hash_file(str(media_file), ["crc32", "md5"])
+
+    assert result["crc32"] == "CACHED00"
+    assert len(result["md5"]) == 32
+    assert cache.get(str(media_file), ["crc32", "md5"]) == result
+
+def test_hashing_service_refresh_bypasses_cache(cache, media_file):
+    service = HashingService(cache=cache)
+    service.record(str(media_file), {"crc32": "STALE000"})
+
+    fresh = service.hash_file(str(media_file), refresh=True)
+
+    assert fresh == {"crc32": f"{zlib.crc32(media_file.read_bytes()):08X}"}
+    assert service.hash_file(str(media_file)) == fresh
+
+def test_downloaded_file_uses_default_service_cache(cache, media_file):
+    import datetime
+    from models.downloaded_file import DownloadedFile
+    from services.hashing_service import set_default_hashing_service
+
+    set_default_hashing_service(HashingService(cache=cache))
+    try:
+        def model():
+            return DownloadedFile(
+                name=media_file.name,
+                original_path="/remote/episode.mkv",
+                current_path=str(media_file),
+                size=media_file.stat().st_size,
+                modified_time=datetime.datetime.now(),
+            )
+
+        first = model().calculate_hash("crc32")
+        # A fresh model instance has an empty in-memory cache but hits the persistent one
+        assert model().calculate_hash("crc32") == first
+        assert cache.hits == 1
+    finally:
+        set_default_hashing_service(None)
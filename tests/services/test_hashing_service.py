@@ -0,0 +1,110 @@
+import hashlib
+import os
+import zlib
+import pytest
+from services.hashing_service import HashingService, MultiHasher, create_hashing_service, crc32_combine, format_crc32
+
+
+@pytest.fixture
+def sample_file(tmp_path):
+    path = tmp_path / "sample.bin"
+    path.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    return path
+
+# ─────────────────────────────────────────────────────────
+# HashingService Tests
+# ─────────────────────────────────────────────────────────
+
+def test_calculate_crc32_matches_zlib(sample_file):
+    data = sample_file.read_bytes()
+    assert HashingService(chunk_size=65536).calculate_crc32(str(sample_file)) == f"{zlib.crc32(data):08X}"
+
+def test_calculate_md5_and_sha1(sample_file):
+    data = sample_file.read_bytes()
+    service = HashingService()
+    assert service.calculate_md5(str(sample_file)) == hashlib.md5(data).hexdigest()
+    assert service.calculate_sha1(str(sample_file)) == hashlib.sha1(data).hexdigest()
+
+def test_hash_file_computes_all_digests_in_one_pass(sample_file, mocker):
+    data = sample_file.read_bytes()
+    service = HashingService(chunk_size=65536)
+    spy = mocker.spy(service, "hash_file")
+
+    result = service.hash_file(str(sample_file), ["crc32", "md5", "sha1", "sha256"])
+
+    assert result == {
+        "crc32": f"{zlib.crc32(data):08X}",
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha1": hashlib.sha1(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    assert spy.call_count == 1
+
+def test_hash_file_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert HashingService().hash_file(str(path), ["crc32", "md5"]) == {
+        "crc32": "00000000",
+        "md5": hashlib.md5(b"").hexdigest(),
+    }
+
+def test_hash_file_rejects_unknown_algorithm(sample_file):
+    with pytest.raises(ValueError):
+        HashingService().hash_file(str(sample_file), ["whirlpool"])
+
+def test_hash_files_batch(tmp_path):
+    contents = {tmp_path / f"f{i}.bin": os.urandom(1000 * (i + 1)) for i in range(5)}
+    for path, data in contents.items():
+        path.write_bytes(data)
+    missing = str(tmp_path / "missing.bin")
+
+    results = HashingService(chunk_size=4096, workers_per_device=2).hash_files(
+        [str(p) for p in contents] + [missing], ["crc32", "md5"]
+    )
+
+    for path, data in contents.items():
+        assert results[str(path)] == {"crc32": f"{zlib.crc32(data):08X}", "md5": hashlib.md5(data).hexdigest()}
+    assert results[missing] is None
+
+def test_hash_files_empty_batch():
+    assert HashingService().hash_files([]) == {}
+
+def test_create_hashing_service_from_config():
+    service = create_hashing_service({"hashing": {"chunk_size_mib": "2", "workers_per_device": "3"}})
+    assert service.chunk_size == 2 * 1024 * 1024
+    assert service.workers_per_device == 3
+
+    service = create_hashing_service({"hashing": {"chunk_size_bytes": "65536"}})
+    assert service.chunk_size == 65536
+
+    assert create_hashing_service({}).chunk_size == 1_048_576
+
+# ─────────────────────────────────────────────────────────
+# Streaming Helpers
+# ─────────────────────────────────────────────────────────
+
+def test_multi_hasher_matches_whole_file_digests(sample_file):
+    data = sample_file.read_bytes()
+    hasher = MultiHasher(["crc32", "md5", "sha1"])
+    for i in range(0, len(data), 100_000):
+        hasher.update(data[i:i + 100_000])
+
+    assert hasher.hexdigests() == {
+        "crc32": format_crc32(zlib.crc32(data)),
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha1": hashlib.sha1(data).hexdigest(),
+    }
+
+def test_multi_hasher_rejects_unknown_algorithm():
+    with pytest.raises(ValueError):
+        MultiHasher(["crc32", "whirlpool"])
+
+@pytest.mark.parametrize("len_a,len_b", [(0, 10), (10, 0), (1, 1), (1000, 4096), (65536, 12345)])
+def test_crc32_combine(len_a, len_b):
+    a = os.urandom(len_a)
+    b = os.urandom(len_b)
+    assert crc32_combine(zlib.crc32(a), zlib.crc32(b), len(b)) == zlib.crc32(a + b)
+
+def test_format_crc32():
+    assert format_crc32(0x1A2B) == "00001A2B"
+    assert format_crc32(-1) == "FFFFFFFF"
@@ -0,0 +1,173 @@
+import asyncio
+import pytest
+from services.job_manager import JobManager, JobProgress, JobStatus, create_job_manager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+# ─────────────────────────────────────────────────────────
+# Progress
+# ─────────────────────────────────────────────────────────
+
+def test_progress_rate_and_eta_from_bytes():
+    clock = FakeClock()
+    progress = JobProgress(clock=clock)
+    progress.start()
+    progress.plan(files=4, nbytes=1000)
+    clock.now += 10
+    progress.advance(nbytes=250)
+    progress.advance(nbytes=0, failed=True)
+
+    snap = progress.snapshot()
+
+    assert (snap["files_done"], snap["files_failed"], snap["bytes_done"]) == (1, 1, 250)
+    assert snap["rate"] == pytest.approx(25.0)
+    assert snap["rate_unit"] == "bytes/s"
+    assert snap["eta"] == pytest.approx(30.0)
+
+
+def test_progress_falls_back_to_item_counts_and_drops_eta_when_stopped():
+    clock = FakeClock()
+    progress = JobProgress(clock=clock)
+    progress.start()
+    progress.plan(files=10)
+    clock.now += 5
+    progress.advance(files=5)
+    assert progress.snapshot()["rate_unit"] == "files/s"
+    assert progress.snapshot()["eta"] == pytest.approx(5.0)
+
+    progress.stop()
+    clock.now += 100
+    snap = progress.snapshot()
+    assert snap["elapsed"] == pytest.approx(5.0)
+    assert snap["eta"] is None
+
+
+# ─────────────────────────────────────────────────────────
+# Manager
+# ─────────────────────────────────────────────────────────
+
+def test_submit_returns_immediately_and_limits_concurrent_jobs():
+    manager = JobManager(max_concurrent_jobs=2)
+    running, peak = [0], [0]
+
+    async def work(progress):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        progress.plan(1)
+        await asyncio.sleep(0.01)
+        progress.advance()
+        running[0] -= 1
+        return {"success": True}
+
+    async def main():
+        jobs = [manager.submit("test", work) for _ in range(5)]
+        assert all(job.status == JobStatus.QUEUED for job in jobs)
+        while not all(job.finished for job in jobs):
+            await asyncio.sleep(0.005)
+        return jobs
+
+    jobs = asyncio.run(main())
+
+    assert peak[0] == 2
+    assert all(job.status == JobStatus.SUCCEEDED and job.result == {"success": True} for job in jobs)
+    assert jobs[0].to_dict()["progress"]["files_done"] == 1
+    assert [job.id for job in manager.list_jobs()] == [job.id for job in reversed(jobs)]
+
+
+def test_failed_job_records_error():
+    manager = JobManager()
+
+    async def work(progress):
+        raise ValueError("No SFTP paths")
+
+    async def main():
+        job = manager.submit("download_from_remote", work, params={"dry_run": True})
+        return [snapshot async for snapshot in manager.events(job.id, interval=0.001)]
+
+    snapshots = asyncio.run(main())
+
+    assert snapshots[-1]["status"] == "failed"
+    assert snapshots[-1]["error"] == "No SFTP paths"
+    assert snapshots[-1]["params"] == {"dry_run": True}
+    assert manager.list_jobs(JobStatus.FAILED)[0].kind == "download_from_remote"
+
+
+def test_events_report_progress_until_finished():
+    manager = JobManager()
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def work(progress):
+            progress.plan(2, 200)
+            await gate.wait()
+            progress.advance(nbytes=100)
+            await asyncio.sleep(0.02)
+            progress.advance(nbytes=100)
+            return {"files_downloaded": 2}
+
+        job = manager.submit("download_from_remote", work)
+        snapshots = []
+        async for snapshot in manager.events(job.id, interval=0.001):
+            snapshots.append(snapshot)
+            gate.set()
+        return snapshots
+
+    snapshots = asyncio.run(main())
+
+    assert snapshots[0]["status"] in ("queued", "running")
+    assert any(s["status"] == "running" and s["progress"]["bytes_done"] == 100 for s in snapshots)
+    assert snapshots[-1]["status"] == "succeeded"
+    assert snapshots[-1]["result"] == {"files_downloaded": 2}
+
+
+def test_finished_jobs_beyond_history_are_forgotten():
+    manager = JobManager(max_finished_jobs=2)
+
+    async def work(progress):
+        return {}
+
+    async def main():
+        ids = []
+        for _ in range(4):
+            job = manager.submit("test", work)
+            ids.append(job.id)
+            while not job.finished:
+                await asyncio.sleep(0)
+        manager.submit("test", work)
+        return ids
+
+    ids = asyncio.run(main())
+
+    assert manager.get(ids[0]) is None and manager.get(ids[1]) is None
+    assert manager.get(ids[3]) is not None
+
+
+def test_shutdown_cancels_running_jobs():
+    manager = JobManager()
+
+    async def main():
+        job = manager.submit("test", lambda progress: asyncio.sleep(10))
+        await asyncio.sleep(0.01)
+        await manager.shutdown()
+        return job
+
+    job = asyncio.run(main())
+
+    assert job.status == JobStatus.FAILED
+    assert job.error == "Cancelled"
+
+
+def test_create_job_manager_reads_api_section():
+    manager = create_job_manager({"api": {"max_concurrent_jobs": "4", "job_history": "10"}})
+    assert (manager.max_concurrent_jobs, manager.max_finished_jobs) == (4, 10)
+
+    defaults = create_job_manager({"api": {}})
+    assert (defaults.max_concurrent_jobs, defaults.max_finished_jobs) == (2, 100)
@@ -0,0 +1,183 @@
+import datetime
+import json
+import zlib
+import pytest
+from models.downloaded_file import DownloadedFile, FileStatus
+from services.db_implementations.sqlite_implementation import SQLiteDBService
+from services.hashing_service import HashingService
+from services.library_verifier import (
+    LibraryVerifier,
+    VerificationCheckpoint,
+    create_library_verifier,
+    default_checkpoint_path,
+)
+
+
+def crc(data: bytes) -> str:
+    return f"{zlib.crc32(data) & 0xFFFFFFFF:08X}"
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    """A private database so earlier tests' rows don't leak into sweep counts."""
+    db = SQLiteDBService(str(tmp_path / "verify.db"))
+    db.initialize()
+    return db
+
+
+@pytest.fixture
+def library(tmp_path, db_service):
+    """Three downloaded files: one tagged correctly, one tagged wrongly, one missing from disk."""
+    root = tmp_path / "library"
+    root.mkdir()
+    good_data, bad_data = b"good episode" * 500, b"corrupt episode" * 500
+    good = root / f"[Group] Show - 01 [{crc(good_data)}].mkv"
+    bad = root / "[Group] Show - 02 [DEADBEEF].mkv"
+    good.write_bytes(good_data)
+    bad.write_bytes(bad_data)
+    now = datetime.datetime.now()
+    ids = {}
+    for key, path, size in (
+        ("good", good, len(good_data)),
+        ("bad", bad, len(bad_data)),
+        ("missing", root / "[Group] Show - 03 [12345678].mkv", 10),
+    ):
+        saved = db_service.upsert_downloaded_file(DownloadedFile(
+            name=path.name,
+            remote_path=f"/remote/{path.name}",
+            current_path=str(path),
+            size=size,
+            modified_time=now,
+        ))
+        ids[key] = saved.id
+    return {"ids": ids, "good": good, "bad": bad, "good_crc": crc(good_data), "bad_crc": crc(bad_data)}
+
+
+def make_verifier(db, tmp_path, **kwargs):
+    return LibraryVerifier(
+        db,
+        HashingService(),
+        max_workers=2,
+        checkpoint_path=str(tmp_path / "verify.checkpoint.json"),
+        **kwargs,
+    )
+
+
+# ─────────────────────────────────────────────────────────
+# Downloaded files
+# ─────────────────────────────────────────────────────────
+
+def test_verify_detects_match_mismatch_and_missing(db_service, library, tmp_path):
+    report = make_verifier(db_service, tmp_path).verify(sources=["downloaded"])
+
+    assert report.completed is True
+    assert (report.checked, report.verified, report.mismatched, report.missing) == (3, 1, 1, 1)
+    assert report.mismatches[0].expected == "DEADBEEF"
+    assert report.mismatches[0].actual == library["bad_crc"]
+
+    bad = db_service.get_downloaded_file_by_id(library["ids"]["bad"])
+    assert bad.status == FileStatus.ERROR
+    assert "CRC32 mismatch" in bad.error_message
+    good = db_service.get_downloaded_file_by_id(library["ids"]["good"])
+    assert good.status == FileStatus.DOWNLOADED
+    assert good.file_hash == library["good_crc"]
+    assert not (tmp_path / "verify.checkpoint.json").exists()
+
+
+def test_verify_dry_run_does_not_write(db_service, library, tmp_path):
+    report = make_verifier(db_service, tmp_path, dry_run=True).verify(sources=["downloaded"])
+
+    assert report.mismatched == 1
+    assert db_service.get_downloaded_file_by_id(library["ids"]["bad"]).status == FileStatus.DOWNLOADED
+    assert db_service.get_downloaded_file_by_id(library["ids"]["good"]).file_hash is None
+
+
+def test_verify_uses_stored_hash_when_filename_has_none(db_service, tmp_path):
+    path = tmp_path / "Show - 01.mkv"
+    path.write_bytes(b"payload")
+    saved = db_service.upsert_downloaded_file(DownloadedFile(
+        name=path.name, remote_path="/remote/Show - 01.mkv", current_path=str(path),
+        size=7, modified_time=datetime.datetime.now(),
+    ))
+    db_service.set_downloaded_file_hash(saved.id, "CRC32", "00000000")
+
+    report = make_verifier(db_service, tmp_path).verify()
+
+    assert report.mismatched == 1
+    assert report.mismatches[0].reference == "stored"
+
+
+def test_verify_limit_checkpoints_and_resumes(db_service, library, tmp_path):
+    first = make_verifier(db_service, tmp_path).verify(limit=2)
+
+    assert first.completed is False
+    assert first.checked == 2
+    checkpoint = json.loads((tmp_path / "verify.checkpoint.json").read_text())
+    assert checkpoint["last_ids"]["downloaded"] == library["ids"]["bad"]
+
+    second = make_verifier(db_service, tmp_path).verify()
+
+    assert second.resumed is True
+    assert second.completed is True
+    assert (second.checked, second.missing) == (1, 1)
+
+
+def test_verify_restart_ignores_checkpoint(db_service, library, tmp_path):
+    make_verifier(db_service, tmp_path).verify(limit=1)
+
+    report = make_verifier(db_service, tmp_path, dry_run=True).verify(resume=False)
+
+    assert report.resumed is False
+    assert report.checked == 3
+
+
+def test_verify_rejects_unknown_source(db_service, tmp_path):
+    with pytest.raises(ValueError):
+        make_verifier(db_service, tmp_path).verify(sources=["nope"])
+
+
+# ─────────────────────────────────────────────────────────
+# Inventory
+# ─────────────────────────────────────────────────────────
+
+def test_verify_inventory_only_checks_tagged_files(db_service, tmp_path):
+    data = b"inventory episode"
+    tagged = tmp_path / f"Show - 01 [{crc(data)}].mkv"
+    untagged = tmp_path / "Show - 02.mkv"
+    tagged.write_bytes(data)
+    untagged.write_bytes(b"other")
+    now = datetime.datetime.now().isoformat()
+    db_service.add_inventory_files([
+        {"name": p.name, "size": p.stat().st_size, "modified_time": now, "path": str(p), "fetched_at": now, "is_dir": 0}
+        for p in (tagged, untagged)
+    ])
+
+    report = make_verifier(db_service, tmp_path).verify(sources=["inventory"])
+
+    assert report.completed is True
+    assert (report.checked, report.verified, report.skipped) == (1, 1, 1)
+
+
+# ─────────────────────────────────────────────────────────
+# Checkpoint and factory
+# ─────────────────────────────────────────────────────────
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = VerificationCheckpoint(str(tmp_path / "cp.json"))
+    assert checkpoint.load() == {}
+    checkpoint.save({"downloaded": 42})
+    assert checkpoint.load() == {"downloaded": 42}
+    checkpoint.remove()
+    assert checkpoint.load() == {}
+
+
+def test_create_library_verifier_reads_verify_section(db_service, tmp_path):
+    config = {
+        "sqlite": {"db_file": str(tmp_path / "db" / "sync2nas.db")},
+        "verify": {"workers": "3", "max_read_mib_per_second": "10"},
+    }
+    verifier = create_library_verifier(config, db_service, HashingService())
+
+    assert verifier.max_workers == 3
+    assert verifier._bucket.rate == 10 * 1024 * 1024
+    assert default_checkpoint_path(config) == str(tmp_path / "db" / "verify_library.checkpoint.json")
@@ -0,0 +1,272 @@
+import threading
+import time
+import pytest
+import paramiko
+from services.sftp_pool import SFTPConnectionPool, create_sftp_pool
+from services.sftp_service import SFTPService
+
+
+def make_client(mocker):
+    client = mocker.Mock()
+    client.get_channel.return_value.closed = False
+    return client
+
+
+@pytest.fixture
+def paramiko_mocks(mocker):
+    """Patch paramiko so each Transport/SFTPClient is a fresh mock."""
+    transports = []
+    clients = []
+
+    def new_transport(*args, **kwargs):
+        t = mocker.Mock()
+        t.is_active.return_value = True
+        transports.append(t)
+        return t
+
+    def new_client(transport):
+        c = make_client(mocker)
+        c.transport = transport
+        clients.append(c)
+        return c
+
+    mocker.patch("paramiko.RSAKey.from_private_key_file", return_value=mocker.Mock())
+    mocker.patch("paramiko.Transport", side_effect=new_transport)
+    mocker.patch("paramiko.SFTPClient.from_transport", side_effect=new_client)
+    return transports, clients
+
+
+def make_pool(**kwargs):
+    params = dict(max_transports=2, channels_per_transport=2, idle_timeout=300.0)
+    params.update(kwargs)
+    return SFTPConnectionPool("host", 22, "user", "keypath", **params)
+
+# ─────────────────────────────────────────────────────────
+# Pool Behaviour Tests
+# ─────────────────────────────────────────────────────────
+
+def test_acquire_reuses_released_session(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool()
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert first is second
+    assert len(transports) == 1
+    assert len(clients) == 1
+
+def test_channels_multiplexed_before_opening_new_transport(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool(max_transports=2, channels_per_transport=2)
+
+    leased = [pool.acquire() for _ in range(3)]
+
+    assert len(clients) == 3
+    assert len(transports) == 2
+    assert clients[0].transport is clients[1].transport
+    assert pool.stats()["leased_sessions"] == 3
+    for c in leased:
+        pool.release(c)
+
+def test_key_loaded_once_for_all_transports(paramiko_mocks):
+    pool = make_pool(max_transports=2, channels_per_transport=1)
+    a = pool.acquire()
+    b = pool.acquire()
+    assert paramiko.RSAKey.from_private_key_file.call_count == 1
+    pool.release(a)
+    pool.release(b)
+
+def test_acquire_times_out_when_pool_exhausted(paramiko_mocks):
+    pool = make_pool(max_transports=1, channels_per_transport=1)
+    held = pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+    pool.release(held)
+
+def test_waiting_acquire_gets_released_session(paramiko_mocks):
+    pool = make_pool(max_transports=1, channels_per_transport=1)
+    held = pool.acquire()
+    result = {}
+
+    def waiter():
+        result["client"] = pool.acquire(timeout=5)
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    pool.release(held)
+    t.join(timeout=5)
+
+    assert result["client"] is held
+
+def test_discarded_session_is_closed_and_replaced(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool()
+
+    first = pool.acquire()
+    pool.release(first, discard=True)
+    second = pool.acquire()
+
+    first.close.assert_called_once()
+    assert second is not first
+    assert pool.stats()["open_sessions"] == 1
+
+def test_unhealthy_idle_session_is_not_reused(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool()
+
+    first = pool.acquire()
+    pool.release(first)
+    first.get_channel.return_value.closed = True
+
+    second = pool.acquire()
+    assert second is not first
+    first.close.assert_called_once()
+
+def test_idle_session_probe_runs_outside_pool_lock(paramiko_mocks, mocker):
+    transports, clients = paramiko_mocks
+    mocker.patch("services.sftp_pool.HEALTH_PROBE_AFTER_SECONDS", -1.0)
+    pool = make_pool()
+
+    first = pool.acquire()
+    other = pool.acquire()
+    pool.release(first)
+
+    def probe(path):
+        # Another thread must be able to use the pool while the probe is on the wire
+        done = threading.Event()
+        threading.Thread(target=lambda: (pool.release(other), done.set())).start()
+        assert done.wait(2)
+        return "/"
+
+    first.normalize.side_effect = probe
+    assert pool.acquire() is first
+    first.normalize.assert_called_once_with(".")
+
+def test_failed_probe_closes_idle_session(paramiko_mocks, mocker):
+    transports, clients = paramiko_mocks
+    mocker.patch("services.sftp_pool.HEALTH_PROBE_AFTER_SECONDS", -1.0)
+    pool = make_pool()
+
+    first = pool.acquire()
+    pool.release(first)
+    first.normalize.side_effect = EOFError("gone")
+
+    second = pool.acquire()
+    assert second is not first
+    first.close.assert_called_once()
+
+def test_idle_sessions_reaped_after_timeout(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool(idle_timeout=0.01)
+
+    first = pool.acquire()
+    pool.release(first)
+    time.sleep(0.05)
+    pool.acquire()
+
+    first.close.assert_called_once()
+    transports[0].close.assert_called_once()
+
+def test_session_context_discards_on_connection_error(paramiko_mocks):
+    pool = make_pool()
+
+    with pytest.raises(paramiko.SSHException):
+        with pool.session() as client:
+            raise paramiko.SSHException("dropped")
+
+    client.close.assert_called_once()
+    assert pool.stats()["idle_sessions"] == 0
+
+def test_close_shuts_down_idle_sessions(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool()
+    pool.release(pool.acquire())
+
+    pool.close()
+
+    clients[0].close.assert_called_once()
+    transports[0].close.assert_called_once()
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+# ─────────────────────────────────────────────────────────
+# SFTPService Integration Tests
+# ─────────────────────────────────────────────────────────
+
+def test_sftp_service_session_leases_from_pool(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool()
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool)
+
+    with sftp.session() as worker:
+        assert worker.client is clients[0]
+        assert worker.transport is None
+    with sftp.session() as worker:
+        assert worker.client is clients[0]
+
+    assert len(transports) == 1
+    assert pool.stats()["idle_sessions"] == 1
+
+def test_sftp_service_session_without_pool_opens_dedicated_connection(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    sftp = SFTPService("host", 22, "user", "keypath")
+
+    with sftp.session() as worker:
+        assert worker.transport is transports[0]
+
+    transports[0].close.assert_called_once()
+
+def test_pooled_worker_reconnect_discards_channel(paramiko_mocks):
+    transports, clients = paramiko_mocks
+    pool = make_pool()
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool)
+
+    with sftp.session() as worker:
+        stale = worker.client
+        worker.reconnect()
+        assert worker.client is not stale
+
+    stale.close.assert_called_once()
+
+def test_segment_session_does_not_wait_for_busy_pool(paramiko_mocks):
+    pool = make_pool(max_transports=1, channels_per_transport=1)
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool)
+    held = pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        with sftp._segment_session():
+            pass
+
+    pool.release(held)
+    with sftp._segment_session() as client:
+        assert client is held
+
+# ─────────────────────────────────────────────────────────
+# Factory Tests
+# ─────────────────────────────────────────────────────────
+
+def test_create_sftp_pool_from_config():
+    config = {
+        "sftp": {
+            "host": "host",
+            "port": "2222",
+            "username": "user",
+            "ssh_key_path": "keypath",
+            "pool_size": "3",
+            "pool_channels_per_transport": "5",
+            "pool_idle_timeout": "60",
+        }
+    }
+    pool = create_sftp_pool(config)
+    assert pool.port == 2222
+    assert pool.max_transports == 3
+    assert pool.channels_per_transport == 5
+    assert pool.idle_timeout == 60.0
+
+def test_create_sftp_pool_disabled():
+    config = {"sftp": {"host": "host", "username": "user", "ssh_key_path": "keypath", "pool_size": "0"}}
+    assert create_sftp_pool(config) is None
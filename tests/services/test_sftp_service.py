@@ -3,6 +3,7 @@ import stat
 import pytest
 import paramiko
 import socket
+import time
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 from services.sftp_service import SFTPService, retry_sftp_operation
@@ -478,6 +479,7 @@ def test_download_file_with_path_truncation(mocker, tmp_path):
     
     # Mock _truncate_filename
     mocker.patch.object(sftp, '_truncate_filename', return_value="short.mkv")
+    sftp.transfer_engine = mocker.Mock()
     
     sftp.download_file("/remote/file.mkv", str(long_path))
     
@@ -496,19 +498,28 @@ def test_download_file_skips_after_truncation_still_too_long(mocker, tmp_path):
     
     # Mock _truncate_filename
     mocker.patch.object(sftp, '_truncate_filename', return_value="still_too_long.mkv")
+    sftp.transfer_engine = mocker.Mock()
     
-    sftp.download_file("/remote/file.mkv", str(long_path))
+    result = sftp.download_file("/remote/file.mkv", str(long_path))
     
-    # Should not call client.get because path is still too long
-    sftp.client.get.assert_not_called()
+    # Should not transfer anything because path is still too long
+    assert result is None
+    sftp.transfer_engine.download.assert_not_called()
+    sftp.client.open.assert_not_called()
 
 def test_download_file_success(mocker, tmp_path):
     sftp = create_sftp_with_mock_client(mocker)
     remote_path = "/remote/file.mkv"
     local_path = tmp_path / "file.mkv"
 
-    sftp.download_file(remote_path, str(local_path))
-    sftp.client.get.assert_called_once_with(remote_path, str(local_path))
+    sftp.transfer_engine = mocker.Mock()
+
+    result = sftp.download_file(remote_path, str(local_path))
+    sftp.transfer_engine.download.assert_called_once_with(
+        sftp.client, remote_path, str(local_path), session_factory=sftp._segment_session
+    )
+    assert result is sftp.transfer_engine.download.return_value
+    sftp.client.get.assert_not_called()
 
 def test_download_dir_with_filename_mapping(mocker, tmp_path, mock_sftp_attr):
     """Test download_dir with filename mapping."""
@@ -787,3 +798,184 @@ def test_download_dir_success(mocker, tmp_path, mock_sftp_attr):
 
     # Verify that the executor was called with the expected tasks
     assert mock_executor.submit.call_count == 2
+
+def test_plan_dir_download_flattens_tree_without_downloading(mocker, tmp_path, mock_sftp_attr):
+    sftp = create_sftp_with_mock_client(mocker)
+    old = (datetime.now() - timedelta(minutes=5)).timestamp()
+    listings = {
+        "/remote/Show": [
+            mock_sftp_attr("ep1.mkv", 100, old),
+            mock_sftp_attr("Season 2", 0, old, is_dir=True),
+            mock_sftp_attr("screens", 0, old, is_dir=True),
+            mock_sftp_attr("cover.jpg", 5, old),
+        ],
+        "/remote/Show/Season 2": [mock_sftp_attr("ep2.mkv", 200, old)],
+        "/remote/Show/screens": [],
+    }
+    sftp.client.listdir_attr.side_effect = lambda path: listings[path]
+    sftp.transfer_engine = mocker.Mock()
+
+    planned = sftp.plan_dir_download("/remote/Show", str(tmp_path / "Show"))
+
+    assert [(p["remote_path"], p["size"]) for p in planned] == [
+        ("/remote/Show/ep1.mkv", 100),
+        ("/remote/Show/Season 2/ep2.mkv", 200),
+    ]
+    assert planned[1]["local_path"] == str(tmp_path / "Show" / "Season 2" / "ep2.mkv")
+    assert (tmp_path / "Show" / "Season 2").is_dir()
+    sftp.transfer_engine.download.assert_not_called()
+
+def test_plan_dir_download_lists_each_directory_once(mocker, tmp_path, mock_sftp_attr):
+    sftp = create_sftp_with_mock_client(mocker)
+    old = (datetime.now() - timedelta(minutes=5)).timestamp()
+    recent = datetime.now().timestamp()
+    listings = {
+        "/remote/Show": [mock_sftp_attr("Season 1", 0, old, is_dir=True), mock_sftp_attr("ep0.mkv", 50, recent)],
+        "/remote/Show/Season 1": [mock_sftp_attr("Extras", 0, old, is_dir=True), mock_sftp_attr("ep1.mkv", 100, old)],
+        "/remote/Show/Season 1/Extras": [mock_sftp_attr("ep1b.mkv", 10, old)],
+    }
+    sftp.client.listdir_attr.side_effect = lambda path: listings[path]
+    truncate = mocker.spy(sftp, "_truncate_for_windows_path")
+
+    planned = sftp.plan_dir_download("/remote/Show", str(tmp_path / "Show"))
+
+    listed = [c.args[0] for c in sftp.client.listdir_attr.call_args_list]
+    assert sorted(listed) == sorted(listings)
+    assert {p["remote_path"] for p in planned} == {
+        "/remote/Show/ep0.mkv", "/remote/Show/Season 1/ep1.mkv", "/remote/Show/Season 1/Extras/ep1b.mkv",
+    }
+    # Each directory's truncation sees every file below it, taken from the one listing
+    filenames = {c.args[1]: sorted(c.kwargs["filenames"]) for c in truncate.call_args_list}
+    assert filenames == {
+        "Show": ["ep0.mkv", "ep1.mkv", "ep1b.mkv"],
+        "Season 1": ["ep1.mkv", "ep1b.mkv"],
+        "Extras": ["ep1b.mkv"],
+    }
+
+# ─────────────────────────────────────────────────────────
+# iter_remote_files_recursive Tests
+# ─────────────────────────────────────────────────────────
+
+class FakeTreeClient:
+    """SFTP client stand-in serving listdir_attr from a {path: [attrs]} tree."""
+    def __init__(self, tree, fail_with=None, delay=0.0):
+        self.tree = tree
+        self.fail_with = fail_with
+        self.delay = delay
+        self.listed = []
+
+    def listdir_attr(self, path):
+        time.sleep(self.delay)
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.listed.append(path)
+        return self.tree[path]
+
+
+class FakePool:
+    """Minimal pool handing out a fixed set of clients without waiting."""
+    def __init__(self, clients):
+        self.free = list(clients)
+        self.released = []
+
+    def acquire(self, timeout=None):
+        if not self.free:
+            raise TimeoutError("no free session")
+        return self.free.pop()
+
+    def release(self, client, discard=False):
+        self.released.append((client, discard))
+
+
+@pytest.fixture
+def remote_tree(mock_sftp_attr):
+    old = (datetime.now() - timedelta(minutes=5)).timestamp()
+    recent = datetime.now().timestamp()
+    tree = {"/remote": [mock_sftp_attr(f"show{i}", 0, old, is_dir=True) for i in range(5)]}
+    tree["/remote"].append(mock_sftp_attr("fresh_dir", 0, recent, is_dir=True))
+    for i in range(5):
+        tree[f"/remote/show{i}"] = [
+            mock_sftp_attr(f"ep{i}.mkv", 100 + i, old),
+            mock_sftp_attr("cover.jpg", 5, old),
+            mock_sftp_attr("season2", 0, old, is_dir=True),
+        ]
+        tree[f"/remote/show{i}/season2"] = [mock_sftp_attr(f"ep{i}-s2.mkv", 200 + i, old)]
+    return tree
+
+
+def test_iter_remote_files_recursive_serial_without_pool(remote_tree):
+    sftp = SFTPService("host", 22, "user", "keypath")
+    sftp.client = FakeTreeClient(remote_tree)
+
+    results = list(sftp.iter_remote_files_recursive("/remote"))
+
+    assert sorted(e["name"] for e in results) == sorted([f"ep{i}.mkv" for i in range(5)] + [f"ep{i}-s2.mkv" for i in range(5)])
+    assert all(e["is_dir"] is False for e in results)
+    # Breadth-first: every top-level show is listed before any season directory
+    listed = sftp.client.listed
+    assert max(listed.index(f"/remote/show{i}") for i in range(5)) < min(listed.index(f"/remote/show{i}/season2") for i in range(5))
+    assert "/remote/fresh_dir" not in listed
+
+
+def test_iter_remote_files_recursive_uses_pooled_helpers(remote_tree):
+    helpers = [FakeTreeClient(remote_tree) for _ in range(3)]
+    pool = FakePool(helpers)
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool, list_concurrency=4)
+    sftp.client = FakeTreeClient(remote_tree)
+
+    results = list(sftp.iter_remote_files_recursive("/remote"))
+
+    assert len(results) == 10
+    listed = sftp.client.listed + [p for c in helpers for p in c.listed]
+    assert sorted(listed) == sorted(p for p in remote_tree if p != "/remote/fresh_dir")
+    assert sorted(id(c) for c, _ in pool.released) == sorted(id(c) for c in helpers)
+    assert not any(discard for _, discard in pool.released)
+
+
+def test_iter_remote_files_recursive_close_early_stops_helpers(remote_tree):
+    helpers = [FakeTreeClient(remote_tree) for _ in range(2)]
+    pool = FakePool(helpers)
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool, list_concurrency=3)
+    sftp.client = FakeTreeClient(remote_tree)
+
+    walker = sftp.iter_remote_files_recursive("/remote")
+    first = next(walker)
+    walker.close()
+
+    assert first["name"].endswith(".mkv")
+    assert len(pool.released) == 2
+
+
+def test_iter_remote_files_recursive_retries_helper_connection_error(remote_tree):
+    broken = FakeTreeClient(remote_tree, fail_with=paramiko.SSHException("channel closed"))
+    pool = FakePool([broken])
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool, list_concurrency=2)
+    # A slow main channel guarantees the helper picks up a directory
+    sftp.client = FakeTreeClient(remote_tree, delay=0.05)
+
+    results = list(sftp.iter_remote_files_recursive("/remote"))
+
+    assert len(results) == 10
+    assert pool.released == [(broken, True)]
+
+
+def test_iter_remote_files_recursive_without_free_sessions(remote_tree):
+    pool = FakePool([])
+    sftp = SFTPService("host", 22, "user", "keypath", pool=pool, list_concurrency=4)
+    sftp.client = FakeTreeClient(remote_tree)
+
+    assert len(list(sftp.iter_remote_files_recursive("/remote"))) == 10
+
+
+def test_stat_remote_dir_reports_children_and_settled(mocker, mock_sftp_attr):
+    sftp = create_sftp_with_mock_client(mocker)
+    old = (datetime.now() - timedelta(minutes=5)).timestamp()
+    sftp.client.stat.return_value.st_mtime = old
+    sftp.client.listdir_attr.return_value = [mock_sftp_attr("a.mkv", 1, old), mock_sftp_attr("b.mkv", 1, datetime.now().timestamp())]
+
+    assert sftp.stat_remote_dir("/remote") == {"mtime": datetime.fromtimestamp(old)}
+    sftp.client.listdir_attr.assert_not_called()
+
+    state = sftp.stat_remote_dir("/remote", children=True)
+    assert state["child_count"] == 2
+    assert state["settled"] is False
@@ -0,0 +1,445 @@
+import datetime
+import hashlib
+import io
+import os
+import zlib
+import pytest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from services.sftp_transfer import (
+    SFTPTransferEngine,
+    TransferJournal,
+    TransferResult,
+    create_bandwidth_limiter,
+    create_transfer_engine,
+    part_path_for,
+    journal_path_for,
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_MAX_REQUESTS,
+)
+from utils.rate_limiter import BandwidthLimiter, FileThrottle, RateSchedule
+
+MIB = 1024 * 1024
+
+
+class FakeRemoteFile(io.BytesIO):
+    """In-memory stand-in for paramiko.SFTPFile that records prefetch calls."""
+
+    def __init__(self, data, owner):
+        super().__init__(data)
+        self.owner = owner
+        self.prefetch_calls = []
+
+    def prefetch(self, file_size=None, max_concurrent_requests=None):
+        self.prefetch_calls.append((self.tell(), file_size, max_concurrent_requests))
+
+    def readv(self, chunks, max_concurrent_prefetch_requests=None):
+        self.owner.readv_calls.append((list(chunks), max_concurrent_prefetch_requests))
+        for offset, length in chunks:
+            self.seek(offset)
+            yield self.read(length)
+
+    def read(self, size=-1):
+        if self.owner.fail_at is not None and self.tell() >= self.owner.fail_at:
+            raise OSError("connection dropped")
+        self.owner.read_sizes.append(size)
+        chunk = super().read(size)
+        self.owner.bytes_read += len(chunk)
+        return chunk
+
+
+class FakeSFTPClient:
+    """SFTP client stand-in serving one in-memory file; optionally fails when reading past ``fail_at``."""
+
+    def __init__(self, data, mtime=1000, fail_at=None, advertised_size=None):
+        self.data = data
+        self.mtime = mtime
+        self.fail_at = fail_at
+        self.advertised_size = len(data) if advertised_size is None else advertised_size
+        self.bytes_read = 0
+        self.read_sizes = []
+        self.readv_calls = []
+        self.files = []
+
+    def stat(self, path):
+        return SimpleNamespace(st_size=self.advertised_size, st_mtime=self.mtime)
+
+    def open(self, path, mode="rb"):
+        f = FakeRemoteFile(self.data, self)
+        self.files.append(f)
+        return f
+
+
+def make_factory(clients):
+    """Session factory handing out the given helper clients, then refusing."""
+    available = list(clients)
+
+    @contextmanager
+    def factory():
+        if not available:
+            raise TimeoutError("pool busy")
+        yield available.pop()
+    return factory
+
+
+@pytest.fixture
+def payload():
+    return bytes(range(256)) * (4 * MIB // 256)
+
+# ─────────────────────────────────────────────────────────
+# Transfer Engine Tests
+# ─────────────────────────────────────────────────────────
+
+def test_download_prefetches_and_writes_file(tmp_path):
+    data = b"abcdefghij" * 1000
+    client = FakeSFTPClient(data)
+    engine = SFTPTransferEngine(block_size=4096, max_requests=16)
+    local_path = tmp_path / "file.mkv"
+
+    result = engine.download(client, "/remote/file.mkv", str(local_path))
+
+    assert len(client.files) == 1
+    assert client.files[0].prefetch_calls == [(0, len(data), 16)]
+    assert max(client.read_sizes) == 4096
+    assert local_path.read_bytes() == data
+    assert result.bytes_transferred == len(data)
+    assert result.bytes_resumed == 0
+    assert result.remote_path == "/remote/file.mkv"
+    assert result.local_path == str(local_path)
+
+def test_download_reports_progress(tmp_path):
+    client = FakeSFTPClient(b"x" * 10)
+    engine = SFTPTransferEngine(block_size=4)
+    progress = []
+
+    engine.download(client, "/remote/f", str(tmp_path / "f"), progress_callback=lambda d, t: progress.append((d, t)))
+
+    assert progress == [(4, 10), (8, 10), (10, 10)]
+
+def test_download_empty_file(tmp_path):
+    client = FakeSFTPClient(b"")
+    engine = SFTPTransferEngine()
+    local_path = tmp_path / "empty"
+
+    result = engine.download(client, "/remote/empty", str(local_path))
+
+    assert local_path.read_bytes() == b""
+    assert result.bytes_transferred == 0
+    assert not os.path.exists(part_path_for(str(local_path)))
+
+def test_download_short_read_keeps_partial_file(tmp_path):
+    client = FakeSFTPClient(b"abc", advertised_size=100)
+    engine = SFTPTransferEngine(preallocate=True)
+    local_path = tmp_path / "short"
+
+    with pytest.raises(IOError):
+        engine.download(client, "/remote/short", str(local_path))
+
+    assert not local_path.exists()
+    journal = TransferJournal.load(journal_path_for(str(local_path)), "/remote/short", 100, 1000)
+    assert journal.bytes_done == 3
+
+def test_engine_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        SFTPTransferEngine(block_size=0)
+    with pytest.raises(ValueError):
+        SFTPTransferEngine(max_requests=0)
+
+def test_transfer_result_throughput():
+    result = TransferResult("/r", "/l", 10 * 1024 * 1024, 2.0)
+    assert result.bytes_per_second == 5 * 1024 * 1024
+    assert "MiB/s" in str(result)
+
+# ─────────────────────────────────────────────────────────
+# Resume Tests
+# ─────────────────────────────────────────────────────────
+
+def test_interrupted_download_resumes_from_journal(tmp_path, payload, monkeypatch):
+    monkeypatch.setattr("services.sftp_transfer.JOURNAL_INTERVAL", 64 * 1024)
+    engine = SFTPTransferEngine(block_size=64 * 1024)
+    local_path = tmp_path / "ep.mkv"
+
+    with pytest.raises(OSError):
+        engine.download(FakeSFTPClient(payload, fail_at=MIB + 4096), "/remote/ep.mkv", str(local_path))
+
+    assert not local_path.exists()
+    assert os.path.exists(part_path_for(str(local_path)))
+
+    retry = FakeSFTPClient(payload)
+    result = engine.download(retry, "/remote/ep.mkv", str(local_path))
+
+    assert local_path.read_bytes() == payload
+    # The block that straddled the failure point was written in full before the drop
+    resumed = MIB + 64 * 1024
+    assert result.bytes_resumed == resumed
+    assert retry.bytes_read == len(payload) - resumed
+    assert retry.files[0].prefetch_calls[0][0] == resumed
+    assert not os.path.exists(part_path_for(str(local_path)))
+    assert not os.path.exists(journal_path_for(str(local_path)))
+
+def test_corrupt_partial_data_is_refetched(tmp_path, payload):
+    engine = SFTPTransferEngine(block_size=64 * 1024)
+    local_path = tmp_path / "ep.mkv"
+
+    with pytest.raises(OSError):
+        engine.download(FakeSFTPClient(payload, fail_at=MIB), "/remote/ep.mkv", str(local_path))
+
+    # Flip a byte inside the journaled range
+    with open(part_path_for(str(local_path)), "r+b") as f:
+        f.seek(10)
+        f.write(b"\xff" if payload[10:11] != b"\xff" else b"\x00")
+
+    retry = FakeSFTPClient(payload)
+    result = engine.download(retry, "/remote/ep.mkv", str(local_path))
+
+    assert result.bytes_resumed == 0
+    assert retry.bytes_read == len(payload)
+    assert local_path.read_bytes() == payload
+
+def test_changed_remote_file_restarts_download(tmp_path, payload):
+    engine = SFTPTransferEngine(block_size=64 * 1024)
+    local_path = tmp_path / "ep.mkv"
+
+    with pytest.raises(OSError):
+        engine.download(FakeSFTPClient(payload, fail_at=MIB), "/remote/ep.mkv", str(local_path))
+
+    retry = FakeSFTPClient(payload, mtime=2000)
+    result = engine.download(retry, "/remote/ep.mkv", str(local_path))
+
+    assert result.bytes_resumed == 0
+    assert local_path.read_bytes() == payload
+
+# ─────────────────────────────────────────────────────────
+# Segmented Download Tests
+# ─────────────────────────────────────────────────────────
+
+def test_segmented_download_uses_helper_channels(tmp_path, payload):
+    main = FakeSFTPClient(payload)
+    helpers = [FakeSFTPClient(payload) for _ in range(3)]
+    engine = SFTPTransferEngine(block_size=64 * 1024, segment_threshold=MIB, segment_count=4)
+    local_path = tmp_path / "big.mkv"
+
+    result = engine.download(main, "/remote/big.mkv", str(local_path), session_factory=make_factory(helpers))
+
+    assert local_path.read_bytes() == payload
+    assert result.segments == 4
+    assert result.bytes_transferred == len(payload)
+    assert main.bytes_read + sum(h.bytes_read for h in helpers) == len(payload)
+    assert not os.path.exists(journal_path_for(str(local_path)))
+
+def test_segmented_download_completes_without_helpers(tmp_path, payload):
+    main = FakeSFTPClient(payload)
+    engine = SFTPTransferEngine(block_size=64 * 1024, segment_threshold=MIB, segment_count=4)
+    local_path = tmp_path / "big.mkv"
+
+    result = engine.download(main, "/remote/big.mkv", str(local_path), session_factory=make_factory([]))
+
+    assert local_path.read_bytes() == payload
+    assert main.bytes_read == len(payload)
+    assert len(main.files) == 4
+    assert result.segments == 4
+
+def test_files_below_threshold_are_not_segmented(tmp_path, payload):
+    main = FakeSFTPClient(payload)
+    engine = SFTPTransferEngine(segment_threshold=len(payload) + 1)
+
+    result = engine.download(main, "/remote/big.mkv", str(tmp_path / "big.mkv"), session_factory=make_factory([]))
+
+    assert result.segments == 1
+    assert len(main.files) == 1
+
+def test_segmented_download_resumes_missing_ranges(tmp_path, payload, monkeypatch):
+    monkeypatch.setattr("services.sftp_transfer.JOURNAL_INTERVAL", 64 * 1024)
+    engine = SFTPTransferEngine(block_size=64 * 1024, segment_threshold=MIB, segment_count=4)
+    local_path = tmp_path / "big.mkv"
+
+    # Connection drops half way through the third segment
+    failing = FakeSFTPClient(payload, fail_at=2 * MIB + MIB // 2)
+    with pytest.raises(OSError):
+        engine.download(failing, "/remote/big.mkv", str(local_path), session_factory=make_factory([]))
+
+    journal = TransferJournal.load(journal_path_for(str(local_path)), "/remote/big.mkv", len(payload), 1000)
+    assert journal is not None
+    done = journal.bytes_done
+    assert done == 2 * MIB + MIB // 2
+
+    retry = FakeSFTPClient(payload)
+    result = engine.download(retry, "/remote/big.mkv", str(local_path), session_factory=make_factory([]))
+
+    assert local_path.read_bytes() == payload
+    assert retry.bytes_read == len(payload) - done
+    assert result.bytes_resumed == done
+    assert result.bytes_transferred == len(payload) - done
+    assert not os.path.exists(journal_path_for(str(local_path)))
+
+def test_segment_plan_covers_file():
+    journal = TransferJournal.plan("/tmp/x", "/r", 10 * MIB + 3, 0, 4)
+    assert len(journal.segments) == 4
+    assert journal.segments[0].start == 0
+    assert journal.segments[-1].end == 10 * MIB + 3
+    for a, b in zip(journal.segments, journal.segments[1:]):
+        assert a.end == b.start
+    assert len(TransferJournal.plan("/tmp/x", "/r", 100, 0, 4).segments) == 1
+
+# ─────────────────────────────────────────────────────────
+# Inline Hashing Tests
+# ─────────────────────────────────────────────────────────
+
+def test_download_reports_inline_hashes(tmp_path, payload):
+    engine = SFTPTransferEngine(block_size=64 * 1024, hash_algorithms=["crc32", "md5", "sha1"])
+
+    result = engine.download(FakeSFTPClient(payload), "/remote/ep.mkv", str(tmp_path / "ep.mkv"))
+
+    assert result.hashes == {
+        "crc32": f"{zlib.crc32(payload):08X}",
+        "md5": hashlib.md5(payload).hexdigest(),
+        "sha1": hashlib.sha1(payload).hexdigest(),
+    }
+
+def test_segmented_download_combines_segment_crcs(tmp_path, payload):
+    engine = SFTPTransferEngine(
+        block_size=64 * 1024, segment_threshold=MIB, segment_count=4, hash_algorithms=["crc32", "md5"]
+    )
+    helpers = [FakeSFTPClient(payload) for _ in range(3)]
+
+    result = engine.download(
+        FakeSFTPClient(payload), "/remote/big.mkv", str(tmp_path / "big.mkv"), session_factory=make_factory(helpers)
+    )
+
+    assert result.hashes == {"crc32": f"{zlib.crc32(payload):08X}"}
+
+def test_resumed_download_still_reports_crc32(tmp_path, payload):
+    engine = SFTPTransferEngine(block_size=64 * 1024, hash_algorithms=["crc32", "md5"])
+    local_path = tmp_path / "ep.mkv"
+
+    with pytest.raises(OSError):
+        engine.download(FakeSFTPClient(payload, fail_at=MIB), "/remote/ep.mkv", str(local_path))
+    result = engine.download(FakeSFTPClient(payload), "/remote/ep.mkv", str(local_path))
+
+    assert result.bytes_resumed > 0
+    assert result.hashes == {"crc32": f"{zlib.crc32(payload):08X}"}
+
+def test_engine_rejects_unknown_hash_algorithm():
+    with pytest.raises(ValueError):
+        SFTPTransferEngine(hash_algorithms=["crc32", "whirlpool"])
+
+# ─────────────────────────────────────────────────────────
+# Bandwidth Tests
+# ─────────────────────────────────────────────────────────
+
+class RecordingThrottle(FileThrottle):
+    """FileThrottle that reports a finite rate but never waits, recording the bytes paid for."""
+
+    limited = True
+
+    def __init__(self, paid):
+        self.paid = paid
+
+    def __call__(self, amount):
+        self.paid.append(amount)
+
+
+class RecordingLimiter(BandwidthLimiter):
+    """Limiter whose throttles record the bytes each file pays for without sleeping."""
+
+    def __init__(self):
+        super().__init__(max_bytes_per_second=1)
+        self.per_file = []
+
+    def throttle_for_file(self):
+        paid = []
+        self.per_file.append(paid)
+        return RecordingThrottle(paid)
+
+
+def test_throttled_download_pays_per_block_and_skips_prefetch(tmp_path):
+    data = b"abcdefghij" * 1000
+    client = FakeSFTPClient(data)
+    limiter = RecordingLimiter()
+    engine = SFTPTransferEngine(block_size=4096, max_requests=16, bandwidth=limiter)
+    local_path = tmp_path / "file.mkv"
+
+    result = engine.download(client, "/remote/file.mkv", str(local_path))
+
+    assert local_path.read_bytes() == data
+    assert result.hashes["crc32"]
+    assert client.files[0].prefetch_calls == []
+    assert client.readv_calls[0] == ([(0, 4096)], 16)
+    assert limiter.per_file == [[4096, 4096, len(data) - 8192]]
+
+
+def test_unlimited_schedule_window_keeps_prefetch(tmp_path):
+    data = b"abcdefghij" * 1000
+    client = FakeSFTPClient(data)
+    limiter = BandwidthLimiter(
+        schedule=RateSchedule.parse("08:00-23:00=50, 23:00-08:00=0"),
+        clock=lambda: datetime.datetime(2024, 1, 1, 23, 30),
+    )
+    engine = SFTPTransferEngine(block_size=4096, max_requests=16, bandwidth=limiter)
+    local_path = tmp_path / "file.mkv"
+
+    engine.download(client, "/remote/file.mkv", str(local_path))
+
+    assert engine.bandwidth is limiter
+    assert local_path.read_bytes() == data
+    assert client.files[0].prefetch_calls == [(0, len(data), 16)]
+    assert client.readv_calls == []
+
+
+def test_segmented_throttled_download_shares_one_file_throttle(tmp_path, payload):
+    main = FakeSFTPClient(payload)
+    helpers = [FakeSFTPClient(payload) for _ in range(3)]
+    limiter = RecordingLimiter()
+    engine = SFTPTransferEngine(block_size=256 * 1024, segment_threshold=MIB, segment_count=4, bandwidth=limiter)
+    local_path = tmp_path / "big.mkv"
+
+    engine.download(main, "/remote/big.mkv", str(local_path), session_factory=make_factory(helpers))
+
+    assert local_path.read_bytes() == payload
+    assert len(limiter.per_file) == 1
+    assert sum(limiter.per_file[0]) == len(payload)
+
+
+def test_disabled_limiter_is_dropped():
+    engine = SFTPTransferEngine(bandwidth=BandwidthLimiter())
+    assert engine.bandwidth is None
+
+
+# ─────────────────────────────────────────────────────────
+# Factory Tests
+# ─────────────────────────────────────────────────────────
+
+def test_create_transfer_engine_from_config():
+    config = {"sftp": {"transfer_block_size": "65536", "transfer_max_requests": "128", "transfer_preallocate": "false"}}
+    engine = create_transfer_engine(config)
+    assert engine.block_size == 65536
+    assert engine.max_requests == 128
+    assert engine.preallocate is False
+
+def test_create_transfer_engine_defaults():
+    engine = create_transfer_engine({"sftp": {}})
+    assert engine.block_size == DEFAULT_BLOCK_SIZE
+    assert engine.max_requests == DEFAULT_MAX_REQUESTS
+    assert engine.preallocate is True
+    assert engine.segment_threshold == 0
+    assert engine.hash_algorithms == ("crc32",)
+
+def test_create_transfer_engine_inline_algorithms():
+    engine = create_transfer_engine({"hashing": {"inline_algorithms": "crc32, MD5"}})
+    assert engine.hash_algorithms == ("crc32", "md5")
+
+def test_create_transfer_engine_bandwidth_limits():
+    engine = create_transfer_engine({"sftp": {
+        "max_download_mib_per_second": "20",
+        "max_file_mib_per_second": "5",
+        "bandwidth_schedule": "08:00-23:00=50, 23:00-08:00=0",
+    }})
+    assert engine.bandwidth.max_bytes_per_second == 20 * MIB
+    assert engine.bandwidth.per_file_bytes_per_second == 5 * MIB
+    assert len(engine.bandwidth.schedule.windows) == 2
+
+def test_create_bandwidth_limiter_ignores_invalid_schedule():
+    limiter = create_bandwidth_limiter({"sftp": {"max_download_mib_per_second": "10", "bandwidth_schedule": "daytime=5"}})
+    assert limiter.schedule is None
+    assert limiter.rate == 10 * MIB
+    assert create_transfer_engine({"sftp": {}}).bandwidth is None
@@ -0,0 +1,100 @@
+import pytest
+from services.db_implementations.sqlite_implementation import SQLiteDBService
+from services.show_resolver import ShowResolver
+
+
+class FakeShow:
+    def __init__(self, sys_name, tmdb_name, aliases, tmdb_id):
+        self.sys_name = sys_name
+        self.tmdb_name = tmdb_name
+        self.values = (sys_name, f"/shows/{sys_name}", tmdb_name, aliases, tmdb_id,
+                       None, None, None, None, 1, 1, None, None, "Ended", None, None)
+
+    def to_db_tuple(self):
+        return self.values
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDBService(str(tmp_path / "shows.db"))
+    db.initialize()
+    db.add_show(FakeShow("Bleach", "BLEACH", "Bleach TYBW, Sennen Kessen-hen", 1))
+    db.add_show(FakeShow("Spy x Family", "SPY x FAMILY", "SxF", 2))
+    db.add_show(FakeShow("Bleach Movies", "Bleach Movies", "Bleach", 3))
+    return db
+
+
+@pytest.mark.parametrize("name", [
+    "bleach", " BLEACH ", "sxf", "Sennen Kessen-hen", "Unknown, SxF", "bleach movies",
+    "Unknown", "Unknown, Other", "",
+])
+def test_resolver_matches_database_lookups(db, name):
+    resolver = ShowResolver(db)
+
+    found = resolver.get_show_by_name_or_alias(name)
+    expected = db.get_show_by_name_or_alias(name)
+    assert (found or {}).get("id") == (expected or {}).get("id")
+    assert resolver.show_exists(name) == db.show_exists(name)
+
+
+def test_resolver_reports_match_type_and_prefers_first_show(db):
+    resolver = ShowResolver(db)
+
+    # "Bleach" is show 1's sys_name and show 3's alias; the lower id wins, as in the database
+    assert resolver.resolve("Bleach")[0]["id"] == 1
+    assert resolver.resolve("Bleach")[1] == "Standard Match"
+    assert resolver.resolve("Nope, SxF")[1] == "Set Match"
+    assert resolver.resolve("Nope") is None
+
+
+def test_resolver_loads_once_until_shows_change(db, mocker):
+    resolver = ShowResolver(db, max_age_seconds=0)
+    get_all_shows = mocker.spy(db, "get_all_shows")
+
+    for _ in range(5):
+        resolver.show_exists("bleach")
+    assert get_all_shows.call_count == 1
+
+    db.update_show_aliases(2, "SxF, Spy Family")
+    assert resolver.get_show_by_name_or_alias("spy family")["id"] == 2
+    db.add_show(FakeShow("Frieren", "Frieren", "", 4))
+    assert resolver.show_exists("frieren")
+    db.delete_show_and_episodes(4)
+    assert not resolver.show_exists("frieren")
+    assert get_all_shows.call_count == 4
+
+
+def test_resolver_reloads_after_invalidate_or_max_age(db, mocker):
+    resolver = ShowResolver(db, max_age_seconds=60)
+    get_all_shows = mocker.spy(db, "get_all_shows")
+    clock = mocker.patch("services.show_resolver.time.monotonic", return_value=100.0)
+
+    resolver.show_exists("bleach")
+    resolver.invalidate()
+    resolver.show_exists("bleach")
+    clock.return_value = 161.0
+    resolver.show_exists("bleach")
+    resolver.show_exists("bleach")
+    assert get_all_shows.call_count == 3
+
+
+def test_returned_show_is_a_copy(db):
+    resolver = ShowResolver(db)
+    resolver.get_show_by_name_or_alias("bleach")["sys_path"] = "/elsewhere"
+    assert resolver.get_show_by_name_or_alias("bleach")["sys_path"] == "/shows/Bleach"
+
+
+def test_fuzzy_search_follows_reloads_and_rejects_ties(db):
+    resolver = ShowResolver(db)
+
+    assert resolver.search("Spy Famly")[0].show["id"] == 2
+    assert resolver.best_fuzzy_match("Spy Famly", 0.99) is None
+    assert resolver.best_fuzzy_match("Spy Famly", 0.6).show["id"] == 2
+
+    db.add_show(FakeShow("Spy x Family Code White", "Spy x Family Code White", "", 4))
+    assert {m.show["id"] for m in resolver.search("spy family code")} >= {2, 4}
+    # Names differing only in punctuation score the same, so neither show is picked
+    db.add_show(FakeShow("Bleach Movie", "Bleach Movie", "", 5))
+    db.add_show(FakeShow("Bleach-Movie", "Bleach-Movie", "", 6))
+    assert resolver.best_fuzzy_match("bleach movie", 0.5) is None
+
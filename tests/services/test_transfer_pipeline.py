@@ -0,0 +1,158 @@
+import threading
+import time
+import pytest
+from services.transfer_pipeline import (
+    PipelineSettings,
+    Stage,
+    StagePipeline,
+    WriteBehindBuffer,
+    create_pipeline_settings,
+)
+from utils.metrics import TransferMetrics, set_metrics
+
+
+@pytest.fixture
+def metrics():
+    fresh = TransferMetrics()
+    set_metrics(fresh)
+    yield fresh
+    set_metrics(None)
+
+
+def test_items_pass_through_every_stage_before_close_returns(metrics):
+    done = []
+    lock = threading.Lock()
+
+    def record(item):
+        with lock:
+            done.append(item)
+
+    stages = [
+        Stage("double", lambda n: n * 2, workers=3),
+        Stage("increment", lambda n: n + 1, workers=2),
+        Stage("record", record),
+    ]
+    with StagePipeline(stages, queue_size=2) as pipeline:
+        for n in range(50):
+            pipeline.submit(n)
+
+    assert sorted(done) == [n * 2 + 1 for n in range(50)]
+    assert all(metrics.stage_backlog.value(stage=s.name) == 0 for s in stages)
+
+
+def test_full_queue_blocks_submit_until_the_stage_catches_up(metrics):
+    release = threading.Event()
+    pipeline = StagePipeline([Stage("slow", lambda item: release.wait(5))], queue_size=1)
+    pipeline.start()
+    pipeline.submit("running")
+    pipeline.submit("queued")
+
+    blocked = threading.Thread(target=pipeline.submit, args=("waiting",))
+    blocked.start()
+    blocked.join(timeout=0.2)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(timeout=5)
+    assert not blocked.is_alive()
+    pipeline.close()
+
+
+def test_handler_errors_go_to_on_error_and_skip_later_stages(metrics):
+    errors, persisted = [], []
+
+    def check(item):
+        if item == "bad":
+            raise ValueError("corrupt")
+        return item
+
+    pipeline = StagePipeline(
+        [Stage("check", check), Stage("persist", persisted.append)],
+        on_error=lambda item, exc: errors.append((item, str(exc))),
+    )
+    with pipeline:
+        for item in ("good", "bad"):
+            pipeline.submit(item)
+
+    assert persisted == ["good"]
+    assert errors == [("bad", "corrupt")]
+
+
+def test_pipeline_requires_stages_and_start():
+    with pytest.raises(ValueError):
+        StagePipeline([])
+    with pytest.raises(RuntimeError):
+        StagePipeline([Stage("noop", lambda item: item)]).submit(1)
+
+
+def test_on_drained_runs_before_the_next_stage_stops(metrics):
+    events = []
+    stages = [
+        Stage("first", lambda item: events.append(("first", item)) or item, on_drained=lambda: events.append("drained")),
+        Stage("second", lambda item: events.append(("second", item))),
+    ]
+    with StagePipeline(stages) as pipeline:
+        pipeline.submit(1)
+
+    assert events.index(("first", 1)) < events.index("drained")
+    assert ("second", 1) in events
+
+
+def test_write_behind_buffer_flushes_full_batches_and_the_rest_on_close():
+    batches = []
+    buffer = WriteBehindBuffer(batches.append, max_items=3, max_seconds=0)
+    for n in range(7):
+        buffer.add(n)
+    assert batches == [[0, 1, 2], [3, 4, 5]]
+
+    buffer.close()
+
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    with pytest.raises(RuntimeError):
+        buffer.add(7)
+
+
+def test_write_behind_buffer_flushes_a_partial_batch_after_max_seconds():
+    flushed = threading.Event()
+    batches = []
+
+    def flush(batch):
+        batches.append(batch)
+        flushed.set()
+
+    with WriteBehindBuffer(flush, max_items=100, max_seconds=0.05) as buffer:
+        buffer.add("a")
+        start = time.monotonic()
+        assert flushed.wait(5)
+        assert time.monotonic() - start < 5
+
+    assert batches == [["a"]]
+
+
+def test_write_behind_buffer_logs_and_drops_a_failed_batch():
+    calls = []
+
+    def flush(batch):
+        calls.append(batch)
+        raise RuntimeError("db down")
+
+    with WriteBehindBuffer(flush, max_items=2, max_seconds=0) as buffer:
+        buffer.add(1)
+        buffer.add(2)
+        buffer.add(3)
+
+    assert calls == [[1, 2], [3]]
+
+
+def test_create_pipeline_settings_reads_transfers_section():
+    config = {"transfers": {
+        "incoming": "/in", "hash_workers": "4", "parse_workers": "0", "stage_queue_size": "8",
+        "persist_batch_size": "10", "persist_batch_seconds": "0.5",
+    }}
+
+    settings = create_pipeline_settings(config)
+
+    assert settings == PipelineSettings(
+        hash_workers=4, parse_workers=1, persist_workers=1, queue_size=8, batch_size=10, batch_seconds=0.5
+    )
+    assert create_pipeline_settings({}) == PipelineSettings()
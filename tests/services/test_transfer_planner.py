@@ -0,0 +1,71 @@
+import pytest
+from services.transfer_planner import (
+    UNKNOWN_SHOW,
+    TransferPlan,
+    free_space,
+    summarize_throughput,
+)
+
+MIB = 1048576
+
+
+def run(workers, mib, seconds):
+    return {"workers": workers, "files": 1, "bytes_transferred": mib * MIB, "elapsed_seconds": seconds}
+
+
+def test_add_file_groups_by_show_and_sorts_by_size():
+    plan = TransferPlan(incoming_path="/in", workers=4)
+    plan.add_file("Show A", 100)
+    plan.add_file("Show B", 500)
+    plan.add_file("Show A", 50)
+    plan.add_file(None, 10)
+
+    assert (plan.files, plan.total_bytes) == (4, 660)
+    assert [(s.name, s.files, s.bytes) for s in plan.shows_by_size()] == [
+        ("Show B", 1, 500), ("Show A", 2, 150), (UNKNOWN_SHOW, 1, 10),
+    ]
+
+
+def test_summarize_throughput_sums_bytes_and_time_per_worker_count():
+    samples = summarize_throughput([
+        run(4, 100, 10), run(4, 1, 9), run(2, 60, 10), run(4, 0, 5), run(8, 10, 0),
+    ])
+
+    assert [(s.workers, s.runs) for s in samples] == [(4, 2), (2, 1)]
+    # Summed, not averaged per run: the small, latency-bound run only pulls the rate down a little
+    assert samples[0].bytes_per_second == pytest.approx(101 * MIB / 19)
+
+
+def test_estimate_prefers_history_at_the_planned_concurrency():
+    plan = TransferPlan(incoming_path="/in", workers=2, total_bytes=600 * MIB)
+    plan.throughput = summarize_throughput([run(4, 100, 10), run(4, 100, 10), run(2, 60, 10)])
+
+    assert plan.estimate.workers == 2
+    assert plan.estimated_seconds == pytest.approx(100)
+
+    plan.workers = 8
+    assert plan.estimate.workers == 0
+    assert plan.estimated_seconds == pytest.approx(600 / (260 / 30))
+
+
+def test_estimate_is_unknown_without_history():
+    plan = TransferPlan(incoming_path="/in", workers=4, total_bytes=MIB)
+
+    assert plan.estimate is None
+    assert plan.estimated_seconds is None
+    assert "ETA unknown" in str(plan)
+
+
+def test_fits_compares_planned_bytes_with_free_space():
+    plan = TransferPlan(incoming_path="/in", workers=4, total_bytes=100)
+    assert plan.fits is None
+    plan.free_bytes = 99
+    assert plan.fits is False
+    plan.free_bytes = 100
+    assert plan.fits is True
+    assert plan.to_dict()["fits"] is True
+
+
+def test_free_space_uses_nearest_existing_parent(tmp_path):
+    assert free_space(str(tmp_path / "not" / "created" / "yet")) == free_space(str(tmp_path))
+    assert free_space(str(tmp_path)) > 0
@@ -0,0 +1,154 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from services.transfer_scheduler import (
+    ByteBudget,
+    TransferJob,
+    TransferScheduler,
+    create_transfer_scheduler,
+)
+
+
+def make_jobs(*sizes):
+    return [TransferJob(f"/remote/f{i}", f"/local/f{i}", size) for i, size in enumerate(sizes)]
+
+
+# ─────────────────────────────────────────────────────────
+# Ordering and sizing
+# ─────────────────────────────────────────────────────────
+
+def test_prioritize_smallest_first_keeps_listing_order_for_ties():
+    jobs = make_jobs(30, 10, 20, 10)
+    ordered = TransferScheduler(order="smallest_first").prioritize(jobs)
+    assert [j.remote_path for j in ordered] == ["/remote/f1", "/remote/f3", "/remote/f2", "/remote/f0"]
+
+
+def test_prioritize_largest_first():
+    ordered = TransferScheduler(order="largest_first").prioritize(make_jobs(30, 10, 20))
+    assert [j.size for j in ordered] == [30, 20, 10]
+
+
+def test_unknown_order_rejected():
+    with pytest.raises(ValueError):
+        TransferScheduler(order="random")
+
+
+def test_workers_capped_by_pool_sessions():
+    scheduler = TransferScheduler(max_concurrent_transfers=8)
+    assert scheduler.workers_for(SimpleNamespace(pool=SimpleNamespace(max_sessions=3))) == 3
+    assert scheduler.workers_for(SimpleNamespace(pool=None)) == 8
+
+
+# ─────────────────────────────────────────────────────────
+# Byte budget
+# ─────────────────────────────────────────────────────────
+
+def test_byte_budget_clamps_oversized_requests_to_capacity():
+    budget = ByteBudget(100)
+    assert budget.acquire(500) == 100
+    assert budget.in_flight == 100
+    budget.release(100)
+    assert budget.in_flight == 0
+
+
+def test_byte_budget_unlimited_never_blocks():
+    budget = ByteBudget(None)
+    assert budget.acquire(10 ** 12) == 0
+    budget.release(0)
+    assert budget.in_flight == 0
+
+
+def test_byte_budget_serves_waiters_in_arrival_order():
+    budget = ByteBudget(100)
+    held = budget.acquire(80)
+    granted = []
+
+    def take(name, amount):
+        reserved = budget.acquire(amount)
+        granted.append(name)
+        budget.release(reserved)
+
+    big = threading.Thread(target=take, args=("big", 90))
+    big.start()
+    time.sleep(0.05)
+    # Fits alongside the held 80 bytes, but must not overtake the earlier 90-byte request
+    small = threading.Thread(target=take, args=("small", 10))
+    small.start()
+    time.sleep(0.05)
+    assert granted == []
+
+    budget.release(held)
+    big.join(timeout=2)
+    small.join(timeout=2)
+    assert granted == ["big", "small"]
+
+
+def test_run_keeps_inflight_bytes_within_budget():
+    scheduler = TransferScheduler(max_concurrent_transfers=4, max_inflight_bytes=100)
+    lock = threading.Lock()
+    peak = [0]
+    current = [0]
+
+    def transfer(job):
+        with lock:
+            current[0] += job.size
+            peak[0] = max(peak[0], current[0])
+        time.sleep(0.01)
+        with lock:
+            current[0] -= job.size
+        return job.remote_path
+
+    jobs = scheduler.prioritize(make_jobs(60, 40, 50, 30, 20, 70))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda j: scheduler.run(j, transfer), jobs))
+
+    assert sorted(results) == sorted(j.remote_path for j in jobs)
+    assert peak[0] <= 100
+    assert scheduler.bytes_in_flight == 0
+
+
+# ─────────────────────────────────────────────────────────
+# Factory
+# ─────────────────────────────────────────────────────────
+
+def test_create_transfer_scheduler_reads_sftp_section():
+    config = {"sftp": {"max_concurrent_transfers": "6", "max_inflight_mib": "2", "transfer_order": "Largest_First"}}
+    scheduler = create_transfer_scheduler(config)
+    assert scheduler.max_concurrent_transfers == 6
+    assert scheduler.max_inflight_bytes == 2 * 1024 * 1024
+    assert scheduler.order == "largest_first"
+
+
+def test_create_transfer_scheduler_explicit_workers_and_defaults():
+    scheduler = create_transfer_scheduler({"sftp": {"transfer_order": "bogus"}}, max_concurrent_transfers=2)
+    assert scheduler.max_concurrent_transfers == 2
+    assert scheduler.max_inflight_bytes is None
+    assert scheduler.order == "smallest_first"
+
+
+def test_run_async_limits_concurrency_and_bytes_in_order():
+    import asyncio
+
+    scheduler = TransferScheduler(max_concurrent_transfers=2, max_inflight_bytes=100)
+    running, peak, started = [0], [0], []
+
+    async def transfer(job):
+        started.append(job.size)
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return job.remote_path
+
+    async def main():
+        jobs = scheduler.prioritize(make_jobs(60, 40, 50, 30, 20, 70))
+        return await asyncio.gather(*(scheduler.run_async(job, transfer) for job in jobs))
+
+    results = asyncio.run(main())
+
+    assert len(results) == 6
+    assert started == [20, 30, 40, 50, 60, 70]
+    assert peak[0] <= 2
+    assert scheduler.bytes_in_flight == 0
@@ -11,8 +11,9 @@ and provide consistent, testable responses for various scenarios.
 import datetime
 import configparser
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple, Union
 from unittest.mock import Mock, MagicMock
 
 from services.db_implementations.db_interface import DatabaseInterface
@@ -35,6 +36,8 @@ class MockDatabaseService(DatabaseInterface):
         self._inventory_files: List[Dict[str, Any]] = []
         self._downloaded_files: List[Dict[str, Any]] = []
         self._downloaded_file_objects: List[DownloadedFile] = []
+        self._remote_dir_snapshots: Dict[str, Dict[str, Any]] = {}
+        self._transfer_runs: List[Dict[str, Any]] = []
         self._next_id = 1
     
     def initialize(self) -> None:
@@ -90,6 +93,7 @@ class MockDatabaseService(DatabaseInterface):
             }
             self._shows[show_dict["tmdb_id"]] = show_dict
             self._next_id += 1
+        self._bump_shows_version()
     
     def add_episode(self, episode: Any) -> None:
         """Add an episode to the mock database."""
@@ -210,6 +214,12 @@ class MockDatabaseService(DatabaseInterface):
         # Mock implementation returns empty list by default
         return []
     
+    def get_known_remote_paths(self, remote_paths: List[str]) -> Set[str]:
+        """Return the remote paths already recorded as downloaded."""
+        known = {f.get("remote_path") or f.get("path") for f in self._downloaded_files}
+        known.update(f.remote_path for f in self._downloaded_file_objects)
+        return {p for p in remote_paths if p in known}
+    
     def backup_database(self) -> str:
         """Backup the database."""
         return "/mock/backup/path.db"
@@ -227,6 +237,7 @@ class MockDatabaseService(DatabaseInterface):
             if show["id"] == show_id:
                 show["tmdb_aliases"] = new_aliases
                 break
+        self._bump_shows_version()
     
     def is_read_only(self) -> bool:
         """Check if database is in read-only mode."""
@@ -343,6 +354,62 @@ class MockDatabaseService(DatabaseInterface):
                 if error_message:
                     file_obj.error_message = error_message
                 break
+
+    def iter_downloaded_files(self,
+        *,
+        statuses: Optional[List[FileStatus]] = None,
+        include_dirs: bool = False,
+        after_id: int = 0,
+        batch_size: int = 500,
+    ) -> Iterator[DownloadedFile]:
+        """Stream downloaded files ordered by id."""
+        for file_obj in sorted(self._downloaded_file_objects, key=lambda f: f.id or 0):
+            if (file_obj.id or 0) <= after_id:
+                continue
+            if statuses and file_obj.status not in statuses:
+                continue
+            if file_obj.is_dir and not include_dirs:
+                continue
+            yield file_obj
+
+    def iter_inventory_files(self, *, after_id: int = 0, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream inventory files ordered by id."""
+        for i, file_info in enumerate(self._inventory_files, start=1):
+            row = {"id": i, **file_info}
+            if row["id"] > after_id:
+                yield row
+    
+    def get_remote_dir_snapshot(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get a remote directory snapshot."""
+        snapshot = self._remote_dir_snapshots.get(path)
+        return dict(snapshot) if snapshot else None
+
+    def upsert_remote_dir_snapshot(self, path: str, mtime: datetime.datetime, child_count: int) -> None:
+        """Record a remote directory snapshot."""
+        self._remote_dir_snapshots[path] = {
+            "path": path,
+            "mtime": mtime,
+            "child_count": child_count,
+            "scanned_at": datetime.datetime.now(),
+        }
+
+    def clear_remote_dir_snapshots(self) -> None:
+        """Forget all remote directory snapshots."""
+        self._remote_dir_snapshots.clear()
+
+    def add_transfer_run(self, files: int, bytes_transferred: int, elapsed_seconds: float, workers: int) -> None:
+        """Record a finished download run."""
+        self._transfer_runs.append({
+            "finished_at": datetime.datetime.now(),
+            "files": files,
+            "bytes_transferred": bytes_transferred,
+            "elapsed_seconds": elapsed_seconds,
+            "workers": workers,
+        })
+
+    def get_transfer_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent download runs, newest first."""
+        return [dict(run) for run in reversed(self._transfer_runs)][:limit]
     
     # Additional mock-specific methods for test setup
     def clear_sftp_temp_files(self) -> None:
@@ -359,6 +426,7 @@ class MockDatabaseService(DatabaseInterface):
             del self._shows[tmdb_id]
         if tmdb_id in self._episodes:
             del self._episodes[tmdb_id]
+        self._bump_shows_version()
     
     def add_inventory_files(self, files: List[Dict[str, Any]]) -> None:
         """Add inventory files (mock-specific)."""
@@ -550,6 +618,12 @@ class MockSFTPService:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.disconnect()
     
+    @contextmanager
+    def session(self):
+        """Mock per-worker session - yields this service."""
+        with self:
+            yield self
+    
     def connect(self):
         """Mock connection - always succeeds."""
         return self
@@ -580,6 +654,15 @@ class MockSFTPService:
         """List files in a remote directory (non-recursive)."""
         return [f for f in self.list_remote_dir(remote_path) if not f["is_dir"]]
     
+    def stat_remote_dir(self, remote_path: str, children: bool = False) -> Dict[str, Any]:
+        """Return the newest child mtime as the directory mtime (mock approximation)."""
+        entries = self.list_remote_dir(remote_path)
+        state = {"mtime": max((e["modified_time"] for e in entries), default=datetime.datetime.min)}
+        if children:
+            state["child_count"] = len(entries)
+            state["settled"] = True
+        return state
+    
     def list_remote_files_recursive(self, remote_path: str) -> List[Dict[str, Any]]:
         """List all files recursively."""
         remote_path = remote_path.rstrip('/')
@@ -596,6 +679,14 @@ class MockSFTPService:
         # Simulate successful download
         pass
     
+    def plan_dir_download(self, remote_path: str, local_path: str, filename_map=None) -> List[Dict[str, Any]]:
+        """Mock directory planning: the files under remote_path with their local destinations."""
+        files = self.list_remote_files_recursive(remote_path)
+        for file_info in files:
+            relative = file_info["remote_path"][len(remote_path.rstrip('/')) + 1:]
+            file_info["local_path"] = local_path + "/" + relative
+        return files
+
     def download_dir(self, remote_path: str, local_path: str, filename_map=None, max_workers: int = 4) -> List[Dict[str, Any]]:
         """Mock directory download."""
         files = self.list_remote_files_recursive(remote_path)
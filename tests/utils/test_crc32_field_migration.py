@@ -13,6 +13,7 @@ from pathlib import Path
 
 from utils.sftp_orchestrator import process_sftp_diffs
 from models.downloaded_file import DownloadedFile
+from services.db_implementations.db_interface import DatabaseInterface
 
 
 class TestCRC32FieldMigration:
@@ -25,8 +26,10 @@ class TestCRC32FieldMigration:
 
     @pytest.fixture
     def mock_db_service(self, mocker):
-        """Mock database service for testing."""
-        return mocker.Mock()
+        """Mock database service for testing; batched upserts go through upsert_downloaded_file."""
+        db = mocker.Mock()
+        db.upsert_downloaded_files.side_effect = lambda files: DatabaseInterface.upsert_downloaded_files(db, files)
+        return db
 
     @pytest.fixture
     def mock_llm_service(self, mocker):
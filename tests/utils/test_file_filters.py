@@ -1,5 +1,5 @@
 import pytest
-from utils.file_filters import is_valid_media_file, is_valid_directory, sanitize_filename
+from utils.file_filters import is_valid_media_file, is_valid_directory, is_partial_download, sanitize_filename
 
 @pytest.mark.parametrize("filename,expected", [
     ("episode1.mkv", True),
@@ -37,6 +37,16 @@ def test_is_valid_media_file(filename, expected):
 def test_is_valid_directory(dirname, expected):
     assert is_valid_directory(dirname) == expected
 
+@pytest.mark.parametrize("filename,expected", [
+    ("Show.S01E01.mkv.part", True),
+    ("Show.S01E01.mkv.part.json", True),
+    ("/incoming/Show.S01E01.MKV.PART", True),
+    ("Show.S01E01.mkv", False),
+    ("Show.Part.1.mkv", False),
+])
+def test_is_partial_download(filename, expected):
+    assert is_partial_download(filename) == expected
+
 @pytest.mark.parametrize("name,expected", [
     ("ValidName", "ValidName"),
     ("Invalid/Name", "Invalid Name"),
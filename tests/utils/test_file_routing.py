@@ -8,6 +8,7 @@ from services.db_implementations.sqlite_implementation import SQLiteDBService
 from models.downloaded_file import DownloadedFile, FileStatus
 from models.show import Show
 from utils.filename_parser import parse_filename
+from services.show_resolver import ShowResolver
 
 @pytest.fixture
 def setup_test_environment(tmp_path, mocker):
@@ -146,6 +147,55 @@ def test_file_route_skips_unmatched_show(tmp_path):
     result = file_routing(str(incoming), None, db, tmdb=MagicMock())
     assert result == []
 
+def test_file_route_uses_resolver_for_show_lookups(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    (incoming / "UnknownShow.S01E01.mkv").write_text("no match")
+    (incoming / "UnknownShow.S01E02.mkv").write_text("no match")
+
+    db = Mock(spec=SQLiteDBService)
+    resolver = Mock()
+    resolver.get_show_by_name_or_alias.return_value = None
+
+    result = file_routing(str(incoming), None, db, tmdb=MagicMock(), resolver=resolver)
+    assert result == []
+    assert resolver.get_show_by_name_or_alias.call_count == 2
+    db.get_show_by_name_or_alias.assert_not_called()
+
+def test_file_route_falls_back_to_fuzzy_match_above_threshold(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    (incoming / "Bleech.S02.E06.mkv").write_text("typo")
+    show_dir = tmp_path / "tv_shows" / "Bleach"
+
+    db = Mock(spec=SQLiteDBService)
+    db.shows_version.return_value = 0
+    db.get_all_shows.return_value = [{
+        "id": 1, "sys_name": "Bleach", "sys_path": str(show_dir), "tmdb_id": 123, "tmdb_name": "Bleach",
+        "tmdb_aliases": "", "tmdb_first_aired": None, "tmdb_last_aired": None, "tmdb_year": None,
+        "tmdb_overview": "", "tmdb_season_count": 0, "tmdb_episode_count": 0, "tmdb_episode_groups": None,
+        "tmdb_status": None, "tmdb_external_ids": None, "tmdb_episodes_fetched_at": None, "fetched_at": None,
+    }]
+    resolver = ShowResolver(db)
+
+    assert file_routing(str(incoming), None, db, tmdb=MagicMock(), dry_run=True, resolver=resolver) == []
+    assert file_routing(str(incoming), None, db, tmdb=MagicMock(), dry_run=True, resolver=resolver, fuzzy_threshold=0.95) == []
+    result = file_routing(str(incoming), None, db, tmdb=MagicMock(), dry_run=True, resolver=resolver, fuzzy_threshold=0.5)
+    assert [r["routed_path"] for r in result] == [str(show_dir / "Season 02" / "Bleech.S02.E06.mkv")]
+
+def test_file_route_skips_partial_downloads(tmp_path):
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    (incoming / "Show.S01E01.mkv.part").write_text("partial")
+    (incoming / "Show.S01E01.mkv.part.json").write_text("{}")
+
+    db = Mock(spec=SQLiteDBService)
+
+    result = file_routing(str(incoming), None, db, tmdb=MagicMock())
+    assert result == []
+    db.get_show_by_name_or_alias.assert_not_called()
+    assert (incoming / "Show.S01E01.mkv.part").exists()
+
 def test_file_route_skips_unmatched_episode(tmp_path):
     incoming = tmp_path / "incoming"
     incoming.mkdir()
@@ -99,4 +99,14 @@ def test_llm_parsing_against_resource_file():
         # Count success if an episode is identified and confidence is reasonable
         if parsed.get('episode') is not None and parsed.get('confidence', 0.0) >= 0.5:
             successes += 1
-    assert successes >= max(1, len(lines) // 2)
\ No newline at end of file
+    assert successes >= max(1, len(lines) // 2)
+
+
+def test_extract_crc32_from_filename():
+    """Test that extract_crc32 returns the last bracketed 8-hex tag, uppercased."""
+    from utils.filename_parser import extract_crc32
+    assert extract_crc32("[Group] Show - 01 [1080p][abcd1234].mkv") == "ABCD1234"
+    assert extract_crc32("[Group] Show - 01 (DEADBEEF).mkv") == "DEADBEEF"
+    assert extract_crc32("[12345678] Show - 01 [9ABCDEF0].mkv") == "9ABCDEF0"
+    assert extract_crc32("Show.S01E01.1080p.mkv") is None
+    assert extract_crc32("Show - 01 [1080p].mkv") is None
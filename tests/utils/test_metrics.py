@@ -0,0 +1,98 @@
+import pytest
+from services.sftp_transfer import TransferResult
+from utils.metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    TransferMetrics,
+    get_metrics,
+    render_metrics,
+    set_metrics,
+)
+
+
+@pytest.fixture
+def metrics():
+    fresh = TransferMetrics()
+    set_metrics(fresh)
+    yield fresh
+    set_metrics(None)
+
+
+# ─────────────────────────────────────────────────────────
+# Exposition format
+# ─────────────────────────────────────────────────────────
+
+def test_counter_and_gauge_render_prometheus_text():
+    registry = MetricsRegistry()
+    failures = registry.counter("jobs_failed_total", "Failed jobs", ["stage"])
+    active = registry.gauge("jobs_active", "Active jobs")
+    failures.inc(stage="hash")
+    failures.inc(2, stage='say "hi"')
+    active.inc(3)
+    active.dec()
+
+    text = registry.render()
+
+    assert "# HELP jobs_failed_total Failed jobs\n# TYPE jobs_failed_total counter\n" in text
+    assert 'jobs_failed_total{stage="hash"} 1\n' in text
+    assert 'jobs_failed_total{stage="say \\"hi\\""} 2\n' in text
+    assert "# TYPE jobs_active gauge\njobs_active 2\n" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value, stage="list")
+
+    lines = histogram.samples()
+
+    assert lines == [
+        'latency_seconds_bucket{stage="list",le="0.1"} 1',
+        'latency_seconds_bucket{stage="list",le="1"} 3',
+        'latency_seconds_bucket{stage="list",le="+Inf"} 4',
+        'latency_seconds_sum{stage="list"} 6.25',
+        'latency_seconds_count{stage="list"} 4',
+    ]
+    assert histogram.count(stage="list") == 4
+
+
+def test_labels_and_names_are_validated():
+    counter = Counter("c_total", "c", ["stage"])
+    with pytest.raises(ValueError):
+        counter.inc(operation="x")
+    with pytest.raises(ValueError):
+        counter.inc(-1, stage="x")
+    registry = MetricsRegistry()
+    registry.gauge("g", "g")
+    with pytest.raises(ValueError):
+        registry.counter("g", "again")
+
+
+# ─────────────────────────────────────────────────────────
+# Transfer metrics
+# ─────────────────────────────────────────────────────────
+
+def test_time_stage_records_duration_and_failures(metrics):
+    with metrics.time_stage("upsert"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.time_stage("upsert"):
+            raise RuntimeError("db locked")
+
+    assert metrics.stage_duration.count(stage="upsert") == 2
+    assert metrics.stage_failures.value(stage="upsert") == 1
+
+
+def test_record_transfer_counts_bytes_size_and_throughput(metrics):
+    metrics.record_transfer(TransferResult("/r/a.mkv", "/l/a.mkv", 4096, 2.0, bytes_resumed=1024))
+
+    assert metrics.bytes_downloaded.value() == 4096
+    assert metrics.file_size.sum() == 5120
+    assert metrics.throughput.sum() == pytest.approx(2048)
+
+
+def test_default_metrics_are_shared_and_rendered(metrics):
+    assert get_metrics() is metrics
+    metrics.retries.inc(operation="download_file")
+    assert 'sync2nas_sftp_retries_total{operation="download_file"} 1' in render_metrics()
@@ -0,0 +1,155 @@
+import datetime
+import threading
+import time
+import pytest
+from utils import rate_limiter
+from utils.rate_limiter import BandwidthLimiter, RateSchedule, TokenBucket
+
+MIB = 1024 * 1024
+
+
+def test_unlimited_bucket_never_blocks():
+    bucket = TokenBucket(None)
+    start = time.monotonic()
+    bucket.consume(10 ** 12)
+    assert bucket.unlimited
+    assert time.monotonic() - start < 0.1
+
+
+def test_consume_enforces_average_rate():
+    bucket = TokenBucket(1000, burst=100)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.consume(100)
+    # 100 bytes of burst, then 300 bytes at 1000 B/s
+    assert time.monotonic() - start >= 0.2
+
+
+def test_oversized_request_is_allowed_and_repaid():
+    bucket = TokenBucket(1000, burst=10)
+    time.sleep(0.02)
+    start = time.monotonic()
+    bucket.consume(200)  # drives the balance negative immediately
+    assert time.monotonic() - start < 0.05
+    bucket.consume(1)  # waits for the debt to be repaid
+    assert time.monotonic() - start >= 0.15
+
+
+def test_set_rate_releases_blocked_consumers():
+    bucket = TokenBucket(10, burst=10)
+    time.sleep(0.15)
+    bucket.consume(1000)  # ~100s of debt
+    done = threading.Event()
+    worker = threading.Thread(target=lambda: (bucket.consume(1), done.set()))
+    worker.start()
+    assert not done.wait(0.1)
+    bucket.set_rate(None)
+    assert done.wait(1.0)
+    worker.join()
+
+
+# ─────────────────────────────────────────────────────────
+# Schedules and bandwidth limiter
+# ─────────────────────────────────────────────────────────
+
+def test_schedule_windows_wrap_past_midnight():
+    schedule = RateSchedule.parse("08:00-23:00=50; 23:00-08:00=unlimited")
+    assert schedule.rate_at(datetime.datetime(2024, 1, 1, 12, 0)) == (True, 50 * MIB)
+    assert schedule.rate_at(datetime.datetime(2024, 1, 1, 23, 0)) == (True, None)
+    assert schedule.rate_at(datetime.datetime(2024, 1, 1, 3, 30)) == (True, None)
+    assert str(schedule) == "08:00-23:00=50, 23:00-08:00=unlimited"
+
+
+def test_schedule_unmatched_time_and_invalid_specs():
+    schedule = RateSchedule.parse("09:00-17:00=10")
+    assert schedule.rate_at(datetime.datetime(2024, 1, 1, 18, 0)) == (False, None)
+    for spec in ("09:00-17:00", "9-17=10", "09:00-25:00=10", "09:00-17:00=-1", "09:00-17:00=fast"):
+        with pytest.raises(ValueError):
+            RateSchedule.parse(spec)
+
+
+def test_limiter_follows_schedule_and_falls_back_to_global_cap():
+    now = [datetime.datetime(2024, 1, 1, 12, 0)]
+    limiter = BandwidthLimiter(
+        max_bytes_per_second=5 * MIB,
+        schedule=RateSchedule.parse("08:00-23:00=50"),
+        clock=lambda: now[0],
+    )
+    assert limiter.rate == 50 * MIB
+    now[0] = datetime.datetime(2024, 1, 1, 23, 30)
+    limiter.refresh()
+    assert limiter.rate == 5 * MIB
+
+
+def test_limiter_rechecks_schedule_while_transferring(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "SCHEDULE_CHECK_SECONDS", 0.0)
+    now = [datetime.datetime(2024, 1, 1, 22, 59)]
+    limiter = BandwidthLimiter(
+        schedule=RateSchedule.parse("08:00-23:00=50, 23:00-08:00=0"), clock=lambda: now[0]
+    )
+    throttle = limiter.throttle_for_file()
+    throttle(1024)
+    assert limiter.rate == 50 * MIB
+    now[0] = datetime.datetime(2024, 1, 1, 23, 0)
+    throttle(1024)
+    assert limiter.rate is None
+
+
+def test_file_throttle_limited_follows_schedule(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "SCHEDULE_CHECK_SECONDS", 0.0)
+    now = [datetime.datetime(2024, 1, 1, 23, 30)]
+    limiter = BandwidthLimiter(
+        schedule=RateSchedule.parse("08:00-23:00=50, 23:00-08:00=0"), clock=lambda: now[0]
+    )
+    throttle = limiter.throttle_for_file()
+    assert not throttle.limited
+    now[0] = datetime.datetime(2024, 1, 2, 8, 0)
+    assert throttle.limited
+    assert BandwidthLimiter(per_file_bytes_per_second=1000).throttle_for_file().limited
+
+
+def test_limiter_per_file_cap_and_disabled_state():
+    assert BandwidthLimiter().throttle_for_file() is None
+    limiter = BandwidthLimiter(per_file_bytes_per_second=10000)
+    assert limiter.enabled and limiter.rate is None
+    throttle = limiter.throttle_for_file()
+    start = time.monotonic()
+    throttle(1000)
+    throttle(1)  # waits for the file's own bucket to repay the first 1000 bytes
+    assert time.monotonic() - start >= 0.08
+    # Another file gets a fresh per-file bucket
+    other = limiter.throttle_for_file()
+    start = time.monotonic()
+    other(10)
+    assert time.monotonic() - start < 0.1
+
+
+def test_reserve_returns_wait_instead_of_blocking():
+    bucket = TokenBucket(10000)
+    assert TokenBucket(None).reserve(10 ** 9) == 0.0
+    assert bucket.reserve(1000) == 0.0
+    # The next caller must wait for the first 1000 bytes to be repaid
+    assert 0.08 <= bucket.reserve(1) <= 0.1
+
+
+def test_async_throttle_sleeps_on_the_event_loop():
+    import asyncio
+
+    assert BandwidthLimiter().async_throttle_for_file() is None
+    throttle = BandwidthLimiter(max_bytes_per_second=10000).async_throttle_for_file()
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(throttle(1000), ticker())
+        await throttle(1)
+        return time.monotonic() - start
+
+    assert asyncio.run(main()) >= 0.08
+    # Other coroutines kept running while the throttle waited
+    assert len(ticks) == 5
@@ -0,0 +1,75 @@
+import datetime
+import pytest
+from models.downloaded_file import DownloadedFile
+from services.db_implementations.sqlite_implementation import SQLiteDBService
+from utils.sftp_diff import iter_new_remote_entries
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SQLiteDBService(str(tmp_path / "diff.db"))
+    db.initialize()
+    return db
+
+
+def listing(n, base="/remote"):
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        {"name": f"ep{i:03d}.mkv", "remote_path": f"{base}/ep{i:03d}.mkv", "size": i, "modified_time": now, "is_dir": False}
+        for i in range(n)
+    ]
+
+
+def record(db, entry):
+    db.upsert_downloaded_file(DownloadedFile(
+        name=entry["name"], remote_path=entry["remote_path"], size=entry["size"], modified_time=entry["modified_time"],
+    ))
+
+
+def test_new_entries_are_those_not_in_downloaded_files(db):
+    entries = listing(10)
+    for entry in entries[::2]:
+        record(db, entry)
+
+    new = list(iter_new_remote_entries(db, entries, batch_size=3))
+
+    assert [e["name"] for e in new] == [e["name"] for e in entries[1::2]]
+
+
+def test_matches_sftp_temp_files_diff(db):
+    entries = listing(7)
+    record(db, entries[3])
+    db.clear_sftp_temp_files()
+    db.insert_sftp_temp_files([{**e, "fetched_at": e["modified_time"]} for e in entries])
+
+    staged = sorted(d["path"] for d in db.get_sftp_diffs())
+    streamed = sorted(e["remote_path"] for e in iter_new_remote_entries(db, entries))
+
+    assert streamed == staged
+
+
+def test_streams_generator_in_batches(mocker):
+    db = mocker.Mock()
+    db.get_known_remote_paths.side_effect = lambda paths: set()
+    consumed = []
+
+    def source():
+        for entry in listing(5):
+            consumed.append(entry["name"])
+            yield entry
+
+    walker = iter_new_remote_entries(db, source(), batch_size=2)
+    first = next(walker)
+
+    # Only the first batch has been read from the listing when the first result is emitted
+    assert first["name"] == "ep000.mkv"
+    assert consumed == ["ep000.mkv", "ep001.mkv"]
+    assert len(list(walker)) == 4
+    assert [len(c.args[0]) for c in db.get_known_remote_paths.call_args_list] == [2, 2, 1]
+
+
+def test_legacy_path_key_and_empty_listing(db):
+    assert list(iter_new_remote_entries(db, [])) == []
+    assert db.get_known_remote_paths([]) == set()
+    entry = {"name": "a.mkv", "path": "/remote/a.mkv", "size": 1, "modified_time": datetime.datetime.now(), "is_dir": False}
+    assert list(iter_new_remote_entries(db, [entry])) == [entry]
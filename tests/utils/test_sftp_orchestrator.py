@@ -5,8 +5,13 @@ from utils.sftp_orchestrator import (
     process_sftp_diffs, 
     download_from_remote, 
     list_remote_files, 
-    bootstrap_downloaded_files
+    bootstrap_downloaded_files,
+    record_remote_dir_snapshot,
+    process_sftp_diffs_async,
+    download_from_remote_async,
+    plan_download_from_remote,
 )
+from services.db_implementations.db_interface import DatabaseInterface
 
 @pytest.fixture
 def mock_sftp_service(mocker):
@@ -14,7 +19,10 @@ def mock_sftp_service(mocker):
 
 @pytest.fixture
 def mock_db_service(mocker):
-    return mocker.Mock()
+    db = mocker.Mock()
+    # Batched writes behave like the interface's default: one upsert_downloaded_file per file
+    db.upsert_downloaded_files.side_effect = lambda files: DatabaseInterface.upsert_downloaded_files(db, files)
+    return db
 
 @pytest.fixture
 def mock_llm_service(mocker):
@@ -72,6 +80,7 @@ def test_process_sftp_diffs_downloads_files(tmp_path, mock_sftp_service, mock_db
     # Mock the file filter functions to always return True
     mocker.patch('utils.sftp_orchestrator.is_valid_media_file', return_value=True)
     mocker.patch('utils.sftp_orchestrator.is_valid_directory', return_value=True)
+    mock_sftp_service.plan_dir_download.return_value = []
 
     process_sftp_diffs(
         sftp_service=mock_sftp_service,
@@ -100,12 +109,14 @@ def test_process_sftp_diffs_downloads_files(tmp_path, mock_sftp_service, mock_db
     # mock_new_sftp.download_file.assert_called_once_with(
     #     "/remote/file1.mkv", str(local_base / "file1.mkv")
     # )
-    # Check that download_dir was called on the original SFTP service
-    # The actual call includes max_workers=4, so we need to account for that
-    mock_sftp_service.download_dir.assert_called_once_with(
-        "/remote/folder1", str(local_base / "folder1"), max_workers=4
+    # The directory was listed up front (nothing in it to fetch) rather than downloaded separately
+    mock_sftp_service.plan_dir_download.assert_called_once_with(
+        "/remote/folder1", str(local_base / "folder1")
     )
-    assert mock_db_service.add_downloaded_file.call_count == 2
+    mock_sftp_service.download_dir.assert_not_called()
+    # The file goes through the batched upsert; only the directory uses the legacy insert
+    assert mock_db_service.upsert_downloaded_file.call_count == 2
+    assert mock_db_service.add_downloaded_file.call_count == 1
 
 def test_process_sftp_diffs_dry_run(tmp_path, mock_sftp_service, mock_db_service):
     now = "2024-01-01T12:00:00"
@@ -131,7 +142,7 @@ def test_process_sftp_diffs_dry_run(tmp_path, mock_sftp_service, mock_db_service
     )
 
     mock_sftp_service.download_file.assert_not_called()
-    mock_sftp_service.download_dir.assert_not_called()
+    mock_sftp_service.plan_dir_download.assert_not_called()
     mock_db_service.add_downloaded_file.assert_not_called()
 
 def test_process_sftp_diffs_directory_download_exception(tmp_path, mock_sftp_service, mock_db_service, mocker):
@@ -152,8 +163,8 @@ def test_process_sftp_diffs_directory_download_exception(tmp_path, mock_sftp_ser
     # Mock file filter to return True
     mocker.patch('utils.sftp_orchestrator.is_valid_directory', return_value=True)
     
-    # Make download_dir raise an exception
-    mock_sftp_service.download_dir.side_effect = Exception("Download failed")
+    # Make listing the directory raise an exception
+    mock_sftp_service.plan_dir_download.side_effect = Exception("Download failed")
     
     # Should not raise an exception
     process_sftp_diffs(
@@ -165,8 +176,8 @@ def test_process_sftp_diffs_directory_download_exception(tmp_path, mock_sftp_ser
         dry_run=False,
     )
     
-    # Verify download_dir was called
-    mock_sftp_service.download_dir.assert_called_once()
+    # Verify the directory listing was attempted
+    mock_sftp_service.plan_dir_download.assert_called_once()
     # Verify add_downloaded_file was not called due to exception
     mock_db_service.add_downloaded_file.assert_not_called()
 
@@ -258,7 +269,7 @@ def test_process_sftp_diffs_filters_invalid_files(tmp_path, mock_sftp_service, m
     
     # Verify no downloads were attempted
     mock_sftp_service.download_file.assert_not_called()
-    mock_sftp_service.download_dir.assert_not_called()
+    mock_sftp_service.plan_dir_download.assert_not_called()
     mock_db_service.add_downloaded_file.assert_not_called()
 
 def test_process_sftp_diffs_filters_invalid_directories(tmp_path, mock_sftp_service, mock_db_service, mocker):
@@ -290,7 +301,7 @@ def test_process_sftp_diffs_filters_invalid_directories(tmp_path, mock_sftp_serv
     
     # Verify no downloads were attempted
     mock_sftp_service.download_file.assert_not_called()
-    mock_sftp_service.download_dir.assert_not_called()
+    mock_sftp_service.plan_dir_download.assert_not_called()
     mock_db_service.add_downloaded_file.assert_not_called()
 
 def test_process_sftp_diffs_with_llm_service(tmp_path, mock_sftp_service, mock_db_service, mock_llm_service, mocker):
@@ -355,13 +366,11 @@ def test_download_from_remote_success(mock_sftp_service, mock_db_service, mocker
     ]
     mocker.patch('utils.sftp_orchestrator.list_remote_files', return_value=mock_files)
     
-    # Mock database methods
-    mock_db_service.clear_sftp_temp_files.return_value = None
-    mock_db_service.insert_sftp_temp_files.return_value = None
-    mock_db_service.get_sftp_diffs.return_value = mock_files
+    # Mock database methods: nothing downloaded yet
+    mock_db_service.get_known_remote_paths.return_value = set()
     
     # Mock process_sftp_diffs
-    mocker.patch('utils.sftp_orchestrator.process_sftp_diffs')
+    mock_process = mocker.patch('utils.sftp_orchestrator.process_sftp_diffs')
     
     download_from_remote(
         sftp=mock_sftp_service,
@@ -371,10 +380,12 @@ def test_download_from_remote_success(mock_sftp_service, mock_db_service, mocker
         dry_run=False,
     )
     
-    # Verify each remote path was processed
-    assert mock_db_service.clear_sftp_temp_files.call_count == 2
-    assert mock_db_service.insert_sftp_temp_files.call_count == 2
-    assert mock_db_service.get_sftp_diffs.call_count == 2
+    # Verify each remote path was diffed without staging in sftp_temp_files
+    assert mock_db_service.get_known_remote_paths.call_count == 2
+    mock_db_service.clear_sftp_temp_files.assert_not_called()
+    mock_db_service.insert_sftp_temp_files.assert_not_called()
+    assert mock_process.call_count == 2
+    assert mock_process.call_args[1]['diffs'] == mock_files
 
 def test_download_from_remote_dry_run(mock_sftp_service, mock_db_service, mocker):
     """Test download_from_remote with dry_run=True."""
@@ -387,10 +398,8 @@ def test_download_from_remote_dry_run(mock_sftp_service, mock_db_service, mocker
     ]
     mocker.patch('utils.sftp_orchestrator.list_remote_files', return_value=mock_files)
     
-    # Mock database methods
-    mock_db_service.clear_sftp_temp_files.return_value = None
-    mock_db_service.insert_sftp_temp_files.return_value = None
-    mock_db_service.get_sftp_diffs.return_value = mock_files
+    # Mock database methods: nothing downloaded yet
+    mock_db_service.get_known_remote_paths.return_value = set()
     
     # Mock process_sftp_diffs
     mock_process = mocker.patch('utils.sftp_orchestrator.process_sftp_diffs')
@@ -505,7 +514,7 @@ def test_bootstrap_downloaded_files_success(mock_sftp_service, mock_db_service,
     assert mock_db_service.copy_sftp_temp_to_downloaded.call_count == 2
 
 def test_process_sftp_diffs_custom_max_workers(tmp_path, mock_sftp_service, mock_db_service, mocker):
-    """Test process_sftp_diffs with custom max_workers parameter."""
+    """Test process_sftp_diffs sizes the single download pool from max_workers."""
     now = "2024-01-01T12:00:00"
     
     diffs = [
@@ -521,6 +530,14 @@ def test_process_sftp_diffs_custom_max_workers(tmp_path, mock_sftp_service, mock
     
     # Mock file filter to return True
     mocker.patch('utils.sftp_orchestrator.is_valid_directory', return_value=True)
+    mock_sftp_service.plan_dir_download.return_value = [
+        {"name": "ep1.mkv", "remote_path": "/remote/folder1/ep1.mkv", "local_path": str(tmp_path / "folder1" / "ep1.mkv"),
+         "size": 10, "modified_time": now, "is_dir": False, "fetched_at": now},
+    ]
+    mock_executor = MagicMock()
+    mock_executor.__enter__.return_value = mock_executor
+    executor_class = mocker.patch('utils.sftp_orchestrator.ThreadPoolExecutor', return_value=mock_executor)
+    mocker.patch('utils.sftp_orchestrator.as_completed', return_value=[])
     
     process_sftp_diffs(
         sftp_service=mock_sftp_service,
@@ -532,11 +549,332 @@ def test_process_sftp_diffs_custom_max_workers(tmp_path, mock_sftp_service, mock
         max_workers=8,  # Custom max_workers
     )
     
-    # Verify download_dir was called with custom max_workers
-    mock_sftp_service.download_dir.assert_called_once_with(
-        "/remote/folder1", str(tmp_path / "folder1"), max_workers=8
+    # Directory contents go through the same pool as loose files
+    executor_class.assert_called_once_with(max_workers=8)
+    assert mock_executor.submit.call_count == 1
+
+def test_process_sftp_diffs_schedules_directory_contents_with_files(tmp_path, mock_db_service, mocker):
+    """Directory contents and loose files share one scheduled pool; the directory is recorded after its files."""
+    from services.transfer_pipeline import PipelineSettings
+    from services.transfer_scheduler import TransferScheduler
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    started = []
+
+    def fake_download(remote_path, local_path):
+        started.append(remote_path)
+        with open(local_path, "wb") as f:
+            f.write(b"x")
+
+    worker = Mock()
+    worker.download_file.side_effect = fake_download
+    sftp = MagicMock()
+    sftp.pool = None
+    sftp.session.return_value.__enter__.return_value = worker
+    sftp.plan_dir_download.side_effect = lambda remote, local: [
+        {"name": name, "remote_path": f"{remote}/{name}", "local_path": f"{local}/{name}",
+         "size": size, "modified_time": now, "is_dir": False, "fetched_at": now}
+        for name, size in (("Show - 02.mkv", 300), ("Show - 03.mkv", 100))
+    ]
+    (tmp_path / "Show").mkdir()
+    diffs = [
+        {"name": "Show - 01.mkv", "path": "/remote/Show - 01.mkv", "size": 200,
+         "modified_time": now, "fetched_at": now, "is_dir": False},
+        {"name": "Show", "path": "/remote/Show", "size": 0,
+         "modified_time": now, "fetched_at": now, "is_dir": True},
+    ]
+
+    process_sftp_diffs(
+        sftp_service=sftp,
+        db_service=mock_db_service,
+        diffs=diffs,
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        parse_filenames=False,
+        scheduler=TransferScheduler(max_concurrent_transfers=1, order="smallest_first"),
+        # One worker per stage keeps records in download order
+        pipeline=PipelineSettings(hash_workers=1, parse_workers=1, persist_workers=1),
+    )
+
+    sftp.download_dir.assert_not_called()
+    assert started == ["/remote/Show/Show - 03.mkv", "/remote/Show - 01.mkv", "/remote/Show/Show - 02.mkv"]
+    recorded = [c.args[0].remote_path for c in mock_db_service.upsert_downloaded_file.call_args_list]
+    assert recorded == started + ["/remote/Show"]
+    assert mock_db_service.upsert_downloaded_files.call_count == 1
+
+def test_process_sftp_diffs_does_not_record_directory_files_missing_locally(tmp_path, mock_db_service, mocker):
+    """A directory file that is not on disk after its download fails; the directory stays unrecorded and the next run retries it."""
+    from services.job_manager import JobProgress
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    missing = {"Show - 03.mkv"}
+
+    def fake_download(remote_path, local_path):
+        if remote_path.rsplit("/", 1)[-1] not in missing:
+            with open(local_path, "wb") as f:
+                f.write(b"x")
+
+    worker = Mock()
+    worker.download_file.side_effect = fake_download
+    sftp = MagicMock()
+    sftp.pool = None
+    sftp.session.return_value.__enter__.return_value = worker
+    sftp.plan_dir_download.side_effect = lambda remote, local: [
+        {"name": name, "remote_path": f"{remote}/{name}", "local_path": f"{local}/{name}",
+         "size": 100, "modified_time": now, "is_dir": False, "fetched_at": now}
+        for name in ("Show - 02.mkv", "Show - 03.mkv")
+    ]
+    (tmp_path / "Show").mkdir()
+    show_entry = {"name": "Show", "path": "/remote/Show", "size": 0,
+                  "modified_time": now, "fetched_at": now, "is_dir": True}
+
+    # downloaded_files as the diff sees it: every path the run recorded
+    known = set()
+    mock_db_service.add_downloaded_file.side_effect = lambda entry: known.add(entry["path"])
+    mock_db_service.upsert_downloaded_file.side_effect = lambda model: known.add(model.remote_path)
+    mock_db_service.get_known_remote_paths.side_effect = lambda paths: known.intersection(paths)
+    progress = JobProgress()
+
+    process_sftp_diffs(
+        sftp_service=sftp,
+        db_service=mock_db_service,
+        diffs=[dict(show_entry)],
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        parse_filenames=False,
+        progress=progress,
     )
 
+    assert "/remote/Show/Show - 02.mkv" in known
+    assert "/remote/Show/Show - 03.mkv" not in known
+    assert "/remote/Show" not in known
+    mock_db_service.add_downloaded_file.assert_not_called()
+    assert progress.snapshot()["files_failed"] == 1
+
+    # The next run sees the directory as new again and schedules the missing file
+    missing.clear()
+    worker.download_file.reset_mock()
+    mocker.patch("utils.sftp_orchestrator.list_remote_files", return_value=[dict(show_entry)])
+
+    download_from_remote(
+        sftp=sftp,
+        db=mock_db_service,
+        remote_paths=["/remote"],
+        incoming_path=str(tmp_path),
+        parse_filenames=False,
+        incremental=False,
+    )
+
+    downloaded = [c.args[0] for c in worker.download_file.call_args_list]
+    assert "/remote/Show/Show - 03.mkv" in downloaded
+    assert {"/remote/Show", "/remote/Show/Show - 03.mkv"} <= known
+
+def test_process_sftp_diffs_reports_progress(tmp_path, mock_db_service):
+    """Planned jobs and each finished download (bytes only on success) are reported to the JobProgress."""
+    from services.job_manager import JobProgress
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+
+    def fake_download(remote_path, local_path):
+        if remote_path.endswith("02.mkv"):
+            raise IOError("connection reset")
+        with open(local_path, "wb") as f:
+            f.write(b"x")
+
+    worker = Mock()
+    worker.download_file.side_effect = fake_download
+    sftp = MagicMock()
+    sftp.pool = None
+    sftp.session.return_value.__enter__.return_value = worker
+    diffs = [
+        {"name": f"Show - 0{i}.mkv", "path": f"/remote/Show - 0{i}.mkv", "size": size,
+         "modified_time": now, "fetched_at": now, "is_dir": False}
+        for i, size in ((1, 200), (2, 300))
+    ]
+    progress = JobProgress()
+
+    process_sftp_diffs(
+        sftp_service=sftp,
+        db_service=mock_db_service,
+        diffs=diffs,
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        parse_filenames=False,
+        progress=progress,
+    )
+
+    snapshot = progress.snapshot()
+    assert (snapshot["files_total"], snapshot["bytes_total"]) == (2, 500)
+    assert (snapshot["files_done"], snapshot["files_failed"], snapshot["bytes_done"]) == (1, 1, 200)
+
+def test_process_sftp_diffs_records_stage_metrics(tmp_path, mock_db_service):
+    """Downloads, parsing and upserts are timed; transfer bytes and queue depth are tracked."""
+    from services.sftp_transfer import TransferResult
+    from utils.metrics import TransferMetrics, set_metrics
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+
+    def fake_download(remote_path, local_path):
+        if remote_path.endswith("02.mkv"):
+            raise IOError("connection reset")
+        with open(local_path, "wb") as f:
+            f.write(b"x" * 200)
+        return TransferResult(remote_path, local_path, 200, 0.5)
+
+    worker = Mock()
+    worker.download_file.side_effect = fake_download
+    sftp = MagicMock()
+    sftp.pool = None
+    sftp.llm_service = None
+    sftp.session.return_value.__enter__.return_value = worker
+    diffs = [
+        {"name": f"Show - 0{i}.mkv", "path": f"/remote/Show - 0{i}.mkv", "size": 200,
+         "modified_time": now, "fetched_at": now, "is_dir": False}
+        for i in (1, 2)
+    ]
+    metrics = TransferMetrics()
+    set_metrics(metrics)
+    try:
+        process_sftp_diffs(
+            sftp_service=sftp,
+            db_service=mock_db_service,
+            diffs=diffs,
+            remote_base="/remote",
+            local_base=str(tmp_path),
+            use_llm=False,
+        )
+    finally:
+        set_metrics(None)
+
+    assert metrics.stage_duration.count(stage="download") == 2
+    assert metrics.stage_failures.value(stage="download") == 1
+    assert metrics.stage_duration.count(stage="parse") == 1
+    assert metrics.stage_duration.count(stage="upsert") == 1
+    assert metrics.bytes_downloaded.value() == 200
+    assert metrics.throughput.sum() == pytest.approx(400)
+    assert metrics.queue_wait.count() == 2
+    assert metrics.queue_depth.value() == 0
+    assert metrics.transfers_active.value() == 0
+    assert metrics.sessions_active.value() == 0
+    assert metrics.stage_backlog.value(stage="parse") == 0
+    # Only the successful transfer counts towards the run's throughput history
+    files, nbytes, elapsed, workers = mock_db_service.add_transfer_run.call_args.args
+    assert (files, nbytes, workers) == (1, 200, 4)
+    assert elapsed > 0
+
+def test_process_sftp_diffs_parses_on_parallel_stage_workers(tmp_path, mock_db_service, mocker):
+    """Finished downloads are parsed on the parse stage's own workers rather than one after another."""
+    import threading
+    from services.transfer_pipeline import PipelineSettings
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    both_parsing = threading.Barrier(2, timeout=5)
+    overlapped = []
+
+    def fake_download(remote_path, local_path):
+        with open(local_path, "wb") as f:
+            f.write(b"x")
+
+    def slow_parse(name, **kwargs):
+        # Only returns promptly if another parse is running at the same time
+        try:
+            both_parsing.wait()
+            overlapped.append(True)
+        except threading.BrokenBarrierError:
+            overlapped.append(False)
+        return {"show_name": "Show", "season": 1, "episode": 1, "confidence": 0.9}
+
+    mocker.patch("utils.sftp_orchestrator.parse_filename", side_effect=slow_parse)
+    worker = Mock()
+    worker.download_file.side_effect = fake_download
+    sftp = MagicMock()
+    sftp.pool = None
+    sftp.llm_service = None
+    sftp.session.return_value.__enter__.return_value = worker
+    diffs = [
+        {"name": f"Show - 0{i}.mkv", "path": f"/remote/Show - 0{i}.mkv", "size": 100,
+         "modified_time": now, "fetched_at": now, "is_dir": False}
+        for i in (1, 2)
+    ]
+
+    process_sftp_diffs(
+        sftp_service=sftp,
+        db_service=mock_db_service,
+        diffs=diffs,
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        use_llm=False,
+        pipeline=PipelineSettings(parse_workers=2, persist_workers=1),
+    )
+
+    assert overlapped == [True, True]
+    assert mock_db_service.upsert_downloaded_file.call_count == 2
+
+def test_process_sftp_diffs_async_schedules_and_records_like_threaded(tmp_path, mock_db_service):
+    """The asyncio runner plans directories, downloads in scheduler order and records the directory last."""
+    import asyncio
+    from unittest.mock import AsyncMock
+    from services.transfer_pipeline import PipelineSettings
+    from services.transfer_scheduler import TransferScheduler
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    started = []
+
+    async def fake_download(remote_path, local_path):
+        started.append(remote_path)
+        with open(local_path, "wb") as f:
+            f.write(b"x")
+
+    async def fake_plan(remote, local):
+        return [
+            {"name": name, "remote_path": f"{remote}/{name}", "local_path": f"{local}/{name}",
+             "size": size, "modified_time": now, "is_dir": False, "fetched_at": now}
+            for name, size in (("Show - 02.mkv", 300), ("Show - 03.mkv", 100))
+        ]
+
+    sftp = Mock()
+    sftp.llm_service = None
+    sftp.download_file = AsyncMock(side_effect=fake_download)
+    sftp.plan_dir_download = AsyncMock(side_effect=fake_plan)
+    (tmp_path / "Show").mkdir()
+    diffs = [
+        {"name": "Show - 01.mkv", "path": "/remote/Show - 01.mkv", "size": 200,
+         "modified_time": now, "fetched_at": now, "is_dir": False},
+        {"name": "Show", "path": "/remote/Show", "size": 0,
+         "modified_time": now, "fetched_at": now, "is_dir": True},
+    ]
+
+    asyncio.run(process_sftp_diffs_async(
+        sftp_service=sftp,
+        db_service=mock_db_service,
+        diffs=diffs,
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        parse_filenames=False,
+        scheduler=TransferScheduler(max_concurrent_transfers=1, order="smallest_first"),
+        pipeline=PipelineSettings(hash_workers=1, parse_workers=1, persist_workers=1),
+    ))
+
+    assert started == ["/remote/Show/Show - 03.mkv", "/remote/Show - 01.mkv", "/remote/Show/Show - 02.mkv"]
+    recorded = [c.args[0].remote_path for c in mock_db_service.upsert_downloaded_file.call_args_list]
+    assert recorded == started + ["/remote/Show"]
+    assert mock_db_service.upsert_downloaded_files.call_count == 1
+
+def test_download_from_remote_async_skips_unchanged_paths(mock_db_service):
+    """Incremental mode awaits the directory stat and skips listing when the snapshot matches."""
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    mtime = datetime(2024, 1, 1, 12, 0, 0)
+    sftp = Mock()
+    sftp.stat_remote_dir = AsyncMock(return_value={"mtime": mtime})
+    sftp.list_remote_dir = AsyncMock(return_value=[])
+    mock_db_service.get_remote_dir_snapshot.return_value = {"mtime": mtime}
+
+    asyncio.run(download_from_remote_async(sftp, mock_db_service, ["/remote"], "/incoming"))
+
+    sftp.list_remote_dir.assert_not_called()
+
 def test_process_sftp_diffs_multiple_files_concurrent(tmp_path, mock_sftp_service, mock_db_service, mocker):
     """Test process_sftp_diffs with multiple files for concurrent download."""
     now = "2024-01-01T12:00:00"
@@ -605,7 +943,7 @@ def test_process_sftp_diffs_multiple_files_concurrent(tmp_path, mock_sftp_servic
     # Verify all futures were processed
     assert all(future.result.call_count == 1 for future in mock_futures)
     # Verify all downloads were recorded
-    assert mock_db_service.add_downloaded_file.call_count == 3
+    assert mock_db_service.upsert_downloaded_file.call_count == 3
 
 
 def test_process_sftp_diffs_parsing_disabled(tmp_path, mock_sftp_service, mock_db_service, mocker):
@@ -909,4 +1247,203 @@ def test_process_sftp_diffs_crc32_field_priority(tmp_path, mock_sftp_service, mo
     assert upsert_arg.season == 1
     assert upsert_arg.episode == 1
     # Should use the crc32 field value, not the hash field value
-    assert getattr(upsert_arg, 'file_provided_hash_value', None) == 'C6FF3F93'
\ No newline at end of file
+    assert getattr(upsert_arg, 'file_provided_hash_value', None) == 'C6FF3F93'
+
+def test_process_sftp_diffs_uses_inline_transfer_crc(tmp_path, mock_sftp_service, mock_db_service, mocker):
+    """CRC32 computed during the transfer is stored without re-reading the file."""
+    from services.sftp_transfer import TransferResult
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    diffs = [{
+        "name": "Show.S01E01.mkv",
+        "path": "/remote/Show.S01E01.mkv",
+        "size": 100,
+        "modified_time": now,
+        "fetched_at": now,
+        "is_dir": False,
+    }]
+    local_file = str(tmp_path / "Show.S01E01.mkv")
+
+    mock_executor = mocker.Mock()
+    mock_future = mocker.Mock()
+    mock_executor.__enter__ = mocker.Mock(return_value=mock_executor)
+    mock_executor.__exit__ = mocker.Mock(return_value=None)
+    mock_executor.submit.return_value = mock_future
+    mocker.patch('utils.sftp_orchestrator.ThreadPoolExecutor', return_value=mock_executor)
+    mocker.patch('utils.sftp_orchestrator.as_completed', return_value=[mock_future])
+    mock_future.result.return_value = TransferResult(
+        "/remote/Show.S01E01.mkv", local_file, 100, 0.1, hashes={"crc32": "1A2B3C4D", "md5": "abc"}
+    )
+    hashing_service = mocker.Mock()
+
+    process_sftp_diffs(
+        sftp_service=mock_sftp_service,
+        db_service=mock_db_service,
+        diffs=diffs,
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        dry_run=False,
+        hashing_service=hashing_service,
+        parse_filenames=False,
+    )
+
+    hashing_service.calculate_crc32.assert_not_called()
+    upsert_arg = mock_db_service.upsert_downloaded_file.call_args[0][0]
+    assert upsert_arg.file_hash == "1A2B3C4D"
+    assert upsert_arg.file_hash_algo == "CRC32"
+    assert upsert_arg.hash_calculated_at is not None
+
+
+def test_process_sftp_diffs_falls_back_to_hashing_service(tmp_path, mock_sftp_service, mock_db_service, mocker):
+    """Without an inline CRC32 the hashing service re-reads the downloaded file."""
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    diffs = [{
+        "name": "Show.S01E01.mkv",
+        "path": "/remote/Show.S01E01.mkv",
+        "size": 100,
+        "modified_time": now,
+        "fetched_at": now,
+        "is_dir": False,
+    }]
+
+    mock_executor = mocker.Mock()
+    mock_future = mocker.Mock()
+    mock_executor.__enter__ = mocker.Mock(return_value=mock_executor)
+    mock_executor.__exit__ = mocker.Mock(return_value=None)
+    mock_executor.submit.return_value = mock_future
+    mocker.patch('utils.sftp_orchestrator.ThreadPoolExecutor', return_value=mock_executor)
+    mocker.patch('utils.sftp_orchestrator.as_completed', return_value=[mock_future])
+    mock_future.result.return_value = None
+    hashing_service = mocker.Mock()
+    hashing_service.calculate_crc32.return_value = "DEADBEEF"
+
+    process_sftp_diffs(
+        sftp_service=mock_sftp_service,
+        db_service=mock_db_service,
+        diffs=diffs,
+        remote_base="/remote",
+        local_base=str(tmp_path),
+        dry_run=False,
+        hashing_service=hashing_service,
+        parse_filenames=False,
+    )
+
+    hashing_service.calculate_crc32.assert_called_once()
+    upsert_arg = mock_db_service.upsert_downloaded_file.call_args[0][0]
+    assert upsert_arg.file_hash == "DEADBEEF"
+
+
+# ─────────────────────────────────────────────────────────
+# Incremental listing (remote dir snapshots)
+# ─────────────────────────────────────────────────────────
+
+def run_incremental(sftp, db, mocker, dry_run=False, incremental=True):
+    mock_list = mocker.patch('utils.sftp_orchestrator.list_remote_files', return_value=[])
+    mock_process = mocker.patch('utils.sftp_orchestrator.process_sftp_diffs')
+    download_from_remote(
+        sftp=sftp,
+        db=db,
+        remote_paths=["/remote/complete"],
+        incoming_path="/local/incoming",
+        dry_run=dry_run,
+        incremental=incremental,
+    )
+    return mock_list, mock_process
+
+def test_download_from_remote_skips_unchanged_path(mock_sftp_service, mock_db_service, mocker):
+    mtime = datetime(2024, 1, 1, 12, 0, 0)
+    mock_sftp_service.stat_remote_dir.return_value = {"mtime": mtime}
+    mock_db_service.get_remote_dir_snapshot.return_value = {"path": "/remote/complete", "mtime": mtime, "child_count": 2}
+
+    mock_list, mock_process = run_incremental(mock_sftp_service, mock_db_service, mocker)
+
+    mock_list.assert_not_called()
+    mock_process.assert_not_called()
+    mock_db_service.clear_sftp_temp_files.assert_not_called()
+
+def test_download_from_remote_records_snapshot_after_changed_path(mock_sftp_service, mock_db_service, mocker):
+    mtime = datetime(2024, 1, 2, 12, 0, 0)
+    mock_sftp_service.stat_remote_dir.side_effect = [
+        {"mtime": mtime},
+        {"mtime": mtime, "child_count": 2, "settled": True},
+    ]
+    mock_db_service.get_remote_dir_snapshot.return_value = {"mtime": datetime(2024, 1, 1, 12, 0, 0)}
+
+    mock_list, mock_process = run_incremental(mock_sftp_service, mock_db_service, mocker)
+
+    mock_list.assert_called_once()
+    mock_process.assert_called_once()
+    mock_db_service.upsert_remote_dir_snapshot.assert_called_once_with("/remote/complete", mtime, 2)
+
+def test_download_from_remote_full_scan_ignores_snapshots(mock_sftp_service, mock_db_service, mocker):
+    mock_list, _ = run_incremental(mock_sftp_service, mock_db_service, mocker, incremental=False)
+
+    mock_list.assert_called_once()
+    mock_sftp_service.stat_remote_dir.assert_not_called()
+    mock_db_service.upsert_remote_dir_snapshot.assert_not_called()
+
+def test_download_from_remote_dry_run_does_not_snapshot(mock_sftp_service, mock_db_service, mocker):
+    mock_sftp_service.stat_remote_dir.return_value = {"mtime": datetime(2024, 1, 2), "child_count": 1, "settled": True}
+    mock_db_service.get_remote_dir_snapshot.return_value = None
+    run_incremental(mock_sftp_service, mock_db_service, mocker, dry_run=True)
+
+    mock_db_service.upsert_remote_dir_snapshot.assert_not_called()
+
+@pytest.mark.parametrize("known, state", [
+    (set(), {"mtime": datetime(2024, 1, 2), "child_count": 1, "settled": True}),
+    ({"/remote/complete/a.mkv"}, {"mtime": datetime(2024, 1, 2), "child_count": 1, "settled": False}),
+    ({"/remote/complete/a.mkv"}, {"mtime": datetime(2024, 1, 3), "child_count": 1, "settled": True}),
+])
+def test_record_remote_dir_snapshot_requires_settled_reconciled_dir(mock_sftp_service, mock_db_service, known, state):
+    """Failed downloads, entries still being written, or changes during processing prevent a snapshot."""
+    mock_db_service.get_known_remote_paths.return_value = known
+    mock_sftp_service.stat_remote_dir.return_value = state
+    entries = [{"name": "a.mkv", "remote_path": "/remote/complete/a.mkv", "is_dir": False}]
+
+    assert record_remote_dir_snapshot(mock_sftp_service, mock_db_service, "/remote/complete", datetime(2024, 1, 2), entries) is False
+    mock_db_service.upsert_remote_dir_snapshot.assert_not_called()
+
+def test_plan_download_from_remote_counts_new_files_without_downloading(tmp_path, mock_sftp_service, mock_db_service):
+    """The plan lists and diffs like a real run, walks new directories without creating them and groups by show."""
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    mock_sftp_service.list_remote_dir.return_value = [
+        {"name": "Show A - 01.mkv", "path": "/remote/Show A - 01.mkv", "size": 100, "modified_time": now, "is_dir": False},
+        {"name": "Show A - 02.mkv", "path": "/remote/Show A - 02.mkv", "size": 100, "modified_time": now, "is_dir": False},
+        {"name": "Show B", "path": "/remote/Show B", "size": 0, "modified_time": now, "is_dir": True},
+    ]
+    mock_sftp_service.plan_dir_download.return_value = [
+        {"name": "Show B - 01.mkv", "remote_path": "/remote/Show B/Show B - 01.mkv", "size": 300},
+        {"name": "extras.mkv", "remote_path": "/remote/Show B/extras.mkv", "size": 50},
+    ]
+    mock_db_service.get_known_remote_paths.return_value = {"/remote/Show A - 02.mkv"}
+    mock_db_service.get_transfer_runs.return_value = [
+        {"workers": 2, "files": 3, "bytes_transferred": 900, "elapsed_seconds": 3.0},
+    ]
+    incoming = tmp_path / "incoming"
+
+    plan = plan_download_from_remote(
+        mock_sftp_service, mock_db_service, ["/remote"], str(incoming), incremental=False, workers=2,
+    )
+
+    mock_sftp_service.plan_dir_download.assert_called_once_with(
+        "/remote/Show B", str(incoming / "Show B"), create_dirs=False
+    )
+    mock_sftp_service.download_file.assert_not_called()
+    assert not incoming.exists()
+    assert (plan.files, plan.total_bytes, plan.directories) == (3, 450, 1)
+    assert {s.name: (s.files, s.bytes) for s in plan.shows.values()} == {"Show A": (1, 100), "Show B": (2, 350)}
+    assert plan.free_bytes > 0
+    assert plan.estimated_seconds == pytest.approx(1.5)
+
+def test_plan_download_from_remote_skips_unchanged_paths(mock_sftp_service, mock_db_service):
+    mtime = datetime(2024, 1, 1, 12, 0, 0)
+    mock_sftp_service.stat_remote_dir.return_value = {"mtime": mtime}
+    mock_db_service.get_remote_dir_snapshot.return_value = {"path": "/remote", "mtime": mtime, "child_count": 2}
+    mock_db_service.get_transfer_runs.return_value = []
+
+    plan = plan_download_from_remote(mock_sftp_service, mock_db_service, ["/remote"], "/incoming")
+
+    mock_sftp_service.list_remote_dir.assert_not_called()
+    assert plan.skipped_paths == ["/remote"]
+    assert plan.files == 0
+    assert plan.estimated_seconds is None
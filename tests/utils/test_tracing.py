@@ -0,0 +1,66 @@
+import pstats
+import threading
+from utils.tracing import RunProfiler, Tracer
+
+
+def test_disabled_tracer_hands_out_shared_noop_span():
+    tracer = Tracer()
+    assert tracer.span("hash") is tracer.span("parse")
+    with tracer.span("hash"):
+        pass
+    assert tracer.stats() == {}
+
+
+def test_enabled_tracer_aggregates_spans_across_threads():
+    tracer = Tracer(enabled=True)
+
+    def work():
+        for _ in range(5):
+            with tracer.span("upsert"):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    tracer.record("download", 2.0)
+    tracer.record("download", 1.0)
+
+    stats = tracer.stats()
+    assert stats["upsert"].count == 20
+    assert (stats["download"].count, stats["download"].total, stats["download"].max) == (2, 3.0, 2.0)
+    assert stats["download"].mean == 1.5
+
+
+def test_summary_lists_slowest_stage_first_with_share_of_wall_time():
+    tracer = Tracer(enabled=True)
+    tracer.record("parse", 0.5)
+    tracer.record("download", 3.0)
+
+    lines = tracer.format_summary(wall_seconds=4.0).splitlines()
+
+    assert lines[0].split() == ["stage", "calls", "total", "s", "mean", "ms", "max", "ms", "%", "wall"]
+    assert lines[2].split()[0] == "download" and lines[2].endswith("75.0%")
+    assert lines[3].split()[0] == "parse"
+    assert lines[-1] == "Wall time: 4.000s"
+    assert Tracer().format_summary() == "No spans recorded."
+
+
+def _worker_only_function():
+    return sum(range(1000))
+
+
+def test_run_profiler_includes_worker_threads(tmp_path):
+    profiler = RunProfiler()
+    profiler.start()
+    worker = threading.Thread(target=_worker_only_function)
+    worker.start()
+    worker.join()
+    profiler.stop()
+
+    path = tmp_path / "run.pstats"
+    profiler.dump(str(path))
+
+    functions = {func[2] for func in pstats.Stats(str(path)).stats}
+    assert "_worker_only_function" in functions
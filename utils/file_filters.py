@@ -10,6 +10,9 @@ EXCLUDED_EXTENSIONS = {ext.lower() for ext in {".jpg", ".jpeg", ".png", ".gif",
 EXCLUDED_KEYWORDS = {kw.lower() for kw in {"sample", "screens", "thumbs.db", ".ds_store"}}
 EXCLUDED_FILENAMES = {fn.lower() for fn in {"desktop.ini", "thumbs.db", ".DS_Store", "screens", "screenshots", "sample", "samples"}}
 
+# Suffixes of in-progress downloads (see services/sftp_transfer.py); these must never be routed
+PARTIAL_DOWNLOAD_SUFFIXES = (".part", ".part.json", ".part.json.tmp")
+
 # Regex for Illegal characters in file/directory names (excluding path separators)
 ILLEGAL_CHARS_REGEX = re.compile(r'[<>:"|?*]+')
 
@@ -34,6 +37,18 @@ def is_valid_media_file(filepath: str) -> bool:
         ext in EXCLUDED_EXTENSIONS
     )
 
+def is_partial_download(filepath: str) -> bool:
+    """
+    Returns True if the file is an in-progress download (partial data or its transfer journal).
+
+    Args:
+        filepath (str): Path to the file.
+
+    Returns:
+        bool: True if the file belongs to an unfinished download, False otherwise.
+    """
+    return os.path.basename(filepath).lower().endswith(PARTIAL_DOWNLOAD_SUFFIXES)
+
 def is_valid_directory(dirname: str) -> bool:
     """
     Returns True if the directory is valid for download based on keyword rules.
@@ -12,6 +12,8 @@ import logging
 from utils.episode_updater import refresh_episodes_for_show
 from services.llm_implementations.llm_interface import LLMInterface
 from utils.filename_parser import parse_filename
+from utils.file_filters import is_partial_download
+from services.show_resolver import ShowResolver
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,8 @@ def file_routing(
     dry_run: bool = False,
     llm_service: Optional[LLMInterface] = None,
     llm_confidence_threshold: float = 0.7,
+    resolver: Optional[ShowResolver] = None,
+    fuzzy_threshold: float = 0.0,
 ) -> List[Dict[str, str]]:
     """
     Scan the incoming directory, identify files to route, and move them to their destination paths.
@@ -35,16 +39,25 @@ def file_routing(
         dry_run (bool): If True, simulate actions without moving files.
         llm_service (Optional[LLMInterface]): Optional LLM service for intelligent filename parsing.
         llm_confidence_threshold (float): Minimum confidence to accept LLM result.
+        resolver (Optional[ShowResolver]): Cached show lookups; if None each file queries the database.
+        fuzzy_threshold (float): With a resolver, route names that match no show exactly to the best
+            fuzzy match scoring at least this much (0 disables the fallback).
 
     Returns:
         List[Dict[str, str]]: List of dicts describing routed files.
     """
     logger.info("Starting file routing")
     routed_files = []
+    shows = resolver or db
 
     # Walk the incoming directory tree
     for root, _, files in os.walk(incoming_path):
         for filename in files:
+            # Leave in-progress downloads alone until they are renamed into place
+            if is_partial_download(filename):
+                logger.debug(f"Skipping partial download: {filename}")
+                continue
+
             # Build the full source path
             source_path = os.path.join(root, filename)
 
@@ -65,7 +78,12 @@ def file_routing(
                 continue
 
             # Lookup the show in the database by sys_name or aliases
-            matched_show_row = db.get_show_by_name_or_alias(show_name)
+            matched_show_row = shows.get_show_by_name_or_alias(show_name)
+            if not matched_show_row and resolver is not None and fuzzy_threshold > 0:
+                fuzzy = resolver.best_fuzzy_match(show_name, fuzzy_threshold)
+                if fuzzy:
+                    logger.info(f"Fuzzy matched '{show_name}' to '{fuzzy.matched_name}' (score: {fuzzy.score:.2f})")
+                    matched_show_row = fuzzy.show
             if not matched_show_row:
                 logger.debug(f"No matching show in DB for: {show_name}")
                 continue
@@ -3,11 +3,29 @@ Filename parsing utilities for extracting show metadata from filenames.
 Supports both LLM-based and regex-based parsing methods for use in Sync2NAS.
 """
 import logging
+import re
 from typing import Optional
 from services.llm_implementations.llm_interface import LLMInterface
 
 logger = logging.getLogger(__name__)
 
+# Release CRC32 tags such as "[ABCD1234]" or "(abcd1234)"; the last tag in a name wins
+CRC32_TAG_PATTERN = re.compile(r"[\[(]([0-9A-Fa-f]{8})[\])]")
+
+
+def extract_crc32(filename: str) -> Optional[str]:
+    """
+    Extract the CRC32 tag that fansub releases embed in their filenames.
+
+    Args:
+        filename (str): Filename or path (e.g., "[Group] Show - 01 [1080p][ABCD1234].mkv").
+
+    Returns:
+        Optional[str]: The CRC32 as 8 uppercase hex characters, or None if the name has no tag.
+    """
+    matches = CRC32_TAG_PATTERN.findall(filename or "")
+    return matches[-1].upper() if matches else None
+
 def parse_filename(filename: str, llm_service: Optional[LLMInterface] = None, llm_confidence_threshold: float = 0.7) -> dict:
     """
     Extract show metadata from a filename using LLM or fallback to regex.
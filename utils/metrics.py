@@ -0,0 +1,321 @@
+"""
+Transfer metrics for Sync2NAS in the Prometheus text exposition format.
+
+A small in-process registry of counters, gauges and histograms (no prometheus_client dependency),
+and TransferMetrics, the set recorded by a download run: how long each stage takes (list, diff,
+download, hash, parse, upsert) and how often it fails, bytes and per-file throughput, queue depth
+and wait, active transfers and SFTP sessions, connection retries, and the backlog in front of each
+post-processing stage. The API serves
+render_metrics() at ``/metrics``.
+
+Usage:
+    metrics = get_metrics()
+    with metrics.time_stage("hash"):
+        crc = hashing_service.calculate_crc32(path)
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.tracing import get_tracer
+
+# Seconds; spans sub-millisecond DB writes to half-hour transfers
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+# Bytes per second, 64 KiB/s to 1 GiB/s
+THROUGHPUT_BUCKETS = tuple(float(64 * 1024 * 4 ** i) for i in range(8))
+# Bytes, 1 MiB to 64 GiB
+SIZE_BUCKETS = tuple(float(1024 * 1024 * 4 ** i) for i in range(9))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    """A named metric family; one series per combination of label values."""
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _pairs(self, key: Tuple[str, ...]) -> List[Tuple[str, str]]:
+        return list(zip(self.labelnames, key))
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self._pairs(k))} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track(self, amount: float = 1, **labels: str) -> Iterator[None]:
+        """Add ``amount`` while the block runs."""
+        self.inc(amount, **labels)
+        try:
+            yield
+        finally:
+            self.dec(amount, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self._pairs(k))} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # Per series: [count per bucket..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return sum(series[0]) if series else 0
+
+    def sum(self, **labels: str) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[1][0] if series else 0.0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._series.items())
+        for key, (counts, total) in items:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+class TransferMetrics:
+    """
+    Metrics recorded while listing, downloading and recording remote files.
+
+    Attributes:
+        stage_duration (Histogram): Seconds per stage call, labelled ``stage``.
+        stage_failures (Counter): Failed stage calls, labelled ``stage``.
+        bytes_downloaded (Counter): Bytes fetched from the remote server.
+        throughput (Histogram): Per-file download rate in bytes/s.
+        file_size (Histogram): Size of each downloaded file.
+        queue_depth (Gauge): Downloads scheduled but not yet started.
+        queue_wait (Histogram): Seconds a download waited between scheduling and starting.
+        transfers_active (Gauge): Downloads in progress.
+        inflight_bytes (Gauge): Bytes reserved by downloads in progress (see TransferScheduler).
+        sessions_active (Gauge): SFTP worker sessions open.
+        retries (Counter): SFTP operations retried after a connection error, labelled ``operation``.
+        stage_backlog (Gauge): Finished downloads waiting for a post-processing stage, labelled ``stage``.
+    """
+
+    STAGES = ("list", "diff", "download", "hash", "parse", "upsert")
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.stage_duration = r.histogram(
+            "sync2nas_stage_duration_seconds", "Duration of transfer pipeline stages", ["stage"])
+        self.stage_failures = r.counter(
+            "sync2nas_stage_failures_total", "Failed transfer pipeline stage calls", ["stage"])
+        self.bytes_downloaded = r.counter(
+            "sync2nas_transfer_bytes_total", "Bytes downloaded from the remote server")
+        self.throughput = r.histogram(
+            "sync2nas_transfer_throughput_bytes_per_second", "Per-file download throughput",
+            buckets=THROUGHPUT_BUCKETS)
+        self.file_size = r.histogram(
+            "sync2nas_transfer_file_size_bytes", "Size of downloaded files", buckets=SIZE_BUCKETS)
+        self.queue_depth = r.gauge(
+            "sync2nas_transfer_queue_depth", "Downloads scheduled but not started")
+        self.queue_wait = r.histogram(
+            "sync2nas_transfer_queue_wait_seconds", "Time downloads wait between scheduling and starting")
+        self.transfers_active = r.gauge(
+            "sync2nas_transfers_active", "Downloads in progress")
+        self.inflight_bytes = r.gauge(
+            "sync2nas_transfer_inflight_bytes", "Bytes reserved by downloads in progress")
+        self.sessions_active = r.gauge(
+            "sync2nas_sftp_sessions_active", "Open SFTP worker sessions")
+        self.retries = r.counter(
+            "sync2nas_sftp_retries_total", "SFTP operations retried after connection errors", ["operation"])
+        self.stage_backlog = r.gauge(
+            "sync2nas_pipeline_stage_backlog", "Finished downloads waiting for a post-processing stage", ["stage"])
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        """Record the block's duration under ``stage``, and a failure if it raises; also a tracing span."""
+        start = time.perf_counter()
+        try:
+            with get_tracer().span(stage):
+                yield
+        except BaseException:
+            self.stage_failures.inc(stage=stage)
+            raise
+        finally:
+            self.stage_duration.observe(time.perf_counter() - start, stage=stage)
+
+    def record_transfer(self, result) -> None:
+        """Record a finished download from its TransferResult."""
+        self.bytes_downloaded.inc(result.bytes_transferred)
+        self.file_size.observe(result.bytes_transferred + result.bytes_resumed)
+        if result.elapsed_seconds > 0:
+            self.throughput.observe(result.bytes_per_second)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+_default_metrics: Optional[TransferMetrics] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> TransferMetrics:
+    """Return the process-wide TransferMetrics, creating it on first use."""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = TransferMetrics()
+        return _default_metrics
+
+
+def set_metrics(metrics: Optional[TransferMetrics]) -> None:
+    """Replace the process-wide TransferMetrics (None starts a fresh set on next use)."""
+    global _default_metrics
+    with _default_lock:
+        _default_metrics = metrics
+
+
+def render_metrics() -> str:
+    """Render the process-wide metrics in the Prometheus text format."""
+    return get_metrics().render()
@@ -0,0 +1,315 @@
+"""
+Thread-safe token-bucket rate limiting for Sync2NAS I/O.
+
+Used to cap the bandwidth of background work (library verification, transfers) so it doesn't
+starve other consumers of the same disks or network link. Download bandwidth can also follow a
+time-of-day schedule (RateSchedule) that is applied while transfers are running.
+"""
+import asyncio
+import datetime
+import logging
+import re
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often a running BandwidthLimiter re-evaluates its schedule
+SCHEDULE_CHECK_SECONDS = 30.0
+
+
+class TokenBucket:
+    """
+    Token bucket shared by any number of threads.
+
+    Tokens (bytes) refill continuously at ``rate`` per second up to ``burst``. consume() blocks
+    until enough tokens are available; a rate of None or 0 disables limiting.
+
+    Attributes:
+        rate (Optional[float]): Refill rate in tokens per second (None/0 = unlimited).
+        burst (float): Bucket capacity; defaults to one second's worth of tokens.
+
+    Methods:
+        consume(amount): Block until ``amount`` tokens have been taken.
+        reserve(amount): Take ``amount`` tokens now and return how long the caller should wait.
+        set_rate(rate, burst): Change the rate while consumers are running.
+    """
+
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None) -> None:
+        self._cond = threading.Condition()
+        self.rate: Optional[float] = None
+        self.burst = 0.0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate, burst)
+
+    def __str__(self) -> str:
+        return f"TokenBucket(rate={self.rate}, burst={self.burst})"
+
+    @property
+    def unlimited(self) -> bool:
+        return not self.rate
+
+    def set_rate(self, rate: Optional[float], burst: Optional[float] = None) -> None:
+        """Change the refill rate; blocked consumers pick up the new rate immediately."""
+        with self._cond:
+            self._refill_locked()
+            self.rate = rate if rate and rate > 0 else None
+            self.burst = float(burst) if burst else float(self.rate or 0)
+            self._tokens = min(self._tokens, self.burst) if self.rate else 0.0
+            self._cond.notify_all()
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def consume(self, amount: float) -> None:
+        """
+        Take ``amount`` tokens, sleeping until they are available.
+
+        Requests larger than the burst size are allowed; they drive the balance negative so the
+        caller's long-run average still matches the rate.
+        """
+        if amount <= 0:
+            return
+        with self._cond:
+            while True:
+                if not self.rate:
+                    return
+                self._refill_locked()
+                if self._tokens > 0:
+                    self._tokens -= amount
+                    return
+                self._cond.wait(max(-self._tokens / self.rate, 0.001))
+
+    def reserve(self, amount: float) -> float:
+        """
+        Non-blocking form of consume() for coroutines: take ``amount`` tokens immediately and return
+        the seconds to sleep before using them (the time until any existing debt is repaid).
+        """
+        if amount <= 0:
+            return 0.0
+        with self._cond:
+            if not self.rate:
+                return 0.0
+            self._refill_locked()
+            wait = max(0.0, -self._tokens / self.rate)
+            self._tokens -= amount
+            return wait
+
+
+_WINDOW_RE = re.compile(r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\S+)$")
+
+
+class RateSchedule:
+    """
+    Time-of-day bandwidth windows, e.g. ``08:00-23:00=50, 23:00-08:00=0``.
+
+    Each window is ``HH:MM-HH:MM=<MiB/s>``; windows may wrap past midnight and the end time is
+    exclusive. A rate of ``0`` or ``unlimited`` lifts the limit. The first matching window wins.
+
+    Methods:
+        parse(spec): Build a schedule from its string form.
+        rate_at(when): Return (matched, bytes per second) for a moment in time.
+    """
+
+    def __init__(self, windows: List[Tuple[int, int, Optional[float]]]) -> None:
+        # (start minute, end minute, bytes per second or None)
+        self.windows = windows
+
+    def __str__(self) -> str:
+        def fmt(minute: int) -> str:
+            return f"{minute // 60:02d}:{minute % 60:02d}"
+
+        return ", ".join(
+            f"{fmt(start)}-{fmt(end)}={rate / 1048576:g}" if rate else f"{fmt(start)}-{fmt(end)}=unlimited"
+            for start, end, rate in self.windows
+        )
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateSchedule":
+        """
+        Parse a comma- or semicolon-separated list of windows.
+
+        Raises:
+            ValueError: If a window is malformed.
+        """
+        windows = []
+        for part in re.split(r"[,;]", spec or ""):
+            part = part.strip()
+            if not part:
+                continue
+            match = _WINDOW_RE.match(part)
+            if not match:
+                raise ValueError(f"Invalid bandwidth window '{part}'; expected HH:MM-HH:MM=<MiB/s>")
+            h1, m1, h2, m2, rate_text = match.groups()
+            start, end = int(h1) * 60 + int(m1), int(h2) * 60 + int(m2)
+            if not (0 <= start <= 24 * 60 and 0 <= end <= 24 * 60 and int(m1) < 60 and int(m2) < 60):
+                raise ValueError(f"Invalid time in bandwidth window '{part}'")
+            if rate_text.lower() in ("unlimited", "none", "off"):
+                rate = None
+            else:
+                try:
+                    mib = float(rate_text)
+                except ValueError:
+                    raise ValueError(f"Invalid rate in bandwidth window '{part}'") from None
+                if mib < 0:
+                    raise ValueError(f"Negative rate in bandwidth window '{part}'")
+                rate = mib * 1024 * 1024 if mib else None
+            windows.append((start % (24 * 60), end % (24 * 60), rate))
+        return cls(windows)
+
+    def rate_at(self, when: datetime.datetime) -> Tuple[bool, Optional[float]]:
+        """Return (True, rate) for the first window containing ``when``, else (False, None)."""
+        minute = when.hour * 60 + when.minute
+        for start, end, rate in self.windows:
+            if start == end or (start < end and start <= minute < end) or (start > end and (minute >= start or minute < end)):
+                return True, rate
+        return False, None
+
+
+class BandwidthLimiter:
+    """
+    Download bandwidth shared by every concurrent transfer.
+
+    All transfers draw from one global TokenBucket. When a per-file cap is set, each file also
+    draws from its own bucket. The global rate follows ``schedule`` where a window matches, and
+    ``max_bytes_per_second`` otherwise. While data is flowing the schedule is re-checked every
+    SCHEDULE_CHECK_SECONDS and the new rate is applied to running transfers in place.
+
+    Attributes:
+        max_bytes_per_second (Optional[float]): Global cap outside scheduled windows (None = unlimited).
+        per_file_bytes_per_second (Optional[float]): Cap for each individual file (None = unlimited).
+        schedule (Optional[RateSchedule]): Time-of-day overrides of the global cap.
+
+    Methods:
+        throttle_for_file(): Return the FileThrottle one transfer uses to pay for the bytes it reads.
+        async_throttle_for_file(): Awaitable version of throttle_for_file() for asyncio transfers.
+        refresh(): Apply the scheduled rate now.
+    """
+
+    def __init__(
+        self,
+        max_bytes_per_second: Optional[float] = None,
+        per_file_bytes_per_second: Optional[float] = None,
+        schedule: Optional[RateSchedule] = None,
+        clock: Callable[[], datetime.datetime] = datetime.datetime.now,
+    ) -> None:
+        self.max_bytes_per_second = max_bytes_per_second or None
+        self.per_file_bytes_per_second = per_file_bytes_per_second or None
+        self.schedule = schedule if schedule and schedule.windows else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bucket = TokenBucket(self.scheduled_rate())
+        self._next_check = time.monotonic() + SCHEDULE_CHECK_SECONDS
+
+    def __str__(self) -> str:
+        def fmt(rate: Optional[float]) -> str:
+            return f"{rate / 1048576:g} MiB/s" if rate else "unlimited"
+
+        text = f"BandwidthLimiter(global={fmt(self.max_bytes_per_second)}, per_file={fmt(self.per_file_bytes_per_second)}"
+        return text + (f", schedule={self.schedule})" if self.schedule else ")")
+
+    @property
+    def enabled(self) -> bool:
+        """True if any limit or schedule is configured."""
+        return bool(self.max_bytes_per_second or self.per_file_bytes_per_second or self.schedule)
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Global rate currently in force (None = unlimited)."""
+        return self._bucket.rate
+
+    def scheduled_rate(self) -> Optional[float]:
+        """Global rate the schedule calls for right now."""
+        if self.schedule is not None:
+            matched, rate = self.schedule.rate_at(self._clock())
+            if matched:
+                return rate
+        return self.max_bytes_per_second
+
+    def refresh(self) -> None:
+        """Apply the scheduled rate; blocked transfers pick it up immediately."""
+        rate = self.scheduled_rate()
+        if rate != self._bucket.rate:
+            logger.info(
+                "Download bandwidth now %s",
+                f"{rate / 1048576:g} MiB/s" if rate else "unlimited",
+            )
+            self._bucket.set_rate(rate)
+
+    def _check_schedule(self) -> None:
+        if self.schedule is not None and time.monotonic() >= self._next_check:
+            with self._lock:
+                if time.monotonic() >= self._next_check:
+                    self._next_check = time.monotonic() + SCHEDULE_CHECK_SECONDS
+                    self.refresh()
+
+    def consume(self, amount: float) -> None:
+        """Take ``amount`` bytes from the global budget, re-checking the schedule when it is due."""
+        self._check_schedule()
+        self._bucket.consume(amount)
+
+    def reserve(self, amount: float) -> float:
+        """Like consume() but returns the seconds to wait instead of sleeping (see TokenBucket.reserve)."""
+        self._check_schedule()
+        return self._bucket.reserve(amount)
+
+    def throttle_for_file(self) -> Optional["FileThrottle"]:
+        """
+        Return the FileThrottle a single transfer (all of its segments) calls with each block size,
+        or None when no limit is configured.
+        """
+        if not self.enabled:
+            return None
+        return FileThrottle(self, self.per_file_bytes_per_second)
+
+    def async_throttle_for_file(self) -> Optional[Callable[[float], Awaitable[None]]]:
+        """
+        Coroutine form of throttle_for_file(): the returned callable is awaited with each block size
+        and sleeps on the event loop instead of blocking a thread.
+        """
+        if not self.enabled:
+            return None
+        file_bucket = TokenBucket(self.per_file_bytes_per_second) if self.per_file_bytes_per_second else None
+
+        async def throttle(amount: float) -> None:
+            if file_bucket is not None:
+                delay = file_bucket.reserve(amount)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            delay = self.reserve(amount)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        return throttle
+
+
+class FileThrottle:
+    """
+    Callable one transfer pays for its bytes with: ``throttle(n)`` draws ``n`` bytes from the file's
+    own bucket (when a per-file cap is set) and then from the limiter's global budget.
+
+    Attributes:
+        limited (bool): True while a finite rate applies to this file. A schedule window can lift or
+            impose the global limit mid-transfer, so transfers re-check this for every block.
+    """
+
+    def __init__(self, limiter: BandwidthLimiter, per_file_bytes_per_second: Optional[float] = None) -> None:
+        self._limiter = limiter
+        self._file_bucket = TokenBucket(per_file_bytes_per_second) if per_file_bytes_per_second else None
+
+    def __call__(self, amount: float) -> None:
+        if self._file_bucket is not None:
+            self._file_bucket.consume(amount)
+        self._limiter.consume(amount)
+
+    @property
+    def limited(self) -> bool:
+        if self._file_bucket is not None:
+            return True
+        self._limiter._check_schedule()
+        return self._limiter.rate is not None
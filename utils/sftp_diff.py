@@ -0,0 +1,63 @@
+"""
+Streaming diff of remote SFTP listings against downloaded_files.
+
+Listing entries are consumed in batches and each batch is checked with one indexed lookup on
+``downloaded_files.remote_path``, so new entries are emitted as the listing is read. Nothing is
+staged in ``sftp_temp_files``, and neither the listing nor the set of known paths has to be held
+in memory all at once.
+"""
+import logging
+from typing import Any, Dict, Iterable, Iterator, List
+
+from services.db_implementations.db_interface import DatabaseInterface
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIFF_BATCH_SIZE = 500
+
+
+def entry_remote_path(entry: Dict[str, Any]) -> str:
+    """Return the remote path of a listing entry (``remote_path``, or legacy ``path``)."""
+    return entry.get("remote_path") or entry.get("path")
+
+
+def _new_in_batch(db: DatabaseInterface, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    known = db.get_known_remote_paths([entry_remote_path(e) for e in batch])
+    return [e for e in batch if entry_remote_path(e) not in known]
+
+
+def iter_new_remote_entries(
+    db: DatabaseInterface,
+    entries: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_DIFF_BATCH_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield listing entries whose remote path is not yet recorded in downloaded_files.
+
+    Equivalent to staging the listing in sftp_temp_files and running get_sftp_diffs(), but
+    ``entries`` may be a generator (e.g. SFTPService.iter_remote_files_recursive) and results are
+    produced one batch at a time.
+
+    Args:
+        db (DatabaseInterface): Database to probe.
+        entries (Iterable[Dict[str, Any]]): Listing entries with a ``remote_path`` (or ``path``).
+        batch_size (int): Entries checked per database round trip.
+
+    Yields:
+        Dict[str, Any]: New entries, in listing order.
+    """
+    batch_size = max(1, batch_size)
+    batch: List[Dict[str, Any]] = []
+    checked = new = 0
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            fresh = _new_in_batch(db, batch)
+            checked, new = checked + len(batch), new + len(fresh)
+            batch = []
+            yield from fresh
+    if batch:
+        fresh = _new_in_batch(db, batch)
+        checked, new = checked + len(batch), new + len(fresh)
+        yield from fresh
+    logger.debug(f"SFTP diff checked {checked} entries; {new} new.")
@@ -1,11 +1,24 @@
 """
 SFTP orchestrator utilities for processing SFTP diffs, downloading files, and bootstrapping file tables.
+
+The ``*_async`` variants drive an AsyncSFTPService (``[sftp] backend = asyncssh``) with coroutines
+instead of worker threads; planning, filtering and database bookkeeping are shared with the
+threaded versions.
 """
+import asyncio
 import os
 import logging
 import datetime
-from typing import List, Dict, Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Dict, Optional, Tuple
 from services.sftp_service import SFTPService
+from services.sftp_transfer import TransferResult
+from services.job_manager import JobProgress
+from services.transfer_scheduler import TransferJob, TransferScheduler
+from services.transfer_pipeline import PipelineSettings, Stage, StagePipeline, WriteBehindBuffer
+from services.transfer_planner import DEFAULT_HISTORY_RUNS, TransferPlan, free_space, summarize_throughput
 from services.db_implementations.db_interface import DatabaseInterface
 from utils.file_filters import is_valid_media_file, is_valid_directory
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -13,9 +26,355 @@ from pathlib import Path
 from models.downloaded_file import DownloadedFile
 from services.hashing_service import HashingService
 from utils.filename_parser import parse_filename
+from utils.sftp_diff import iter_new_remote_entries
+from utils.metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class _Finished:
+    """A job whose download has ended, on its way through the post-processing stages."""
+    job: TransferJob
+    result: Any = None
+    error: Optional[BaseException] = None
+    file_model: Optional[DownloadedFile] = None
+
+
+class _DiffDownload:
+    """
+    Jobs and database bookkeeping for one process_sftp_diffs run.
+
+    Used by both the thread pool and the asyncio runner: classify() turns diffs into file jobs and
+    the directories still to be planned, and add_dir() schedules a planned directory. Each
+    finished download goes through pipeline(): hash() builds the file record and its CRC32,
+    parse() adds show/season/episode from the filename, and persist() queues it for a batched
+    database write (its directory is recorded once all of its files are). With a JobProgress, planned jobs and
+    finished files are reported to it as they happen. Stage durations, queue depth and wait, and
+    transfer sizes go to the process-wide TransferMetrics; record_run() stores the run's overall
+    throughput for later transfer plans.
+    """
+
+    def __init__(
+        self,
+        db_service: DatabaseInterface,
+        remote_base: str,
+        local_base: str,
+        llm_service=None,
+        hashing_service: Optional[HashingService] = None,
+        parse_filenames: bool = True,
+        use_llm: bool = True,
+        llm_confidence_threshold: float = 0.7,
+        progress: Optional[JobProgress] = None,
+    ) -> None:
+        self.db_service = db_service
+        self.remote_base = remote_base
+        self.local_base = local_base
+        self.llm_service = llm_service
+        self.hashing_service = hashing_service
+        self.parse_filenames = parse_filenames
+        self.use_llm = use_llm
+        self.llm_confidence_threshold = llm_confidence_threshold
+        self.progress = progress
+        self.metrics = get_metrics()
+        self.jobs: List[TransferJob] = []
+        self.dir_states: Dict[str, Dict] = {}
+        self._scheduled_at: Optional[float] = None
+        # persist() may run on several threads
+        self._lock = threading.Lock()
+        self._writer: Optional[WriteBehindBuffer] = None
+        self._files_transferred = 0
+        self._bytes_transferred = 0
+
+    def log_config(self, workers: int) -> None:
+        logger.info(
+            "SFTP processing config: parse_filenames=%s, use_llm=%s, llm_confidence_threshold=%.2f, max_workers=%d",
+            self.parse_filenames,
+            self.use_llm,
+            self.llm_confidence_threshold,
+            workers,
+        )
+        if not self.parse_filenames:
+            logger.info("Filename parsing is disabled; show/season/episode will not be populated.")
+        elif not self.use_llm or self.llm_service is None:
+            logger.info("LLM parsing disabled or unavailable; regex fallback will be used for filename parsing.")
+
+    def classify(self, diffs: List[Dict], dry_run: bool) -> List[Tuple[Dict, str, str]]:
+        """Queue loose files as jobs; return (entry, remote_path, local_path) for directories to plan."""
+        directories = []
+        for entry in diffs:
+            name = entry["name"]
+            remote_path = entry.get("remote_path") or entry.get("path")
+            relative_path = os.path.relpath(remote_path, self.remote_base)
+            local_path = os.path.join(self.local_base, relative_path)
+            entry['fetched_at'] = datetime.datetime.now()
+
+            if entry["is_dir"]:
+                if not is_valid_directory(name):
+                    logger.info(f"Skipping directory due to filter: {name}")
+                    continue
+                if dry_run:
+                    logger.info(f"DRY RUN - Would download DIR: {remote_path} -> {local_path}")
+                    continue
+                logger.info(f"Listing DIR for download: {remote_path} -> {local_path}")
+                directories.append((entry, remote_path, local_path))
+            else:
+                if not is_valid_media_file(name):
+                    logger.info(f"Skipping file due to filter: {name}")
+                    continue
+                if dry_run:
+                    logger.info(f"DRY RUN - Would download FILE: {remote_path} -> {local_path}")
+                    continue
+                self.jobs.append(TransferJob(remote_path, local_path, int(entry.get("size") or 0), entry))
+        return directories
+
+    def add_dir(self, entry: Dict, remote_path: str, local_path: str, planned: List[Dict]) -> None:
+        """Schedule the files plan_dir_download found in a new directory."""
+        self.dir_states[remote_path] = {"entry": entry, "local_path": local_path, "planned": len(planned), "remaining": len(planned), "downloaded": 0}
+        for item in planned:
+            item.setdefault("fetched_at", entry["fetched_at"])
+            self.jobs.append(TransferJob(item["remote_path"], item["local_path"], int(item.get("size") or 0), item, remote_path))
+
+    def record_empty_dirs(self) -> None:
+        # Directories with nothing to fetch are complete already
+        for remote_path, state in self.dir_states.items():
+            if state["remaining"] == 0:
+                self._record_dir(remote_path, state)
+        if self.progress is not None:
+            self.progress.plan(len(self.jobs), sum(job.size for job in self.jobs))
+
+    def scheduled(self) -> None:
+        """Count every job as queued; each leaves the queue when start() is called for it."""
+        self._scheduled_at = time.monotonic()
+        self.metrics.queue_depth.inc(len(self.jobs))
+
+    def start(self, job: TransferJob) -> None:
+        """Note that a scheduled job's transfer has begun."""
+        self.metrics.queue_depth.dec()
+        if self._scheduled_at is not None:
+            self.metrics.queue_wait.observe(time.monotonic() - self._scheduled_at)
+
+    def transferred(self, result: Any) -> None:
+        if isinstance(result, TransferResult):
+            self.metrics.record_transfer(result)
+            with self._lock:
+                self._files_transferred += 1
+                self._bytes_transferred += result.bytes_transferred
+
+    def record_run(self, workers: int) -> None:
+        """Store the bytes moved since scheduled() and the time taken, for plan_download_from_remote's estimates."""
+        if self._scheduled_at is None or self._bytes_transferred <= 0:
+            return
+        elapsed = time.monotonic() - self._scheduled_at
+        try:
+            self.db_service.add_transfer_run(self._files_transferred, self._bytes_transferred, elapsed, workers)
+        except Exception as e:
+            logger.warning(f"Could not record transfer run history: {e}")
+
+    def pipeline(self, settings: PipelineSettings) -> StagePipeline:
+        """Post-processing stages for finished downloads; submit a _Finished per job."""
+        self._writer = WriteBehindBuffer(self._write_batch, settings.batch_size, settings.batch_seconds)
+        return StagePipeline(
+            [
+                Stage("hash", self.hash, settings.hash_workers),
+                Stage("parse", self.parse, settings.parse_workers),
+                # The last batch is written once every persist worker has finished
+                Stage("persist", self.persist, settings.persist_workers, on_drained=self._writer.close),
+            ],
+            queue_size=settings.queue_size,
+            on_error=self._stage_failed,
+        )
+
+    def hash(self, item: _Finished) -> _Finished:
+        """Build the file's DownloadedFile and its CRC32 (from the transfer, or by reading the file)."""
+        if item.error is not None:
+            return item
+        job, result, hashing_service = item.job, item.result, self.hashing_service
+        remote_path, local_path = job.remote_path, job.local_path
+        # Directory contents are only recorded if the local file actually exists; otherwise the
+        # job fails and stays unrecorded so the next run downloads it again
+        if job.parent is not None and not os.path.isfile(local_path):
+            logger.warning(f"Local file not found for {remote_path}; not recording it.")
+            item.error = FileNotFoundError(f"Local file not found after download: {local_path}")
+            return item
+        try:
+            file_model = DownloadedFile.from_sftp_entry(
+                {**job.entry, "path": remote_path, "local_path": local_path},
+                base_path=self.local_base,
+            )
+        except Exception as repo_exc:
+            logger.warning(f"Could not build the DownloadedFile record for FILE {remote_path}: {repo_exc}")
+            return item
+        # Prefer the CRC32 computed while the file streamed in; re-read only as a fallback
+        transfer_hashes = result.hashes if isinstance(result, TransferResult) else None
+        if file_model.apply_transfer_hashes(transfer_hashes):
+            logger.debug(f"Using CRC32 computed during transfer for {local_path}")
+            if hashing_service is not None:
+                hashing_service.record(local_path, transfer_hashes)
+        elif hashing_service is not None:
+            try:
+                hash_start = datetime.datetime.now()
+                with self.metrics.time_stage("hash"):
+                    crc = hashing_service.calculate_crc32(local_path)
+                hash_end = datetime.datetime.now()
+                file_model.file_hash = crc
+                file_model.file_hash_algo = "CRC32"
+                file_model.hash_calculated_at = hash_end
+                hash_secs = (hash_end - hash_start).total_seconds()
+                logger.info(f"CRC32 computed for {local_path} in {hash_secs:.2f}s")
+            except Exception as h_exc:
+                logger.warning(f"CRC32 compute failed for {local_path}: {h_exc}")
+        item.file_model = file_model
+        return item
+
+    def parse(self, item: _Finished) -> _Finished:
+        """Populate show/season/episode from the filename."""
+        if item.file_model is not None and self.parse_filenames:
+            self._apply_filename_metadata(item.file_model)
+        return item
+
+    def persist(self, item: _Finished) -> None:
+        """
+        Queue a file for the next database batch. Failed downloads (including directory contents
+        missing locally) finish now; a loose file whose record could not be built gets a legacy row.
+        """
+        job = item.job
+        if item.error is not None:
+            self._finish(job, item.error)
+        elif item.file_model is None:
+            try:
+                self.db_service.add_downloaded_file({**job.entry, "path": job.remote_path})
+            except Exception as e:
+                self._finish(job, e)
+            else:
+                self._finish(job)
+        else:
+            self._writer.add(item)
+
+    def _write_batch(self, items: List[_Finished]) -> None:
+        """Upsert a batch of files in one transaction, falling back to one at a time if it fails."""
+        errors: List[Optional[BaseException]] = [None] * len(items)
+        start = time.perf_counter()
+        try:
+            with self.metrics.time_stage("upsert"):
+                self.db_service.upsert_downloaded_files([item.file_model for item in items])
+        except Exception as batch_exc:
+            logger.warning(f"Batch upsert of {len(items)} file(s) failed ({batch_exc}); retrying one at a time")
+            for i, item in enumerate(items):
+                try:
+                    with self.metrics.time_stage("upsert"):
+                        self.db_service.upsert_downloaded_file(item.file_model)
+                except Exception as e:
+                    errors[i] = e
+        logger.info(f"Recorded {len(items)} downloaded file(s) in {time.perf_counter() - start:.2f}s")
+        for item, error in zip(items, errors):
+            self._finish(item.job, error)
+
+    def _finish(self, job: TransferJob, error: Optional[BaseException] = None) -> None:
+        """Report a job as done (failed if ``error``) and record its directory once all its files succeeded."""
+        succeeded = error is None
+        if succeeded:
+            logger.info(f"Downloaded FILE: {job.remote_path} -> {job.local_path}")
+        else:
+            logger.error(f"Failed to download FILE {job.remote_path}: {error}", exc_info=error)
+        if self.progress is not None:
+            self.progress.advance(nbytes=job.size if succeeded else 0, failed=not succeeded)
+        state = self.dir_states.get(job.parent) if job.parent is not None else None
+        if state is None:
+            return
+        with self._lock:
+            state["remaining"] -= 1
+            state["downloaded"] += int(succeeded)
+            last = state["remaining"] == 0
+        if not last:
+            return
+        if state["downloaded"] == state["planned"]:
+            self._record_dir(job.parent, state)
+        else:
+            # Leave the directory unrecorded so the next run plans it (and its failed files) again
+            logger.warning(
+                f"Not recording DIR {job.parent}: {state['planned'] - state['downloaded']} of "
+                f"{state['planned']} file(s) failed; it will be retried next run"
+            )
+
+    def _stage_failed(self, item: _Finished, error: BaseException) -> None:
+        # An unexpected error in hash() or parse(); leave the file unrecorded so the next run retries it
+        self._finish(item.job, error)
+
+    def _apply_filename_metadata(self, file_model: DownloadedFile) -> None:
+        # Parse filename to populate show/season/episode
+        use_llm, active_llm_service = self.use_llm, self.llm_service
+        llm_confidence_threshold = self.llm_confidence_threshold
+        try:
+            with self.metrics.time_stage("parse"):
+                metadata = parse_filename(
+                    file_model.name,
+                    llm_service=active_llm_service if use_llm else None,
+                    llm_confidence_threshold=llm_confidence_threshold,
+                )
+            file_model.show_name = metadata.get("show_name")
+            file_model.season = metadata.get("season")
+            file_model.episode = metadata.get("episode")
+            file_model.confidence = metadata.get("confidence")
+            file_model.reasoning = metadata.get("reasoning")
+            # Normalize and store filename-provided CRC32 if present
+            parsed_hash = metadata.get("crc32") or metadata.get("hash")
+            if parsed_hash and metadata.get("hash") and not metadata.get("crc32"):
+                logger.debug(f"Using legacy 'hash' field for {file_model.name} - consider updating to 'crc32'")
+            if isinstance(parsed_hash, str):
+                trimmed = parsed_hash.strip()
+                if trimmed.startswith("[") and trimmed.endswith("]"):
+                    trimmed = trimmed[1:-1]
+                trimmed = trimmed.strip().upper()
+                if len(trimmed) == 8 and all(c in "0123456789ABCDEF" for c in trimmed):
+                    file_model.file_provided_hash_value = trimmed
+            method = (
+                "LLM"
+                if (
+                    use_llm
+                    and active_llm_service is not None
+                    and file_model.confidence is not None
+                    and file_model.confidence >= llm_confidence_threshold
+                )
+                else "regex"
+            )
+            def _fmt_num(value):
+                try:
+                    return f"{int(value):02d}"
+                except Exception:
+                    return "??"
+            s_display = _fmt_num(file_model.season)
+            e_display = _fmt_num(file_model.episode)
+            logger.info(
+                "Parsed '%s' via %s: show='%s' S%s E%s (confidence=%.2f)",
+                file_model.name,
+                method,
+                file_model.show_name,
+                s_display,
+                e_display,
+                (file_model.confidence if file_model.confidence is not None else 0.0),
+            )
+            logger.debug("Parsing details for '%s': %s", file_model.name, metadata)
+        except Exception as p_exc:
+            logger.warning(f"Filename parsing failed for {file_model.name}: {p_exc}")
+
+    def _record_dir(self, remote_path: str, state: Dict) -> None:
+        entry, local_path = state["entry"], state["local_path"]
+        try:
+            self.db_service.add_downloaded_file({**entry, "path": remote_path})
+            try:
+                dir_model = DownloadedFile.from_sftp_entry(
+                    {**entry, "path": remote_path, "local_path": local_path},
+                    base_path=self.local_base,
+                )
+                self.db_service.upsert_downloaded_file(dir_model)
+            except Exception as repo_exc:
+                logger.warning(f"DownloadedFile upsert failed for DIR {remote_path}: {repo_exc}")
+            logger.info(f"Downloaded DIR: {remote_path} -> {local_path} with {state['downloaded']} file(s)")
+        except Exception as e:
+            logger.exception(f"Failed to record DIR {remote_path}: {e}")
+
+
 def process_sftp_diffs(
     sftp_service: SFTPService,
     db_service: DatabaseInterface,
@@ -29,10 +388,19 @@ def process_sftp_diffs(
     parse_filenames: bool = True,
     use_llm: bool = True,
     llm_confidence_threshold: float = 0.7,
+    scheduler: Optional[TransferScheduler] = None,
+    progress: Optional[JobProgress] = None,
+    pipeline: Optional[PipelineSettings] = None,
 ) -> None:
     """
     Process a list of SFTP diffs: download new files or directories and record them.
-    Now supports concurrent file downloads using a thread pool.
+    New directories are listed first and their files are scheduled together with loose files.
+    All downloads run on one thread pool. The scheduler sets their start order (by size) and caps
+    concurrent transfers and in-flight bytes. Worker sessions come from the SFTP service's
+    connection pool when one is configured. Each finished download is handed to the hash, parse
+    and persist stages, which run on their own threads, so slow filename parsing never holds up
+    transfers. A directory is recorded once all its files succeed; if any fail it is
+    left unrecorded so the next run plans it again.
     
         Args:
         sftp_service (SFTPService): SFTP service instance.
@@ -42,311 +410,145 @@ def process_sftp_diffs(
         local_base (str): Root local path.
         dry_run (bool): If True, perform no download or DB writes.
         llm_service: Optional LLM service for directory name suggestions.
-        max_workers (int): Number of concurrent download threads for files.
+        max_workers (int): Number of concurrent downloads when no scheduler is given.
+        scheduler (Optional[TransferScheduler]): Global ordering and concurrency limits; defaults to
+            smallest-first with max_workers concurrent transfers and no byte limit.
+        progress (Optional[JobProgress]): Receives the planned downloads and each finished one.
+        pipeline (Optional[PipelineSettings]): Worker counts and queue size for the post-download stages.
     Returns:
         None
     """
-    # Extract SFTP connection parameters from the provided sftp_service
-    sftp_params = {
-        "host": sftp_service.host,
-        "port": sftp_service.port,
-        "username": sftp_service.username,
-        "ssh_key_path": sftp_service.ssh_key_path,
-        "llm_service": sftp_service.llm_service,
-    }
     # Determine effective LLM service
     active_llm_service = llm_service or getattr(sftp_service, "llm_service", None)
-    logger.info(
-        "SFTP processing config: parse_filenames=%s, use_llm=%s, llm_confidence_threshold=%.2f, max_workers=%d",
-        parse_filenames,
-        use_llm,
-        llm_confidence_threshold,
-        max_workers,
+    scheduler = scheduler or TransferScheduler(max_concurrent_transfers=max_workers)
+    workers = scheduler.workers_for(sftp_service)
+    run = _DiffDownload(
+        db_service, remote_base, local_base, active_llm_service, hashing_service,
+        parse_filenames, use_llm, llm_confidence_threshold, progress,
     )
-    if not parse_filenames:
-        logger.info("Filename parsing is disabled; show/season/episode will not be populated.")
-    elif not use_llm or active_llm_service is None:
-        logger.info("LLM parsing disabled or unavailable; regex fallback will be used for filename parsing.")
-
-    def download_file_task(remote_path, local_path):
-        sftp = SFTPService(**sftp_params)
-        with sftp:
+    run.log_config(workers)
+
+    def download_file_task(job: TransferJob):
+        # Each task runs on its own session, leased from the SFTP pool when one is configured
+        run.start(job)
+        with sftp_service.session() as sftp:
             start_ts = datetime.datetime.now()
-            sftp.download_file(remote_path, local_path)
+            with run.metrics.time_stage("download"):
+                result = sftp.download_file(job.remote_path, job.local_path)
+            run.transferred(result)
             duration = (datetime.datetime.now() - start_ts).total_seconds()
-            logger.info(f"Downloaded {remote_path} -> {local_path} in {duration:.2f}s")
-
-    # Separate files and directories
-    file_entries = []
-    dir_entries = []
-    for entry in diffs:
-        name = entry["name"]
-        remote_path = entry.get("remote_path") or entry.get("path")
-        relative_path = os.path.relpath(remote_path, remote_base)
-        local_path = os.path.join(local_base, relative_path)
-        entry['fetched_at'] = datetime.datetime.now()
-
-        if entry["is_dir"]:
-            if not is_valid_directory(name):
-                logger.info(f"Skipping directory due to filter: {name}")
-                continue
-            dir_entries.append((entry, remote_path, local_path))
-        else:
-            if not is_valid_media_file(name):
-                logger.info(f"Skipping file due to filter: {name}")
-                continue
-            file_entries.append((entry, remote_path, local_path))
+            logger.info(f"Downloaded {job.remote_path} -> {job.local_path} in {duration:.2f}s")
+            return result
 
-    # Download directories sequentially (can be parallelized in future)
-    for entry, remote_path, local_path in dir_entries:
-        if dry_run:
-            logger.info(f"DRY RUN - Would download DIR: {remote_path} -> {local_path}")
-            continue
+    # Flatten files and directory contents into one job list
+    for entry, remote_path, local_path in run.classify(diffs, dry_run):
         try:
-            logger.info(f"Starting download of DIR: {remote_path} -> {local_path}")
-            downloaded_items = sftp_service.download_dir(remote_path, local_path, max_workers=max_workers)
-            # Record the directory itself
-            db_service.add_downloaded_file({**entry, "path": entry.get("remote_path") or entry.get("path")})
-            try:
-                dir_model = DownloadedFile.from_sftp_entry(
-                    {**entry, "path": entry.get("remote_path") or entry.get("path"), "local_path": local_path},
-                    base_path=local_base,
-                )
-                db_service.upsert_downloaded_file(dir_model)
-            except Exception as repo_exc:
-                logger.warning(f"DownloadedFile upsert failed for DIR {remote_path}: {repo_exc}")
-
-            # Use actual download results to record directory contents, avoiding remote re-listing
-            try:
-                for itm in (downloaded_items or []):
-                    try:
-                        name_value = itm.get("name")
-                        if not name_value or not str(name_value).strip():
-                            logger.warning(
-                                f"Empty file name in download result for DIR {remote_path}; skipping entry: {itm}"
-                            )
-                            continue
-
-                        local_file_path = itm.get("local_path") or os.path.join(local_path, name_value)
-
-                        # Record minimal entry in downloaded_files for tracking consistency
-                        try:
-                            db_service.add_downloaded_file(
-                                {
-                                    "name": name_value,
-                                    "size": itm["size"],
-                                    "modified_time": itm["modified_time"],
-                                    "is_dir": False,
-                                    "fetched_at": itm.get("fetched_at") or entry.get("fetched_at") or datetime.datetime.now(),
-                                    "path": itm.get("remote_path") or itm.get("path") or itm.get("remote_entry"),
-                                }
-                            )
-                        except Exception as add_exc:
-                            logger.warning(
-                                f"Failed to add downloaded file record for {itm.get('remote_path') or itm.get('path')}: {add_exc}"
-                            )
-
-                        # Only upsert a detailed record if the local file actually exists
-                        if not os.path.exists(local_file_path):
-                            logger.warning(
-                                f"Local file not found for {itm.get('remote_path') or itm.get('path')}; skipping upsert."
-                            )
-                            continue
-                        if os.path.isdir(local_file_path):
-                            logger.warning(
-                                f"Local path points to a directory, not a file: {local_file_path}; skipping upsert."
-                            )
-                            continue
-
-                        file_model = DownloadedFile.from_sftp_entry(
-                            {
-                                "name": name_value,
-                                "remote_path": itm.get("remote_path") or itm.get("path") or itm.get("remote_entry"),
-                                "path": itm.get("remote_path") or itm.get("path") or itm.get("remote_entry"),
-                                "local_path": local_file_path,
-                                "size": itm["size"],
-                                "modified_time": itm["modified_time"],
-                                "is_dir": False,
-                                "fetched_at": itm.get("fetched_at") or entry.get("fetched_at") or datetime.datetime.now(),
-                            },
-                            base_path=local_base,
-                        )
-
-                        # Parse filename to populate show/season/episode if enabled
-                        if parse_filenames:
-                            try:
-                                metadata = parse_filename(
-                                    file_model.name,
-                                    llm_service=active_llm_service if use_llm else None,
-                                    llm_confidence_threshold=llm_confidence_threshold,
-                                )
-                                file_model.show_name = metadata.get("show_name")
-                                file_model.season = metadata.get("season")
-                                file_model.episode = metadata.get("episode")
-                                file_model.confidence = metadata.get("confidence")
-                                file_model.reasoning = metadata.get("reasoning")
-                                # Normalize and store filename-provided CRC32 if present
-                                parsed_hash = metadata.get("crc32") or metadata.get("hash")
-                                if parsed_hash and metadata.get("hash") and not metadata.get("crc32"):
-                                    logger.debug(f"Using legacy 'hash' field for {file_model.name} - consider updating to 'crc32'")
-                                if isinstance(parsed_hash, str):
-                                    trimmed = parsed_hash.strip()
-                                    if trimmed.startswith("[") and trimmed.endswith("]"):
-                                        trimmed = trimmed[1:-1]
-                                    trimmed = trimmed.strip().upper()
-                                    if len(trimmed) == 8 and all(c in "0123456789ABCDEF" for c in trimmed):
-                                        file_model.file_provided_hash_value = trimmed
-
-                                # Detailed parsing logs (mirror single-file path)
-                                method = (
-                                    "LLM"
-                                    if (
-                                        use_llm
-                                        and active_llm_service is not None
-                                        and file_model.confidence is not None
-                                        and file_model.confidence >= llm_confidence_threshold
-                                    )
-                                    else "regex"
-                                )
-                                def _fmt_num(value):
-                                    try:
-                                        return f"{int(value):02d}"
-                                    except Exception:
-                                        return "??"
-                                s_display = _fmt_num(file_model.season)
-                                e_display = _fmt_num(file_model.episode)
-                                logger.info(
-                                    "Parsed '%s' via %s: show='%s' S%s E%s (confidence=%.2f)",
-                                    file_model.name,
-                                    method,
-                                    file_model.show_name,
-                                    s_display,
-                                    e_display,
-                                    (file_model.confidence if file_model.confidence is not None else 0.0),
-                                )
-                                logger.debug("Parsing details for '%s': %s", file_model.name, metadata)
-                            except Exception as p_exc:
-                                logger.warning(f"Filename parsing failed for {file_model.name}: {p_exc}")
-
-                        # Compute CRC32 if hashing_service provided and file exists
-                        if hashing_service is not None:
-                            try:
-                                hash_start = datetime.datetime.now()
-                                crc = hashing_service.calculate_crc32(local_file_path)
-                                hash_end = datetime.datetime.now()
-                                file_model.file_hash = crc
-                                file_model.file_hash_algo = "CRC32"
-                                file_model.hash_calculated_at = hash_end
-                                hash_secs = (hash_end - hash_start).total_seconds()
-                                logger.info(f"CRC32 computed for {local_file_path} in {hash_secs:.2f}s")
-                            except Exception as h_exc:
-                                logger.warning(f"CRC32 compute failed for {local_file_path}: {h_exc}")
-
-                        db_service.upsert_downloaded_file(file_model)
-                    except Exception as inner_exc:
-                        logger.warning(f"Failed to upsert inner file from DIR {remote_path}: {inner_exc}")
-            except Exception as list_exc:
-                logger.warning(f"Failed to record files for DIR {remote_path}: {list_exc}")
-            logger.info(f"Downloaded DIR: {remote_path} -> {local_path} with {len(downloaded_items or [])} file(s)")
+            with run.metrics.time_stage("list"):
+                planned = list(sftp_service.plan_dir_download(remote_path, local_path))
         except Exception as e:
             logger.exception(f"Failed to download DIR {remote_path}: {e}")
-
-    # Download files concurrently
-    if file_entries:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_entry = {}
-            for entry, remote_path, local_path in file_entries:
-                if dry_run:
-                    logger.info(f"DRY RUN - Would download FILE: {remote_path} -> {local_path}")
-                    continue
-                future = executor.submit(download_file_task, remote_path, local_path)
-                future_to_entry[future] = (entry, remote_path, local_path)
-            for future in as_completed(future_to_entry):
-                entry, remote_path, local_path = future_to_entry[future]
+            continue
+        run.add_dir(entry, remote_path, local_path, planned)
+    run.record_empty_dirs()
+
+    # Download everything on one pool, in the scheduler's order and within its limits
+    if run.jobs:
+        settings = pipeline or PipelineSettings()
+        logger.info(f"Scheduling {len(run.jobs)} download(s) on {workers} worker(s): {scheduler}; {settings}")
+        run.scheduled()
+        with run.pipeline(settings) as stages, ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_job = {
+                executor.submit(scheduler.run, job, download_file_task): job
+                for job in scheduler.prioritize(run.jobs)
+            }
+            for future in as_completed(future_to_job):
+                job = future_to_job[future]
                 try:
-                    future.result()
-                    db_service.add_downloaded_file({**entry, "path": entry.get("remote_path") or entry.get("path")})
-                    # Upsert record via DB service
-                    try:
-                        file_model = DownloadedFile.from_sftp_entry(
-                            {**entry, "path": entry.get("remote_path") or entry.get("path"), "local_path": local_path},
-                            base_path=local_base,
-                        )
-                        # Parse filename to populate show/season/episode if enabled
-                        if parse_filenames and not entry.get("is_dir", False):
-                            try:
-                                metadata = parse_filename(
-                                    file_model.name,
-                                    llm_service=active_llm_service if use_llm else None,
-                                    llm_confidence_threshold=llm_confidence_threshold,
-                                )
-                                file_model.show_name = metadata.get("show_name")
-                                file_model.season = metadata.get("season")
-                                file_model.episode = metadata.get("episode")
-                                file_model.confidence = metadata.get("confidence")
-                                file_model.reasoning = metadata.get("reasoning")
-                                # Normalize and store filename-provided CRC32 if present
-                                parsed_hash = metadata.get("crc32") or metadata.get("hash")
-                                if parsed_hash and metadata.get("hash") and not metadata.get("crc32"):
-                                    logger.debug(f"Using legacy 'hash' field for {file_model.name} - consider updating to 'crc32'")
-                                if isinstance(parsed_hash, str):
-                                    trimmed = parsed_hash.strip()
-                                    if trimmed.startswith("[") and trimmed.endswith("]"):
-                                        trimmed = trimmed[1:-1]
-                                    trimmed = trimmed.strip().upper()
-                                    if len(trimmed) == 8 and all(c in "0123456789ABCDEF" for c in trimmed):
-                                        file_model.file_provided_hash_value = trimmed
-                                method = (
-                                    "LLM"
-                                    if (
-                                        use_llm
-                                        and active_llm_service is not None
-                                        and file_model.confidence is not None
-                                        and file_model.confidence >= llm_confidence_threshold
-                                    )
-                                    else "regex"
-                                )
-                                def _fmt_num(value):
-                                    try:
-                                        return f"{int(value):02d}"
-                                    except Exception:
-                                        return "??"
-                                s_display = _fmt_num(file_model.season)
-                                e_display = _fmt_num(file_model.episode)
-                                logger.info(
-                                    "Parsed '%s' via %s: show='%s' S%s E%s (confidence=%.2f)",
-                                    file_model.name,
-                                    method,
-                                    file_model.show_name,
-                                    s_display,
-                                    e_display,
-                                    (file_model.confidence if file_model.confidence is not None else 0.0),
-                                )
-                                logger.debug("Parsing details for '%s': %s", file_model.name, metadata)
-                            except Exception as p_exc:
-                                logger.warning(f"Filename parsing failed for {file_model.name}: {p_exc}")
-                        # Compute CRC32 if hashing_service provided
-                        if hashing_service is not None and not entry.get("is_dir", False):
-                            try:
-                                hash_start = datetime.datetime.now()
-                                crc = hashing_service.calculate_crc32(local_path)
-                                hash_end = datetime.datetime.now()
-                                file_model.file_hash = crc
-                                file_model.file_hash_algo = "CRC32"
-                                file_model.hash_calculated_at = hash_end
-                                hash_secs = (hash_end - hash_start).total_seconds()
-                                logger.info(f"CRC32 computed for {local_path} in {hash_secs:.2f}s")
-                            except Exception as h_exc:
-                                logger.warning(f"CRC32 compute failed for {local_path}: {h_exc}")
-                        upsert_start = datetime.datetime.now()
-                        db_service.upsert_downloaded_file(file_model)
-                        upsert_secs = (datetime.datetime.now() - upsert_start).total_seconds()
-                        logger.info(f"Upserted DownloadedFile for {local_path} in {upsert_secs:.2f}s")
-                    except Exception as repo_exc:
-                        logger.warning(f"DownloadedFile upsert failed for FILE {remote_path}: {repo_exc}")
-                    logger.info(f"Downloaded FILE: {remote_path} -> {local_path}")
+                    result = future.result()
                 except Exception as e:
-                    logger.exception(f"Failed to download FILE {remote_path}: {e}")
+                    stages.submit(_Finished(job, error=e))
+                else:
+                    stages.submit(_Finished(job, result))
+            run.record_run(workers)
+
+
+async def process_sftp_diffs_async(
+    sftp_service,
+    db_service: DatabaseInterface,
+    diffs: List[Dict],
+    remote_base: str,
+    local_base: str,
+    dry_run: bool = False,
+    llm_service=None,
+    max_workers: int = 4,
+    hashing_service: Optional[HashingService] = None,
+    parse_filenames: bool = True,
+    use_llm: bool = True,
+    llm_confidence_threshold: float = 0.7,
+    scheduler: Optional[TransferScheduler] = None,
+    progress: Optional[JobProgress] = None,
+    pipeline: Optional[PipelineSettings] = None,
+) -> None:
+    """
+    Coroutine version of process_sftp_diffs for an AsyncSFTPService.
+
+    Directories are planned and files downloaded as coroutines on the service's single connection;
+    the scheduler's start order, concurrency cap and byte budget apply as in the threaded version
+    (see TransferScheduler.run_async). Finished downloads go through the same post-processing
+    stage threads, so hashing, parsing and database writes stay off the event loop; the remaining
+    database calls (directory rows, run history) run in worker threads too. Arguments and
+    recording are the same as process_sftp_diffs.
+    """
+    active_llm_service = llm_service or getattr(sftp_service, "llm_service", None)
+    scheduler = scheduler or TransferScheduler(max_concurrent_transfers=max_workers)
+    run = _DiffDownload(
+        db_service, remote_base, local_base, active_llm_service, hashing_service,
+        parse_filenames, use_llm, llm_confidence_threshold, progress,
+    )
+    run.log_config(scheduler.max_concurrent_transfers)
+
+    async def download_file_task(job: TransferJob):
+        run.start(job)
+        start_ts = datetime.datetime.now()
+        with run.metrics.time_stage("download"):
+            result = await sftp_service.download_file(job.remote_path, job.local_path)
+        run.transferred(result)
+        duration = (datetime.datetime.now() - start_ts).total_seconds()
+        logger.info(f"Downloaded {job.remote_path} -> {job.local_path} in {duration:.2f}s")
+        return result
+
+    async def attempt(job: TransferJob):
+        try:
+            return job, await scheduler.run_async(job, download_file_task), None
+        except Exception as e:
+            return job, None, e
+
+    for entry, remote_path, local_path in run.classify(diffs, dry_run):
+        try:
+            with run.metrics.time_stage("list"):
+                planned = list(await sftp_service.plan_dir_download(remote_path, local_path))
+        except Exception as e:
+            logger.exception(f"Failed to download DIR {remote_path}: {e}")
+            continue
+        run.add_dir(entry, remote_path, local_path, planned)
+    await asyncio.to_thread(run.record_empty_dirs)
+
+    if run.jobs:
+        settings = pipeline or PipelineSettings()
+        logger.info(f"Scheduling {len(run.jobs)} async download(s): {scheduler}; {settings}")
+        run.scheduled()
+        stages = run.pipeline(settings)
+        stages.start()
+        try:
+            # Tasks queue on the scheduler in priority order, so they start in that order too
+            tasks = [asyncio.ensure_future(attempt(job)) for job in scheduler.prioritize(run.jobs)]
+            for next_done in asyncio.as_completed(tasks):
+                job, result, error = await next_done
+                # submit() blocks while the first stage is full; wait for it off the event loop
+                await asyncio.to_thread(stages.submit, _Finished(job, result, error))
+            await asyncio.to_thread(run.record_run, scheduler.max_concurrent_transfers)
+        finally:
+            await asyncio.to_thread(stages.close)
 
 def download_from_remote(
     sftp: SFTPService,
@@ -359,13 +561,18 @@ def download_from_remote(
     parse_filenames: bool = True,
     use_llm: bool = True,
     llm_confidence_threshold: float = 0.7,
-) -> None:
+    incremental: bool = True,
+    scheduler: Optional[TransferScheduler] = None,
+    progress: Optional[JobProgress] = None,
+    pipeline: Optional[PipelineSettings] = None,
+) -> int:
     """
     Orchestrates remote file download:
-    - List and store files in sftp_temp_files
-    - Diff against downloaded_files
+    - Skip remote paths whose mtime matches their last settled snapshot (incremental mode)
+    - List remote files
+    - Diff against downloaded_files in batches (streaming; no sftp_temp_files staging)
     - Download missing files
-    - Record downloads
+    - Record downloads and snapshot fully processed remote paths
 
     Args:
         sftp (SFTPService): SFTP service instance.
@@ -373,21 +580,34 @@ def download_from_remote(
         remote_paths (List[str]): List of remote paths to process.
         incoming_path (str): Local incoming directory.
         dry_run (bool): If True, simulate actions without downloading or DB writes.
-        max_workers (int): Number of concurrent download threads for files.
+        max_workers (int): Number of concurrent downloads when no scheduler is given.
+        incremental (bool): Skip remote paths unchanged since their last snapshot.
+        scheduler (Optional[TransferScheduler]): Ordering and concurrency limits shared by every remote path.
+        progress (Optional[JobProgress]): Receives the current remote path, planned downloads and finished ones.
+        pipeline (Optional[PipelineSettings]): Worker counts and queue size for the post-download stages.
 
     Returns:
-        None
+        int: Number of files downloaded successfully.
     """
+    progress = progress or JobProgress()
     for remote_path in remote_paths:
         logger.info(f"Processing remote path: {remote_path}")
+        progress.set_stage(f"Processing {remote_path}")
+
+        # Step 0: Skip paths whose entries haven't changed since the last fully processed run
+        dir_mtime = None
+        if incremental:
+            unchanged, dir_mtime = remote_dir_unchanged(sftp, db, remote_path)
+            if unchanged:
+                logger.info(f"Remote path unchanged since last scan; skipping listing: {remote_path}")
+                continue
 
-        # Step 1: List files and populate sftp_temp_files
+        # Step 1: List files
         remote_files = list_remote_files(sftp, remote_path)
-        db.clear_sftp_temp_files()
-        db.insert_sftp_temp_files(remote_files)
 
         # Step 2: Diff against already downloaded files
-        diffs = db.get_sftp_diffs()
+        with get_metrics().time_stage("diff"):
+            diffs = list(iter_new_remote_entries(db, remote_files))
         logger.info(f"{len(diffs)} new file(s)/dir(s) to download.")
 
         # Step 3: Delegate to processor
@@ -403,8 +623,151 @@ def download_from_remote(
             parse_filenames=parse_filenames,
             use_llm=use_llm,
             llm_confidence_threshold=llm_confidence_threshold,
+            scheduler=scheduler,
+            progress=progress,
+            pipeline=pipeline,
         )
 
+        # Step 4: Remember the path's state once everything in it has been recorded
+        if incremental and not dry_run and dir_mtime is not None:
+            record_remote_dir_snapshot(sftp, db, remote_path, dir_mtime, remote_files)
+    return progress.files_done
+
+def plan_download_from_remote(
+    sftp: SFTPService,
+    db: DatabaseInterface,
+    remote_paths: List[str],
+    incoming_path: str,
+    incremental: bool = True,
+    workers: int = 4,
+    history_runs: int = DEFAULT_HISTORY_RUNS,
+) -> TransferPlan:
+    """
+    Work out what download_from_remote would fetch, without downloading or writing anything.
+
+    Remote paths are listed and diffed exactly as a real run would, and new directories are
+    walked with plan_dir_download (without creating local directories). Files are grouped by the
+    show name the regex parser finds in their filename (or their directory's name); the LLM is
+    not consulted.
+
+    Args:
+        sftp (SFTPService): SFTP service instance.
+        db (DatabaseInterface): Database interface.
+        remote_paths (List[str]): List of remote paths to plan.
+        incoming_path (str): Local incoming directory; its volume's free space is reported.
+        incremental (bool): Skip remote paths unchanged since their last snapshot.
+        workers (int): Concurrent transfers the run would use; history at this concurrency is preferred.
+        history_runs (int): Most recent transfer runs used for the throughput estimate.
+
+    Returns:
+        TransferPlan: Files, bytes, per-show breakdown, free space and estimated duration.
+    """
+    plan = TransferPlan(incoming_path=incoming_path, workers=workers)
+    for remote_path in remote_paths:
+        if incremental:
+            unchanged, _ = remote_dir_unchanged(sftp, db, remote_path)
+            if unchanged:
+                plan.skipped_paths.append(remote_path)
+                continue
+
+        remote_files = list_remote_files(sftp, remote_path)
+        for entry in iter_new_remote_entries(db, remote_files):
+            name = entry["name"]
+            entry_path = entry.get("remote_path") or entry.get("path")
+            if not entry["is_dir"]:
+                if is_valid_media_file(name):
+                    plan.add_file(_planned_show_name(name), int(entry.get("size") or 0))
+                continue
+            if not is_valid_directory(name):
+                continue
+            local_path = os.path.join(incoming_path, os.path.relpath(entry_path, remote_path))
+            try:
+                planned = sftp.plan_dir_download(entry_path, local_path, create_dirs=False)
+            except Exception as e:
+                logger.warning(f"Could not list DIR {entry_path} for the transfer plan: {e}")
+                continue
+            plan.directories += 1
+            dir_show = _planned_show_name(name)
+            for item in planned:
+                plan.add_file(_planned_show_name(item["name"], dir_show), int(item.get("size") or 0))
+
+    plan.free_bytes = free_space(incoming_path)
+    try:
+        plan.throughput = summarize_throughput(db.get_transfer_runs(history_runs))
+    except Exception as e:
+        logger.warning(f"Could not read transfer run history: {e}")
+    return plan
+
+
+def _planned_show_name(filename: str, fallback: Optional[str] = None) -> Optional[str]:
+    # Regex only; a confident pattern match wins over the enclosing directory's name
+    parsed = parse_filename(filename)
+    if fallback is not None and parsed.get("confidence", 0.0) < 0.6:
+        return fallback
+    return parsed.get("show_name") or fallback
+
+
+def remote_dir_unchanged(sftp_service: SFTPService, db: DatabaseInterface, remote_path: str) -> Tuple[bool, Optional[datetime.datetime]]:
+    """
+    Check a remote directory's mtime against its last settled snapshot.
+
+    Adding, removing or renaming an entry directly inside a directory updates its mtime, so a
+    matching mtime means the top-level listing (and therefore the diff) is the same as when the
+    snapshot was recorded.
+
+    Args:
+        sftp_service (SFTPService): SFTP service instance.
+        db (DatabaseInterface): Database interface.
+        remote_path (str): Remote directory to check.
+
+    Returns:
+        Tuple[bool, Optional[datetime.datetime]]: (unchanged, current mtime); the mtime is None
+        when it could not be determined, in which case the path is listed in full.
+    """
+    try:
+        mtime = sftp_service.stat_remote_dir(remote_path)["mtime"]
+        snapshot = db.get_remote_dir_snapshot(remote_path)
+    except Exception as e:
+        logger.debug(f"Incremental check unavailable for {remote_path}: {e}")
+        return False, None
+    if not isinstance(mtime, datetime.datetime):
+        return False, None
+    return bool(snapshot and snapshot.get("mtime") == mtime), mtime
+
+def record_remote_dir_snapshot(sftp_service: SFTPService, db: DatabaseInterface, remote_path: str,
+                               mtime: datetime.datetime, entries: List[Dict]) -> bool:
+    """
+    Snapshot a remote directory after its listing has been fully processed.
+
+    Nothing is recorded while entries from the listing are still missing from downloaded_files
+    (failed downloads), while any entry is younger than a minute (it may still be written and was
+    filtered out of the listing), or if the directory changed during processing.
+
+    Args:
+        sftp_service (SFTPService): SFTP service instance.
+        db (DatabaseInterface): Database interface.
+        remote_path (str): Remote directory that was processed.
+        mtime (datetime.datetime): Directory mtime observed before listing.
+        entries (List[Dict]): The listing that was processed.
+
+    Returns:
+        bool: True if a snapshot was recorded.
+    """
+    try:
+        pending = list(iter_new_remote_entries(db, entries))
+        if pending:
+            logger.info(f"{len(pending)} entr(y/ies) in {remote_path} not yet recorded; it will be listed again next run.")
+            return False
+        state = sftp_service.stat_remote_dir(remote_path, children=True)
+        if state["mtime"] != mtime or not state["settled"]:
+            logger.debug(f"{remote_path} changed or has recently modified entries; not snapshotting.")
+            return False
+        db.upsert_remote_dir_snapshot(remote_path, mtime, state["child_count"])
+        return True
+    except Exception as e:
+        logger.warning(f"Could not record listing snapshot for {remote_path}: {e}")
+        return False
+
 def list_remote_files(sftp_service: SFTPService, remote_path: str) -> List[Dict]:
     """
     List files in the given SFTP path with filtering rules applied.
@@ -422,8 +785,12 @@ def list_remote_files(sftp_service: SFTPService, remote_path: str) -> List[Dict]
         List[Dict]: List of filtered file metadata dictionaries.
     """
 
-    raw_files = sftp_service.list_remote_dir(remote_path)
+    with get_metrics().time_stage("list"):
+        raw_files = sftp_service.list_remote_dir(remote_path)
+    return filter_remote_listing(raw_files)
 
+def filter_remote_listing(raw_files: List[Dict]) -> List[Dict]:
+    """Apply list_remote_files' filters to entries returned by list_remote_dir (either SFTP backend)."""
     filtered = []
     now = datetime.datetime.now()
 
@@ -460,6 +827,100 @@ def list_remote_files(sftp_service: SFTPService, remote_path: str) -> List[Dict]
 
     return filtered
 
+async def download_from_remote_async(
+    sftp,
+    db: DatabaseInterface,
+    remote_paths: List[str],
+    incoming_path: str,
+    dry_run: bool = False,
+    max_workers: int = 4,
+    hashing_service: Optional[HashingService] = None,
+    parse_filenames: bool = True,
+    use_llm: bool = True,
+    llm_confidence_threshold: float = 0.7,
+    incremental: bool = True,
+    scheduler: Optional[TransferScheduler] = None,
+    progress: Optional[JobProgress] = None,
+    pipeline: Optional[PipelineSettings] = None,
+) -> int:
+    """
+    Coroutine version of download_from_remote for an AsyncSFTPService (``[sftp] backend = asyncssh``).
+
+    Same steps, arguments and snapshot rules as download_from_remote; all remote I/O is awaited and
+    database calls run in worker threads, so the event loop stays free for other requests while
+    files transfer.
+    """
+    progress = progress or JobProgress()
+    for remote_path in remote_paths:
+        logger.info(f"Processing remote path: {remote_path}")
+        progress.set_stage(f"Processing {remote_path}")
+
+        dir_mtime = None
+        if incremental:
+            unchanged, dir_mtime = await remote_dir_unchanged_async(sftp, db, remote_path)
+            if unchanged:
+                logger.info(f"Remote path unchanged since last scan; skipping listing: {remote_path}")
+                continue
+
+        with get_metrics().time_stage("list"):
+            raw_files = await sftp.list_remote_dir(remote_path)
+        remote_files = filter_remote_listing(raw_files)
+
+        with get_metrics().time_stage("diff"):
+            diffs = await asyncio.to_thread(lambda: list(iter_new_remote_entries(db, remote_files)))
+        logger.info(f"{len(diffs)} new file(s)/dir(s) to download.")
+
+        await process_sftp_diffs_async(
+            sftp_service=sftp,
+            db_service=db,
+            diffs=diffs,
+            remote_base=remote_path,
+            local_base=incoming_path,
+            dry_run=dry_run,
+            max_workers=max_workers,
+            hashing_service=hashing_service,
+            parse_filenames=parse_filenames,
+            use_llm=use_llm,
+            llm_confidence_threshold=llm_confidence_threshold,
+            scheduler=scheduler,
+            progress=progress,
+            pipeline=pipeline,
+        )
+
+        if incremental and not dry_run and dir_mtime is not None:
+            await record_remote_dir_snapshot_async(sftp, db, remote_path, dir_mtime, remote_files)
+    return progress.files_done
+
+async def remote_dir_unchanged_async(sftp_service, db: DatabaseInterface, remote_path: str) -> Tuple[bool, Optional[datetime.datetime]]:
+    """Coroutine version of remote_dir_unchanged for an AsyncSFTPService."""
+    try:
+        mtime = (await sftp_service.stat_remote_dir(remote_path))["mtime"]
+        snapshot = await asyncio.to_thread(db.get_remote_dir_snapshot, remote_path)
+    except Exception as e:
+        logger.debug(f"Incremental check unavailable for {remote_path}: {e}")
+        return False, None
+    if not isinstance(mtime, datetime.datetime):
+        return False, None
+    return bool(snapshot and snapshot.get("mtime") == mtime), mtime
+
+async def record_remote_dir_snapshot_async(sftp_service, db: DatabaseInterface, remote_path: str,
+                                           mtime: datetime.datetime, entries: List[Dict]) -> bool:
+    """Coroutine version of record_remote_dir_snapshot for an AsyncSFTPService."""
+    try:
+        pending = await asyncio.to_thread(lambda: list(iter_new_remote_entries(db, entries)))
+        if pending:
+            logger.info(f"{len(pending)} entr(y/ies) in {remote_path} not yet recorded; it will be listed again next run.")
+            return False
+        state = await sftp_service.stat_remote_dir(remote_path, children=True)
+        if state["mtime"] != mtime or not state["settled"]:
+            logger.debug(f"{remote_path} changed or has recently modified entries; not snapshotting.")
+            return False
+        await asyncio.to_thread(db.upsert_remote_dir_snapshot, remote_path, mtime, state["child_count"])
+        return True
+    except Exception as e:
+        logger.warning(f"Could not record listing snapshot for {remote_path}: {e}")
+        return False
+
 def bootstrap_downloaded_files(sftp: SFTPService, db: DatabaseInterface, remote_paths: List[str]) -> None:
     """
     Populate the `downloaded_files` table from the current remote SFTP listing.
@@ -480,4 +941,6 @@ def bootstrap_downloaded_files(sftp: SFTPService, db: DatabaseInterface, remote_
         db.clear_downloaded_files()
         db.insert_sftp_temp_files(files)
         db.copy_sftp_temp_to_downloaded()
-        logger.info(f"Bootstrapped {len(files)} entries into downloaded_files from remote path.")
\ No newline at end of file
+        # downloaded_files was rebuilt, so earlier listing snapshots no longer describe it
+        db.clear_remote_dir_snapshots()
+        logger.info(f"Bootstrapped {len(files)} entries into downloaded_files from remote path.")
\ No newline at end of file
@@ -4,11 +4,13 @@ Show adder utility for interactively adding shows to the database, with optional
 import os
 import click
 import logging
+from typing import Optional
 from models.show import Show
 from models.episode import Episode
 from services.db_implementations.db_interface import DatabaseInterface
 from services.tmdb_service import TMDBService
 from utils.file_filters import sanitize_filename
+from services.show_resolver import ShowResolver
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,8 @@ def add_show_interactively(
     llm_service=None,
     use_llm: bool = False,
     max_tmdb_results: int = 20,
-    llm_confidence: float = 0.7
+    llm_confidence: float = 0.7,
+    resolver: Optional[ShowResolver] = None
 ) -> dict:
     """
     Add a show interactively, optionally using LLM to select the best TMDB match.
@@ -40,6 +43,7 @@ def add_show_interactively(
         use_llm (bool): Whether to use LLM for show selection.
         max_tmdb_results (int): Max TMDB search results to consider for LLM selection.
         llm_confidence (float): Minimum confidence for LLM selection.
+        resolver (Optional[ShowResolver]): Cached show lookups for the already-exists checks.
 
     Returns:
         dict: Information about the added show (sys_path, tmdb_name, episode_count).
@@ -156,14 +160,15 @@ def add_show_interactively(
 
         # Check if the show already exists by multiple criteria
         # First check by the original show_name (before sanitization)
-        show_exists_by_name = db.show_exists(show_name)
+        shows = resolver or db
+        show_exists_by_name = shows.show_exists(show_name)
         # Then check by the sanitized sys_name
-        show_exists_by_sys_name = db.show_exists(sys_name)
+        show_exists_by_sys_name = shows.show_exists(sys_name)
         
         if show_exists_by_name or show_exists_by_sys_name:
             if not override_dir:
                 # Get the actual existing show name for better error reporting
-                existing_show = db.get_show_by_name_or_alias(show_name) or db.get_show_by_name_or_alias(sys_name)
+                existing_show = shows.get_show_by_name_or_alias(show_name) or shows.get_show_by_name_or_alias(sys_name)
                 existing_name = existing_show.get('tmdb_name', show_name) if existing_show else show_name
                 # Don't log this as an exception since it's not really an error
                 logger.info(f"Show already exists in DB: {existing_name}")
@@ -0,0 +1,173 @@
+"""
+Lightweight spans and profiling for the download pipeline.
+
+Spans time named stages of a run (list, diff, download, hash, parse, upsert) so a slow run can be
+attributed to the network, disk, LLM parsing or the database:
+
+    with get_tracer().span("hash"):
+        crc = hashing_service.calculate_crc32(path)
+
+Tracing is off by default; a disabled tracer hands out one shared no-op context manager, so spans
+cost a method call. TransferMetrics.time_stage opens a span for every stage it times. The CLI's
+``--profile`` option enables tracing for one command and prints format_summary() at the end, and
+``--profile-output`` additionally records a cProfile of the run with RunProfiler.
+"""
+import contextlib
+import cProfile
+import pstats
+import threading
+import time
+from dataclasses import dataclass
+from typing import ContextManager, Dict, List, Optional
+
+_NOOP = contextlib.nullcontext()
+
+
+@dataclass
+class SpanStats:
+    """Aggregated timings of every span with one name."""
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: "Tracer", name: str) -> None:
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.tracer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Tracer:
+    """
+    Collects span timings by name, from any thread.
+
+    Methods:
+        span(name): Context manager timing its block under ``name`` (no-op when disabled).
+        record(name, seconds): Add one timing directly.
+        stats(): Return SpanStats per span name.
+        format_summary(wall_seconds): Render the stats as a table.
+        reset(): Forget collected timings.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, SpanStats] = {}
+
+    def span(self, name: str) -> ContextManager:
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = SpanStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+
+    def stats(self) -> Dict[str, SpanStats]:
+        with self._lock:
+            return {name: SpanStats(s.count, s.total, s.max) for name, s in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def format_summary(self, wall_seconds: Optional[float] = None) -> str:
+        """
+        Render one row per span name, slowest total first.
+
+        ``% wall`` compares a stage's summed time with the run's wall-clock time; stages that run
+        on several workers at once can exceed 100%.
+        """
+        stats = sorted(self.stats().items(), key=lambda item: item[1].total, reverse=True)
+        if not stats:
+            return "No spans recorded."
+        header = f"{'stage':<12} {'calls':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10}"
+        if wall_seconds:
+            header += f" {'% wall':>8}"
+        lines: List[str] = [header, "-" * len(header)]
+        for name, s in stats:
+            row = f"{name:<12} {s.count:>7} {s.total:>10.3f} {s.mean * 1000:>10.1f} {s.max * 1000:>10.1f}"
+            if wall_seconds:
+                row += f" {100 * s.total / wall_seconds:>7.1f}%"
+            lines.append(row)
+        if wall_seconds:
+            lines.append(f"Wall time: {wall_seconds:.3f}s")
+        return "\n".join(lines)
+
+
+class RunProfiler:
+    """
+    cProfile for a whole run, including worker threads started while it is active.
+
+    Downloads run on a thread pool, so profiling only the calling thread would miss them. Each
+    new thread gets its own cProfile.Profile (via threading.setprofile); dump() merges them.
+    Where the interpreter allows only one active profiler (sys.monitoring based cProfile), that
+    one already sees every thread and per-thread profiles are skipped.
+    """
+
+    def __init__(self) -> None:
+        self._main: Optional[cProfile.Profile] = None
+        self._threads: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def _start_thread_profile(self, frame, event, arg) -> None:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return
+        with self._lock:
+            self._threads.append(profile)
+
+    def start(self) -> None:
+        self._main = cProfile.Profile()
+        self._main.enable()
+        threading.setprofile(self._start_thread_profile)
+
+    def stop(self) -> None:
+        threading.setprofile(None)
+        if self._main is not None:
+            self._main.disable()
+
+    def dump(self, path: str) -> pstats.Stats:
+        """Write the merged profile to ``path`` (load with pstats or snakeviz) and return it."""
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            for profile in self._threads:
+                profile.create_stats()
+                if profile.stats:
+                    stats.add(profile)
+        stats.dump_stats(path)
+        return stats
+
+
+_default_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    return _default_tracer
+
+
+def span(name: str) -> ContextManager:
+    """Time a block under ``name`` on the process-wide tracer."""
+    return _default_tracer.span(name)